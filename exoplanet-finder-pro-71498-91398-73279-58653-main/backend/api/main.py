@@ -1,12 +1,13 @@
 from __future__ import annotations
 
+import atexit
 import io
 import json
 import logging
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 import csv
-import math
 import os
+import threading
 import time
 import hmac
 import hashlib
@@ -15,142 +16,249 @@ import base64
 import joblib
 import numpy as np
 import pandas as pd
-from fastapi import FastAPI, File, HTTPException, UploadFile, Body, Depends
+from fastapi import FastAPI, File, HTTPException, UploadFile, Body, Depends, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from pathlib import Path
 from pydantic import BaseModel
-from src.dataset_adapter import adapt_to_canonical, detect_dataset_type
+from src.catalog import LOOKUP_FIELDS, CatalogManager
+from src.catalog_query import QueryError
+from src.sky_index import find_coordinate_columns
+from src.data_cleaning import clean_k2_frame, clean_kepler_frame, clean_toi_frame
+from src.dataset_adapter import adapt_to_canonical, detect_dataset_type, plan_cache_info
+from src.drift import DriftMonitor
+from src.habitability import compute_habitability_for_row
+from src.incremental_training import MissingTrainingStore, reset_store, train_incremental
+from src.instrumentation import METRICS_ENABLED, REGISTRY, begin_request, end_request, server_timing, stage
+from src.model_backend import backend_name, resolve_backend
+from src.parallel_csv import read_csv_parallel
 from src.preprocessing import apply_inference_preprocessing, compute_preprocessor_config
-from src.train_model import train_model as train_model_kepler
-from src.train_model_k2 import train_model_k2
+from src.profiling import DEFAULT_INTERVAL_MS, MAX_REQUESTS, PROFILER, profile_thread, render_flamegraph
+from src.tabular_formats import UnsupportedFormat, detect_table_format, read_table
+from src.train_model import train_model_frame as train_model_kepler_frame
+from src.train_model_k2 import train_model_k2_frame
+from src.train_model_toi import train_model_toi_frame
+from src.tree_shap import SHAP_MAX_ROWS, ShapCache, explain_rows, make_explainer
+from src.uploads import UPLOAD_MAX_BYTES, UPLOAD_MAX_DECOMPRESSED_BYTES, NullStrippingReader, SpooledUpload, UnsupportedCompression, UploadTooLarge, spool_upload
 
 
 logger = logging.getLogger("exodetect.api")
 logging.basicConfig(level=logging.INFO)
 
+REQUESTS_TOTAL = REGISTRY.counter("exodetect_requests_total", "Requêtes HTTP traitées", ("path", "method", "status"))
+REQUEST_SECONDS = REGISTRY.histogram("exodetect_request_seconds", "Durée totale des requêtes HTTP", ("path",))
+CSV_PARSE_TOTAL = REGISTRY.counter(
+    "exodetect_csv_parse_total",
+    "Parsings CSV par nombre de tentatives (0 = lecture parallèle, 1 = sniffer direct, plus = stratégies de repli)",
+    ("depth", "outcome"),
+)
+HEURISTIC_FALLBACKS_TOTAL = REGISTRY.counter(
+    "exodetect_heuristic_fallbacks_total",
+    "Réponses heuristiques (unparsed: CSV illisible, model: modèle absent ou en échec)",
+    ("reason",),
+)
+BINARY_INGEST_TOTAL = REGISTRY.counter(
+    "exodetect_binary_ingest_total",
+    "Uploads binaires (parquet, arrow, npz, npy) lus sans parsing CSV",
+    ("format", "outcome"),
+)
+ROWS_TOTAL = REGISTRY.counter("exodetect_rows_total", "Lignes avant (in) et après (out) préprocessing", ("model", "direction"))
+CLIP_TOTAL = REGISTRY.counter(
+    "exodetect_clip_total",
+    "Valeurs servies hors des bornes de clipping d'entraînement (low: < clip_min, high: > clip_max)",
+    ("model", "feature", "side"),
+)
+
+
+def _load_json(path: Path, label: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cfg = json.load(f)
+        logger.info("%s loaded", label)
+        return cfg
+    except Exception as e:
+        logger.warning("%s not loaded: %s", label, e)
+        return None
 
-def _load_models() -> Tuple[Optional[Any], Optional[Any], Optional[Dict[str, Any]]]:
+
+def _load_models() -> Tuple[Optional[Any], Optional[Any], Optional[Dict[str, Any]], Optional[Any], Optional[Dict[str, Any]]]:
     base_dir = Path(__file__).resolve().parents[1]  # .../backend
     models_dir = base_dir / "models"
     model_path = models_dir / "model.joblib"
     model_k2_path = models_dir / "model_k2.joblib"
+    model_toi_path = models_dir / "model_toi.joblib"
     preproc_path = models_dir / "preprocessor_config.json"
     try:
         model = joblib.load(str(model_path))
-        logger.info("Model loaded: %s", model_path)
+        logger.info("Model loaded: %s (backend=%s)", model_path, backend_name(model))
     except Exception as e:
         logger.warning("Model not loaded: %s", e)
         model = None
 
     try:
         model_k2 = joblib.load(str(model_k2_path))
-        logger.info("Model K2 loaded: %s", model_k2_path)
+        logger.info("Model K2 loaded: %s (backend=%s)", model_k2_path, backend_name(model_k2))
     except Exception as e:
         logger.warning("Model K2 not loaded: %s", e)
         model_k2 = None
 
-    preproc_cfg: Optional[Dict[str, Any]] = None
     try:
-        with open(preproc_path, "r", encoding="utf-8") as f:
-            preproc_cfg = json.load(f)
-        logger.info("Preprocessor config loaded")
+        model_toi = joblib.load(str(model_toi_path))
+        logger.info("Model TOI loaded: %s (backend=%s)", model_toi_path, backend_name(model_toi))
     except Exception as e:
-        logger.warning("Preprocessor config not loaded: %s", e)
+        logger.warning("Model TOI not loaded: %s", e)
+        model_toi = None
+
+    preproc_cfg = _load_json(preproc_path, "Preprocessor config")
+    preproc_cfg_toi = _load_json(models_dir / "preprocessor_toi.json", "Preprocessor config TOI")
+
+    return model, model_k2, preproc_cfg, model_toi, preproc_cfg_toi
+
+
+# Octets parcourus au plus pour constituer l'échantillon du Sniffer (préambule '#' compris)
+SNIFF_SCAN_BYTES = 1 << 20
 
-    return model, model_k2, preproc_cfg
+
+def _read_uploaded_csv(source: Union[bytes, SpooledUpload]) -> pd.DataFrame:
+    upload = SpooledUpload.from_bytes(source) if isinstance(source, (bytes, bytearray)) else source
+    try:
+        # Parquet / Arrow IPC / npz / npy: lecture colonne directe, sans la cascade CSV
+        fmt = detect_table_format(upload)
+        if fmt is not None:
+            return _read_binary_table(upload, fmt)
+        return _read_csv_counted(upload)
+    finally:
+        if upload is not source:
+            upload.close()
+
+
+def _read_binary_table(upload: SpooledUpload, fmt: str) -> pd.DataFrame:
+    outcome = "error"
+    try:
+        with stage("parse"):
+            df = read_table(upload, fmt)
+        outcome = "ok"
+        return df
+    except UnsupportedFormat as e:
+        outcome = "unsupported"
+        raise HTTPException(status_code=415, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Fichier {fmt} invalide: {e}")
+    finally:
+        BINARY_INGEST_TOTAL.inc(format=fmt, outcome=outcome)
 
 
-def _read_uploaded_csv(file_bytes: bytes) -> pd.DataFrame:
+def _read_csv_counted(upload: SpooledUpload) -> pd.DataFrame:
+    # Compte les appels à read_csv: profondeur atteinte dans la cascade de stratégies
+    attempts = [0]
+
+    def read_csv(*args: Any, **kwargs: Any) -> pd.DataFrame:
+        attempts[0] += 1
+        return pd.read_csv(*args, **kwargs)
+
+    outcome = "error"
+    try:
+        with stage("parse"):
+            df = _parse_uploaded_csv(upload, read_csv)
+        outcome = "ok"
+        return df
+    finally:
+        CSV_PARSE_TOTAL.inc(depth=str(attempts[0]), outcome=outcome)
+
+
+def _parse_uploaded_csv(upload: SpooledUpload, read_csv: Any = pd.read_csv) -> pd.DataFrame:
+    # Chaque tentative relit le fichier spoolé via un nouveau flux: pas de copie complète
+    # en mémoire (ni bytes nettoyés, ni chaîne décodée)
     # Nettoyage basique: supprimer les null bytes qui cassent certains parseurs
-    if b"\x00" in file_bytes:
-        file_bytes = file_bytes.replace(b"\x00", b"")
+    # (upload compressé: décompressé à la volée par upload.stream(), filtré sans pré-scan)
+    has_nul = upload.compression is not None or upload.view().find(b"\x00") >= 0
+
+    def binary() -> Any:
+        stream = upload.stream()
+        return io.BufferedReader(NullStrippingReader(stream)) if has_nul else stream
+
+    def text(encoding: str) -> Any:
+        return io.TextIOWrapper(binary(), encoding=encoding, errors="ignore")
+
+    def attempt(open_handle: Any, **kwargs: Any) -> pd.DataFrame:
+        with open_handle() as handle:
+            return read_csv(handle, comment="#", engine="python", on_bad_lines="skip", header=0, **kwargs)
 
     # Tentative 0: Sniffer pour détecter séparateur/quotechar
     try:
-        sample_txt = file_bytes[:10000].decode("utf-8", errors="ignore")
+        # Échantillon sans les lignes '#': le préambule des exports NEA fait échouer le Sniffer
+        with binary() as f:
+            kept: List[bytes] = []
+            kept_bytes = scanned = 0
+            while kept_bytes < 10000 and scanned < SNIFF_SCAN_BYTES:
+                line = f.readline(65536)
+                if not line:
+                    break
+                scanned += len(line)
+                if not line.lstrip().startswith(b"#"):
+                    kept.append(line)
+                    kept_bytes += len(line)
+            sample_txt = b"".join(kept)[:10000].decode("utf-8", errors="ignore")
         dialect = csv.Sniffer().sniff(sample_txt, delimiters=[",", ";", "\t", "|"])
         sniff_sep = getattr(dialect, "delimiter", None) or ","
         sniff_quote = getattr(dialect, "quotechar", '"')
-        return pd.read_csv(
-            io.BytesIO(file_bytes),
-            comment="#",
-            sep=sniff_sep,
-            engine="python",
-            on_bad_lines="skip",
-            quotechar=sniff_quote,
-            header=0,
-        )
     except Exception:
-        pass
+        sniff_sep = None
+    if sniff_sep is not None:
+        # Chemin rapide: moteur C, fichier spoolé lu par mmap. Mémoire de l'ordre du DataFrame final
+        # (le moteur python matérialise chaque ligne en listes de str); round_trip donne les mêmes
+        # flottants que le moteur python
+        try:
+            source = upload.path if upload.path is not None and not has_nul else None
+            if source is not None:
+                # Très gros fichier sur disque: plages d'octets parsées en parallèle (None si non applicable)
+                df = read_csv_parallel(source, sep=sniff_sep, quotechar=sniff_quote)
+                if df is not None:
+                    return df
+                return read_csv(source, comment="#", sep=sniff_sep, quotechar=sniff_quote, engine="c", on_bad_lines="skip",
+                                header=0, float_precision="round_trip", memory_map=True)
+            with binary() as handle:
+                return read_csv(handle, comment="#", sep=sniff_sep, quotechar=sniff_quote, engine="c", on_bad_lines="skip",
+                                header=0, float_precision="round_trip")
+        except Exception:
+            pass
+        try:
+            return attempt(binary, sep=sniff_sep, quotechar=sniff_quote)
+        except Exception:
+            pass
 
     # Try bytes -> pandas with various strategies
     # Strategy 1: direct bytes with pandas (fast path)
     try:
         # sep=None -> inference du séparateur ("," ";" etc.) via l'engine python
-        return pd.read_csv(
-            io.BytesIO(file_bytes),
-            comment="#",
-            sep=None,
-            engine="python",
-            on_bad_lines="skip",
-            header=0,
-        )
+        return attempt(binary, sep=None)
     except Exception:
         pass
 
     # Strategy 2: decode as UTF-8
     try:
-        return pd.read_csv(
-            io.StringIO(file_bytes.decode("utf-8", errors="ignore")),
-            comment="#",
-            sep=None,
-            engine="python",
-            on_bad_lines="skip",
-            header=0,
-        )
+        return attempt(lambda: text("utf-8"), sep=None)
     except Exception:
         pass
 
     # Strategy 3: decode as latin-1
     try:
-        return pd.read_csv(
-            io.StringIO(file_bytes.decode("latin-1", errors="ignore")),
-            comment="#",
-            sep=None,
-            engine="python",
-            on_bad_lines="skip",
-            header=0,
-        )
+        return attempt(lambda: text("latin-1"), sep=None)
     except Exception:
         pass
 
     # Strategy 4: delimiter fallback over common separators
     for sep in [",", ";", "\t", "|"]:
         try:
-            return pd.read_csv(
-                io.StringIO(file_bytes.decode("utf-8", errors="ignore")),
-                comment="#",
-                sep=sep,
-                engine="python",
-                on_bad_lines="skip",
-                header=0,
-            )
+            return attempt(lambda: text("utf-8"), sep=sep)
         except Exception:
             continue
 
     # Strategy 5: ignorer tout quoting (données très mal quotées)
     for sep in [",", ";", "\t", "|"]:
         try:
-            return pd.read_csv(
-                io.StringIO(file_bytes.decode("utf-8", errors="ignore")),
-                comment="#",
-                sep=sep,
-                engine="python",
-                on_bad_lines="skip",
-                quoting=csv.QUOTE_NONE,
-                escapechar="\\",
-                header=0,
-            )
+            return attempt(lambda: text("utf-8"), sep=sep, quoting=csv.QUOTE_NONE, escapechar="\\")
         except Exception:
             continue
 
@@ -158,30 +266,20 @@ def _read_uploaded_csv(file_bytes: bytes) -> pd.DataFrame:
     for enc in ["utf-8-sig", "utf-16", "utf-16le", "utf-16be"]:
         for sep in [None, ",", ";", "\t", "|"]:
             try:
-                return pd.read_csv(
-                    io.StringIO(file_bytes.decode(enc, errors="ignore")),
-                    comment="#",
-                    sep=sep,
-                    engine="python",
-                    on_bad_lines="skip",
-                    header=0,
-                )
+                return attempt(lambda: text(enc), sep=sep)
             except Exception:
                 continue
 
     # Strategy 7: fallback whitespace-delimited
     try:
-        return pd.read_csv(
-            io.StringIO(file_bytes.decode("utf-8", errors="ignore")),
-            comment="#",
-            delim_whitespace=True,
-            engine="python",
-            on_bad_lines="skip",
-            header=0,
-        )
+        return attempt(lambda: text("utf-8"), delim_whitespace=True)
     except Exception:
         pass
 
+    if upload.too_large:
+        raise HTTPException(status_code=413, detail=f"Fichier décompressé trop volumineux (limite: {UPLOAD_MAX_DECOMPRESSED_BYTES} octets)")
+    if upload.compression is not None:
+        raise HTTPException(status_code=400, detail=f"Fichier {upload.compression} invalide: impossible de décompresser ou de parser le contenu")
     raise HTTPException(status_code=400, detail="CSV invalide: impossible de parser le contenu (séparateur/quotage)")
 
 
@@ -224,20 +322,24 @@ def _extract_time_flux(df: pd.DataFrame) -> Tuple[Optional[np.ndarray], Optional
 
     if t_col is not None:
         try:
-            time_values = pd.to_numeric(df[t_col], errors="coerce").dropna().to_numpy()
+            time_values = pd.to_numeric(df[t_col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
         except Exception:
             time_values = None
 
     if f_col is not None:
         try:
-            flux_values = pd.to_numeric(df[f_col], errors="coerce").dropna().to_numpy()
+            flux_values = pd.to_numeric(df[f_col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
         except Exception:
             flux_values = None
 
     if time_values is not None and flux_values is not None:
-        n = min(len(time_values), len(flux_values), 3000)
-        time_values = time_values[:n]
-        flux_values = flux_values[:n]
+        # Masque commun: les paires (temps, flux) restent alignées quand les trous diffèrent
+        valid = np.isfinite(time_values) & np.isfinite(flux_values)
+        time_values = time_values[valid][:3000]
+        flux_values = flux_values[valid][:3000]
+    else:
+        time_values = time_values[np.isfinite(time_values)] if time_values is not None else None
+        flux_values = flux_values[np.isfinite(flux_values)] if flux_values is not None else None
 
     return time_values, flux_values
 
@@ -254,7 +356,17 @@ def _simple_classification(time_values: Optional[np.ndarray], flux_values: Optio
     return status, round(confidence, 4)
 
 
-app = FastAPI(title="ExoDetect AI Backend", version="1.0.0")
+class TimedJSONResponse(JSONResponse):
+    # Sérialisation JSON chronométrée (étape "encode")
+    def render(self, content: Any) -> bytes:
+        with stage("encode"):
+            return super().render(content)
+
+
+# Marge pour l'enveloppe multipart (boundaries, en-têtes de partie) autour du fichier
+UPLOAD_ENVELOPE_BYTES = 64 * 1024
+
+app = FastAPI(title="ExoDetect AI Backend", version="1.0.0", default_response_class=TimedJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -270,7 +382,107 @@ app.add_middleware(
 )
 
 
-MODEL_KEPLER, MODEL_K2, PREPROC_CFG_KEPLER = _load_models()
+class UploadSizeLimit:
+    """
+    Middleware ASGI: refus immédiat quand Content-Length dépasse déjà la limite, sinon les octets
+    du corps sont comptés à la réception (corps chunked ou Content-Length mensonger) et la lecture
+    est interrompue par une 413 dès que la limite est franchie, sans attendre que Starlette ait
+    spoolé tout le corps. La limite exacte sur le fichier est appliquée pendant la copie (_read_upload).
+    """
+
+    def __init__(self, app: Any, max_bytes: int = UPLOAD_MAX_BYTES) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+        self.max_body = max_bytes + UPLOAD_ENVELOPE_BYTES
+
+    def _too_large(self) -> HTTPException:
+        return HTTPException(status_code=413, detail=f"Fichier trop volumineux (limite: {self.max_bytes} octets)")
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        try:
+            content_length = int(headers.get(b"content-length") or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > self.max_body:
+            error = self._too_large()
+            await JSONResponse(status_code=error.status_code, content={"detail": error.detail})(scope, receive, send)
+            return
+        received = 0
+
+        async def limited_receive() -> Dict[str, Any]:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    # Remonte jusqu'au gestionnaire d'HTTPException de FastAPI (réponse 413)
+                    raise self._too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+app.add_middleware(UploadSizeLimit, max_bytes=UPLOAD_MAX_BYTES)
+
+
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next: Any) -> Any:
+    # Compteur + histogramme par route, et en-tête Server-Timing avec le détail des étapes
+    if not METRICS_ENABLED:
+        return await call_next(request)
+    timings, token = begin_request()
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - t0
+        end_request(token)
+        route = request.scope.get("route")
+        path = getattr(route, "path", None) or "unmatched"
+        REQUESTS_TOTAL.inc(path=path, method=request.method, status=str(status))
+        REQUEST_SECONDS.observe(elapsed, path=path)
+    header = server_timing(timings)
+    response.headers["Server-Timing"] = f"{header}, total;dur={elapsed * 1000.0:.2f}" if header else f"total;dur={elapsed * 1000.0:.2f}"
+    return response
+
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next: Any) -> Any:
+    # Profilage à la demande (voir /admin/profile/start): sans session active, un seul test
+    try:
+        content_length = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        content_length = 0
+    session = PROFILER.claim(request.url.path, content_length)
+    if session is None:
+        return await call_next(request)
+    token = session.enter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        session.exit(token, request.url.path, status)
+
+
+MODEL_KEPLER, MODEL_K2, PREPROC_CFG_KEPLER, MODEL_TOI, PREPROC_CFG_TOI = _load_models()
+
+
+def _reload_models() -> None:
+    # Après un entraînement admin, servir immédiatement les nouveaux modèles
+    global MODEL_KEPLER, MODEL_K2, PREPROC_CFG_KEPLER, MODEL_TOI, PREPROC_CFG_TOI, MODEL_REGISTRY
+    MODEL_KEPLER, MODEL_K2, PREPROC_CFG_KEPLER, MODEL_TOI, PREPROC_CFG_TOI = _load_models()
+    MODEL_REGISTRY = _build_registry()
+    if CATALOG_AUTOBUILD:
+        CATALOG.ensure(MODEL_REGISTRY)
+
 
 KEPLER_FEATURES: List[str] = [
     "koi_period",
@@ -284,6 +496,105 @@ K2_FEATURES: List[str] = [
     "koi_prad",
 ]
 
+# Le modèle TOI (TESS) reprend les features Kepler avec son propre préprocesseur
+TOI_FEATURES: List[str] = list(KEPLER_FEATURES)
+
+
+MODEL_FILES: Dict[str, str] = {
+    "kepler": "model.joblib",
+    "k2": "model_k2.joblib",
+    "toi": "model_toi.joblib",
+}
+
+
+def _model_version(path: Path) -> Optional[str]:
+    # Empreinte du fichier modèle: change à chaque réentraînement
+    try:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        return h.hexdigest()[:16]
+    except OSError:
+        return None
+
+
+def _explanation_artifacts(model_obj: Optional[Any], features: List[str], base_cfg: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Métadonnées d'explication calculées une fois par version de modèle:
+    importances (feature_importances_ d'une forêt est réagrégé sur tous les arbres à chaque accès),
+    médianes et amplitudes de clipping du préprocesseur, alignées sur l'ordre des features.
+    """
+    n = len(features)
+    importances = np.ones(n, dtype=np.float64)
+    try:
+        raw = np.asarray(getattr(model_obj, "feature_importances_"), dtype=np.float64).ravel()
+        k = min(n, raw.shape[0])
+        importances[:k] = raw[:k]
+    except Exception:
+        pass
+
+    has_stats = bool(base_cfg and "stats" in base_cfg)
+    stats = base_cfg.get("stats", {}) if has_stats else {}
+    medians = np.array([float(stats.get(f, {}).get("median", 0.0)) for f in features], dtype=np.float64)
+    clip_min = np.array([float(stats.get(f, {}).get("clip_min", 1.0)) for f in features], dtype=np.float64)
+    clip_max = np.array([float(stats.get(f, {}).get("clip_max", 1.0)) for f in features], dtype=np.float64)
+    return {
+        "has_stats": has_stats,
+        "importances": importances,
+        "medians": medians,
+        "ranges": np.maximum(clip_max - clip_min, 1e-9),
+    }
+
+
+def _build_registry() -> Dict[str, Dict[str, Any]]:
+    # Modèles servis: objet chargé, features attendues, config de préprocessing,
+    # version (empreinte du fichier) et artefacts d'explication précalculés
+    models_dir = Path(__file__).resolve().parents[1] / "models"
+    registry: Dict[str, Dict[str, Any]] = {
+        "kepler": {"model": MODEL_KEPLER, "features": KEPLER_FEATURES, "cfg": PREPROC_CFG_KEPLER},
+        "k2": {"model": MODEL_K2, "features": K2_FEATURES, "cfg": PREPROC_CFG_KEPLER},
+        "toi": {"model": MODEL_TOI, "features": TOI_FEATURES, "cfg": PREPROC_CFG_TOI or PREPROC_CFG_KEPLER},
+    }
+    previous: Dict[str, Dict[str, Any]] = globals().get("MODEL_REGISTRY") or {}
+    for name, entry in registry.items():
+        loaded = entry["model"] is not None
+        entry["version"] = _model_version(models_dir / MODEL_FILES[name]) if loaded else None
+        entry["explain"] = _explanation_artifacts(entry["model"], entry["features"], entry["cfg"]) if loaded else None
+        # Explainer TreeSHAP (~1-2 s, dizaines de Mo) construit à la première demande, une seule
+        # fois par version de modèle: conservé au rechargement si la version n'a pas changé
+        old = previous.get(name)
+        keep = old is not None and loaded and old["version"] == entry["version"]
+        entry["shap"] = old["shap"] if keep else None
+        entry["shap_lock"] = old["shap_lock"] if keep else threading.Lock()
+    return registry
+
+
+MODEL_REGISTRY: Dict[str, Dict[str, Any]] = _build_registry()
+
+# Scores + habitabilité précalculés des catalogues NEA fournis (GET /catalog/lookup).
+# Reconstruits en arrière-plan quand une version de modèle ou un export change.
+CATALOG_AUTOBUILD = os.environ.get("EXODETECT_CATALOG_AUTOBUILD", "1").strip().lower() not in ("0", "false", "no")
+CATALOG = CatalogManager(
+    store_dir=os.environ.get("EXODETECT_CATALOG_PATH") or str(Path(__file__).resolve().parents[1] / "models" / "catalog_store"),
+    source_dir=os.environ.get("EXODETECT_CATALOG_DIR") or str(Path(__file__).resolve().parents[1]),
+)
+if CATALOG_AUTOBUILD:
+    CATALOG.ensure(MODEL_REGISTRY)
+
+# Modèle dédié par catalogue détecté (les autres catalogues passent par Kepler)
+CATALOG_MODELS: Dict[str, str] = {
+    "TESS": "toi",
+    "K2": "k2",
+}
+
+LABEL_ORDER: List[int] = [-1, 0, 1]
+STATUS_BY_LABEL: Dict[int, str] = {
+    1: "Exoplanète",
+    0: "Candidat",
+    -1: "Faux positif",
+}
+
 
 def _build_config_for_features(source_df: pd.DataFrame, base_cfg: Optional[Dict[str, Any]], features: List[str]) -> Dict[str, Any]:
     # If base config has stats for desired features, subset it
@@ -335,317 +646,717 @@ def _prepare_features(canonical_df: pd.DataFrame, features: List[str], base_cfg:
     return feats_df, info
 
 
-def _build_feature_explanation(
-    features_df: pd.DataFrame,
-    features: List[str],
-    base_cfg: Optional[Dict[str, Any]],
-    model_obj: Optional[Any],
-) -> Dict[str, Any]:
-    explanation: Dict[str, Any] = {"top_features": []}
-
-    # Feature importances when available (e.g., RandomForest)
-    importances: Optional[List[float]] = None
-    if hasattr(model_obj, "feature_importances_"):
-        try:
-            importances = list(getattr(model_obj, "feature_importances_"))
-        except Exception:
-            importances = None
-
-    # Compute normalized deltas vs median from preprocessing stats
-    deltas: Dict[str, float] = {}
-    if base_cfg and "stats" in base_cfg:
-        stats = base_cfg.get("stats", {})
-        means = features_df[features].mean(numeric_only=True)
-        for i, f in enumerate(features):
-            median = float(stats.get(f, {}).get("median", 0.0))
-            clip_min = float(stats.get(f, {}).get("clip_min", 1.0))
-            clip_max = float(stats.get(f, {}).get("clip_max", 1.0))
-            rng = max(clip_max - clip_min, 1e-9)
-            val = float(means.get(f, median))
-            deltas[f] = (val - median) / rng
-
-    # Aggregate contributions = |delta| * importance (if available), else |delta|
-    contributions: List[Tuple[str, float, float]] = []  # (feature, contrib, signed_delta)
-    for i, f in enumerate(features):
-        delta = deltas.get(f, 0.0)
-        weight = importances[i] if (importances is not None and i < len(importances)) else 1.0
-        contributions.append((f, abs(delta) * float(weight), delta))
+def _build_feature_explanation(features_df: pd.DataFrame, entry: Dict[str, Any]) -> Dict[str, Any]:
+    # Contributions = |écart normalisé de la moyenne du lot à la médiane| * importance,
+    # à partir des artefacts précalculés du modèle (voir _explanation_artifacts)
+    explain = entry["explain"]
+    features = entry["features"]
+    if explain["has_stats"]:
+        means = features_df[features].to_numpy(dtype=np.float64).mean(axis=0)
+        deltas = (means - explain["medians"]) / explain["ranges"]
+    else:
+        deltas = np.zeros(len(features), dtype=np.float64)
+    contributions = np.abs(deltas) * explain["importances"]
 
     # Top 3 features by contribution
-    contributions.sort(key=lambda x: x[1], reverse=True)
-    top = contributions[:3]
-    for f, contrib, delta in top:
+    top: List[Dict[str, Any]] = []
+    for i in np.argsort(-contributions, kind="stable")[:3]:
+        delta = float(deltas[i])
         direction = "au-dessus" if delta > 0 else ("en-dessous" if delta < 0 else "proche de")
-        explanation["top_features"].append({
-            "feature": f,
-            "influence": round(contrib, 4),
+        top.append({
+            "feature": features[i],
+            "influence": round(float(contributions[i]), 4),
             "direction": direction,
         })
+    return {"top_features": top}
+
+
+def _select_models(dataset_type: str, canonical_df: pd.DataFrame, requested: Optional[List[str]] = None) -> List[str]:
+    """
+    Choix des modèles pour une requête: liste explicite, "all" (tous les modèles chargés),
+    ou routage automatique par catalogue détecté puis par colonnes disponibles.
+    """
+    loaded = [name for name, entry in MODEL_REGISTRY.items() if entry["model"] is not None]
+    if requested and requested != ["all"]:
+        return list(requested)
+
+    primary = CATALOG_MODELS.get(dataset_type, "kepler")
+    if primary not in loaded:
+        primary = "kepler"
+    # Si les features du modèle retenu manquent mais qu'un autre modèle est couvert
+    # (ex: K2 minimal period/prad), préférer le modèle couvert le plus riche
+    present = {c for c in canonical_df.columns if canonical_df[c].notna().any()}
+    covered = [n for n in loaded if all(f in present for f in MODEL_REGISTRY[n]["features"])]
+    if primary not in covered and covered:
+        primary = max(covered, key=lambda n: len(MODEL_REGISTRY[n]["features"]))
+    if requested == ["all"]:
+        # Tous les modèles chargés, le modèle routé en premier
+        return [primary] + [n for n in loaded if n != primary]
+    return [primary]
+
+
+SHAP_CACHE = ShapCache()
+
+REGISTRY.gauge("exodetect_shap_cache_hits", "Lignes TreeSHAP servies par le cache", lambda: SHAP_CACHE.hits)
+REGISTRY.gauge("exodetect_shap_cache_misses", "Lignes TreeSHAP calculées", lambda: SHAP_CACHE.misses)
+REGISTRY.gauge("exodetect_shap_cache_size", "Lignes TreeSHAP en cache", lambda: len(SHAP_CACHE))
+REGISTRY.gauge("exodetect_schema_plan_cache_hits", "Plans de résolution de schéma réutilisés", lambda: plan_cache_info().hits)
+REGISTRY.gauge("exodetect_schema_plan_cache_misses", "Plans de résolution de schéma compilés", lambda: plan_cache_info().misses)
+
+
+def _row_explanations(entry: Dict[str, Any], features_df: pd.DataFrame, proba: np.ndarray, max_rows: int) -> Dict[str, Any]:
+    """
+    Contributions TreeSHAP par ligne (forêt: en probabilité, XGBoost: en log-odds) vers la classe
+    prédite de chaque ligne, pour au plus max_rows lignes. Cache LRU par (version du modèle, ligne).
+    """
+    if entry["shap"] is None:
+        # Requêtes concurrentes: un seul thread construit l'explainer, les autres l'attendent
+        with entry["shap_lock"]:
+            if entry["shap"] is None:
+                entry["shap"] = make_explainer(entry["model"])
+    explainer = entry["shap"]
+    if explainer is None:
+        return {"method": "unavailable"}
+
+    n_rows = min(int(features_df.shape[0]), max_rows)
+    features = entry["features"]
+    X = features_df[features].to_numpy(dtype=np.float64)[:n_rows]
+    values, cache_hits = explain_rows(explainer, entry["version"] or "", X, SHAP_CACHE)
+    classes = [int(c) for c in explainer.classes_]
+    predicted = proba[:n_rows].argmax(axis=1)
+    rows: List[Dict[str, Any]] = []
+    for r, index in enumerate(features_df.index[:n_rows]):
+        k = int(predicted[r])
+        rows.append({
+            "index": int(index) if isinstance(index, (int, np.integer)) else str(index),
+            "status": STATUS_BY_LABEL.get(classes[k], str(classes[k])),
+            "contributions": {f: round(float(values[r, i, k]), 6) for i, f in enumerate(features)},
+        })
+    return {
+        "method": "tree_shap",
+        "output": explainer.output,
+        "classes": [STATUS_BY_LABEL.get(c, str(c)) for c in classes],
+        "expected_value": [round(float(v), 6) for v in (explainer.expected_value if explainer.expected_value is not None else [])],
+        "rows_total": int(features_df.shape[0]),
+        "rows_explained": n_rows,
+        "truncated": n_rows < int(features_df.shape[0]),
+        "cache_hits": int(cache_hits),
+        "rows": rows,
+    }
 
-    return explanation
 
-
-@app.get("/health")
-def health() -> Dict[str, str]:
-    return {"status": "ok"}
+# Dérive des features servies vs statistiques d'entraînement (GET /drift)
+DRIFT = DriftMonitor(path=os.environ.get("EXODETECT_DRIFT_PATH") or str(Path(__file__).resolve().parents[1] / "models" / "drift_state.json"))
+atexit.register(DRIFT.save, wait=True)
 
 
-@app.post("/predict")
-async def predict(file: UploadFile = File(...)) -> Dict[str, Any]:
-    # Log des métadonnées du fichier pour diagnostic
-    logger.info("/predict received file: name=%s content_type=%s", getattr(file, 'filename', None), getattr(file, 'content_type', None))
-
+def _observe_drift(name: str, entry: Dict[str, Any], canonical_df: pd.DataFrame) -> None:
+    # Valeurs brutes (avant clipping) comparées à la config chargée du modèle, jamais à une config recalculée
     try:
-        content = await file.read()
-        logger.info("/predict file size: %s bytes", len(content) if content else 0)
-        if not content:
-            raise HTTPException(status_code=400, detail="Fichier vide")
+        with stage("drift", name):
+            hits = DRIFT.observe(name, entry["version"], canonical_df, entry["features"], entry["cfg"])
     except Exception as e:
-        logger.exception("/predict read error")
-        raise HTTPException(status_code=400, detail=f"Lecture du fichier impossible: {e}")
-
-    # Only CSV supported in this baseline endpoint
+        logger.warning("%s drift monitoring failed: %s", name, e)
+        return
+    for feature, (below, above) in hits.items():
+        if below:
+            CLIP_TOTAL.inc(below, model=name, feature=feature, side="low")
+        if above:
+            CLIP_TOTAL.inc(above, model=name, feature=feature, side="high")
+
+
+def _run_model(name: str, canonical_df: pd.DataFrame, shap_rows: int = 0) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    # Projection des features du modèle, inférence puis explication. (None, info) si indisponible/échec.
+    entry = MODEL_REGISTRY[name]
     try:
-        raw_df = _read_uploaded_csv(content)
-    except HTTPException:
-        # If CSV parsing failed, return a graceful default classification without chart
-        status, confidence = _simple_classification(None, None)
-        return {
-            "result": {
-                "status": status,
-                "confidence": confidence,
-            }
-        }
-
-    # Extract possible chart data for UI
-    time_values, flux_values = _extract_time_flux(raw_df)
-
-    # Adapt uploaded dataset to canonical features
-    canonical_df = adapt_to_canonical(raw_df)
+        with stage("preprocess", name):
+            features_df, info = _prepare_features(canonical_df, entry["features"], entry["cfg"])
+    except Exception as e:
+        logger.warning("%s preprocessing failed: %s", name, e)
+        return None, {}
+    if entry["model"] is not None:
+        _observe_drift(name, entry, canonical_df)
 
-    # Prepare features for Kepler model
+    if info:
+        ROWS_TOTAL.inc(info.get("rows_in", 0), model=name, direction="in")
+        ROWS_TOTAL.inc(info.get("rows_out", 0), model=name, direction="out")
+    model_obj = entry["model"]
+    if model_obj is None or features_df is None or features_df.empty:
+        return None, info
     try:
-        features_df, info = _prepare_features(canonical_df, KEPLER_FEATURES, PREPROC_CFG_KEPLER)
+        with stage("predict", name):
+            proba = model_obj.predict_proba(features_df)  # shape (n, 3)
+        # Agréger sur tout le fichier: moyenne des probas
+        mean_proba = proba.mean(axis=0)
+        best_idx = int(mean_proba.argmax())
+        confidence = float(mean_proba[best_idx])
+        with stage("explain", name):
+            explanation = _build_feature_explanation(features_df, entry)
     except Exception as e:
-        logger.warning("Kepler preprocessing failed: %s", e)
-        features_df, info = None, {}
-
-    # Use model if available; fallback to heuristic otherwise
-    if MODEL_KEPLER is not None and features_df is not None and not features_df.empty:
+        logger.error("Model inference failed: %s", e)
+        return None, info
+
+    response: Dict[str, Any] = {
+        "result": {
+            "status": STATUS_BY_LABEL[LABEL_ORDER[best_idx]],
+            "confidence": round(confidence, 4),
+        },
+        "model": name,
+        "backend": backend_name(model_obj),
+        "explanation": explanation,
+    }
+    if shap_rows > 0:
         try:
-            proba = MODEL_KEPLER.predict_proba(features_df)  # shape (n, 3)
-            pred = MODEL_KEPLER.predict(features_df)
-            # Agréger sur tout le fichier: moyenne des probas
-            mean_proba = proba.mean(axis=0)
-            # Map predicted label (int) to name
-            # Labels: -1 FP, 0 CANDIDATE, 1 CONFIRMED (selon train_model.py)
-            label_order = [-1, 0, 1]
-            label_to_index = {lbl: idx for idx, lbl in enumerate(label_order)}
-            # Choix par proba moyenne
-            best_idx = int(mean_proba.argmax())
-            best_label = label_order[best_idx]
-            confidence = float(mean_proba[best_idx])
-
-            if best_label == 1:
-                status = "Exoplanète"
-            elif best_label == 0:
-                status = "Candidat"
-            else:
-                status = "Faux positif"
-
-            explanation = _build_feature_explanation(features_df, KEPLER_FEATURES, PREPROC_CFG_KEPLER, MODEL_KEPLER)
-            response: Dict[str, Any] = {
-                "result": {
-                    "status": status,
-                    "confidence": round(confidence, 4),
-                },
-                "model": "kepler",
-                "explanation": explanation,
-            }
+            with stage("shap", name):
+                response["row_explanations"] = _row_explanations(entry, features_df, proba, shap_rows)
         except Exception as e:
-            logger.error("Model inference failed: %s", e)
-            status, confidence = _simple_classification(time_values, flux_values)
-            response = {
-                "result": {
-                    "status": status,
-                    "confidence": confidence,
-                },
-                "model": "heuristic",
-                "explanation": {"method": "flux_variance"},
-            }
-    else:
-        status, confidence = _simple_classification(time_values, flux_values)
-        response = {
-            "result": {
-                "status": status,
-                "confidence": confidence,
-            },
-            "model": "heuristic",
-            "explanation": {"method": "flux_variance"},
+            logger.error("TreeSHAP failed: %s", e)
+            response["row_explanations"] = {"method": "unavailable", "error": str(e)}
+    return response, info
+
+
+def _run_prediction_pipeline(content: Union[bytes, SpooledUpload], requested: Optional[List[str]] = None, shap_rows: int = 0) -> Dict[str, Any]:
+    """
+    Pipeline de prédiction commun: ingestion -> adaptation -> projection par modèle
+    -> inférence -> explication. Le fichier est parsé et adapté une seule fois,
+    les frames brut/canonique sont partagés entre tous les modèles retenus.
+    """
+    # Exécuté dans un worker du threadpool: rattaché au profileur si la requête est capturée
+    with profile_thread():
+        try:
+            raw_df = _read_uploaded_csv(content)
+        except HTTPException as e:
+            # Dépassement de taille décompressée ou format binaire non supporté:
+            # erreur explicite plutôt que repli heuristique
+            if e.status_code in (413, 415):
+                raise
+            return {"parsed": False}
+
+        with stage("extract"):
+            time_values, flux_values = _extract_time_flux(raw_df)
+        with stage("adapt"):
+            canonical_df = adapt_to_canonical(raw_df)
+            dataset_type = detect_dataset_type(raw_df)
+        with stage("route"):
+            selected = _select_models(dataset_type, canonical_df, requested)
+        return {
+            "parsed": True,
+            "dataset_type": dataset_type,
+            "selected": selected,
+            "outputs": {name: _run_model(name, canonical_df, shap_rows) for name in selected},
+            "time": time_values,
+            "flux": flux_values,
         }
 
+
+def _heuristic_response(time_values: Optional[np.ndarray], flux_values: Optional[np.ndarray]) -> Dict[str, Any]:
+    HEURISTIC_FALLBACKS_TOTAL.inc(reason="model")
+    status, confidence = _simple_classification(time_values, flux_values)
+    return {
+        "result": {
+            "status": status,
+            "confidence": confidence,
+        },
+        "model": "heuristic",
+        "explanation": {"method": "flux_variance"},
+    }
+
+
+def _chart(ctx: Dict[str, Any]) -> Optional[Dict[str, List[float]]]:
+    time_values, flux_values = ctx["time"], ctx["flux"]
     if time_values is not None and flux_values is not None and len(time_values) > 0 and len(flux_values) > 0:
-        response["chart"] = {
+        return {
             "time": [float(x) for x in time_values.tolist()],
             "flux": [float(x) for x in flux_values.tolist()],
         }
+    return None
+
+
+def _model_response(ctx: Dict[str, Any], name: str) -> Dict[str, Any]:
+    # Réponse historique d'un modèle (repli heuristique si modèle absent ou en échec)
+    output, info = ctx["outputs"][name]
+    response = dict(output) if output is not None else _heuristic_response(ctx["time"], ctx["flux"])
+    response["dataset_type"] = ctx["dataset_type"]
+    chart = _chart(ctx)
+    if chart is not None:
+        response["chart"] = chart
     if info:
         response["preprocessing"] = info
+    return response
+
+
+def _unparsed_response() -> Dict[str, Any]:
+    # CSV illisible: classification par défaut, sans graphique
+    HEURISTIC_FALLBACKS_TOTAL.inc(reason="unparsed")
+    status, confidence = _simple_classification(None, None)
+    return {
+        "result": {
+            "status": status,
+            "confidence": confidence,
+        }
+    }
+
+
+async def _read_upload(file: UploadFile, endpoint: str) -> SpooledUpload:
+    # Upload copié par blocs: en mémoire sous EXODETECT_UPLOAD_SPOOL_BYTES, sinon fichier temporaire
+    # (à fermer par l'appelant). Log des métadonnées du fichier pour diagnostic
+    logger.info("%s received file: name=%s content_type=%s", endpoint, getattr(file, 'filename', None), getattr(file, 'content_type', None))
+    try:
+        with stage("read_upload"):
+            upload = await spool_upload(file)
+        logger.info("%s file size: %s bytes (%s%s)", endpoint, upload.size, "memory" if upload.in_memory else "spooled",
+                    f", {upload.compression}" if upload.compression else "")
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedCompression as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except Exception as e:
+        logger.exception("%s read error", endpoint)
+        raise HTTPException(status_code=400, detail=f"Lecture du fichier impossible: {e}")
+    if not upload.size:
+        upload.close()
+        raise HTTPException(status_code=400, detail="Fichier vide")
+    return upload
+
+
+@app.get("/health")
+def health() -> Dict[str, str]:
+    return {"status": "ok"}
+
+
+@app.get("/drift")
+def drift(model: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Dérive par modèle et par feature depuis le dernier (ré)entraînement: taux de valeurs manquantes
+    et de clipping, quantiles servis, PSI et KS vs la distribution d'entraînement, statut ok/warn/alert.
+    """
+    if model is not None and model not in MODEL_REGISTRY:
+        raise HTTPException(status_code=404, detail=f"Modèle inconnu: {model}")
+    return DRIFT.report(model)
+
+
+@app.post("/admin/drift/reset")
+def admin_drift_reset(model: Optional[str] = None) -> Dict[str, Any]:
+    if model is not None and model not in MODEL_REGISTRY:
+        raise HTTPException(status_code=404, detail=f"Modèle inconnu: {model}")
+    DRIFT.reset(model)
+    return {"reset": model or "all"}
+
+
+def _with_status(record: Dict[str, Any]) -> Dict[str, Any]:
+    for score in record["scores"].values():
+        score["status"] = STATUS_BY_LABEL[score["label"]]
+    return record
+
+
+def _catalog_record(table: Any, i: int) -> Dict[str, Any]:
+    return _with_status(table.record(i))
+
 
+def _catalog_table() -> Any:
+    table = CATALOG.table
+    if table is None:
+        raise HTTPException(status_code=503, detail="Catalogue en cours de construction" if CATALOG.building else "Catalogue indisponible")
+    return table
+
+
+@app.get("/catalog/status")
+def catalog_status() -> Dict[str, Any]:
+    return CATALOG.status()
+
+
+@app.get("/catalog/lookup")
+def catalog_lookup(q: str, by: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
+    """
+    Objet(s) des catalogues fournis par identifiant (kepoi_name, kepler_name, toi, pl_name, hostname;
+    casse, espaces et tirets ignorés): scores de chaque modèle et habitabilité précalculés.
+    """
+    table = _catalog_table()
+    if by is not None and by not in LOOKUP_FIELDS:
+        raise HTTPException(status_code=400, detail=f"by doit être parmi: {', '.join(LOOKUP_FIELDS)}")
+    rows = table.lookup(q, by, max(1, min(limit, 1000)))
+    if not rows:
+        raise HTTPException(status_code=404, detail=f"Aucun objet pour: {q}")
+    return {"query": q, "count": len(rows), "results": [_catalog_record(table, i) for i in rows]}
+
+
+@app.get("/catalog/query")
+def catalog_query(
+    filter: List[str] = Query(default=[]),
+    sort: Optional[str] = None,
+    limit: int = 50,
+    offset: int = 0,
+) -> Dict[str, Any]:
+    """
+    Recherche par plages sur les résultats précalculés, filtres combinés (ET):
+    ?filter=esi>0.8&filter=temp_eq=200..320&filter=star_class=K|M&filter=distance_pc<=50&sort=-esi
+    """
+    table = _catalog_table()
+    try:
+        result = table.query_engine.query(filter, sort=sort, limit=limit, offset=offset)
+    except QueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "filters": filter,
+        "sort": sort,
+        "total": result["total"],
+        "offset": offset,
+        "count": len(result["rows"]),
+        "strategy": result["strategy"],
+        "results": [_catalog_record(table, i) for i in result["rows"]],
+    }
+
+
+@app.get("/catalog/cone")
+def catalog_cone(ra: float, dec: float, radius: float = 60.0, limit: int = 50) -> Dict[str, Any]:
+    """Objets des catalogues fournis à moins de radius arcsec de (ra, dec) en degrés, du plus proche au plus lointain."""
+    table = _catalog_table()
+    try:
+        rows, sep = table.sky_index.cone(ra, dec, radius)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    limit = max(1, min(limit, 1000))
+    results = [{"separation_arcsec": round(float(d), 4), **_catalog_record(table, int(i))} for i, d in zip(rows[:limit], sep[:limit])]
+    return {"ra": ra, "dec": dec, "radius_arcsec": radius, "total": int(rows.size), "count": len(results), "results": results}
+
+
+@app.post("/catalog/crossmatch")
+async def catalog_crossmatch(file: UploadFile = File(...), radius: float = 5.0) -> Response:
+    """
+    Cross-match d'une table importée (colonnes ra/dec en degrés) avec les catalogues fournis:
+    toutes les paires à moins de radius arcsec, avec identifiants et score du modèle de chaque objet.
+    """
+    table = _catalog_table()
+    with await _read_upload(file, "/catalog/crossmatch") as content:
+        try:
+            df = _read_uploaded_csv(content)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Table illisible: {e}")
+    try:
+        ra_col, dec_col = find_coordinate_columns([str(c) for c in df.columns])
+        ra = pd.to_numeric(df[ra_col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        dec = pd.to_numeric(df[dec_col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        with stage("crossmatch"):
+            inputs, rows, sep = table.sky_index.crossmatch(ra, dec, radius)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    with stage("format"):
+        # Mise en forme une seule fois par objet du catalogue apparié
+        unique = np.unique(rows)
+        objects = dict(zip(unique.tolist(), (_with_status(o) for o in table.summaries(unique))))
+        matches = [
+            {"input": i, "ra": float(ra[i]), "dec": float(dec[i]), "separation_arcsec": round(d, 4), "object": objects[j]}
+            for i, j, d in zip(inputs.tolist(), rows.tolist(), sep.tolist())
+        ]
+    # Contenu déjà en types Python natifs: réponse directe, sans passe jsonable_encoder sur chaque paire
+    return TimedJSONResponse({
+        "rows": int(len(df)),
+        "positions": int(np.count_nonzero(np.isfinite(ra) & np.isfinite(dec))),
+        "matched": int(np.unique(inputs).size),
+        "pairs": len(matches),
+        "radius_arcsec": radius,
+        "matches": matches,
+    })
+
+
+@app.get("/catalog/fields")
+def catalog_fields() -> Dict[str, Any]:
+    return _catalog_table().query_engine.fields()
+
+
+@app.get("/metrics")
+def metrics() -> PlainTextResponse:
+    # Exposition texte Prometheus: étapes, requêtes, replis, lignes, caches
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _shap_rows(shap: bool, shap_rows: Optional[int]) -> int:
+    # Explications par ligne sur demande uniquement, plafonnées à EXODETECT_SHAP_MAX_ROWS
+    if not shap:
+        return 0
+    return max(1, min(shap_rows or SHAP_MAX_ROWS, SHAP_MAX_ROWS))
+
+
+@app.post("/predict")
+async def predict(file: UploadFile = File(...), shap: bool = False, shap_rows: Optional[int] = None) -> Dict[str, Any]:
+    # Modèle choisi automatiquement selon le catalogue détecté (TOI, K2, sinon Kepler)
+    with await _read_upload(file, "/predict") as content:
+        ctx = await run_in_threadpool(_run_prediction_pipeline, content, shap_rows=_shap_rows(shap, shap_rows))
+    if not ctx["parsed"]:
+        return _unparsed_response()
+    return _model_response(ctx, ctx["selected"][0])
+
+
+@app.post("/predict-auto")
+async def predict_auto(
+    file: UploadFile = File(...),
+    models: Optional[str] = None,
+    shap: bool = False,
+    shap_rows: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Un seul upload pour un ou plusieurs modèles.
+    models: absent (routage automatique), "all" (tous les modèles chargés) ou liste "kepler,k2,toi".
+    shap: explications TreeSHAP par ligne (au plus shap_rows lignes, plafonné par EXODETECT_SHAP_MAX_ROWS).
+    """
+    requested = [m.strip().lower() for m in models.split(",") if m.strip()] if models else None
+    if requested and requested != ["all"]:
+        unknown = [m for m in requested if m not in MODEL_REGISTRY]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Modèles inconnus: {unknown} (disponibles: {list(MODEL_REGISTRY)})")
+    with await _read_upload(file, "/predict-auto") as content:
+        ctx = await run_in_threadpool(_run_prediction_pipeline, content, requested, _shap_rows(shap, shap_rows))
+    if not ctx["parsed"]:
+        return _unparsed_response()
+
+    predictions: Dict[str, Any] = {}
+    for name in ctx["selected"]:
+        output, info = ctx["outputs"][name]
+        entry = dict(output) if output is not None else {**_heuristic_response(ctx["time"], ctx["flux"]), "requested_model": name}
+        if info:
+            entry["preprocessing"] = info
+        predictions[name] = entry
+
+    primary = ctx["selected"][0] if ctx["selected"] else None
+    response: Dict[str, Any] = {
+        "dataset_type": ctx["dataset_type"],
+        "models": ctx["selected"],
+        "primary": primary,
+        "result": predictions[primary]["result"] if primary else _heuristic_response(ctx["time"], ctx["flux"])["result"],
+        "predictions": predictions,
+    }
+    chart = _chart(ctx)
+    if chart is not None:
+        response["chart"] = chart
     return response
+
+
+@app.post("/admin/profile/start")
+def admin_profile_start(
+    requests: int = 1,
+    path: Optional[str] = None,
+    min_bytes: int = 0,
+    interval_ms: float = DEFAULT_INTERVAL_MS,
+    memory: bool = False,
+) -> Dict[str, Any]:
+    """
+    Profile les `requests` prochaines requêtes dont le chemin commence par `path` et dont le corps
+    fait au moins `min_bytes` octets. memory=true active tracemalloc pendant la session (coûteux:
+    ralentit toutes les requêtes tant que la session tourne).
+    """
+    if not 1 <= requests <= MAX_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"requests doit être entre 1 et {MAX_REQUESTS}")
+    session = PROFILER.start(requests=requests, path=path, min_bytes=min_bytes, interval_ms=interval_ms, memory=memory)
+    return session.status()
+
+
+@app.post("/admin/profile/stop")
+def admin_profile_stop() -> Dict[str, Any]:
+    session = PROFILER.stop()
+    if session is None:
+        raise HTTPException(status_code=404, detail="Aucune session de profilage")
+    return session.status()
+
+
+def _profile_session() -> Any:
+    session = PROFILER.session
+    if session is None:
+        raise HTTPException(status_code=404, detail="Aucune session de profilage")
+    return session
+
+
+@app.get("/admin/profile/status")
+def admin_profile_status() -> Dict[str, Any]:
+    return _profile_session().status()
+
+
+@app.get("/admin/profile/collapsed")
+def admin_profile_collapsed() -> PlainTextResponse:
+    # Format "collapsed stacks": flamegraph.pl, speedscope, inferno
+    return PlainTextResponse(_profile_session().collapsed(), headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'})
+
+
+@app.get("/admin/profile/flamegraph.svg")
+def admin_profile_flamegraph() -> Response:
+    session = _profile_session()
+    return Response(render_flamegraph(session.stacks), media_type="image/svg+xml")
+
+
+@app.get("/admin/profile/allocations")
+def admin_profile_allocations(limit: int = 25) -> Dict[str, Any]:
+    session = _profile_session()
+    if not session.memory:
+        raise HTTPException(status_code=400, detail="Session lancée sans memory=true")
+    status = session.status()
+    return {
+        "running": status["running"],
+        "peak_traced_bytes": status["peak_traced_bytes"],
+        "top": session.top_allocations(max(1, limit)),
+    }
+
+
+TRAIN_MODES = ("full", "incremental")
+
+
+def _check_train_params(mode: str, backend: Optional[str]) -> str:
+    # Paramètres validés avant lecture de l'upload: erreur 400 immédiate plutôt que 500 après nettoyage
+    if mode not in TRAIN_MODES:
+        raise HTTPException(status_code=400, detail=f"mode invalide: {mode} (full|incremental)")
+    try:
+        return resolve_backend(backend)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _training_rows(content: SpooledUpload, clean_frame: Any) -> pd.DataFrame:
+    # CSV déjà nettoyé (features + label) ou export NEA brut à nettoyer
+    df = _read_uploaded_csv(content)
+    if "label" in df.columns:
+        return df
+    return clean_frame(df)
+
+
 @app.post("/admin/train/kepler")
-async def admin_train_kepler(file: UploadFile = File(...)) -> Dict[str, Any]:
+async def admin_train_kepler(
+    file: UploadFile = File(...),
+    backend: Optional[str] = None,
+    mode: str = "full",
+) -> Dict[str, Any]:
     base_dir = Path(__file__).resolve().parents[1]
     models_dir = base_dir / "models"
+    store_path = models_dir / "training_store_kepler"
+    backend = _check_train_params(mode, backend)
     try:
-        content = await file.read()
-        if not content:
-            raise HTTPException(status_code=400, detail="Fichier vide")
-        tmp_csv = models_dir / "_tmp_train_kepler.csv"
         models_dir.mkdir(parents=True, exist_ok=True)
-        tmp_csv.write_bytes(content)
-        metrics = train_model_kepler(
-            cleaned_csv=str(tmp_csv),
-            model_path=str(models_dir / "model.joblib"),
-            metrics_path=str(models_dir / "metrics.json"),
-            preproc_path=str(models_dir / "preprocessor_config.json"),
-        )
+        with await _read_upload(file, "/admin/train/kepler") as content:
+            rows = _training_rows(content, clean_kepler_frame)
+        if mode == "incremental":
+            metrics = train_incremental(
+                new_rows=rows,
+                features=KEPLER_FEATURES,
+                store_path=str(store_path),
+                model_path=str(models_dir / "model.joblib"),
+                metrics_path=str(models_dir / "metrics.json"),
+                preproc_path=str(models_dir / "preprocessor_config.json"),
+                backend=backend,
+            )
+        else:
+            metrics = train_model_kepler_frame(
+                rows,
+                model_path=str(models_dir / "model.joblib"),
+                metrics_path=str(models_dir / "metrics.json"),
+                preproc_path=str(models_dir / "preprocessor_config.json"),
+                backend=backend,
+            )
+            reset_store(str(store_path), rows, KEPLER_FEATURES)
+        _reload_models()
         return {"status": "ok", "metrics": metrics}
     except HTTPException:
         raise
+    except MissingTrainingStore as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.exception("Training Kepler failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/admin/train/k2")
-async def admin_train_k2(file: UploadFile = File(...)) -> Dict[str, Any]:
+async def admin_train_k2(
+    file: UploadFile = File(...),
+    backend: Optional[str] = None,
+    mode: str = "full",
+) -> Dict[str, Any]:
     base_dir = Path(__file__).resolve().parents[1]
     models_dir = base_dir / "models"
+    store_path = models_dir / "training_store_k2"
+    backend = _check_train_params(mode, backend)
     try:
-        content = await file.read()
-        if not content:
-            raise HTTPException(status_code=400, detail="Fichier vide")
-        tmp_csv = models_dir / "_tmp_train_k2.csv"
         models_dir.mkdir(parents=True, exist_ok=True)
-        tmp_csv.write_bytes(content)
-        metrics = train_model_k2(
-            cleaned_csv=str(tmp_csv),
-            model_path=str(models_dir / "model_k2.joblib"),
-            metrics_path=str(models_dir / "metrics_k2.json"),
-        )
+        with await _read_upload(file, "/admin/train/k2") as content:
+            rows = _training_rows(content, clean_k2_frame)
+        if mode == "incremental":
+            metrics = train_incremental(
+                new_rows=rows,
+                features=K2_FEATURES,
+                store_path=str(store_path),
+                model_path=str(models_dir / "model_k2.joblib"),
+                metrics_path=str(models_dir / "metrics_k2.json"),
+                backend=backend,
+            )
+        else:
+            metrics = train_model_k2_frame(
+                rows,
+                model_path=str(models_dir / "model_k2.joblib"),
+                metrics_path=str(models_dir / "metrics_k2.json"),
+                backend=backend,
+            )
+            reset_store(str(store_path), rows, K2_FEATURES)
+        _reload_models()
         return {"status": "ok", "metrics": metrics}
     except HTTPException:
         raise
+    except MissingTrainingStore as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.exception("Training K2 failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/predict-k2")
-async def predict_k2(file: UploadFile = File(...)) -> Dict[str, Any]:
-    # Pour compat avec jeux K2/NEA (souvent avec # en commentaires, autres alias)
-    logger.info("/predict-k2 received file: name=%s content_type=%s", getattr(file, 'filename', None), getattr(file, 'content_type', None))
-
-    try:
-        content = await file.read()
-        logger.info("/predict-k2 file size: %s bytes", len(content) if content else 0)
-        if not content:
-            raise HTTPException(status_code=400, detail="Fichier vide")
-    except Exception as e:
-        logger.exception("/predict-k2 read error")
-        raise HTTPException(status_code=400, detail=f"Lecture du fichier impossible: {e}")
-
+@app.post("/admin/train/toi")
+async def admin_train_toi(
+    file: UploadFile = File(...),
+    backend: Optional[str] = None,
+    mode: str = "full",
+) -> Dict[str, Any]:
+    base_dir = Path(__file__).resolve().parents[1]
+    models_dir = base_dir / "models"
+    store_path = models_dir / "training_store_toi"
+    backend = _check_train_params(mode, backend)
     try:
-        raw_df = _read_uploaded_csv(content)
+        models_dir.mkdir(parents=True, exist_ok=True)
+        with await _read_upload(file, "/admin/train/toi") as content:
+            rows = _training_rows(content, clean_toi_frame)
+        if mode == "incremental":
+            metrics = train_incremental(
+                new_rows=rows,
+                features=TOI_FEATURES,
+                store_path=str(store_path),
+                model_path=str(models_dir / "model_toi.joblib"),
+                metrics_path=str(models_dir / "metrics_toi.json"),
+                preproc_path=str(models_dir / "preprocessor_toi.json"),
+                backend=backend,
+                dataset="toi",
+            )
+        else:
+            metrics = train_model_toi_frame(
+                rows,
+                model_path=str(models_dir / "model_toi.joblib"),
+                metrics_path=str(models_dir / "metrics_toi.json"),
+                preproc_path=str(models_dir / "preprocessor_toi.json"),
+                backend=backend,
+            )
+            reset_store(str(store_path), rows, TOI_FEATURES)
+        _reload_models()
+        return {"status": "ok", "metrics": metrics}
     except HTTPException:
-        status, confidence = _simple_classification(None, None)
-        return {
-            "result": {
-                "status": status,
-                "confidence": confidence,
-            }
-        }
-
-    time_values, flux_values = _extract_time_flux(raw_df)
-    canonical_df = adapt_to_canonical(raw_df)
-
-    features_df = None
-    info: Dict[str, Any] = {}
-    try:
-        features_df, info = _prepare_features(canonical_df, K2_FEATURES, PREPROC_CFG_KEPLER)
+        raise
+    except MissingTrainingStore as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
-        logger.warning("K2 preprocessing failed: %s", e)
-        features_df, info = None, {}
-
-    if MODEL_K2 is not None and features_df is not None and not features_df.empty:
-        try:
-            proba = MODEL_K2.predict_proba(features_df)
-            mean_proba = proba.mean(axis=0)
-            label_order = [-1, 0, 1]
-            best_idx = int(mean_proba.argmax())
-            best_label = label_order[best_idx]
-            confidence = float(mean_proba[best_idx])
-
-            if best_label == 1:
-                status = "Exoplanète"
-            elif best_label == 0:
-                status = "Candidat"
-            else:
-                status = "Faux positif"
-
-            explanation = _build_feature_explanation(features_df, K2_FEATURES, PREPROC_CFG_KEPLER, MODEL_K2)
-            response: Dict[str, Any] = {
-                "result": {
-                    "status": status,
-                    "confidence": round(confidence, 4),
-                },
-                "model": "k2",
-                "explanation": explanation,
-            }
-        except Exception as e:
-            logger.error("Model inference failed: %s", e)
-            status, confidence = _simple_classification(time_values, flux_values)
-            response = {
-                "result": {
-                    "status": status,
-                    "confidence": confidence,
-                },
-                "model": "heuristic",
-                "explanation": {"method": "flux_variance"},
-            }
-    else:
-        status, confidence = _simple_classification(time_values, flux_values)
-        response = {
-            "result": {
-                "status": status,
-                "confidence": confidence,
-            },
-            "model": "heuristic",
-            "explanation": {"method": "flux_variance"},
-        }
-
-    if time_values is not None and flux_values is not None and len(time_values) > 0 and len(flux_values) > 0:
-        response["chart"] = {
-            "time": [float(x) for x in time_values.tolist()],
-            "flux": [float(x) for x in flux_values.tolist()],
-        }
-    if info:
-        response["preprocessing"] = info
-
-    return response
-
+        logger.exception("Training TOI failed")
+        raise HTTPException(status_code=500, detail=str(e))
 
 
-T_SUN = 5778.0  # K
-R_SUN_M = 6.957e8  # m
-M_SUN_KG = 1.98847e30  # kg
-G_SI = 6.67430e-11  # m^3 kg^-1 s^-2
-AU_M = 1.495978707e11  # m
-L_SUN_W = 3.828e26  # W
-R_EARTH_M = 6.371e6  # m
-M_EARTH_KG = 5.972e24  # kg
-M_JUPITER_KG = 1.898e27  # kg
+@app.post("/predict-k2")
+async def predict_k2(file: UploadFile = File(...), shap: bool = False, shap_rows: Optional[int] = None) -> Dict[str, Any]:
+    # Pour compat avec jeux K2/NEA (souvent avec # en commentaires, autres alias)
+    with await _read_upload(file, "/predict-k2") as content:
+        ctx = await run_in_threadpool(_run_prediction_pipeline, content, ["k2"], _shap_rows(shap, shap_rows))
+    if not ctx["parsed"]:
+        return _unparsed_response()
+    return _model_response(ctx, "k2")
 
 
 class PlanetIn(BaseModel):
@@ -659,176 +1370,6 @@ class PlanetIn(BaseModel):
     pl_insol: Optional[float] = None
 
 
-def _safe_float(x: Any) -> Optional[float]:
-    try:
-        if x is None or (isinstance(x, float) and pd.isna(x)):
-            return None
-        return float(x)
-    except Exception:
-        return None
-
-
-def _compute_habitability_for_row(row: Dict[str, Any]) -> Dict[str, Any]:
-    name = row.get("pl_name") or row.get("name") or "Non disponible"
-    T_star = _safe_float(row.get("st_teff"))
-    R_star_rsun = _safe_float(row.get("st_rad"))
-    M_star_msun = _safe_float(row.get("st_mass"))
-    P_days = _safe_float(row.get("pl_orbper"))
-    R_p_re = _safe_float(row.get("pl_rade"))
-    # Optional masses if available in some datasets
-    M_p_earth = _safe_float(row.get("pl_bmasse"))  # Earth masses
-    M_p_jup = _safe_float(row.get("pl_bmassj")) or _safe_float(row.get("pl_massj"))  # Jupiter masses
-    T_eq = _safe_float(row.get("pl_eqt"))
-    # Distances
-    dist_pc = _safe_float(row.get("st_dist")) or _safe_float(row.get("sy_dist"))
-
-    a_au: Optional[float] = None
-    if M_star_msun is not None and P_days is not None:
-        try:
-            a_m = ((G_SI * (M_star_msun * M_SUN_KG) * (P_days * 86400.0) ** 2) / (4.0 * math.pi ** 2)) ** (1.0 / 3.0)
-            a_au = a_m / AU_M
-        except Exception:
-            a_au = None
-
-    L_rel: Optional[float] = None
-    if R_star_rsun is not None and T_star is not None:
-        try:
-            L_rel = (R_star_rsun ** 2.0) * ((T_star / T_SUN) ** 4.0)
-        except Exception:
-            L_rel = None
-
-    hz_inner = None
-    hz_outer = None
-    in_hab_zone = None
-    if L_rel is not None:
-        try:
-            hz_inner = math.sqrt(L_rel / 1.1)
-            hz_outer = math.sqrt(L_rel / 0.53)
-            if a_au is not None:
-                in_hab_zone = (a_au >= hz_inner and a_au <= hz_outer)
-        except Exception:
-            pass
-
-    if T_eq is None and T_star is not None and R_star_rsun is not None and a_au is not None:
-        try:
-            R_star_m = R_star_rsun * R_SUN_M
-            a_m = a_au * AU_M
-            T_eq = T_star * math.sqrt(R_star_m / (2.0 * a_m)) * ((1.0 - 0.3) ** 0.25)
-        except Exception:
-            T_eq = None
-
-    # Planet gravity if mass and radius available
-    gravity = None
-    try:
-        if R_p_re is not None:
-            R_p_m = R_p_re * R_EARTH_M
-            if M_p_earth is not None:
-                M_p_kg = M_p_earth * M_EARTH_KG
-                gravity = G_SI * M_p_kg / (R_p_m ** 2)
-            elif M_p_jup is not None:
-                M_p_kg = M_p_jup * M_JUPITER_KG
-                gravity = G_SI * M_p_kg / (R_p_m ** 2)
-    except Exception:
-        gravity = None
-
-    # Stellar irradiance at planet orbit
-    luminosity_w_m2 = None
-    try:
-        if L_rel is not None and a_au is not None:
-            a_m = a_au * AU_M
-            luminosity_w_m2 = L_rel * L_SUN_W / (4.0 * math.pi * (a_m ** 2))
-    except Exception:
-        luminosity_w_m2 = None
-
-    # Star class from temperature
-    star_class = None
-    if T_star is not None:
-        try:
-            if T_star >= 30000:
-                star_class = "O"
-            elif T_star >= 10000:
-                star_class = "B"
-            elif T_star >= 7500:
-                star_class = "A"
-            elif T_star >= 6000:
-                star_class = "F"
-            elif T_star >= 5200:
-                star_class = "G"
-            elif T_star >= 3700:
-                star_class = "K"
-            else:
-                star_class = "M"
-        except Exception:
-            star_class = None
-
-    # Earth Similarity Index (simplified: radius, gravity, temp)
-    def _sub_esi(x: Optional[float], x_ref: float) -> Optional[float]:
-        if x is None or x <= 0 or x_ref <= 0:
-            return None
-        try:
-            v = 1.0 - abs(x - x_ref) / (x + x_ref)
-            return max(0.0, min(1.0, v))
-        except Exception:
-            return None
-
-    esi_parts: List[float] = []
-    r_esi = _sub_esi(R_p_re, 1.0)
-    if r_esi is not None:
-        esi_parts.append(r_esi)
-    g_esi = _sub_esi(gravity / 9.81 if (gravity is not None and gravity > 0) else None, 1.0)
-    if g_esi is not None:
-        esi_parts.append(g_esi)
-    t_esi = _sub_esi(T_eq, 288.0)
-    if t_esi is not None:
-        esi_parts.append(t_esi)
-    esi = None
-    if esi_parts:
-        try:
-            prod = 1.0
-            for p in esi_parts:
-                prod *= p
-            esi = prod ** (1.0 / len(esi_parts))
-        except Exception:
-            esi = None
-
-    score = 0.0
-    if T_eq is not None and 0.0 <= T_eq <= 373.0:
-        score += 0.4
-    if R_p_re is not None and R_p_re <= 2.0:
-        score += 0.3
-    if in_hab_zone is True:
-        score += 0.2
-    if T_star is not None and 4000.0 <= T_star <= 6000.0:
-        score += 0.1
-
-    # Summary sentence
-    try:
-        status_phrase = "dans la zone habitable" if in_hab_zone else "en dehors de la zone habitable"
-        temp_txt = f"{int(round(T_eq))} K" if T_eq is not None else "température inconnue"
-        rad_txt = f"{R_p_re:.1f}x Terre" if R_p_re is not None else "rayon inconnu"
-        summary = (
-            f"{name} est située {status_phrase}, avec une température de {temp_txt}, "
-            f"un rayon {rad_txt} et un score d’habitabilité de {round(score, 2):.2f}."
-        )
-    except Exception:
-        summary = None
-
-    return {
-        "name": name,
-        "radius": R_p_re if R_p_re is not None else None,
-        "temp_eq": T_eq if T_eq is not None else None,
-        "zone_habitable": bool(in_hab_zone) if in_hab_zone is not None else False,
-        "habitability_score": round(score, 4),
-        "gravity_m_s2": gravity if gravity is not None else None,
-        "luminosity_w_m2": luminosity_w_m2 if luminosity_w_m2 is not None else None,
-        "esi": round(esi, 4) if esi is not None else None,
-        "star_class": star_class,
-        "distance_pc": dist_pc if dist_pc is not None else None,
-        "distance_ly": (dist_pc * 3.26156) if dist_pc is not None else None,
-        "summary": summary,
-    }
-
-
 @app.post("/habitability")
 async def habitability(
     file: Optional[UploadFile] = File(None),
@@ -837,10 +1378,8 @@ async def habitability(
     try:
         rows: List[Dict[str, Any]] = []
         if file is not None:
-            content = await file.read()
-            if not content:
-                raise HTTPException(status_code=400, detail="Fichier vide")
-            df = _read_uploaded_csv(content)
+            with await _read_upload(file, "/habitability") as content:
+                df = _read_uploaded_csv(content)
             rows = df.to_dict(orient="records")
         elif planets is not None:
             rows = [p.model_dump() for p in planets]
@@ -848,8 +1387,9 @@ async def habitability(
             raise HTTPException(status_code=400, detail="Aucun fichier ou liste JSON fournie")
 
         out: List[Dict[str, Any]] = []
-        for r in rows:
-            out.append(_compute_habitability_for_row(r))
+        with stage("habitability"):
+            for r in rows:
+                out.append(compute_habitability_for_row(r))
 
         return {"planets": out}
     except HTTPException:
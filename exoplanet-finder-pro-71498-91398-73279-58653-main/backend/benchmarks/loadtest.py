@@ -0,0 +1,448 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .synthetic import GENERATORS, NEA_PREAMBLE, parse_size, to_csv_bytes
+
+
+# endpoint:catalogue:taille:poids, séparés par des virgules
+DEFAULT_MIX = "predict:kepler:1k:6,predict:toi:10k:2,predict-k2:k2:1k:1,habitability:k2:1k:1"
+ENDPOINTS = ("predict", "predict-auto", "predict-k2", "habitability")
+DEFAULT_OUTPUT = "benchmarks/results/loadtest.json"
+SAMPLE_INTERVAL_S = 0.5
+STARTUP_TIMEOUT_S = 60.0
+
+
+class Scenario(NamedTuple):
+	endpoint: str
+	catalog: str
+	rows: int
+	weight: float
+
+	@property
+	def label(self) -> str:
+		return f"{self.endpoint}:{self.catalog}:{self.rows}"
+
+
+def parse_mix(text: str) -> List[Scenario]:
+	scenarios: List[Scenario] = []
+	for item in (p.strip() for p in text.split(",") if p.strip()):
+		parts = item.split(":")
+		if len(parts) not in (3, 4):
+			raise ValueError(f"Scénario invalide: {item} (endpoint:catalogue:taille[:poids])")
+		endpoint, catalog, size = parts[0], parts[1], parts[2]
+		if endpoint not in ENDPOINTS:
+			raise ValueError(f"Endpoint inconnu: {endpoint} (disponibles: {list(ENDPOINTS)})")
+		if catalog not in GENERATORS:
+			raise ValueError(f"Catalogue inconnu: {catalog} (disponibles: {list(GENERATORS)})")
+		scenarios.append(Scenario(endpoint, catalog, parse_size(size), float(parts[3]) if len(parts) == 4 else 1.0))
+	return scenarios
+
+
+def build_payloads(scenarios: List[Scenario], seed: int = 0) -> Dict[str, bytes]:
+	# Un fichier par (catalogue, taille), généré une fois avant la charge
+	payloads: Dict[str, bytes] = {}
+	for s in scenarios:
+		key = f"{s.catalog}:{s.rows}"
+		if key not in payloads:
+			preamble = None if s.catalog == "lightcurve" else NEA_PREAMBLE
+			payloads[key] = to_csv_bytes(GENERATORS[s.catalog](s.rows, seed=seed), preamble=preamble)
+	return payloads
+
+
+def _free_port(host: str) -> int:
+	with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+		sock.bind((host, 0))
+		return int(sock.getsockname()[1])
+
+
+class LocalServer:
+	"""
+	API lancée localement: "thread" (uvicorn dans ce process, le CPU mesuré inclut le générateur)
+	ou "subprocess" (process uvicorn séparé, mesures serveur isolées, --workers possible).
+	"""
+
+	def __init__(self, mode: str = "thread", host: str = "127.0.0.1", port: int = 0, workers: int = 1) -> None:
+		self.mode = mode
+		self.host = host
+		self.port = port or _free_port(host)
+		self.workers = workers
+		self.pid = os.getpid()
+		self._server: Any = None
+		self._thread: Optional[threading.Thread] = None
+		self._proc: Optional[subprocess.Popen] = None
+
+	@property
+	def base_url(self) -> str:
+		return f"http://{self.host}:{self.port}"
+
+	def start(self) -> None:
+		if self.mode == "thread":
+			import uvicorn
+
+			config = uvicorn.Config("api.main:app", host=self.host, port=self.port, log_level="warning", lifespan="off")
+			self._server = uvicorn.Server(config)
+			self._thread = threading.Thread(target=self._server.run, name="exodetect-loadtest-server", daemon=True)
+			self._thread.start()
+		elif self.mode == "subprocess":
+			cmd = [
+				sys.executable, "-m", "uvicorn", "api.main:app",
+				"--host", self.host, "--port", str(self.port),
+				"--workers", str(self.workers), "--log-level", "warning",
+			]
+			self._proc = subprocess.Popen(cmd)
+			self.pid = self._proc.pid
+		else:
+			raise ValueError(f"Mode serveur inconnu: {self.mode} (thread|subprocess)")
+		self._wait_ready()
+
+	def _wait_ready(self) -> None:
+		deadline = time.monotonic() + STARTUP_TIMEOUT_S
+		while time.monotonic() < deadline:
+			if self._proc is not None and self._proc.poll() is not None:
+				raise RuntimeError(f"Le serveur s'est arrêté au démarrage (code {self._proc.returncode})")
+			try:
+				with socket.create_connection((self.host, self.port), timeout=0.5):
+					return
+			except OSError:
+				time.sleep(0.1)
+		raise RuntimeError(f"Serveur non joignable sur {self.base_url} après {STARTUP_TIMEOUT_S:.0f} s")
+
+	def stop(self) -> None:
+		if self._server is not None:
+			self._server.should_exit = True
+			if self._thread is not None:
+				self._thread.join(timeout=10.0)
+		if self._proc is not None:
+			self._proc.terminate()
+			try:
+				self._proc.wait(timeout=10.0)
+			except subprocess.TimeoutExpired:
+				self._proc.kill()
+
+
+def _proc_usage(pid: int) -> Optional[Tuple[float, int]]:
+	# (temps CPU cumulé en s, RSS en octets) du process et de ses enfants (workers uvicorn)
+	try:
+		import psutil
+
+		procs = [psutil.Process(pid)]
+		procs += procs[0].children(recursive=True)
+		cpu, rss = 0.0, 0
+		for p in procs:
+			try:
+				t = p.cpu_times()
+				cpu += t.user + t.system
+				rss += p.memory_info().rss
+			except psutil.Error:
+				continue
+		return cpu, rss
+	except ImportError:
+		pass
+	try:
+		with open(f"/proc/{pid}/stat", "r") as f:
+			fields = f.read().rsplit(")", 1)[1].split()
+		with open(f"/proc/{pid}/statm", "r") as f:
+			rss_pages = int(f.read().split()[1])
+		ticks = os.sysconf("SC_CLK_TCK")
+		return (int(fields[11]) + int(fields[12])) / ticks, rss_pages * os.sysconf("SC_PAGE_SIZE")
+	except (OSError, ValueError, IndexError):
+		return None
+
+
+class ResourceSampler:
+	"""CPU (%) et RSS (Mo) du serveur toutes les SAMPLE_INTERVAL_S secondes."""
+
+	def __init__(self, pid: int, interval: float = SAMPLE_INTERVAL_S) -> None:
+		self.pid = pid
+		self.interval = interval
+		self.samples: List[Dict[str, float]] = []
+		self._stop = threading.Event()
+		self._thread = threading.Thread(target=self._run, name="exodetect-loadtest-sampler", daemon=True)
+		self._t0 = time.perf_counter()
+
+	def _run(self) -> None:
+		prev = _proc_usage(self.pid)
+		prev_t = time.perf_counter()
+		while not self._stop.wait(self.interval):
+			usage = _proc_usage(self.pid)
+			now = time.perf_counter()
+			if usage is None or prev is None:
+				prev, prev_t = usage, now
+				continue
+			self.samples.append({
+				"t": round(now - self._t0, 3),
+				"cpu_percent": round(100.0 * (usage[0] - prev[0]) / max(now - prev_t, 1e-9), 1),
+				"rss_mb": round(usage[1] / 2 ** 20, 1),
+			})
+			prev, prev_t = usage, now
+
+	def __enter__(self) -> "ResourceSampler":
+		self._t0 = time.perf_counter()
+		self._thread.start()
+		return self
+
+	def __exit__(self, *exc: Any) -> None:
+		self._stop.set()
+		self._thread.join()
+
+
+async def _send(client: Any, base_url: str, scenario: Scenario, payload: bytes, t_offset: float, records: List[Dict[str, Any]]) -> None:
+	files = {"file": (f"{scenario.catalog}_{scenario.rows}.csv", payload, "text/csv")}
+	t0 = time.perf_counter()
+	status: Any
+	try:
+		resp = await client.post(f"{base_url}/{scenario.endpoint}", files=files)
+		status = resp.status_code
+	except Exception as e:
+		status = "timeout" if "Timeout" in type(e).__name__ else f"error:{type(e).__name__}"
+	records.append({"scenario": scenario.label, "t": t_offset, "latency": time.perf_counter() - t0, "status": status})
+
+
+async def run_load(
+	base_url: str,
+	scenarios: List[Scenario],
+	payloads: Dict[str, bytes],
+	rps: float,
+	duration: float,
+	max_in_flight: int = 256,
+	timeout: float = 60.0,
+	poisson: bool = False,
+	seed: int = 0,
+) -> Tuple[List[Dict[str, Any]], float]:
+	"""
+	Charge en boucle ouverte: les requêtes partent à la cadence cible quel que soit le temps de
+	réponse (sinon un serveur lent ralentit le générateur et masque la saturation). Au-delà de
+	max_in_flight requêtes en cours, les départs sont comptés comme "dropped".
+	"""
+	import httpx
+
+	rng = random.Random(seed)
+	weights = [s.weight for s in scenarios]
+	records: List[Dict[str, Any]] = []
+	tasks: List[asyncio.Task] = []
+	limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+	async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+		start = time.perf_counter()
+		next_t = 0.0
+		while next_t < duration:
+			delay = start + next_t - time.perf_counter()
+			if delay > 0:
+				await asyncio.sleep(delay)
+			scenario = rng.choices(scenarios, weights=weights)[0]
+			tasks = [t for t in tasks if not t.done()]
+			if len(tasks) >= max_in_flight:
+				records.append({"scenario": scenario.label, "t": next_t, "latency": None, "status": "dropped"})
+			else:
+				payload = payloads[f"{scenario.catalog}:{scenario.rows}"]
+				tasks.append(asyncio.create_task(_send(client, base_url, scenario, payload, next_t, records)))
+			next_t += rng.expovariate(rps) if poisson else 1.0 / rps
+		if tasks:
+			await asyncio.gather(*tasks)
+		elapsed = time.perf_counter() - start
+	return records, elapsed
+
+
+def _latency_stats(latencies: List[float]) -> Optional[Dict[str, float]]:
+	if not latencies:
+		return None
+	a = np.asarray(latencies, dtype=np.float64) * 1000.0
+	return {
+		"p50_ms": round(float(np.percentile(a, 50)), 2),
+		"p90_ms": round(float(np.percentile(a, 90)), 2),
+		"p99_ms": round(float(np.percentile(a, 99)), 2),
+		"max_ms": round(float(a.max()), 2),
+		"mean_ms": round(float(a.mean()), 2),
+	}
+
+
+def summarize(records: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+	sent = [r for r in records if r["status"] != "dropped"]
+	ok = [r for r in sent if isinstance(r["status"], int) and 200 <= r["status"] < 300]
+	statuses: Dict[str, int] = {}
+	for r in records:
+		statuses[str(r["status"])] = statuses.get(str(r["status"]), 0) + 1
+	n = max(len(records), 1)
+	return {
+		"requests": len(records),
+		"sent": len(sent),
+		"ok": len(ok),
+		"throughput_rps": round(len(ok) / max(elapsed, 1e-9), 3),
+		"error_rate": round((len(records) - len(ok)) / n, 4),
+		"rate_503": round(statuses.get("503", 0) / n, 4),
+		"timeout_rate": round(statuses.get("timeout", 0) / n, 4),
+		"dropped_rate": round(statuses.get("dropped", 0) / n, 4),
+		"statuses": statuses,
+		"latency_ok": _latency_stats([r["latency"] for r in ok]),
+		"latency_all": _latency_stats([r["latency"] for r in sent]),
+	}
+
+
+def timeline(records: List[Dict[str, Any]], resources: List[Dict[str, float]], bucket_s: float = 1.0) -> List[Dict[str, Any]]:
+	# Par seconde: requêtes envoyées, réussies, p50, et CPU/RSS serveur moyens
+	buckets: Dict[int, Dict[str, Any]] = {}
+	for r in records:
+		b = buckets.setdefault(int(r["t"] // bucket_s), {"sent": 0, "ok": 0, "lat": [], "cpu": [], "rss": []})
+		b["sent"] += 1
+		if isinstance(r["status"], int) and 200 <= r["status"] < 300:
+			b["ok"] += 1
+			b["lat"].append(r["latency"])
+	for s in resources:
+		b = buckets.setdefault(int(s["t"] // bucket_s), {"sent": 0, "ok": 0, "lat": [], "cpu": [], "rss": []})
+		b["cpu"].append(s["cpu_percent"])
+		b["rss"].append(s["rss_mb"])
+	out: List[Dict[str, Any]] = []
+	for k in sorted(buckets):
+		b = buckets[k]
+		out.append({
+			"t": k * bucket_s,
+			"sent": b["sent"],
+			"ok": b["ok"],
+			"p50_ms": round(float(np.median(b["lat"])) * 1000.0, 2) if b["lat"] else None,
+			"cpu_percent": round(float(np.mean(b["cpu"])), 1) if b["cpu"] else None,
+			"rss_mb": round(float(np.max(b["rss"])), 1) if b["rss"] else None,
+		})
+	return out
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.10) -> Dict[str, Any]:
+	"""Régression si le p99 ou le taux d'erreur augmente, ou si le débit baisse, au-delà du seuil."""
+	cur, base = current["overall"], baseline["overall"]
+	checks: Dict[str, Any] = {}
+	for key in ("p50_ms", "p99_ms"):
+		c = (cur.get("latency_ok") or {}).get(key)
+		b = (base.get("latency_ok") or {}).get(key)
+		if c is not None and b:
+			checks[key] = {"baseline": b, "current": c, "ratio": round(c / b, 3), "regression": c > b * (1.0 + threshold)}
+	checks["throughput_rps"] = {
+		"baseline": base["throughput_rps"],
+		"current": cur["throughput_rps"],
+		"regression": cur["throughput_rps"] < base["throughput_rps"] * (1.0 - threshold),
+	}
+	checks["error_rate"] = {
+		"baseline": base["error_rate"],
+		"current": cur["error_rate"],
+		"regression": cur["error_rate"] > base["error_rate"] + 0.01,
+	}
+	return checks
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Test de charge local de l'API (serveur lancé par le script)")
+	parser.add_argument("--mix", default=DEFAULT_MIX, help=f"endpoint:catalogue:taille:poids,... (défaut: {DEFAULT_MIX})")
+	parser.add_argument("--rps", type=float, default=10.0, help="Débit cible (requêtes/s)")
+	parser.add_argument("--duration", type=float, default=30.0, help="Durée d'injection (s)")
+	parser.add_argument("--poisson", action="store_true", help="Arrivées de Poisson plutôt qu'à intervalle fixe")
+	parser.add_argument("--max-in-flight", type=int, default=256)
+	parser.add_argument("--timeout", type=float, default=60.0)
+	parser.add_argument("--server", default="thread", choices=("thread", "subprocess"))
+	parser.add_argument("--workers", type=int, default=1, help="Workers uvicorn (mode subprocess)")
+	parser.add_argument("--host", default="127.0.0.1")
+	parser.add_argument("--port", type=int, default=0, help="0: port libre")
+	parser.add_argument("--url", default=None, help="Cibler un serveur déjà lancé au lieu d'en démarrer un")
+	parser.add_argument("--pid", type=int, default=None, help="PID du serveur --url (mesures CPU/RSS)")
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--output", default=DEFAULT_OUTPUT)
+	parser.add_argument("--baseline", default=None)
+	parser.add_argument("--threshold", type=float, default=0.10)
+	parser.add_argument("--fail-on-regression", action="store_true")
+	args = parser.parse_args()
+
+	try:
+		import httpx  # noqa: F401
+	except ImportError:
+		parser.error("httpx est requis pour le générateur de charge (pip install httpx)")
+
+	scenarios = parse_mix(args.mix)
+	payloads = build_payloads(scenarios, seed=args.seed)
+	server: Optional[LocalServer] = None
+	if args.url:
+		base_url, pid = args.url.rstrip("/"), args.pid
+	else:
+		server = LocalServer(args.server, args.host, args.port, args.workers)
+		server.start()
+		base_url, pid = server.base_url, server.pid
+	print(f"Cible: {base_url} ({args.rps} req/s pendant {args.duration} s, {len(scenarios)} scénarios)")
+
+	try:
+		if pid is not None:
+			with ResourceSampler(pid) as sampler:
+				records, elapsed = asyncio.run(run_load(
+					base_url, scenarios, payloads, args.rps, args.duration,
+					args.max_in_flight, args.timeout, args.poisson, args.seed,
+				))
+			resources = sampler.samples
+		else:
+			records, elapsed = asyncio.run(run_load(
+				base_url, scenarios, payloads, args.rps, args.duration,
+				args.max_in_flight, args.timeout, args.poisson, args.seed,
+			))
+			resources = []
+	finally:
+		if server is not None:
+			server.stop()
+
+	report: Dict[str, Any] = {
+		"meta": {
+			"created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+			"target_rps": args.rps,
+			"duration_s": args.duration,
+			"poisson": args.poisson,
+			"server": "external" if args.url else args.server,
+			"workers": args.workers,
+			"mix": [s._asdict() for s in scenarios],
+			"payload_bytes": {k: len(v) for k, v in payloads.items()},
+			"seed": args.seed,
+		},
+		"elapsed_s": round(elapsed, 3),
+		"overall": summarize(records, elapsed),
+		"scenarios": {
+			s.label: summarize([r for r in records if r["scenario"] == s.label], elapsed) for s in scenarios
+		},
+		"server_resources": {
+			"cpu_percent_max": max((s["cpu_percent"] for s in resources), default=None),
+			"rss_mb_max": max((s["rss_mb"] for s in resources), default=None),
+		},
+		"timeline": timeline(records, resources),
+	}
+
+	overall = report["overall"]
+	lat = overall["latency_ok"] or {}
+	print(
+		f"ok={overall['ok']}/{overall['requests']}  débit={overall['throughput_rps']} req/s  "
+		f"p50={lat.get('p50_ms')} ms  p99={lat.get('p99_ms')} ms  erreurs={overall['error_rate']:.2%}  "
+		f"503={overall['rate_503']:.2%}  CPU max={report['server_resources']['cpu_percent_max']}%  "
+		f"RSS max={report['server_resources']['rss_mb_max']} Mo"
+	)
+	for label, s in report["scenarios"].items():
+		sl = s["latency_ok"] or {}
+		print(f"  {label:<28} ok={s['ok']:>5}/{s['requests']:<5} p50={sl.get('p50_ms')} ms  p99={sl.get('p99_ms')} ms")
+
+	regression = False
+	if args.baseline:
+		with open(args.baseline, "r", encoding="utf-8") as f:
+			report["comparison"] = compare(report, json.load(f), args.threshold)
+		for key, c in report["comparison"].items():
+			print(f"  {key:<16} {c['baseline']} -> {c['current']}{'  RÉGRESSION' if c['regression'] else ''}")
+		regression = any(c["regression"] for c in report["comparison"].values())
+
+	os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+	with open(args.output, "w", encoding="utf-8") as f:
+		json.dump(report, f, ensure_ascii=False, indent=2)
+	print(f"Résultats: {args.output}")
+	if args.fail_on_regression and regression:
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,399 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .synthetic import GENERATORS, NEA_PREAMBLE, parse_size, to_csv_bytes, to_fits_bytes
+
+
+# Étapes mesurées et catalogues sur lesquels elles ont un sens
+STAGES: Dict[str, Tuple[str, ...]] = {
+	"parse": ("kepler", "k2", "toi"),
+	"adapt": ("kepler", "k2", "toi"),
+	"preprocess": ("kepler", "k2", "toi"),
+	"predict": ("kepler", "k2", "toi"),
+	"habitability": ("k2", "toi"),
+	"pipeline": ("kepler", "k2", "toi"),
+	"lightcurve": ("lightcurve",),
+	"fits": ("lightcurve",),
+	# Export NEA réel fourni (pas de générateur synthétique): backends comparés en latence et en précision
+	"backends": ("cumulative",),
+	# Lecture parallèle par plages d'un CSV sur disque, par nombre de workers (1 = pd.read_csv séquentiel)
+	"csv_workers": ("kepler",),
+}
+# Features du modèle synthétique par catalogue (mêmes listes que l'API)
+MODEL_FEATURES: Dict[str, List[str]] = {
+	"kepler": ["koi_period", "koi_duration", "koi_depth", "koi_prad"],
+	"k2": ["koi_period", "koi_prad"],
+	"toi": ["koi_period", "koi_duration", "koi_depth", "koi_prad"],
+}
+LABELS = {"CONFIRMED": 1, "CANDIDATE": 0, "FALSE POSITIVE": -1}
+DEFAULT_SIZES = "1k,100k"
+DEFAULT_OUTPUT = "benchmarks/results/latest.json"
+RSS_POLL_S = 0.005
+MODEL_TRAIN_ROWS = 5_000
+# Part de l'export KOI réservée à l'évaluation (découpage stratifié à graine fixe)
+BACKEND_TEST_FRACTION = 0.25
+DEFAULT_CATALOG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CSV_WORKERS = "1,2,4,8"
+# Étapes hors de la boucle des catalogues synthétiques en mémoire
+SEPARATE_STAGES = ("backends", "csv_workers")
+
+
+def _current_rss() -> Optional[int]:
+	# RSS courant (octets) via /proc (Linux); None ailleurs
+	try:
+		with open("/proc/self/statm", "r") as f:
+			return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+	except (OSError, ValueError, IndexError):
+		return None
+
+
+def _max_rss() -> int:
+	# Pic RSS du process (ru_maxrss: Ko sous Linux, octets sous macOS)
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+class PeakRss:
+	"""Pic RSS pendant un bloc: échantillonnage /proc toutes les 5 ms, sinon ru_maxrss."""
+
+	def __init__(self) -> None:
+		self.start = _current_rss()
+		self.peak = self.start or 0
+		self._stop = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+
+	def _poll(self) -> None:
+		while not self._stop.wait(RSS_POLL_S):
+			rss = _current_rss()
+			if rss is not None and rss > self.peak:
+				self.peak = rss
+
+	def __enter__(self) -> "PeakRss":
+		if self.start is not None:
+			self._thread = threading.Thread(target=self._poll, daemon=True)
+			self._thread.start()
+		return self
+
+	def __exit__(self, *exc: Any) -> None:
+		if self._thread is not None:
+			self._stop.set()
+			self._thread.join()
+			rss = _current_rss()
+			self.peak = max(self.peak, rss or 0)
+		else:
+			self.peak = _max_rss()
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+	a = np.asarray(samples, dtype=np.float64)
+	return {
+		"min": float(a.min()),
+		"p50": float(np.percentile(a, 50)),
+		"p90": float(np.percentile(a, 90)),
+		"p99": float(np.percentile(a, 99)),
+		"max": float(a.max()),
+		"mean": float(a.mean()),
+	}
+
+
+def measure(fn: Callable[[], Any], rows: int, repeat: int, warmup: int = 1) -> Dict[str, Any]:
+	for _ in range(warmup):
+		fn()
+	gc.collect()
+	samples: List[float] = []
+	with PeakRss() as mem:
+		for _ in range(repeat):
+			t0 = time.perf_counter()
+			fn()
+			samples.append(time.perf_counter() - t0)
+	stats = _percentiles(samples)
+	return {
+		"seconds": stats,
+		"rows_per_s": rows / stats["p50"] if stats["p50"] > 0 else None,
+		"peak_rss_mb": round(mem.peak / 2 ** 20, 2),
+		"rss_delta_mb": round((mem.peak - mem.start) / 2 ** 20, 2) if mem.start is not None else None,
+	}
+
+
+def _synthetic_model(catalog: str, backend: Optional[str], seed: int) -> Any:
+	# Modèle entraîné sur des données synthétiques à graine fixe: indépendant des modèles installés
+	from src.dataset_adapter import adapt_to_canonical
+	from src.model_backend import fit_model
+
+	features = MODEL_FEATURES[catalog]
+	canonical = adapt_to_canonical(GENERATORS[catalog](MODEL_TRAIN_ROWS, seed=seed + 100))
+	canonical = canonical.dropna(subset=features + ["koi_disposition"])
+	y = canonical["koi_disposition"].map(LABELS)
+	keep = y.notna().to_numpy()
+	return fit_model(canonical.loc[keep, features], y[keep].astype(int).to_numpy(), backend=backend, random_state=seed)
+
+
+def benchmark_backends(input_dir: str, repeat: int, seed: int, log: Callable[[str], None] = print) -> List[Dict[str, Any]]:
+	"""
+	Chaque backend (forêt 300 arbres, XGBoost hist) entraîné sur l'export cumulative_*.csv fourni:
+	latence d'inférence (1 ligne et lot de test complet) et précision / macro-F1 sur le jeu de test.
+	"""
+	from sklearn.metrics import accuracy_score, f1_score
+	from sklearn.model_selection import train_test_split
+	from src.data_cleaning import KEPLER_FEATURES, _robust_read_csv, clean_kepler_frame
+	from src.model_backend import BACKENDS, fit_model
+	from src.pipeline import CATALOGS, find_latest_input
+
+	path = find_latest_input(CATALOGS["kepler"]["pattern"], input_dir)
+	if path is None:
+		log(f"backends: aucun export {CATALOGS['kepler']['pattern']} dans {input_dir}, étape ignorée")
+		return []
+	cleaned = clean_kepler_frame(_robust_read_csv(path))
+	X = cleaned[KEPLER_FEATURES]
+	y = cleaned["label"].astype(int).to_numpy()
+	X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=BACKEND_TEST_FRACTION, stratify=y, random_state=seed)
+
+	results: List[Dict[str, Any]] = []
+	for backend in BACKENDS:
+		t0 = time.perf_counter()
+		model = fit_model(X_train, y_train, backend=backend, random_state=seed)
+		train_s = time.perf_counter() - t0
+		y_pred = model.predict(X_test)
+		quality = {
+			"accuracy": round(float(accuracy_score(y_test, y_pred)), 4),
+			"macro_f1": round(float(f1_score(y_test, y_pred, average="macro")), 4),
+			"train_s": round(train_s, 3),
+			"train_rows": int(len(X_train)),
+			"test_rows": int(len(X_test)),
+			"n_estimators": int(model.n_estimators),
+		}
+		for batch in (X_test.iloc[:1], X_test):
+			res = measure(lambda: model.predict_proba(batch), len(batch), repeat)
+			res.update({"stage": "backends", "catalog": "cumulative", "rows": int(len(batch)), "repeat": repeat, "backend": backend, **quality})
+			results.append(res)
+			log(
+				f"{'backends':<13}{backend:<14}{len(batch):>7}  p50={res['seconds']['p50'] * 1000:10.2f} ms  "
+				f"p90={res['seconds']['p90'] * 1000:10.2f} ms  accuracy={quality['accuracy']:.4f}  macro_f1={quality['macro_f1']:.4f}"
+			)
+	return results
+
+
+def benchmark_csv_workers(
+	sizes: List[int],
+	worker_counts: List[int],
+	repeat: int,
+	seed: int,
+	log: Callable[[str], None] = print,
+) -> List[Dict[str, Any]]:
+	"""
+	read_csv_parallel sur un CSV KOI synthétique écrit sur disque, pour chaque nombre de workers
+	(1 = pd.read_csv séquentiel, référence). Le résultat parallèle est comparé à la référence.
+	"""
+	import tempfile
+
+	from src.parallel_csv import read_csv_parallel
+
+	results: List[Dict[str, Any]] = []
+	for rows in sizes:
+		fd, path = tempfile.mkstemp(suffix=".csv")
+		try:
+			with os.fdopen(fd, "wb") as f:
+				f.write(to_csv_bytes(GENERATORS["kepler"](rows, seed=seed), preamble=None))
+			size = os.path.getsize(path)
+			reference = pd.read_csv(path, float_precision="round_trip")
+			for workers in worker_counts:
+				if workers <= 1:
+					fn: Callable[[], Any] = lambda: pd.read_csv(path, float_precision="round_trip")
+				else:
+					df = read_csv_parallel(path, workers=workers, min_bytes=0)
+					if df is None or not df.equals(reference):
+						log(f"csv_workers: {workers} workers, {rows} lignes: résultat différent de la lecture séquentielle, ignoré")
+						continue
+					fn = lambda: read_csv_parallel(path, workers=workers, min_bytes=0)
+				res = measure(fn, rows, repeat)
+				res.update({"stage": "csv_workers", "catalog": "kepler", "rows": rows, "repeat": repeat, "workers": workers, "input_bytes": size})
+				results.append(res)
+				log(
+					f"{'csv_workers':<13}{workers:<11}{rows:>10}  p50={res['seconds']['p50'] * 1000:10.2f} ms  "
+					f"p90={res['seconds']['p90'] * 1000:10.2f} ms  {res['rows_per_s'] or 0:14.0f} rows/s  "
+					f"peak_rss={res['peak_rss_mb']:.1f} MB"
+				)
+			del reference
+		finally:
+			os.unlink(path)
+			gc.collect()
+	return results
+
+
+def _environment() -> Dict[str, Any]:
+	import sklearn
+
+	try:
+		commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip() or None
+	except Exception:
+		commit = None
+	return {
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"cpu_count": os.cpu_count(),
+		"numpy": np.__version__,
+		"pandas": pd.__version__,
+		"sklearn": sklearn.__version__,
+		"git_commit": commit,
+	}
+
+
+def run_benchmarks(
+	stages: List[str],
+	sizes: List[int],
+	repeat: int = 5,
+	seed: int = 0,
+	backend: Optional[str] = None,
+	log: Callable[[str], None] = print,
+	catalog_dir: str = DEFAULT_CATALOG_DIR,
+	csv_workers: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+	# Imports différés: l'API charge ses modèles à l'import. Pas de construction du catalogue
+	# en arrière-plan pendant les mesures
+	os.environ.setdefault("EXODETECT_CATALOG_AUTOBUILD", "0")
+	from api import main as api
+	from src.dataset_adapter import adapt_to_canonical
+	from src.habitability import compute_habitability_for_row
+	from src.preprocessing import apply_inference_preprocessing, compute_preprocessor_config
+
+	results: List[Dict[str, Any]] = []
+	models: Dict[str, Any] = {}
+	catalogs = sorted({c for s in stages if s not in SEPARATE_STAGES for c in STAGES[s]})
+	for catalog in catalogs:
+		cat_stages = [s for s in stages if s not in SEPARATE_STAGES and catalog in STAGES[s]]
+		for rows in sizes:
+			frame = GENERATORS[catalog](rows, seed=seed)
+			content = to_csv_bytes(frame, preamble=None if catalog == "lightcurve" else NEA_PREAMBLE)
+			fits_content = to_fits_bytes(frame, seed=seed) if "fits" in cat_stages else b""
+			del frame
+			raw = api._read_uploaded_csv(content)
+			canonical = adapt_to_canonical(raw) if catalog in MODEL_FEATURES else None
+			ctx: Dict[str, Callable[[], Any]] = {
+				"parse": lambda: api._read_uploaded_csv(content),
+				"adapt": lambda: adapt_to_canonical(raw),
+				"habitability": lambda: [compute_habitability_for_row(r) for r in raw.to_dict(orient="records")],
+				"pipeline": lambda: api._run_prediction_pipeline(content),
+				"lightcurve": lambda: api._simple_classification(*api._extract_time_flux(api._read_uploaded_csv(content))),
+				"fits": lambda: api._simple_classification(*api._extract_time_flux(api._read_uploaded_csv(fits_content))),
+			}
+			if canonical is not None:
+				features = MODEL_FEATURES[catalog]
+				cfg = compute_preprocessor_config(canonical, features)
+				prepared, _ = apply_inference_preprocessing(canonical, cfg)
+				if "predict" in cat_stages and catalog not in models:
+					models[catalog] = _synthetic_model(catalog, backend, seed)
+				ctx["preprocess"] = lambda: apply_inference_preprocessing(canonical, cfg)
+				ctx["predict"] = lambda: models[catalog].predict_proba(prepared)
+
+			for stage in cat_stages:
+				res = measure(ctx[stage], rows, repeat)
+				res.update({"stage": stage, "catalog": catalog, "rows": rows, "repeat": repeat, "input_bytes": len(fits_content if stage == "fits" else content)})
+				results.append(res)
+				log(
+					f"{stage:<13}{catalog:<11}{rows:>10}  p50={res['seconds']['p50'] * 1000:10.2f} ms  "
+					f"p90={res['seconds']['p90'] * 1000:10.2f} ms  {res['rows_per_s'] or 0:14.0f} rows/s  "
+					f"peak_rss={res['peak_rss_mb']:.1f} MB"
+				)
+			del content, fits_content, raw, canonical, ctx
+			gc.collect()
+
+	if "backends" in stages:
+		results.extend(benchmark_backends(catalog_dir, repeat, seed, log))
+	if "csv_workers" in stages:
+		worker_counts = csv_workers or [int(w) for w in DEFAULT_CSV_WORKERS.split(",")]
+		results.extend(benchmark_csv_workers(sizes, worker_counts, repeat, seed, log))
+
+	return {
+		"meta": {
+			"created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+			"seed": seed,
+			"repeat": repeat,
+			"backend": backend,
+			"sizes": sizes,
+			"stages": stages,
+			"environment": _environment(),
+		},
+		"results": results,
+	}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.10) -> List[Dict[str, Any]]:
+	"""Ratio des médianes (courant / baseline) par (étape, catalogue, taille) présents des deux côtés."""
+	base = {(r["stage"], r["catalog"], r["rows"], r.get("backend"), r.get("workers")): r for r in baseline.get("results", [])}
+	rows: List[Dict[str, Any]] = []
+	for r in current.get("results", []):
+		b = base.get((r["stage"], r["catalog"], r["rows"], r.get("backend"), r.get("workers")))
+		if b is None:
+			continue
+		ratio = r["seconds"]["p50"] / max(b["seconds"]["p50"], 1e-12)
+		status = "regression" if ratio > 1.0 + threshold else ("improvement" if ratio < 1.0 - threshold else "same")
+		rows.append({
+			"stage": r["stage"],
+			"catalog": r["catalog"],
+			"rows": r["rows"],
+			"backend": r.get("backend"),
+			"workers": r.get("workers"),
+			"baseline_p50": b["seconds"]["p50"],
+			"current_p50": r["seconds"]["p50"],
+			"ratio": round(ratio, 3),
+			"rss_delta_mb": round(r["peak_rss_mb"] - b["peak_rss_mb"], 2),
+			"status": status,
+		})
+	return rows
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Benchmarks reproductibles: ingestion, adaptation, préprocessing, inférence, habitabilité")
+	parser.add_argument("--stages", default=",".join(STAGES), help=f"Étapes (défaut: {','.join(STAGES)})")
+	parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Tailles séparées par des virgules, ex: 1k,100k,1M,10M")
+	parser.add_argument("--repeat", type=int, default=5)
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--backend", default=None, help="Backend du modèle synthétique (random_forest|xgboost)")
+	parser.add_argument("--catalog-dir", default=DEFAULT_CATALOG_DIR, help="Dossier de l'export cumulative_*.csv (étape backends)")
+	parser.add_argument("--csv-workers", default=DEFAULT_CSV_WORKERS, help="Nombres de workers mesurés (étape csv_workers)")
+	parser.add_argument("--output", default=DEFAULT_OUTPUT)
+	parser.add_argument("--baseline", default=None, help="Résultats JSON de référence à comparer")
+	parser.add_argument("--threshold", type=float, default=0.10, help="Écart relatif de p50 considéré significatif")
+	parser.add_argument("--fail-on-regression", action="store_true", help="Code de sortie 1 si une étape régresse")
+	args = parser.parse_args()
+
+	stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+	unknown = [s for s in stages if s not in STAGES]
+	if unknown:
+		parser.error(f"Étapes inconnues: {unknown} (disponibles: {list(STAGES)})")
+	sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+
+	report = run_benchmarks(
+		stages, sizes, repeat=args.repeat, seed=args.seed, backend=args.backend, catalog_dir=args.catalog_dir,
+		csv_workers=[int(w) for w in args.csv_workers.split(",") if w.strip()],
+	)
+	if args.baseline:
+		with open(args.baseline, "r", encoding="utf-8") as f:
+			baseline = json.load(f)
+		report["comparison"] = {"baseline": os.path.abspath(args.baseline), "threshold": args.threshold, "rows": compare(report, baseline, args.threshold)}
+		for r in report["comparison"]["rows"]:
+			print(f"{r['stage']:<13}{r['backend'] or r.get('workers') or r['catalog']:<14}{r['rows']:>7}  x{r['ratio']:<7} {r['status']}")
+
+	os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+	with open(args.output, "w", encoding="utf-8") as f:
+		json.dump(report, f, ensure_ascii=False, indent=2)
+	print(f"Résultats: {args.output}")
+
+	if args.fail_on_regression and any(r["status"] == "regression" for r in report.get("comparison", {}).get("rows", [])):
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,198 @@
+import io
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Colonnes des produits FITS Kepler/TESS (extension LIGHTCURVE) et leur TFORM
+FITS_LIGHTCURVE_COLUMNS: Dict[str, Tuple[str, str]] = {
+	"time": ("TIME", "D"),
+	"flux": ("PDCSAP_FLUX", "E"),
+	"flux_err": ("PDCSAP_FLUX_ERR", "E"),
+}
+_FITS_DTYPES = {"D": ">f8", "E": ">f4", "J": ">i4"}
+
+# Préambule de commentaires comme dans les exports NEA (sauté par header_scan / read_csv(comment="#"))
+NEA_PREAMBLE = (
+	"# This file was produced by the NASA Exoplanet Archive  http://exoplanetarchive.ipac.caltech.edu\n"
+	"# (synthetic benchmark data)\n"
+	"#\n"
+)
+
+
+def _dispositions(rng: np.random.Generator, n: int, codes: List[str], p: List[float]) -> np.ndarray:
+	return rng.choice(np.array(codes, dtype=object), size=n, p=p)
+
+
+def _with_missing(rng: np.random.Generator, values: np.ndarray, frac: float) -> np.ndarray:
+	# Trous aléatoires (NaN) comme dans les vrais exports
+	if frac <= 0:
+		return values
+	out = values.astype(np.float64, copy=True)
+	out[rng.random(values.shape[0]) < frac] = np.nan
+	return out
+
+
+def _planet_block(rng: np.random.Generator, n: int) -> Dict[str, np.ndarray]:
+	# Distributions log-normales grossièrement calées sur le KOI cumulative
+	period = np.exp(rng.normal(2.5, 1.3, n)).clip(0.25, 1500.0)
+	prad = np.exp(rng.normal(0.9, 0.9, n)).clip(0.3, 200.0)
+	steff = rng.normal(5600.0, 800.0, n).clip(2500.0, 12000.0)
+	srad = np.exp(rng.normal(0.0, 0.35, n)).clip(0.1, 30.0)
+	smass = np.exp(rng.normal(0.0, 0.25, n)).clip(0.08, 5.0)
+	duration = (13.0 * (period / 365.0) ** (1.0 / 3.0) * srad * rng.uniform(0.3, 1.0, n)).clip(0.2, 48.0)
+	depth = ((prad / (srad * 109.1)) ** 2 * 1e6 * rng.uniform(0.8, 1.2, n)).clip(5.0, 5e5)
+	a_au = (smass * (period / 365.25) ** 2) ** (1.0 / 3.0)
+	lum = srad ** 2 * (steff / 5778.0) ** 4
+	insol = lum / np.maximum(a_au, 1e-4) ** 2
+	teq = 278.0 * insol ** 0.25
+	return {
+		"period": period, "prad": prad, "steff": steff, "srad": srad, "smass": smass,
+		"duration": duration, "depth": depth, "insol": insol, "teq": teq,
+		"ra": rng.uniform(0.0, 360.0, n), "dec": np.degrees(np.arcsin(rng.uniform(-1.0, 1.0, n))),
+		"dist": np.exp(rng.normal(5.5, 0.8, n)).clip(1.3, 8000.0),
+	}
+
+
+def koi_frame(n: int, seed: int = 0, missing: float = 0.02) -> pd.DataFrame:
+	"""Catalogue façon KOI cumulative (Kepler)."""
+	rng = np.random.default_rng(seed)
+	b = _planet_block(rng, n)
+	return pd.DataFrame({
+		"kepid": rng.integers(757_000, 12_900_000, n),
+		"kepoi_name": [f"K{i // 10 + 1:05d}.{i % 10 + 1:02d}" for i in range(n)],
+		"koi_disposition": _dispositions(rng, n, ["CONFIRMED", "CANDIDATE", "FALSE POSITIVE"], [0.3, 0.2, 0.5]),
+		"koi_score": rng.random(n).round(3),
+		"koi_period": _with_missing(rng, b["period"], missing),
+		"koi_duration": _with_missing(rng, b["duration"], missing),
+		"koi_depth": _with_missing(rng, b["depth"], missing),
+		"koi_prad": _with_missing(rng, b["prad"], missing),
+		"koi_teq": b["teq"].round(0),
+		"koi_insol": b["insol"].round(2),
+		"koi_steff": b["steff"].round(0),
+		"koi_srad": b["srad"].round(3),
+		"ra": b["ra"].round(6),
+		"dec": b["dec"].round(6),
+	})
+
+
+def k2_frame(n: int, seed: int = 0, missing: float = 0.02) -> pd.DataFrame:
+	"""Catalogue façon K2 Planets and Candidates (colonnes pl_* / st_* utilisées par l'habitabilité)."""
+	rng = np.random.default_rng(seed + 1)
+	b = _planet_block(rng, n)
+	return pd.DataFrame({
+		"pl_name": [f"K2-{i // 3 + 1} {'bcd'[i % 3]}" for i in range(n)],
+		"hostname": [f"K2-{i // 3 + 1}" for i in range(n)],
+		"disposition": _dispositions(rng, n, ["CONFIRMED", "CANDIDATE", "FALSE POSITIVE"], [0.5, 0.4, 0.1]),
+		"discoverymethod": "Transit",
+		"pl_orbper": _with_missing(rng, b["period"], missing),
+		"pl_rade": _with_missing(rng, b["prad"], missing),
+		"pl_bmasse": _with_missing(rng, b["prad"] ** 2.06, 0.6),
+		"pl_insol": b["insol"].round(2),
+		"pl_eqt": _with_missing(rng, b["teq"].round(0), 0.3),
+		"st_teff": b["steff"].round(0),
+		"st_rad": b["srad"].round(4),
+		"st_mass": b["smass"].round(4),
+		"ra": b["ra"].round(7),
+		"dec": b["dec"].round(7),
+		"sy_dist": b["dist"].round(4),
+	})
+
+
+def toi_frame(n: int, seed: int = 0, missing: float = 0.02) -> pd.DataFrame:
+	"""Catalogue façon TESS TOI (dispositions TFOPWG, durée en heures)."""
+	rng = np.random.default_rng(seed + 2)
+	b = _planet_block(rng, n)
+	return pd.DataFrame({
+		"toi": np.round(1000.01 + np.arange(n) * 0.01, 2),
+		"tid": rng.integers(1_000_000, 500_000_000, n),
+		"tfopwg_disp": _dispositions(rng, n, ["PC", "APC", "CP", "KP", "FP", "FA"], [0.55, 0.05, 0.12, 0.08, 0.15, 0.05]),
+		"ra": b["ra"].round(7),
+		"dec": b["dec"].round(7),
+		"pl_orbper": _with_missing(rng, b["period"], missing),
+		"pl_trandurh": _with_missing(rng, b["duration"], missing),
+		"pl_trandep": _with_missing(rng, b["depth"], missing),
+		"pl_rade": _with_missing(rng, b["prad"], missing),
+		"pl_insol": b["insol"].round(2),
+		"pl_eqt": b["teq"].round(0),
+		"st_dist": b["dist"].round(3),
+		"st_teff": b["steff"].round(0),
+		"st_rad": b["srad"].round(4),
+	})
+
+
+def light_curve_frame(n: int, seed: int = 0, cadence_days: float = 2.0 / 1440.0) -> pd.DataFrame:
+	"""Courbe de lumière normalisée (cadence TESS 2 min) avec transits en boîte et bruit gaussien."""
+	rng = np.random.default_rng(seed + 3)
+	time = 2459000.0 + np.arange(n) * cadence_days
+	period, duration, depth = rng.uniform(1.0, 10.0), rng.uniform(0.05, 0.2), rng.uniform(5e-4, 1e-2)
+	phase = np.mod(time - time[0], period)
+	flux = 1.0 + rng.normal(0.0, 5e-4, n)
+	flux[phase < duration] -= depth
+	return pd.DataFrame({"time": time, "flux": flux, "flux_err": np.full(n, 5e-4)})
+
+
+GENERATORS: Dict[str, Callable[..., pd.DataFrame]] = {
+	"kepler": koi_frame,
+	"k2": k2_frame,
+	"toi": toi_frame,
+	"lightcurve": light_curve_frame,
+}
+
+
+def to_csv_bytes(df: pd.DataFrame, preamble: Optional[str] = NEA_PREAMBLE) -> bytes:
+	buf = io.StringIO()
+	if preamble:
+		buf.write(preamble)
+	df.to_csv(buf, index=False)
+	return buf.getvalue().encode("utf-8")
+
+
+def parse_size(text: str) -> int:
+	# "1k", "250k", "10M" ou entier brut
+	text = text.strip().lower()
+	factor = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+	return int(float(text[:-1] if factor > 1 else text) * factor)
+
+
+def _fits_header(cards: List[Tuple[str, Any]]) -> bytes:
+	lines = []
+	for key, value in cards:
+		if isinstance(value, bool):
+			text = f"{'T' if value else 'F':>20}"
+		elif isinstance(value, str):
+			text = f"'{value:<8}'"
+		else:
+			text = f"{value:>20}"
+		lines.append(f"{key:<8}= {text}".ljust(80))
+	lines.append("END".ljust(80))
+	raw = "".join(lines).encode("ascii")
+	return raw + b" " * (-len(raw) % 2880)
+
+
+def to_fits_bytes(df: pd.DataFrame, seed: int = 0, flagged: float = 0.01, missing: float = 0.005) -> bytes:
+	"""
+	Courbe de lumière au format produit Kepler/TESS: HDU primaire vide + table binaire LIGHTCURVE
+	(TIME, PDCSAP_FLUX[_ERR], QUALITY). Une fraction de points est flaggée dans QUALITY, une autre a un flux NaN.
+	"""
+	rng = np.random.default_rng(seed + 4)
+	n = len(df)
+	columns = [(fits_name, tform, df[name].to_numpy(np.float64)) for name, (fits_name, tform) in FITS_LIGHTCURVE_COLUMNS.items() if name in df]
+	quality = np.where(rng.random(n) < flagged, 1 << rng.integers(0, 12, n), 0)
+	columns.append(("QUALITY", "J", quality))
+	rec = np.empty(n, dtype=[(name, _FITS_DTYPES[tform]) for name, tform, _ in columns])
+	for name, _, values in columns:
+		rec[name] = values
+	if "PDCSAP_FLUX" in rec.dtype.names:
+		rec["PDCSAP_FLUX"][rng.random(n) < missing] = np.nan
+	data = rec.tobytes()
+	primary = _fits_header([("SIMPLE", True), ("BITPIX", 8), ("NAXIS", 0), ("EXTEND", True)])
+	cards: List[Tuple[str, Any]] = [
+		("XTENSION", "BINTABLE"), ("BITPIX", 8), ("NAXIS", 2), ("NAXIS1", rec.dtype.itemsize), ("NAXIS2", n),
+		("PCOUNT", 0), ("GCOUNT", 1), ("TFIELDS", len(columns)),
+	]
+	for i, (name, tform, _) in enumerate(columns, start=1):
+		cards += [(f"TTYPE{i}", name), (f"TFORM{i}", tform)]
+	cards.append(("EXTNAME", "LIGHTCURVE"))
+	return primary + _fits_header(cards) + data + b"\x00" * (-len(data) % 2880)
@@ -0,0 +1,462 @@
+import argparse
+import contextlib
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+	import fcntl
+except ImportError:  # Windows: pas de verrou inter-processus
+	fcntl = None  # type: ignore[assignment]
+
+import numpy as np
+import pandas as pd
+
+from .catalog_query import CatalogQueryEngine
+from .columnar_store import is_columnar_store, read_columnar, read_manifest, write_columnar
+from .data_cleaning import _normalize_columns, _robust_read_csv
+from .dataset_adapter import adapt_to_canonical
+from .habitability import compute_habitability_for_row, habitability_summary
+from .pipeline import CATALOGS, file_sha256, find_latest_input
+from .preprocessing import FEATURES, apply_inference_preprocessing, compute_preprocessor_config, load_preprocessor_config
+from .sky_index import SkyIndex
+from .train_model_k2 import FEATURES_K2
+
+
+logger = logging.getLogger("exodetect.catalog")
+
+# Table précalculée (store colonne): scores de chaque modèle + habitabilité des catalogues NEA fournis
+CATALOG_STORE = os.environ.get("EXODETECT_CATALOG_PATH", "models/catalog_store")
+# Champs indexés pour la recherche (clé normalisée: minuscules, sans espaces/tirets/soulignés)
+LOOKUP_FIELDS = ("object_id", "kepoi_name", "kepler_name", "toi", "pl_name", "hostname")
+TEXT_COLUMNS = ("object_id", "kepoi_name", "kepler_name", "toi", "pl_name", "hostname", "disposition")
+# Ordre des colonnes de predict_proba (comme l'API)
+LABEL_ORDER: List[int] = [-1, 0, 1]
+PROBA_SUFFIXES = ("false_positive", "candidate", "confirmed")
+# Modèle de référence par catalogue (repli: kepler)
+PRIMARY_MODELS: Dict[str, str] = {"kepler": "kepler", "k2": "k2", "toi": "toi"}
+# Modèles servis par l'API: fichier, features, config de préprocessing (pour la construction hors ligne)
+MODEL_SPECS: Dict[str, Dict[str, Any]] = {
+	"kepler": {"file": "model.joblib", "features": FEATURES, "preproc": "preprocessor_config.json"},
+	"k2": {"file": "model_k2.joblib", "features": FEATURES_K2, "preproc": "preprocessor_config.json"},
+	"toi": {"file": "model_toi.joblib", "features": FEATURES, "preproc": "preprocessor_toi.json"},
+}
+# Colonnes KOI -> entrées du calcul d'habitabilité (K2/TOI utilisent déjà les noms NEA)
+HABITABILITY_ALIASES: Dict[str, Dict[str, str]] = {
+	"kepler": {
+		"koi_steff": "st_teff", "koi_srad": "st_rad", "koi_slogg": "st_logg", "koi_period": "pl_orbper",
+		"koi_prad": "pl_rade", "koi_teq": "pl_eqt", "koi_insol": "pl_insol",
+	},
+}
+# Sans st_mass (KOI, TOI), la masse stellaire vient de st_logg et st_rad
+HABITABILITY_INPUTS = ("st_teff", "st_rad", "st_mass", "st_logg", "pl_insol", "pl_orbper", "pl_rade", "pl_bmasse", "pl_bmassj", "pl_massj", "pl_eqt", "st_dist", "sy_dist")
+# Résultats d'habitabilité stockés (float64: mêmes valeurs que POST /habitability)
+HABITABILITY_COLUMNS: Dict[str, str] = {
+	"radius": "hab_radius",
+	"temp_eq": "hab_temp_eq",
+	"habitability_score": "hab_score",
+	"gravity_m_s2": "hab_gravity",
+	"luminosity_w_m2": "hab_luminosity",
+	"esi": "hab_esi",
+	"distance_pc": "hab_distance_pc",
+}
+
+
+def normalize_key(value: Any) -> str:
+	return re.sub(r"[\s\-_]+", "", str(value)).lower()
+
+
+def _text(values: Any) -> pd.Series:
+	return pd.Series(values, dtype=object).where(pd.notna(values), "").astype(str).str.strip()
+
+
+def _identifiers(catalog: str, raw: pd.DataFrame) -> pd.DataFrame:
+	n = len(raw)
+	empty = pd.Series([""] * n, dtype=object)
+	col = lambda c: _text(raw[c].to_numpy()) if c in raw.columns else empty  # noqa: E731
+	ids = pd.DataFrame({c: empty for c in TEXT_COLUMNS})
+	if catalog == "kepler":
+		ids["kepoi_name"] = col("kepoi_name")
+		ids["kepler_name"] = col("kepler_name")
+		ids["pl_name"] = ids["kepler_name"]
+		# Hôte d'une planète confirmée: "Kepler-227 b" -> "Kepler-227"
+		ids["hostname"] = ids["kepler_name"].str.replace(r"\s+\S+$", "", regex=True)
+		ids["object_id"] = ids["kepoi_name"]
+		ids["disposition"] = col("koi_disposition")
+	elif catalog == "toi":
+		toi = pd.to_numeric(raw["toi"], errors="coerce") if "toi" in raw.columns else pd.Series(np.nan, index=raw.index)
+		# Numéro TOI toujours à deux décimales (1000.1 -> "1000.10")
+		ids["toi"] = [f"{v:.2f}" if pd.notna(v) else "" for v in toi]
+		ids["pl_name"] = ["TOI-" + t if t else "" for t in ids["toi"]]
+		tid = pd.to_numeric(raw["tid"], errors="coerce") if "tid" in raw.columns else pd.Series(np.nan, index=raw.index)
+		ids["hostname"] = [f"TIC {int(v)}" if pd.notna(v) else "" for v in tid]
+		ids["object_id"] = ids["pl_name"]
+		ids["disposition"] = col("tfopwg_disp")
+	else:
+		ids["pl_name"] = col("pl_name")
+		ids["hostname"] = col("hostname")
+		ids["object_id"] = ids["pl_name"]
+		ids["disposition"] = col("disposition")
+	ids["catalog"] = catalog
+	for c in ("ra", "dec"):
+		ids[c] = pd.to_numeric(raw[c], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan) if c in raw.columns else np.nan
+	return ids
+
+
+def _habitability(catalog: str, raw: pd.DataFrame, names: pd.Series) -> pd.DataFrame:
+	# Même calcul que POST /habitability, ligne par ligne (hors ligne: coût payé une fois)
+	source = raw.rename(columns=HABITABILITY_ALIASES.get(catalog, {}))
+	inputs = source[[c for c in HABITABILITY_INPUTS if c in source.columns]].copy()
+	inputs["pl_name"] = names.where(names != "", None).to_numpy()
+	results = [compute_habitability_for_row(r) for r in inputs.to_dict(orient="records")]
+	out = pd.DataFrame({
+		col: np.array([np.nan if r[key] is None else r[key] for r in results], dtype=np.float64)
+		for key, col in HABITABILITY_COLUMNS.items()
+	})
+	out["hab_zone"] = np.array([r["zone_habitable"] for r in results], dtype=bool)
+	out["hab_star_class"] = pd.Categorical([r["star_class"] or "" for r in results])
+	return out
+
+
+def _score(canonical: pd.DataFrame, entry: Dict[str, Any]) -> np.ndarray:
+	# Probabilités (n, 3) dans l'ordre LABEL_ORDER; NaN pour les lignes non prédictibles
+	out = np.full((len(canonical), len(LABEL_ORDER)), np.nan, dtype=np.float32)
+	features = entry["features"]
+	cfg = entry.get("cfg") or {}
+	stats = cfg.get("stats") or {}
+	if all(f in stats for f in features):
+		cfg = {"features": features, "stats": {f: stats[f] for f in features}}
+	else:
+		cfg = compute_preprocessor_config(canonical, features)
+	work, _ = apply_inference_preprocessing(canonical, cfg)
+	if work.empty:
+		return out
+	proba = entry["model"].predict_proba(work[features])
+	out[canonical.index.get_indexer(work.index)] = proba
+	return out
+
+
+def _source_signature(path: str) -> Dict[str, Any]:
+	st = os.stat(path)
+	return {"file": os.path.basename(path), "size": st.st_size, "mtime": int(st.st_mtime)}
+
+
+def catalog_signature(registry: Dict[str, Dict[str, Any]], source_dir: str) -> Dict[str, Any]:
+	"""Versions des modèles chargés + exports sources: la table est reconstruite quand l'une change."""
+	sources = {}
+	for name, spec in CATALOGS.items():
+		path = find_latest_input(spec["pattern"], source_dir)
+		if path is not None:
+			sources[name] = _source_signature(path)
+	versions = {name: entry.get("version") for name, entry in registry.items() if entry.get("model") is not None}
+	return {"model_versions": versions, "sources": sources}
+
+
+def build_catalog(registry: Dict[str, Dict[str, Any]], source_dir: str = ".", store_dir: str = CATALOG_STORE) -> str:
+	"""
+	Score chaque objet des exports NEA (cumulative/k2pandc/TOI) avec chaque modèle chargé, calcule son
+	habitabilité et écrit le tout dans un store colonne (une ligne par objet).
+	"""
+	models = {name: entry for name, entry in registry.items() if entry.get("model") is not None}
+	frames: List[pd.DataFrame] = []
+	for catalog, spec in CATALOGS.items():
+		path = find_latest_input(spec["pattern"], source_dir)
+		if path is None:
+			continue
+		raw = _normalize_columns(_robust_read_csv(path))
+		# k2pandc: plusieurs solutions par planète, seule la solution par défaut est retenue
+		if "default_flag" in raw.columns:
+			raw = raw[pd.to_numeric(raw["default_flag"], errors="coerce") == 1]
+		raw = raw.reset_index(drop=True)
+		ids = _identifiers(catalog, raw)
+		canonical = adapt_to_canonical(raw).reset_index(drop=True)
+		part = pd.concat([ids, canonical[FEATURES].apply(pd.to_numeric, errors="coerce").astype(np.float64)], axis=1)
+		primary = PRIMARY_MODELS.get(catalog, "kepler")
+		part["model"] = primary if primary in models else ("kepler" if "kepler" in models else "")
+		for name, entry in models.items():
+			try:
+				proba = _score(canonical, entry)
+			except Exception as e:
+				logger.warning("Catalog %s: model %s failed: %s", catalog, name, e)
+				proba = np.full((len(canonical), len(LABEL_ORDER)), np.nan, dtype=np.float32)
+			for k, suffix in enumerate(PROBA_SUFFIXES):
+				part[f"p_{name}_{suffix}"] = proba[:, k]
+		part = pd.concat([part, _habitability(catalog, raw, ids["pl_name"].where(ids["pl_name"] != "", ids["object_id"]))], axis=1)
+		frames.append(part)
+		logger.info("Catalog %s: %d objects from %s", catalog, len(part), path)
+	if not frames:
+		raise FileNotFoundError(f"Aucun export NEA (cumulative/k2pandc/TOI) dans {source_dir}")
+	table = pd.concat(frames, ignore_index=True)
+	# Colonnes de probabilités absentes d'un catalogue (modèle en échec): NaN
+	for c in table.columns:
+		if c.startswith("p_"):
+			table[c] = table[c].astype(np.float32)
+	for c in ("catalog", "model", "hab_star_class"):
+		table[c] = table[c].astype("category")
+	meta = {**catalog_signature(registry, source_dir), "models": sorted(models), "built": time.strftime("%Y-%m-%dT%H:%M:%S")}
+	return write_columnar(table, store_dir, meta=meta)
+
+
+def _nan_none(value: Any) -> Optional[float]:
+	value = float(value)
+	return None if value != value else value
+
+
+class CatalogTable:
+	"""
+	Table catalogue mappée en mémoire + index clé normalisée -> lignes, construit au chargement.
+	Une recherche est un accès dict suivi de quelques lectures de tableaux NumPy.
+	"""
+
+	def __init__(self, store_dir: str) -> None:
+		self.store_dir = store_dir
+		self.meta: Dict[str, Any] = read_manifest(store_dir).get("meta", {})
+		frame = read_columnar(store_dir)
+		self.rows = int(frame.shape[0])
+		self.columns: Dict[str, np.ndarray] = {}
+		self.categories: Dict[str, List[str]] = {}
+		for c in frame.columns:
+			if isinstance(frame[c].dtype, pd.CategoricalDtype):
+				self.columns[c] = frame[c].cat.codes.to_numpy()
+				self.categories[c] = [str(v) for v in frame[c].cat.categories]
+			else:
+				self.columns[c] = frame[c].to_numpy()
+		self.models: List[str] = list(self.meta.get("models", []))
+		self.index: Dict[str, Dict[str, np.ndarray]] = {}
+		positions = pd.Series(np.arange(self.rows))
+		for field in LOOKUP_FIELDS:
+			keys = pd.Series(self.columns[field]).astype(str).str.replace(r"[\s\-_]+", "", regex=True).str.lower()
+			self.index[field] = {k: v for k, v in positions.groupby(keys.to_numpy()).indices.items() if k}
+		# Index triés par colonne numérique pour les requêtes par plages (GET /catalog/query)
+		self.query_engine = CatalogQueryEngine(self.columns, self.categories)
+		# KD-tree des positions pour les recherches de cône et le cross-match
+		self.sky_index = SkyIndex(self.columns["ra"], self.columns["dec"])
+
+	def lookup(self, query: str, field: Optional[str] = None, limit: int = 50) -> List[int]:
+		key = normalize_key(query)
+		rows: List[int] = []
+		seen = set()
+		for f in ([field] if field else LOOKUP_FIELDS):
+			for i in self.index.get(f, {}).get(key, ()):
+				if i not in seen:
+					seen.add(i)
+					rows.append(int(i))
+		return rows[:limit]
+
+	def _category(self, column: str, i: int) -> str:
+		code = int(self.columns[column][i])
+		return self.categories[column][code] if code >= 0 else ""
+
+	def _scores(self, i: int, models: List[str]) -> Dict[str, Any]:
+		cols = self.columns
+		scores: Dict[str, Any] = {}
+		for name in models:
+			proba = [float(cols[f"p_{name}_{s}"][i]) for s in PROBA_SUFFIXES]
+			if proba[0] != proba[0]:
+				continue
+			best = int(np.argmax(proba))
+			scores[name] = {
+				"label": LABEL_ORDER[best],
+				"confidence": round(proba[best], 4),
+				"proba": {s: round(p, 4) for s, p in zip(PROBA_SUFFIXES, proba)},
+			}
+		return scores
+
+	def summaries(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+		"""
+		Forme compacte (cross-match) de plusieurs lignes: identifiants, position, score du modèle
+		du catalogue. Colonnes extraites une fois pour toutes les lignes (pas de lecture par objet).
+		"""
+		cols = self.columns
+		rows = np.asarray(rows, dtype=np.int64)
+		texts = {c: [str(v) or None for v in cols[c][rows].tolist()] for c in TEXT_COLUMNS}
+		catalog = [self.categories["catalog"][k] if k >= 0 else "" for k in cols["catalog"][rows].tolist()]
+		models = [self.categories["model"][k] if k >= 0 else None for k in cols["model"][rows].tolist()]
+		ra = [_nan_none(v) for v in cols["ra"][rows].tolist()]
+		dec = [_nan_none(v) for v in cols["dec"][rows].tolist()]
+		# Probabilités du modèle propre à chaque ligne, arrondies en bloc
+		proba = np.full((rows.size, len(PROBA_SUFFIXES)), np.nan)
+		for name in self.models:
+			own = np.array([m == name for m in models], dtype=bool)
+			if own.any():
+				proba[own] = np.column_stack([cols[f"p_{name}_{sfx}"][rows[own]] for sfx in PROBA_SUFFIXES])
+		scored = ~np.isnan(proba[:, 0])
+		best = np.argmax(np.where(np.isnan(proba), -1.0, proba), axis=1).tolist()
+		rounded = np.round(proba, 4).tolist()
+		out: List[Dict[str, Any]] = []
+		for k in range(rows.size):
+			item: Dict[str, Any] = {c: texts[c][k] for c in TEXT_COLUMNS}
+			item["catalog"] = catalog[k]
+			item["ra"] = ra[k]
+			item["dec"] = dec[k]
+			item["model"] = models[k]
+			scores: Dict[str, Any] = {}
+			if scored[k]:
+				p = rounded[k]
+				scores[models[k]] = {
+					"label": LABEL_ORDER[best[k]],
+					"confidence": p[best[k]],
+					"proba": dict(zip(PROBA_SUFFIXES, p)),
+				}
+			item["scores"] = scores
+			out.append(item)
+		return out
+
+	def record(self, i: int) -> Dict[str, Any]:
+		cols = self.columns
+		out: Dict[str, Any] = {c: str(cols[c][i]) or None for c in TEXT_COLUMNS}
+		out["catalog"] = self._category("catalog", i)
+		out["ra"] = _nan_none(cols["ra"][i])
+		out["dec"] = _nan_none(cols["dec"][i])
+		out["features"] = {f: _nan_none(cols[f][i]) for f in FEATURES}
+		out["model"] = self._category("model", i) or None
+		out["scores"] = self._scores(i, self.models)
+		hab = {key: _nan_none(cols[col][i]) for key, col in HABITABILITY_COLUMNS.items()}
+		zone = bool(cols["hab_zone"][i])
+		name = out["pl_name"] or out["object_id"] or "Non disponible"
+		out["habitability"] = {
+			"name": name,
+			"radius": hab["radius"],
+			"temp_eq": hab["temp_eq"],
+			"zone_habitable": zone,
+			"habitability_score": hab["habitability_score"],
+			"gravity_m_s2": hab["gravity_m_s2"],
+			"luminosity_w_m2": hab["luminosity_w_m2"],
+			"esi": hab["esi"],
+			"star_class": self._category("hab_star_class", i) or None,
+			"distance_pc": hab["distance_pc"],
+			"distance_ly": hab["distance_pc"] * 3.26156 if hab["distance_pc"] is not None else None,
+			"summary": habitability_summary(name, zone, hab["temp_eq"], hab["radius"], hab["habitability_score"] or 0.0),
+		}
+		return out
+
+
+@contextlib.contextmanager
+def _store_lock(store_dir: str) -> Iterator[None]:
+	# Verrou fichier exclusif: une seule construction à la fois entre workers uvicorn et CLI
+	if fcntl is None:
+		yield
+		return
+	os.makedirs(os.path.dirname(os.path.abspath(store_dir)), exist_ok=True)
+	with open(f"{store_dir}.lock", "a") as f:
+		fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+		try:
+			yield
+		finally:
+			fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class CatalogManager:
+	"""
+	Table servie par l'API. ensure() recharge le store s'il correspond aux modèles et exports
+	courants, sinon le reconstruit dans un thread (la table précédente reste servie pendant ce temps).
+	"""
+
+	def __init__(self, store_dir: str = CATALOG_STORE, source_dir: str = ".") -> None:
+		self.store_dir = store_dir
+		self.source_dir = source_dir
+		self.table: Optional[CatalogTable] = None
+		self.building = False
+		self.last_error: Optional[str] = None
+		self._pending: Optional[Dict[str, Dict[str, Any]]] = None
+		self._lock = threading.Lock()
+
+	def _fresh(self, signature: Dict[str, Any]) -> bool:
+		if not is_columnar_store(self.store_dir):
+			return False
+		meta = read_manifest(self.store_dir).get("meta", {})
+		return meta.get("model_versions") == signature["model_versions"] and meta.get("sources") == signature["sources"]
+
+	def ensure(self, registry: Dict[str, Dict[str, Any]], background: bool = True) -> None:
+		# Instantané du registre: un rechargement des modèles pendant la construction n'y touche pas
+		snapshot = {name: dict(entry) for name, entry in registry.items()}
+		try:
+			if self._fresh(catalog_signature(snapshot, self.source_dir)):
+				if self.table is None or self.table.meta != read_manifest(self.store_dir).get("meta", {}):
+					self.table = CatalogTable(self.store_dir)
+				return
+		except Exception as e:
+			logger.warning("Catalog store not loaded: %s", e)
+		with self._lock:
+			if self.building:
+				# Reconstruction déjà en cours: relancée à la fin avec le registre le plus récent
+				self._pending = snapshot
+				return
+			self.building = True
+		if background:
+			threading.Thread(target=self._build_loop, args=(snapshot,), name="catalog-build", daemon=True).start()
+		else:
+			self._build_loop(snapshot)
+
+	def _build_loop(self, snapshot: Dict[str, Dict[str, Any]]) -> None:
+		while True:
+			try:
+				t0 = time.perf_counter()
+				with _store_lock(self.store_dir):
+					# Un autre worker a pu construire le store pendant l'attente du verrou
+					if self._fresh(catalog_signature(snapshot, self.source_dir)):
+						self.table = CatalogTable(self.store_dir)
+						self.last_error = None
+						logger.info("Catalog loaded: %d objects (built by another process)", self.table.rows)
+					else:
+						build_catalog(snapshot, self.source_dir, self.store_dir)
+						self.table = CatalogTable(self.store_dir)
+						self.last_error = None
+						logger.info("Catalog built: %d objects in %.1f s", self.table.rows, time.perf_counter() - t0)
+			except Exception as e:
+				self.last_error = str(e)
+				logger.warning("Catalog build failed: %s", e)
+			with self._lock:
+				snapshot, self._pending = self._pending, None  # type: ignore[assignment]
+				if snapshot is None:
+					self.building = False
+					return
+
+	def status(self) -> Dict[str, Any]:
+		table = self.table
+		return {
+			"ready": table is not None,
+			"building": self.building,
+			"rows": table.rows if table is not None else 0,
+			"meta": table.meta if table is not None else None,
+			"error": self.last_error,
+		}
+
+
+def load_registry(models_dir: str = "models") -> Dict[str, Dict[str, Any]]:
+	# Registre équivalent à celui de l'API (mêmes versions: empreinte sha256 du fichier modèle)
+	import joblib
+
+	registry: Dict[str, Dict[str, Any]] = {}
+	for name, spec in MODEL_SPECS.items():
+		path = os.path.join(models_dir, spec["file"])
+		if not os.path.exists(path):
+			continue
+		preproc = os.path.join(models_dir, spec["preproc"])
+		registry[name] = {
+			"model": joblib.load(path),
+			"features": spec["features"],
+			"cfg": load_preprocessor_config(preproc) if os.path.exists(preproc) else None,
+			"version": file_sha256(path)[:16],
+		}
+	return registry
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Précalcule scores et habitabilité des catalogues NEA fournis")
+	parser.add_argument("--input_dir", type=str, default=".", help="Dossier des exports cumulative/k2pandc/TOI")
+	parser.add_argument("--models_dir", type=str, default="models")
+	parser.add_argument("--output", type=str, default=CATALOG_STORE, help="Store colonne de sortie")
+	args = parser.parse_args()
+	logging.basicConfig(level=logging.INFO)
+	registry = load_registry(args.models_dir)
+	with _store_lock(args.output):
+		path = build_catalog(registry, args.input_dir, args.output)
+	print(f"Catalogue écrit: {path}")
+
+
+if __name__ == "__main__":
+	main()
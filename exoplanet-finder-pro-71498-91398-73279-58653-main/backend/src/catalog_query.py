@@ -0,0 +1,206 @@
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Noms exposés -> colonnes du store catalogue (les autres colonnes numériques gardent leur nom)
+FIELD_ALIASES: Dict[str, str] = {
+	"radius": "hab_radius",
+	"temp_eq": "hab_temp_eq",
+	"habitability_score": "hab_score",
+	"gravity_m_s2": "hab_gravity",
+	"luminosity_w_m2": "hab_luminosity",
+	"esi": "hab_esi",
+	"distance_pc": "hab_distance_pc",
+	"star_class": "hab_star_class",
+	"zone_habitable": "hab_zone",
+}
+# Champs dérivés d'une colonne par un facteur: valeur = colonne * facteur
+DERIVED_FIELDS: Dict[str, Tuple[str, float]] = {
+	"distance_ly": ("hab_distance_pc", 3.26156),
+}
+# Colonnes texte filtrables par égalité (codes calculés au chargement)
+TEXT_FILTER_COLUMNS = ("disposition",)
+# Sous cette fraction de lignes, le prédicat le plus sélectif fournit les candidats et les autres
+# sont vérifiés directement sur ces lignes (sinon: intersection de bitmaps)
+CANDIDATE_FRACTION = 1 / 32
+MAX_LIMIT = 1000
+
+_FILTER_RE = re.compile(r"^\s*([A-Za-z_][A-Za-z0-9_]*)\s*(>=|<=|!=|>|<|=)\s*(.+?)\s*$")
+
+
+class QueryError(ValueError):
+	pass
+
+
+class SortedColumn:
+	"""Index trié d'une colonne numérique: permutation + valeurs triées (NaN exclus, en fin de permutation)."""
+
+	def __init__(self, values: np.ndarray) -> None:
+		self.values = values
+		self.order = np.argsort(values, kind="stable")
+		self.valid = int(np.count_nonzero(~np.isnan(values))) if values.dtype.kind == "f" else values.size
+		self.sorted = values[self.order[:self.valid]]
+
+	def bounds(self, op: str, x: float) -> Tuple[int, int]:
+		# Plage [lo, hi) de la permutation triée satisfaisant "valeur op x" (recherche binaire)
+		if op == ">":
+			return int(np.searchsorted(self.sorted, x, side="right")), self.valid
+		if op == ">=":
+			return int(np.searchsorted(self.sorted, x, side="left")), self.valid
+		if op == "<":
+			return 0, int(np.searchsorted(self.sorted, x, side="left"))
+		if op == "<=":
+			return 0, int(np.searchsorted(self.sorted, x, side="right"))
+		return int(np.searchsorted(self.sorted, x, side="left")), int(np.searchsorted(self.sorted, x, side="right"))
+
+
+class CatalogQueryEngine:
+	"""
+	Filtres par plages et par catégories sur la table catalogue, tri et pagination.
+	Index construits une fois (argsort par colonne numérique, codes par colonne catégorielle);
+	une requête = recherches binaires + intersection de bitmaps, sans parcours Python des lignes.
+	"""
+
+	def __init__(self, columns: Dict[str, np.ndarray], categories: Dict[str, List[str]]) -> None:
+		self.n = len(next(iter(columns.values()))) if columns else 0
+		self.numeric: Dict[str, SortedColumn] = {}
+		self.categorical: Dict[str, Tuple[np.ndarray, List[str]]] = {}
+		for name, values in columns.items():
+			if name in categories:
+				self.categorical[name] = (values, categories[name])
+			elif values.dtype.kind == "b":
+				self.categorical[name] = (values.astype(np.int8), ["false", "true"])
+			elif values.dtype.kind in "fiu":
+				self.numeric[name] = SortedColumn(values)
+		for name in TEXT_FILTER_COLUMNS:
+			if name in columns:
+				labels, codes = np.unique(columns[name].astype(str), return_inverse=True)
+				self.categorical[name] = (codes, [str(v) for v in labels])
+
+	def fields(self) -> Dict[str, List[str]]:
+		inverse = {v: k for k, v in FIELD_ALIASES.items()}
+		numeric = sorted({inverse.get(c, c) for c in self.numeric} | set(DERIVED_FIELDS))
+		return {"numeric": numeric, "categorical": sorted(inverse.get(c, c) for c in self.categorical)}
+
+	def _resolve(self, field: str) -> Tuple[str, float]:
+		if field in DERIVED_FIELDS:
+			return DERIVED_FIELDS[field]
+		return FIELD_ALIASES.get(field, field), 1.0
+
+	def _numeric_ranges(self, predicates: List[Tuple[str, str, Tuple[str, float]]]) -> Dict[str, Tuple[int, int]]:
+		# Prédicats d'une même colonne fusionnés en une seule plage de la permutation triée
+		ranges: Dict[str, Tuple[int, int]] = {}
+		for column, op, (value, scale) in predicates:
+			index = self.numeric[column]
+			try:
+				x = float(value) / scale
+			except ValueError:
+				raise QueryError(f"Valeur numérique attendue: {value!r}")
+			lo, hi = index.bounds(op, x)
+			prev = ranges.get(column, (0, index.valid))
+			ranges[column] = (max(lo, prev[0]), min(hi, prev[1]))
+		return ranges
+
+	def _parse(self, filters: Sequence[str]) -> Tuple[List[Tuple[str, str, Tuple[str, float]]], List[Tuple[str, np.ndarray]]]:
+		numeric: List[Tuple[str, str, Tuple[str, float]]] = []
+		categorical: List[Tuple[str, np.ndarray]] = []
+		for text in filters:
+			m = _FILTER_RE.match(text)
+			if m is None:
+				raise QueryError(f"Filtre invalide: {text!r} (attendu: champ op valeur, op parmi > >= < <= = !=)")
+			field, op, value = m.groups()
+			column, scale = self._resolve(field)
+			if column in self.numeric:
+				if ".." in value and op == "=":
+					# Raccourci "champ=a..b": plage fermée
+					a, b = (v.strip() for v in value.split("..", 1))
+					numeric.append((column, ">=", (a, scale)))
+					numeric.append((column, "<=", (b, scale)))
+				elif op == "!=":
+					raise QueryError(f"!= non supporté pour le champ numérique {field}")
+				else:
+					numeric.append((column, op, (value, scale)))
+			elif column in self.categorical:
+				if op not in ("=", "!="):
+					raise QueryError(f"Champ catégoriel {field}: opérateurs = et != seulement")
+				labels = self.categorical[column][1]
+				wanted = {v.strip().lower() for v in re.split(r"[|,]", value) if v.strip()}
+				# Table code -> accepté; le dernier élément couvre le code -1 (valeur manquante)
+				allowed = np.zeros(len(labels) + 1, dtype=bool)
+				allowed[[i for i, label in enumerate(labels) if label.lower() in wanted]] = True
+				if op == "!=":
+					# Valeur manquante exclue dans les deux cas (comme NULL en SQL)
+					allowed = ~allowed
+					allowed[-1] = False
+				categorical.append((column, allowed))
+			else:
+				raise QueryError(f"Champ inconnu: {field}")
+		return numeric, categorical
+
+	def _sort_order(self, sort: str) -> np.ndarray:
+		descending = sort.startswith("-")
+		column, _ = self._resolve(sort.lstrip("+-"))
+		if column not in self.numeric:
+			raise QueryError(f"Tri impossible sur {sort.lstrip('+-')} (champ numérique attendu)")
+		index = self.numeric[column]
+		if not descending:
+			return index.order
+		# Décroissant: valeurs valides inversées, NaN toujours en fin
+		return np.concatenate([index.order[:index.valid][::-1], index.order[index.valid:]])
+
+	def query(
+		self,
+		filters: Sequence[str] = (),
+		sort: Optional[str] = None,
+		limit: int = 50,
+		offset: int = 0,
+	) -> Dict[str, Any]:
+		"""
+		Lignes satisfaisant tous les filtres ("esi>0.8", "temp_eq=200..320", "star_class=K|M",
+		"distance_pc<=50"), triées par sort ("-esi": décroissant), page [offset, offset + limit).
+		"""
+		limit = max(0, min(int(limit), MAX_LIMIT))
+		offset = max(0, int(offset))
+		numeric, categorical = self._parse(filters)
+		ranges = self._numeric_ranges(numeric)
+		by_size = sorted(ranges.items(), key=lambda kv: kv[1][1] - kv[1][0])
+
+		if by_size and max(0, by_size[0][1][1] - by_size[0][1][0]) <= self.n * CANDIDATE_FRACTION:
+			# Prédicat très sélectif: ses lignes sont les candidats, les autres prédicats sont vérifiés dessus
+			strategy = "candidates"
+			column, (lo, hi) = by_size[0]
+			rows = np.sort(self.numeric[column].order[lo:max(lo, hi)])
+			for column, (lo, hi) in by_size[1:]:
+				index = self.numeric[column]
+				if hi <= lo:
+					rows = rows[:0]
+					break
+				v = index.values[rows]
+				rows = rows[(v >= index.sorted[lo]) & (v <= index.sorted[hi - 1])]
+			for column, allowed in categorical:
+				rows = rows[allowed[self.categorical[column][0][rows]]]
+			mask = np.zeros(self.n, dtype=bool)
+			mask[rows] = True
+		else:
+			strategy = "bitmap"
+			mask = np.ones(self.n, dtype=bool)
+			for column, (lo, hi) in by_size:
+				bitmap = np.zeros(self.n, dtype=bool)
+				bitmap[self.numeric[column].order[lo:max(lo, hi)]] = True
+				mask &= bitmap
+			for column, allowed in categorical:
+				mask &= allowed[self.categorical[column][0]]
+
+		total = int(np.count_nonzero(mask))
+		if sort:
+			order = self._sort_order(sort)
+			selected = order[mask[order]]
+		else:
+			selected = np.flatnonzero(mask)
+		return {
+			"total": total,
+			"rows": selected[offset:offset + limit].tolist(),
+			"strategy": strategy,
+		}
@@ -10,7 +10,7 @@ from .train_model import train_model
 def main() -> None:
 	parser = argparse.ArgumentParser(description="Nettoyage puis entraînement sur dataset K2")
 	parser.add_argument("--input", required=True, help="Chemin du CSV filtré (sans commentaires)")
-	parser.add_argument("--cleaned", required=True, help="Chemin de sortie du CSV propre")
+	parser.add_argument("--cleaned", required=True, help="Store colonne de sortie (dossier) ou chemin *.csv")
 	parser.add_argument("--model", default="models/model_k2.joblib")
 	parser.add_argument("--metrics", default="models/metrics_k2.json")
 	parser.add_argument("--preproc", default="models/preprocessor_k2.json")
@@ -22,7 +22,7 @@ def main() -> None:
 
 	# Nettoyage via pipeline DataFrame
 	clean_path = clean_kepler_df(df, args.cleaned)
-	print(f"CSV propre: {clean_path}")
+	print(f"Données propres: {clean_path}")
 
 	# Entraînement
 	metrics = train_model(
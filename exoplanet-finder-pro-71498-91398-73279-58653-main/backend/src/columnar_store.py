@@ -0,0 +1,137 @@
+import json
+import os
+import re
+import shutil
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Store colonne: un dossier contenant un .npy par colonne + manifest.json
+MANIFEST_NAME = "manifest.json"
+STORE_FORMAT = "exodetect-columnar"
+STORE_VERSION = 1
+
+
+def is_columnar_store(path: str) -> bool:
+	return os.path.isdir(path) and os.path.exists(os.path.join(path, MANIFEST_NAME))
+
+
+def read_manifest(store_dir: str) -> Dict[str, Any]:
+	with open(os.path.join(store_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+		manifest = json.load(f)
+	if manifest.get("format") != STORE_FORMAT:
+		raise ValueError(f"Store colonne invalide: {store_dir}")
+	return manifest
+
+
+def _column_file(name: str, used: set) -> str:
+	base = re.sub(r"[^0-9A-Za-z_]+", "_", str(name)).strip("_") or "col"
+	fname = f"{base}.npy"
+	i = 1
+	while fname in used:
+		fname = f"{base}_{i}.npy"
+		i += 1
+	used.add(fname)
+	return fname
+
+
+def _column_array(series: pd.Series) -> Dict[str, Any]:
+	# Tableau NumPy typé + métadonnées éventuelles (catégories)
+	if isinstance(series.dtype, pd.CategoricalDtype):
+		return {
+			"array": np.asarray(series.cat.codes.to_numpy()),
+			"categories": [c.item() if hasattr(c, "item") else c for c in series.cat.categories],
+		}
+	arr = series.to_numpy()
+	if arr.dtype.kind in "biufcmM":
+		return {"array": np.ascontiguousarray(arr)}
+	# Colonnes texte/objet: chaînes de largeur fixe (pas de pickle)
+	return {"array": np.asarray(series.astype(str).to_numpy(), dtype=str)}
+
+
+def write_columnar(
+	df: pd.DataFrame,
+	store_dir: str,
+	meta: Optional[Dict[str, Any]] = None,
+) -> str:
+	"""
+	Écrit un DataFrame en store colonne typé (un .npy par colonne + manifest).
+	L'écriture se fait dans un dossier temporaire puis remplace l'ancien store.
+	"""
+	store_dir = os.path.normpath(store_dir)
+	parent = os.path.dirname(store_dir) or "."
+	os.makedirs(parent, exist_ok=True)
+	tmp_dir = f"{store_dir}.tmp-{os.getpid()}"
+	if os.path.exists(tmp_dir):
+		shutil.rmtree(tmp_dir)
+	os.makedirs(tmp_dir)
+
+	used: set = set()
+	columns: List[Dict[str, Any]] = []
+	for name in df.columns:
+		col = _column_array(df[name])
+		fname = _column_file(name, used)
+		np.save(os.path.join(tmp_dir, fname), col["array"], allow_pickle=False)
+		entry: Dict[str, Any] = {"name": str(name), "file": fname, "dtype": col["array"].dtype.str}
+		if "categories" in col:
+			entry["categories"] = col["categories"]
+		columns.append(entry)
+
+	manifest = {
+		"format": STORE_FORMAT,
+		"version": STORE_VERSION,
+		"rows": int(df.shape[0]),
+		"columns": columns,
+		"created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+		"meta": meta or {},
+	}
+	with open(os.path.join(tmp_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+		json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+	old_dir = None
+	if os.path.exists(store_dir):
+		old_dir = f"{store_dir}.old-{os.getpid()}"
+		os.replace(store_dir, old_dir)
+	os.replace(tmp_dir, store_dir)
+	if old_dir is not None:
+		shutil.rmtree(old_dir, ignore_errors=True)
+	return store_dir
+
+
+def read_columnar(
+	store_dir: str,
+	columns: Optional[List[str]] = None,
+	mmap: bool = True,
+) -> pd.DataFrame:
+	"""
+	Lit un store colonne. Avec mmap=True les colonnes sont des memmaps en lecture seule
+	enveloppées sans copie par pandas (pas de parsing texte).
+	"""
+	manifest = read_manifest(store_dir)
+	entries = {c["name"]: c for c in manifest["columns"]}
+	wanted = columns if columns is not None else [c["name"] for c in manifest["columns"]]
+	missing = [c for c in wanted if c not in entries]
+	if missing:
+		raise ValueError(f"Colonnes absentes du store {store_dir}: {missing}")
+
+	# Un tableau vide ne peut pas être mappé en mémoire
+	mmap = mmap and int(manifest.get("rows", 0)) > 0
+	data: Dict[str, Any] = {}
+	for name in wanted:
+		entry = entries[name]
+		arr = np.load(os.path.join(store_dir, entry["file"]), mmap_mode="r" if mmap else None, allow_pickle=False)
+		if "categories" in entry:
+			data[name] = pd.Categorical.from_codes(np.asarray(arr), categories=entry["categories"])
+		else:
+			data[name] = arr
+	return pd.DataFrame(data, columns=wanted, copy=False)
+
+
+def load_table(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+	# Store colonne si disponible, sinon CSV (compatibilité avec les anciens fichiers nettoyés)
+	if is_columnar_store(path):
+		return read_columnar(path, columns=columns)
+	return pd.read_csv(path, usecols=columns)
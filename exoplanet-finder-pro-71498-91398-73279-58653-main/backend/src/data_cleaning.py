@@ -2,11 +2,15 @@ import argparse
 import json
 import os
 from glob import glob
-from typing import List
-import io
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from .columnar_store import write_columnar
+from .header_scan import find_header_offset, open_data_stream
+from .parallel_csv import read_csv_parallel
+
 
 IMPORTANT_COLUMNS: List[str] = [
 	"koi_period",
@@ -21,9 +25,27 @@ LABEL_MAP = {
 	"CANDIDATE": 0,
 	"FALSE POSITIVE": -1,
 }
+KEPLER_FEATURES: List[str] = ["koi_period", "koi_duration", "koi_depth", "koi_prad"]
+K2_FEATURES: List[str] = ["koi_period", "koi_prad"]
+# Types compacts des données nettoyées (les arbres RF/XGBoost travaillent de toute façon en float32)
+FEATURE_DTYPE = np.float32
+LABEL_DTYPE = np.int8
+# Version des règles de nettoyage et du schéma de sortie: à incrémenter à chaque changement
+# (filtres, labels, features, types) pour invalider les sorties déjà nettoyées par le pipeline
+CLEANING_VERSION = 2
+# Filtres d'outliers de base
+MAX_PERIOD = 1000
+MAX_PRAD = 30
 
 
 def _robust_read_csv(path: str) -> pd.DataFrame:
+	# Gros fichiers: lecture parallèle par plages d'octets (None si non applicable)
+	try:
+		df = read_csv_parallel(path, float_precision=None)
+		if df is not None:
+			return df
+	except Exception:
+		pass
 	# Essaye lecture explicite (NEA: séparateur virgule, commentaires '#') puis fallback
 	encodings = ["utf-8", "latin-1"]
 	for enc in encodings:
@@ -36,7 +58,6 @@ def _robust_read_csv(path: str) -> pd.DataFrame:
 				comment="#",
 				encoding=enc,
 				skip_blank_lines=True,
-				low_memory=False,
 			)
 		except Exception:
 			pass
@@ -51,59 +72,31 @@ def _robust_read_csv(path: str) -> pd.DataFrame:
 				comment="#",
 				encoding=enc,
 				skip_blank_lines=True,
-				low_memory=False,
 			)
 		except Exception:
 			pass
-	# Fallback avancé: scanner pour trouver la ligne d'en-tête et reconstruire un buffer en mémoire
-	for enc in encodings:
-		try:
-			with open(path, "r", encoding=enc, errors="ignore") as f:
-				lines = [ln for ln in f.readlines() if ln and not ln.lstrip().startswith("#")]
-			if not lines:
-				continue
-			# Trouver index de l'entête (ligne contenant des colonnes attendues NEA ou KOI)
-			header_idx = None
-			for i, line in enumerate(lines):
-				l = line.strip().lower()
-				if l.startswith("pl_name,") or l.startswith("koi_period,"):
-					header_idx = i
-					break
-			if header_idx is None:
-				continue
-			content = "".join(lines[header_idx:])
-			buffer = io.StringIO(content)
-			return pd.read_csv(
-				buffer,
-				engine="python",
-				sep=",",
-				on_bad_lines="skip",
-				skip_blank_lines=True,
-				low_memory=False,
-			)
-		except Exception:
-			continue
-	# Fallback: détecter la ligne d'entête dans le fichier brut et lire avec header index
-	for enc in encodings:
-		try:
-			with open(path, "r", encoding=enc, errors="ignore") as f:
-				all_lines = f.readlines()
-			header_idx = None
-			for i, ln in enumerate(all_lines[:500]):
-				l = ln.strip().lower()
-				if l.startswith("pl_name,") or l.startswith("koi_period,"):
-					header_idx = i
-					break
-			if header_idx is not None:
-				return pd.read_csv(
-					path,
-					engine="python",
-					sep=",",
-					header=header_idx,
-					low_memory=False,
-				)
-		except Exception:
-			continue
+	# Fallback avancé: pré-scan en flux (blocs bornés) pour trouver l'offset de la ligne d'en-tête,
+	# puis lecture pandas depuis cet offset (avec puis sans filtrage des lignes '#')
+	try:
+		header_offset = find_header_offset(path, require_marker=True)
+	except Exception:
+		header_offset = None
+	if header_offset is not None:
+		for enc in encodings:
+			for skip_comments in (True, False):
+				try:
+					with open_data_stream(path, header_offset, skip_comments=skip_comments) as stream:
+						return pd.read_csv(
+							stream,
+							engine="python",
+							sep=",",
+							on_bad_lines="skip",
+							skip_blank_lines=True,
+							encoding=enc,
+							encoding_errors="ignore",
+						)
+				except Exception:
+					continue
 	# Autres séparateurs possibles
 	seps = [",", ";", "\t", "|"]
 	for enc in encodings:
@@ -117,7 +110,6 @@ def _robust_read_csv(path: str) -> pd.DataFrame:
 					comment="#",
 					encoding=enc,
 					skip_blank_lines=True,
-					low_memory=False,
 				)
 			except Exception:
 				continue
@@ -125,10 +117,54 @@ def _robust_read_csv(path: str) -> pd.DataFrame:
 
 
 def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-	# Supprime les espaces superflus et standardise en minuscules
-	df = df.copy()
-	df.columns = [str(c).strip().lower() for c in df.columns]
-	return df
+	# Supprime les espaces superflus et standardise en minuscules (nouveaux noms, données partagées)
+	return df.set_axis([str(c).strip().lower() for c in df.columns], axis=1, copy=False)
+
+
+def _label_codes(disposition: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+	# Labels int8 + masque des labels connus. strip/upper appliqués aux seules valeurs distinctes
+	# (factorize), pas à chaque ligne; le code -1 (NaN) tombe sur la dernière case des tables
+	codes, uniques = pd.factorize(disposition, use_na_sentinel=True)
+	names = [str(u).strip().upper() for u in uniques]
+	labels = np.array([LABEL_MAP.get(n, 0) for n in names] + [0], dtype=LABEL_DTYPE)
+	known = np.array([n in LABEL_MAP for n in names] + [False], dtype=bool)
+	return labels[codes], known[codes]
+
+
+def _clean_mask(
+	df: pd.DataFrame,
+	features: List[str],
+	counts: Dict[str, int],
+	dropna_raw: bool,
+) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray]:
+	"""
+	Un seul masque booléen pour toutes les étapes (valeurs manquantes, numérique, outliers, label).
+	Les comptes par étape sont les sommes cumulées du masque: aucune copie intermédiaire du frame.
+	"""
+	counts["rows_before"] = int(df.shape[0])
+	numeric = {c: pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan) for c in features}
+	if dropna_raw:
+		raw = np.ones(len(df), dtype=bool)
+		for c in features:
+			raw &= df[c].notna().to_numpy()
+		counts["after_dropna_raw"] = int(raw.sum())
+	mask = np.ones(len(df), dtype=bool)
+	for c in features:
+		mask &= ~np.isnan(numeric[c])
+	counts["after_numeric"] = int(mask.sum())
+	mask &= (numeric["koi_period"] <= MAX_PERIOD) & (numeric["koi_prad"] <= MAX_PRAD)
+	counts["after_outliers"] = int(mask.sum())
+	labels, known = _label_codes(df["koi_disposition"])
+	mask &= known
+	counts["after_label_filter"] = int(mask.sum())
+	return numeric, labels, mask
+
+
+def _materialize(index: pd.Index, numeric: Dict[str, np.ndarray], labels: np.ndarray, mask: np.ndarray, features: List[str]) -> pd.DataFrame:
+	# Matérialisation unique: features float32 + label int8 des seules lignes retenues
+	data = {c: numeric[c][mask].astype(FEATURE_DTYPE) for c in features}
+	data["label"] = labels[mask]
+	return pd.DataFrame(data, index=index[mask], copy=False)
 
 
 def _try_adapt_dataset(df: pd.DataFrame) -> pd.DataFrame:
@@ -139,6 +175,15 @@ def _try_adapt_dataset(df: pd.DataFrame) -> pd.DataFrame:
 		raise ValueError(f"Adaptation de schéma échouée: {e}")
 
 
+def write_cleaned(df: pd.DataFrame, output_path: str, meta: Optional[Dict] = None) -> str:
+	# Sortie par défaut: store colonne typé (dossier). Un chemin *.csv garde l'ancien format texte.
+	os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+	if output_path.lower().endswith(".csv"):
+		df.to_csv(output_path, index=False)
+		return output_path
+	return write_columnar(df, output_path, meta=meta)
+
+
 def clean_kepler_csv(input_path: str, output_path: str) -> str:
 	df = _robust_read_csv(input_path)
 	df = _normalize_columns(df)
@@ -153,74 +198,47 @@ def clean_kepler_csv(input_path: str, output_path: str) -> str:
 	if missing_cols2:
 		raise ValueError(f"Colonnes manquantes dans {input_path}: {missing_cols2}")
 
-	before_rows = int(df.shape[0])
-	df = df[IMPORTANT_COLUMNS].copy()
-
-	# Nettoyage du label
-	df["koi_disposition"] = (
-		df["koi_disposition"].astype(str).str.strip().str.upper()
-	)
-
-	# Supprimer lignes avec valeurs manquantes
-	df = df.dropna(subset=["koi_period", "koi_duration", "koi_depth", "koi_prad", "koi_disposition"]).copy()
-	after_dropna = int(df.shape[0])
-
-	# Convertir en numérique (sécurise la suite) puis filtrer les outliers
-	for col in ["koi_period", "koi_duration", "koi_depth", "koi_prad"]:
-		df[col] = pd.to_numeric(df[col], errors="coerce")
-	df = df.dropna(subset=["koi_period", "koi_duration", "koi_depth", "koi_prad"]).copy()
-	after_numeric = int(df.shape[0])
+	counts: Dict[str, int] = {}
+	numeric, labels, mask = _clean_mask(df, KEPLER_FEATURES, counts, dropna_raw=True)
 
-	# Filtrer les valeurs aberrantes
-	df = df[(df["koi_period"] <= 1000) & (df["koi_prad"] <= 30)].copy()
-	after_outliers = int(df.shape[0])
-
-	# Garder uniquement les labels connus
-	valid_labels = set(LABEL_MAP.keys())
-	df = df[df["koi_disposition"].isin(valid_labels)].copy()
-	after_label = int(df.shape[0])
-
-	if df.empty:
+	if not mask.any():
 		raise ValueError(
 			"Aucune ligne restante après nettoyage. Vérifiez séparateur, colonnes et filtres (period<=1000, prad<=30)."
 		)
 
-	# Transformer le label
-	df["label"] = df["koi_disposition"].map(LABEL_MAP)
+	df = _materialize(df.index, numeric, labels, mask, KEPLER_FEATURES)
 
-	# Réordonner colonnes
-	df = df[["koi_period", "koi_duration", "koi_depth", "koi_prad", "label"]]
-
-	os.makedirs(os.path.dirname(output_path), exist_ok=True)
-	df.to_csv(output_path, index=False)
+	write_cleaned(df, output_path, meta={"source": os.path.abspath(input_path), "dataset": "kepler"})
 
 	# Sauvegarde d'un petit manifeste
 	manifest = {
 		"source": os.path.abspath(input_path),
-		"rows_before": before_rows,
+		"rows_before": counts["rows_before"],
 		"rows_after": int(df.shape[0]),
 		"pipeline_counts": {
-			"after_dropna_raw": after_dropna,
-			"after_numeric": after_numeric,
-			"after_outliers": after_outliers,
-			"after_label_filter": after_label,
+			"after_dropna_raw": counts["after_dropna_raw"],
+			"after_numeric": counts["after_numeric"],
+			"after_outliers": counts["after_outliers"],
+			"after_label_filter": counts["after_label_filter"],
 		},
 		"columns": list(df.columns),
 		"filters": {
 			"dropna": True,
-			"koi_period_max": 1000,
-			"koi_prad_max": 30,
+			"koi_period_max": MAX_PERIOD,
+			"koi_prad_max": MAX_PRAD,
 			"label_map": LABEL_MAP,
 		},
 		"output": os.path.abspath(output_path),
 	}
-	with open(os.path.join(os.path.dirname(output_path), "cleaning_manifest.json"), "w", encoding="utf-8") as f:
+	with open(os.path.join(os.path.dirname(output_path) or ".", "cleaning_manifest.json"), "w", encoding="utf-8") as f:
 		json.dump(manifest, f, ensure_ascii=False, indent=2)
 
 	return output_path
 
 
-def clean_kepler_df(df: pd.DataFrame, output_path: str) -> str:
+def clean_kepler_frame(df: pd.DataFrame, counts: Optional[Dict[str, int]] = None) -> pd.DataFrame:
+	# counts (optionnel) reçoit le nombre de lignes après chaque étape
+	counts = counts if counts is not None else {}
 	# Normaliser colonnes
 	df = _normalize_columns(df)
 
@@ -234,45 +252,19 @@ def clean_kepler_df(df: pd.DataFrame, output_path: str) -> str:
 	if missing_cols2:
 		raise ValueError(f"Colonnes manquantes: {missing_cols2}")
 
-	before_rows = int(df.shape[0])
-	df = df[IMPORTANT_COLUMNS].copy()
-
-	# Nettoyage du label
-	df["koi_disposition"] = (
-		df["koi_disposition"].astype(str).str.strip().str.upper()
-	)
-
-	# Supprimer lignes avec valeurs manquantes
-	df = df.dropna(subset=["koi_period", "koi_duration", "koi_depth", "koi_prad", "koi_disposition"]).copy()
-
-	# Convertir en numérique puis filtrer les outliers
-	for col in ["koi_period", "koi_duration", "koi_depth", "koi_prad"]:
-		df[col] = pd.to_numeric(df[col], errors="coerce")
-	df = df.dropna(subset=["koi_period", "koi_duration", "koi_depth", "koi_prad"]).copy()
-
-	# Filtrer valeurs aberrantes
-	df = df[(df["koi_period"] <= 1000) & (df["koi_prad"] <= 30)].copy()
-
-	# Filtrer labels inconnus
-	valid_labels = set(LABEL_MAP.keys())
-	df = df[df["koi_disposition"].isin(valid_labels)].copy()
-
-	if df.empty:
+	numeric, labels, mask = _clean_mask(df, KEPLER_FEATURES, counts, dropna_raw=True)
+	if not mask.any():
 		raise ValueError("Aucune ligne restante après nettoyage")
+	return _materialize(df.index, numeric, labels, mask, KEPLER_FEATURES)
 
-	# Transformer label
-	df["label"] = df["koi_disposition"].map(LABEL_MAP)
 
-	# Réordonner colonnes
-	df = df[["koi_period", "koi_duration", "koi_depth", "koi_prad", "label"]]
-
-	os.makedirs(os.path.dirname(output_path), exist_ok=True)
-	df.to_csv(output_path, index=False)
-	return output_path
+def clean_kepler_df(df: pd.DataFrame, output_path: str) -> str:
+	return write_cleaned(clean_kepler_frame(df), output_path, meta={"dataset": "kepler"})
 
 
-def clean_k2_df(df: pd.DataFrame, output_path: str) -> str:
+def clean_k2_frame(df: pd.DataFrame, counts: Optional[Dict[str, int]] = None) -> pd.DataFrame:
 	# K2 minimal: only koi_period, koi_prad and koi_disposition are required
+	counts = counts if counts is not None else {}
 	df = _normalize_columns(df)
 
 	required = ["koi_period", "koi_prad", "koi_disposition"]
@@ -284,38 +276,27 @@ def clean_k2_df(df: pd.DataFrame, output_path: str) -> str:
 		if missing2:
 			raise ValueError(f"Colonnes manquantes pour K2 minimal: {missing2}")
 
-	before_rows = int(df.shape[0])
-	df = df[required].copy()
-
-	# Nettoyage label
-	df["koi_disposition"] = df["koi_disposition"].astype(str).str.strip().str.upper()
-
-	# Convertir en numérique
-	for col in ["koi_period", "koi_prad"]:
-		df[col] = pd.to_numeric(df[col], errors="coerce")
-
-	# Drop lignes invalides
-	df = df.dropna(subset=["koi_period", "koi_prad", "koi_disposition"]).copy()
+	numeric, labels, mask = _clean_mask(df, K2_FEATURES, counts, dropna_raw=False)
+	if not mask.any():
+		raise ValueError("Aucune ligne restante après nettoyage K2 minimal")
+	# Sortie minimale
+	return _materialize(df.index, numeric, labels, mask, K2_FEATURES)
 
-	# Filtrer outliers de base
-	df = df[(df["koi_period"] <= 1000) & (df["koi_prad"] <= 30)].copy()
 
-	# Labels connus
-	valid_labels = set(LABEL_MAP.keys())
-	df = df[df["koi_disposition"].isin(valid_labels)].copy()
+def clean_k2_df(df: pd.DataFrame, output_path: str) -> str:
+	return write_cleaned(clean_k2_frame(df), output_path, meta={"dataset": "k2"})
 
-	if df.empty:
-		raise ValueError("Aucune ligne restante après nettoyage K2 minimal")
 
-	# Label numérique
-	df["label"] = df["koi_disposition"].map(LABEL_MAP)
+def clean_toi_frame(df: pd.DataFrame, counts: Optional[Dict[str, int]] = None) -> pd.DataFrame:
+	# TOI (TESS): mêmes 4 features que Kepler une fois adapté (pl_trandurh, tfopwg_disp CP/KP/PC/APC/FP/FA)
+	df = _normalize_columns(df)
+	if "koi_disposition" not in df.columns:
+		df = _try_adapt_dataset(df)
+	return clean_kepler_frame(df, counts=counts)
 
-	# Sortie minimale
-	df = df[["koi_period", "koi_prad", "label"]]
 
-	os.makedirs(os.path.dirname(output_path), exist_ok=True)
-	df.to_csv(output_path, index=False)
-	return output_path
+def clean_toi_df(df: pd.DataFrame, output_path: str) -> str:
+	return write_cleaned(clean_toi_frame(df), output_path, meta={"dataset": "toi"})
 
 
 def find_default_input(pattern: str = "cumulative_*.csv") -> str:
@@ -331,14 +312,14 @@ def find_default_input(pattern: str = "cumulative_*.csv") -> str:
 def main() -> None:
 	parser = argparse.ArgumentParser(description="Nettoyage du tableau KOI (Kepler/K2)")
 	parser.add_argument("--input", type=str, default=None, help="Chemin du CSV brut (Kepler/K2) (défaut: cumulative_*.csv)")
-	parser.add_argument("--output", type=str, default="data/cleaned_kepler.csv", help="Chemin de sortie du CSV propre")
+	parser.add_argument("--output", type=str, default="data/cleaned_kepler", help="Store colonne de sortie (dossier), ou chemin *.csv")
 	args = parser.parse_args()
 
 	input_path = args.input or find_default_input()
 	output_path = args.output
 
 	cleaned = clean_kepler_csv(input_path, output_path)
-	print(f"CSV propre sauvegardé: {cleaned}")
+	print(f"Données propres sauvegardées: {cleaned}")
 
 
 if __name__ == "__main__":
@@ -1,5 +1,8 @@
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
 import pandas as pd
-from typing import Dict, List
 
 # Schéma canonique attendu en sortie
 CANONICAL_FEATURES: List[str] = [
@@ -18,7 +21,7 @@ COLUMN_ALIASES: Dict[str, List[str]] = {
 	],
 	"koi_duration": [
 		"koi_duration", "transit_duration", "duration", "k2_duration", "kep_duration",
-		"pl_trandur", "pl_trandur_err1", "pl_trandur_err2", "transit_duration_hours",
+		"pl_trandur", "pl_trandurh", "pl_trandur_err1", "pl_trandur_err2", "transit_duration_hours",
 	],
 	"koi_depth": [
 		"koi_depth", "transit_depth", "depth", "k2_depth", "kep_depth",
@@ -29,7 +32,7 @@ COLUMN_ALIASES: Dict[str, List[str]] = {
 		"pl_rade", "pl_rade_err1", "pl_rade_err2", "planet_radius_earth_units",
 	],
 	"koi_disposition": [
-		"koi_disposition", "disposition", "status", "label", "pl_discmethod",
+		"koi_disposition", "disposition", "tfopwg_disp", "status", "label", "pl_discmethod",
 		"k2_disposition", "kep_disposition", "exoplanet_disposition",
 	],
 }
@@ -40,6 +43,52 @@ K2_LABEL_MAPPINGS = {
 	"FALSE POSITIVE": ["FALSE POSITIVE", "False Positive", "false positive", "-1", "FP"],
 }
 
+# Dispositions TESS (TFOPWG): CP/KP confirmées, PC/APC candidates, FP/FA faux positifs
+TOI_LABEL_MAPPINGS = {
+	"CONFIRMED": ["CP", "KP"],
+	"CANDIDATE": ["PC", "APC"],
+	"FALSE POSITIVE": ["FP", "FA"],
+}
+
+# Colonnes propres aux exports TOI (TESS)
+TOI_MARKER_COLUMNS = ("toi", "tid", "tfopwg_disp")
+
+# Colonnes canoniques converties en numérique lors de l'adaptation
+NUMERIC_FEATURES: List[str] = [c for c in CANONICAL_FEATURES if c != "koi_disposition"]
+
+# Nombre d'entêtes distincts dont le plan de résolution est gardé en cache
+PLAN_CACHE_SIZE = 64
+
+
+def _build_disposition_lookup() -> Dict[str, str]:
+	# Clés en minuscules, comparées à des valeurs mises en majuscules: seuls "1", "0", "-1"
+	# correspondent effectivement (comportement historique conservé)
+	reverse_mapping: Dict[str, str] = {}
+	for canonical, aliases in K2_LABEL_MAPPINGS.items():
+		for alias in aliases:
+			reverse_mapping[alias.lower().strip()] = canonical
+	return reverse_mapping
+
+
+DISPOSITION_LOOKUP: Dict[str, str] = _build_disposition_lookup()
+
+# Pour un entête TOI, les codes TFOPWG (déjà en majuscules) priment
+TOI_DISPOSITION_LOOKUP: Dict[str, str] = {
+	**DISPOSITION_LOOKUP,
+	**{code: canonical for canonical, codes in TOI_LABEL_MAPPINGS.items() for code in codes},
+}
+
+
+class ResolutionPlan(NamedTuple):
+	"""Plan de résolution compilé pour un entête donné (colonnes normalisées)."""
+	# canonique -> position de la colonne source (None: colonne absente, remplie à NaN)
+	projection: Tuple[Tuple[str, Optional[int]], ...]
+	# alias source -> canonique
+	renames: Tuple[Tuple[str, str], ...]
+	numeric: Tuple[str, ...]
+	disposition_lookup: Dict[str, str]
+	dataset_type: str
+
 
 def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
 	df = df.copy()
@@ -47,49 +96,91 @@ def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
 	return df
 
 
-def _normalize_disposition_values(df: pd.DataFrame) -> pd.DataFrame:
-	df = df.copy()
-	if "koi_disposition" in df.columns:
-		reverse_mapping: Dict[str, str] = {}
-		for canonical, aliases in K2_LABEL_MAPPINGS.items():
-			for alias in aliases:
-				reverse_mapping[alias.lower().strip()] = canonical
-		df["koi_disposition"] = (
-			df["koi_disposition"].astype(str).str.strip().str.upper().map(reverse_mapping).fillna(df["koi_disposition"])
-		)
-	return df
+def _header_key(df: pd.DataFrame) -> Tuple[str, ...]:
+	return tuple(str(c).strip().lower() for c in df.columns)
+
+
+def _detect_from_columns(columns: Tuple[str, ...]) -> str:
+	if any(col in TOI_MARKER_COLUMNS for col in columns):
+		return "TESS"
+	elif any("k2" in col for col in columns):
+		return "K2"
+	elif any("kep" in col or "koi" in col for col in columns):
+		return "Kepler"
+	elif any("pl_" in col for col in columns):
+		return "NASA_Exoplanet_Archive"
+	else:
+		return "Unknown"
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def compile_plan(columns: Tuple[str, ...]) -> ResolutionPlan:
+	"""
+	Compile le plan de résolution d'un entête (tuple de colonnes normalisées).
+	Mis en cache: les schémas récurrents (KOI cumulative, K2 P&C, ...) ne refont aucune résolution.
+	"""
+	positions: Dict[str, int] = {}
+	for i, col in enumerate(columns):
+		positions.setdefault(col, i)
+
+	projection: List[Tuple[str, Optional[int]]] = []
+	renames: List[Tuple[str, str]] = []
+	for canonical in CANONICAL_FEATURES:
+		source = next((a for a in COLUMN_ALIASES[canonical] if a in positions), None)
+		projection.append((canonical, positions[source] if source is not None else None))
+		if source is not None and source != canonical:
+			renames.append((source, canonical))
+
+	dataset_type = _detect_from_columns(columns)
+	return ResolutionPlan(
+		projection=tuple(projection),
+		renames=tuple(renames),
+		numeric=tuple(NUMERIC_FEATURES),
+		disposition_lookup=TOI_DISPOSITION_LOOKUP if dataset_type == "TESS" else DISPOSITION_LOOKUP,
+		dataset_type=dataset_type,
+	)
+
+
+def plan_cache_info():
+	return compile_plan.cache_info()
+
+
+def _map_dispositions(values: pd.Series, lookup: Dict[str, str]) -> pd.Series:
+	# Normalisation sur les valeurs distinctes uniquement, puis report par codes
+	codes, uniques = pd.factorize(values)
+	if len(uniques) == 0:
+		return values
+	keys = pd.Index(uniques).astype(str).str.strip().str.upper()
+	mapped = np.array([lookup.get(k, u) for k, u in zip(keys, uniques)] + [np.nan], dtype=object)
+	return pd.Series(mapped[codes], index=values.index, name=values.name)
+
+
+def apply_plan(df: pd.DataFrame, plan: ResolutionPlan) -> pd.DataFrame:
+	# Une seule passe: projection + conversion par colonne, sans copie/renommage du DataFrame source
+	numeric = set(plan.numeric)
+	data: Dict[str, pd.Series] = {}
+	for canonical, pos in plan.projection:
+		if pos is None:
+			data[canonical] = pd.Series(np.nan, index=df.index, dtype="float64" if canonical in numeric else object)
+			continue
+		col = df.iloc[:, pos]
+		if canonical in numeric:
+			col = pd.to_numeric(col, errors="coerce")
+		elif canonical == "koi_disposition":
+			col = _map_dispositions(col, plan.disposition_lookup)
+		data[canonical] = col.rename(canonical)
+	return pd.DataFrame(data, index=df.index, columns=CANONICAL_FEATURES, copy=False)
 
 
 def adapt_to_canonical(df: pd.DataFrame) -> pd.DataFrame:
 	"""
-	Essaie d'adapter un DataFrame arbitraire (Kepler/K2/...) au schéma canonique.
+	Essaie d'adapter un DataFrame arbitraire (Kepler/K2/TOI/...) au schéma canonique.
 	- Renomme les colonnes via COLUMN_ALIASES
-	- Normalise les valeurs de disposition
+	- Normalise les valeurs de disposition, convertit les features en numérique
 	- Crée les colonnes manquantes à NaN (la suite du pipeline filtrera si besoin)
+	Le plan de résolution est compilé une fois par entête distinct (voir compile_plan).
 	"""
-	df = _normalize_columns(df)
-
-	# Construire le mapping alias -> canonique
-	mapping: Dict[str, str] = {}
-	for canonical, aliases in COLUMN_ALIASES.items():
-		for alias in aliases:
-			if alias in df.columns:
-				mapping[alias] = canonical
-				break
-
-	# Appliquer le renommage
-	adapted = df.rename(columns=mapping)
-
-	# Créer les colonnes manquantes à NaN
-	for col in CANONICAL_FEATURES:
-		if col not in adapted.columns:
-			adapted[col] = pd.NA
-
-	# Normaliser la disposition
-	adapted = _normalize_disposition_values(adapted)
-
-	# Restreindre aux colonnes canoniques
-	return adapted[CANONICAL_FEATURES].copy()
+	return apply_plan(df, compile_plan(_header_key(df)))
 
 
 def get_supported_aliases() -> Dict[str, List[str]]:
@@ -97,12 +188,4 @@ def get_supported_aliases() -> Dict[str, List[str]]:
 
 
 def detect_dataset_type(df: pd.DataFrame) -> str:
-	df_norm = _normalize_columns(df)
-	if any("k2" in col for col in df_norm.columns):
-		return "K2"
-	elif any("kep" in col or "koi" in col for col in df_norm.columns):
-		return "Kepler"
-	elif any("pl_" in col for col in df_norm.columns):
-		return "NASA_Exoplanet_Archive"
-	else:
-		return "Unknown"
+	return compile_plan(_header_key(df)).dataset_type
@@ -0,0 +1,286 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .sketches import KLLSketch
+
+
+logger = logging.getLogger("exodetect.drift")
+
+# Sketch par (modèle, feature): mémoire constante quel que soit le volume prédit
+DRIFT_SKETCH_K = int(os.environ.get("EXODETECT_DRIFT_SKETCH_K", "512"))
+# Sauvegarde de l'état (thread dédié) toutes les N secondes (0: après chaque observation)
+DRIFT_PERSIST_S = float(os.environ.get("EXODETECT_DRIFT_PERSIST_S", "60"))
+# Seuils usuels du PSI: < 0.1 stable, 0.1-0.25 dérive modérée, >= 0.25 dérive forte
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+# Bins du PSI: déciles de la distribution d'entraînement
+PSI_BINS = 10
+PSI_EPS = 1e-4
+# En dessous, les estimations ne sont pas significatives
+DRIFT_MIN_ROWS = 100
+STATE_VERSION = 1
+
+
+def _reference_cdf(reference: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+	# Grille de percentiles -> (valeurs distinctes, fraction <= valeur), pour interpolation linéaire
+	probs = np.linspace(0.0, 1.0, reference.size)
+	values = np.unique(reference)
+	return values, probs[np.searchsorted(reference, values, side="right") - 1]
+
+
+def _ref_cdf_at(ref: Tuple[np.ndarray, np.ndarray], xs: np.ndarray) -> np.ndarray:
+	values, probs = ref
+	if values.size == 1:
+		return (xs >= values[0]).astype(np.float64)
+	return np.interp(xs, values, probs, left=0.0, right=1.0)
+
+
+def population_stability_index(reference: np.ndarray, sketch: KLLSketch) -> float:
+	"""PSI entre la distribution d'entraînement (grille de percentiles) et le sketch des valeurs servies."""
+	ref = _reference_cdf(reference)
+	step = (reference.size - 1) // PSI_BINS
+	edges = np.unique(reference[step:-1:step])
+	expected = np.diff(np.concatenate([[0.0], _ref_cdf_at(ref, edges), [1.0]]))
+	actual = np.diff(np.concatenate([[0.0], sketch.cdf(edges), [1.0]]))
+	expected = np.maximum(expected, PSI_EPS)
+	actual = np.maximum(actual, PSI_EPS)
+	return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks_statistic(reference: np.ndarray, sketch: KLLSketch) -> float:
+	"""Distance de Kolmogorov-Smirnov estimée (sup |F_servi - F_entraînement|) sur les deux grilles."""
+	ref = _reference_cdf(reference)
+	probs = np.linspace(0.0, 1.0, reference.size)
+	points = np.concatenate([reference, np.asarray(sketch.quantiles(probs))])
+	points = points[np.isfinite(points)]
+	return float(np.max(np.abs(sketch.cdf(points) - _ref_cdf_at(ref, points)))) if points.size else 0.0
+
+
+class FeatureDrift:
+	"""Valeurs servies d'une feature: sketch des valeurs, valeurs manquantes, dépassements des bornes de clipping."""
+
+	def __init__(self, clip_min: float, clip_max: float, reference: Optional[List[float]], k: int = DRIFT_SKETCH_K) -> None:
+		self.clip_min = float(clip_min)
+		self.clip_max = float(clip_max)
+		self.reference = None if reference is None else np.asarray(reference, dtype=np.float64)
+		self.sketch = KLLSketch(k=k)
+		self.rows = 0
+		self.missing = 0
+		self.below = 0
+		self.above = 0
+
+	def observe(self, values: np.ndarray) -> Tuple[int, int]:
+		present = values[~np.isnan(values)]
+		below = int(np.count_nonzero(present < self.clip_min))
+		above = int(np.count_nonzero(present > self.clip_max))
+		self.rows += int(values.size)
+		self.missing += int(values.size - present.size)
+		self.below += below
+		self.above += above
+		self.sketch.update(present)
+		return below, above
+
+	def report(self) -> Dict[str, Any]:
+		n = self.sketch.n
+		out: Dict[str, Any] = {
+			"rows": self.rows,
+			"missing_rate": round(self.missing / self.rows, 6) if self.rows else None,
+			"clip_min_rate": round(self.below / n, 6) if n else None,
+			"clip_max_rate": round(self.above / n, 6) if n else None,
+			"training": {"clip_min": self.clip_min, "clip_max": self.clip_max},
+		}
+		if self.reference is not None:
+			out["training"]["median"] = float(self.reference[self.reference.size // 2])
+		if n == 0:
+			out["status"] = "no_data"
+			return out
+		p01, p50, p99 = self.sketch.quantiles([0.01, 0.5, 0.99])
+		out["live"] = {"p01": p01, "median": p50, "p99": p99, "min": self.sketch.min, "max": self.sketch.max}
+		if self.reference is None or not np.isfinite(self.reference).all():
+			# Ancienne config sans distribution de référence: taux de clipping seulement
+			out["status"] = "no_reference"
+			return out
+		psi = population_stability_index(self.reference, self.sketch)
+		out["psi"] = round(psi, 6)
+		out["ks"] = round(ks_statistic(self.reference, self.sketch), 6)
+		if n < DRIFT_MIN_ROWS:
+			out["status"] = "insufficient_data"
+		else:
+			out["status"] = "alert" if psi >= PSI_ALERT else "warn" if psi >= PSI_WARN else "ok"
+		return out
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {
+			"clip_min": self.clip_min,
+			"clip_max": self.clip_max,
+			"reference": None if self.reference is None else self.reference.tolist(),
+			"rows": self.rows,
+			"missing": self.missing,
+			"below": self.below,
+			"above": self.above,
+			"sketch": self.sketch.to_dict(),
+		}
+
+	@classmethod
+	def from_dict(cls, data: Dict[str, Any]) -> "FeatureDrift":
+		fd = cls(data["clip_min"], data["clip_max"], data.get("reference"))
+		fd.rows, fd.missing, fd.below, fd.above = (int(data[k]) for k in ("rows", "missing", "below", "above"))
+		fd.sketch = KLLSketch.from_dict(data["sketch"])
+		return fd
+
+
+class DriftMonitor:
+	"""
+	Dérive des features servies par modèle, par rapport aux statistiques d'entraînement
+	(preprocessor_config: bornes de clipping + percentiles de référence). État remis à zéro quand
+	la version du modèle change, sauvegardé en JSON toutes les persist_s secondes par un thread
+	dédié: aucune écriture disque sur le chemin des requêtes.
+	"""
+
+	def __init__(self, path: Optional[str] = None, persist_s: float = DRIFT_PERSIST_S, k: int = DRIFT_SKETCH_K) -> None:
+		self.path = path
+		self.persist_s = persist_s
+		self.k = k
+		self._models: Dict[str, Dict[str, Any]] = {}
+		self._lock = threading.Lock()
+		self._save_lock = threading.Lock()
+		self._dirty = False
+		self._wake = threading.Event()
+		self.load()
+		if path:
+			threading.Thread(target=self._persist_loop, name="drift-persist", daemon=True).start()
+
+	def _persist_loop(self) -> None:
+		# persist_s <= 0: réveillé par chaque observation; sinon sauvegarde périodique (si modifié)
+		while True:
+			self._wake.wait(self.persist_s if self.persist_s > 0 else None)
+			self._wake.clear()
+			self.save()
+
+	def _new_state(self, version: Optional[str], features: List[str], cfg: Dict[str, Any]) -> Dict[str, Any]:
+		stats, reference = cfg["stats"], cfg.get("reference") or {}
+		return {
+			"version": version,
+			"since": time.time(),
+			"features": {f: FeatureDrift(stats[f]["clip_min"], stats[f]["clip_max"], reference.get(f), k=self.k) for f in features},
+		}
+
+	def observe(
+		self,
+		model: str,
+		version: Optional[str],
+		frame: pd.DataFrame,
+		features: List[str],
+		cfg: Optional[Dict[str, Any]],
+	) -> Dict[str, Tuple[int, int]]:
+		"""
+		Enregistre les valeurs brutes (avant clipping) d'une requête. Sans statistiques d'entraînement
+		pour ces features, rien n'est enregistré. Retourne {feature: (sous clip_min, au-dessus de clip_max)}.
+		"""
+		stats = (cfg or {}).get("stats") or {}
+		if not all(f in stats for f in features):
+			return {}
+		columns = {
+			f: pd.to_numeric(frame[f], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan) if f in frame.columns else np.full(len(frame), np.nan)
+			for f in features
+		}
+		with self._lock:
+			state = self._models.get(model)
+			if state is None or state["version"] != version or set(state["features"]) != set(features):
+				state = self._models[model] = self._new_state(version, features, cfg)  # type: ignore[arg-type]
+			hits = {f: state["features"][f].observe(columns[f]) for f in features}
+			self._dirty = True
+		if self.persist_s <= 0:
+			self._wake.set()
+		return hits
+
+	def report(self, model: Optional[str] = None) -> Dict[str, Any]:
+		with self._lock:
+			names = [model] if model is not None else sorted(self._models)
+			out: Dict[str, Any] = {}
+			for name in names:
+				state = self._models.get(name)
+				if state is None:
+					continue
+				features = {f: fd.report() for f, fd in state["features"].items()}
+				statuses = [r["status"] for r in features.values()]
+				out[name] = {
+					"version": state["version"],
+					"since": state["since"],
+					"status": next((s for s in ("alert", "warn", "ok") if s in statuses), statuses[0] if statuses else "no_data"),
+					"retrain_recommended": "alert" in statuses,
+					"features": features,
+				}
+		return {"models": out, "thresholds": {"psi_warn": PSI_WARN, "psi_alert": PSI_ALERT, "min_rows": DRIFT_MIN_ROWS}}
+
+	def reset(self, model: Optional[str] = None) -> None:
+		with self._lock:
+			if model is None:
+				self._models.clear()
+			else:
+				self._models.pop(model, None)
+			self._dirty = True
+		self.save()
+
+	def save(self, wait: bool = False) -> None:
+		if not self.path:
+			return
+		# Un seul écrivain; sérialisation sous verrou, écriture disque hors verrou.
+		# wait=True (arrêt du processus): attend l'écriture en cours du thread au lieu de l'abandonner
+		if not self._save_lock.acquire(blocking=wait):
+			return
+		try:
+			with self._lock:
+				if not self._dirty:
+					return
+				payload = {
+					"version": STATE_VERSION,
+					"models": {
+						name: {
+							"version": state["version"],
+							"since": state["since"],
+							"features": {f: fd.to_dict() for f, fd in state["features"].items()},
+						}
+						for name, state in self._models.items()
+					},
+				}
+				self._dirty = False
+			os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+			tmp = f"{self.path}.tmp-{os.getpid()}"
+			with open(tmp, "w", encoding="utf-8") as f:
+				json.dump(payload, f)
+			os.replace(tmp, self.path)
+		except OSError as e:
+			self._dirty = True
+			logger.warning("Drift state not saved: %s", e)
+		finally:
+			self._save_lock.release()
+
+	def load(self) -> None:
+		if not self.path or not os.path.exists(self.path):
+			return
+		try:
+			with open(self.path, "r", encoding="utf-8") as f:
+				payload = json.load(f)
+			if payload.get("version") != STATE_VERSION:
+				return
+			models = {
+				name: {
+					"version": state["version"],
+					"since": state["since"],
+					"features": {f: FeatureDrift.from_dict(d) for f, d in state["features"].items()},
+				}
+				for name, state in payload.get("models", {}).items()
+			}
+		except (OSError, ValueError, KeyError, TypeError) as e:
+			logger.warning("Drift state not loaded: %s", e)
+			return
+		with self._lock:
+			self._models = models
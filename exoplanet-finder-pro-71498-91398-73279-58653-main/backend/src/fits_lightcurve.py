@@ -0,0 +1,235 @@
+import io
+import os
+import re
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+# Courbes de lumière Kepler/K2/TESS (produits FITS MAST): table binaire LIGHTCURVE
+FITS_MAGIC = b"SIMPLE  ="
+FITS_BLOCK = 2880
+FITS_CARD = 80
+LIGHTCURVE_EXTNAME = "LIGHTCURVE"
+TIME_COLUMN = "TIME"
+# Colonne de flux retenue: première présente dans cet ordre
+FLUX_COLUMNS = ("PDCSAP_FLUX", "SAP_FLUX", "KSPSAP_FLUX", "FLUX")
+QUALITY_COLUMN = "QUALITY"
+# Bits de QUALITY qui excluent un point (défaut: tout point flaggé est exclu)
+QUALITY_BITMASK = int(os.environ.get("EXODETECT_FITS_QUALITY_BITMASK", str(0xFFFFFFFF)), 0)
+
+# TFORM -> (code numpy big-endian, taille en octets par élément)
+_TFORM_TYPES: Dict[str, Tuple[str, int]] = {
+	"L": ("i1", 1),
+	"B": ("u1", 1),
+	"I": (">i2", 2),
+	"J": (">i4", 4),
+	"K": (">i8", 8),
+	"A": ("S", 1),
+	"E": (">f4", 4),
+	"D": (">f8", 8),
+	"C": (">c8", 8),
+	"M": (">c16", 16),
+	"P": ("V", 8),
+	"Q": ("V", 16),
+}
+_TFORM_RE = re.compile(r"^\s*(\d*)([LXBIJKAEDCMPQ])")
+
+
+def is_fits(head: bytes) -> bool:
+	return head.startswith(FITS_MAGIC)
+
+
+def _card_value(text: str) -> Any:
+	text = text.strip()
+	if text.startswith("'"):
+		# Chaîne FITS: '' représente une apostrophe
+		out, i = [], 1
+		while i < len(text):
+			if text[i] == "'":
+				if text[i + 1:i + 2] == "'":
+					out.append("'")
+					i += 2
+					continue
+				break
+			out.append(text[i])
+			i += 1
+		return "".join(out).rstrip()
+	value = text.split("/", 1)[0].strip()
+	if value == "T":
+		return True
+	if value == "F":
+		return False
+	try:
+		return int(value)
+	except ValueError:
+		pass
+	try:
+		return float(value.replace("D", "E"))
+	except ValueError:
+		return value
+
+
+def _read_header(f: BinaryIO) -> Optional[Dict[str, Any]]:
+	cards: Dict[str, Any] = {}
+	first = True
+	while True:
+		block = f.read(FITS_BLOCK)
+		if len(block) < FITS_BLOCK:
+			if first and not block.strip(b"\x00 "):
+				return None
+			raise ValueError("FITS tronqué (en-tête incomplet)")
+		first = False
+		for i in range(0, FITS_BLOCK, FITS_CARD):
+			card = block[i:i + FITS_CARD].decode("ascii", errors="replace")
+			key = card[:8].strip()
+			if key == "END":
+				return cards
+			if card[8:10] == "= " and key not in cards:
+				cards[key] = _card_value(card[10:])
+
+
+def _data_size(h: Dict[str, Any]) -> int:
+	naxis = int(h.get("NAXIS", 0))
+	if naxis == 0:
+		return 0
+	n = 1
+	for i in range(1, naxis + 1):
+		n *= int(h.get(f"NAXIS{i}", 0))
+	size = abs(int(h.get("BITPIX", 8))) // 8 * int(h.get("GCOUNT", 1)) * (int(h.get("PCOUNT", 0)) + n)
+	return (size + FITS_BLOCK - 1) // FITS_BLOCK * FITS_BLOCK
+
+
+def _iter_hdus(f: BinaryIO) -> Iterator[Tuple[Dict[str, Any], int]]:
+	# (en-tête, offset des données) de chaque HDU, sans lire les données
+	while True:
+		h = _read_header(f)
+		if h is None:
+			return
+		offset = f.tell()
+		yield h, offset
+		f.seek(offset + _data_size(h))
+
+
+def _bintable_dtype(h: Dict[str, Any]) -> np.dtype:
+	names: List[str] = []
+	formats: List[Any] = []
+	offsets: List[int] = []
+	pos = 0
+	for n in range(1, int(h["TFIELDS"]) + 1):
+		m = _TFORM_RE.match(str(h.get(f"TFORM{n}", "")))
+		if m is None:
+			raise ValueError(f"TFORM{n} non supporté: {h.get(f'TFORM{n}')!r}")
+		repeat = int(m.group(1) or 1)
+		code = m.group(2)
+		if code == "X":
+			width = (repeat + 7) // 8
+			fmt: Any = f"V{width}"
+		else:
+			base, size = _TFORM_TYPES[code]
+			width = repeat * size
+			if code == "A":
+				fmt = f"S{repeat}"
+			elif code in ("P", "Q"):
+				fmt = f"V{width}"
+			else:
+				fmt = base if repeat == 1 else (base, (repeat,))
+		name = str(h.get(f"TTYPE{n}") or f"col{n}")
+		if width > 0 and name not in names:
+			names.append(name)
+			formats.append(fmt)
+			offsets.append(pos)
+		pos += width
+	return np.dtype({"names": names, "formats": formats, "offsets": offsets, "itemsize": int(h["NAXIS1"])})
+
+
+def _scaled(rec: np.ndarray, h: Dict[str, Any], name: str) -> np.ndarray:
+	col = rec[name]
+	n = [str(h.get(f"TTYPE{i}")) for i in range(1, int(h["TFIELDS"]) + 1)].index(name) + 1
+	scale, zero = h.get(f"TSCAL{n}", 1), h.get(f"TZERO{n}", 0)
+	if scale != 1 or zero != 0:
+		return col * scale + zero
+	return col
+
+
+def _is_lightcurve(h: Dict[str, Any]) -> bool:
+	return str(h.get("XTENSION", "")).strip() == "BINTABLE" and TIME_COLUMN in {
+		str(h.get(f"TTYPE{i}")) for i in range(1, int(h.get("TFIELDS", 0)) + 1)
+	}
+
+
+def _read_bintable(source: Union[str, bytes]) -> Dict[str, np.ndarray]:
+	# Parseur minimal: localise l'extension LIGHTCURVE (sinon la première table avec TIME),
+	# puis mappe ses lignes en tableau structuré (np.memmap sur disque, vue sur les bytes sinon)
+	with (open(source, "rb") if isinstance(source, str) else io.BytesIO(source)) as f:
+		found: Optional[Tuple[Dict[str, Any], int]] = None
+		for h, offset in _iter_hdus(f):
+			if not _is_lightcurve(h):
+				continue
+			if str(h.get("EXTNAME", "")).strip().upper() == LIGHTCURVE_EXTNAME:
+				found = (h, offset)
+				break
+			if found is None:
+				found = (h, offset)
+	if found is None:
+		raise ValueError("FITS: aucune table binaire avec colonne TIME")
+	h, offset = found
+	dtype = _bintable_dtype(h)
+	rows = int(h["NAXIS2"])
+	if isinstance(source, str):
+		rec = np.memmap(source, dtype=dtype, mode="r", offset=offset, shape=(rows,)) if rows else np.empty(0, dtype=dtype)
+	else:
+		rec = np.frombuffer(source, dtype=dtype, count=rows, offset=offset)
+	return {name: _scaled(rec, h, name) for name in _wanted(dtype.names or ())}
+
+
+def _wanted(names: Any) -> List[str]:
+	flux = [c for c in FLUX_COLUMNS if c in names][:1]
+	err = [f"{c}_ERR" for c in flux if f"{c}_ERR" in names]
+	return [c for c in (TIME_COLUMN, *flux, *err, QUALITY_COLUMN) if c in names]
+
+
+def _read_astropy(source: Union[str, bytes]) -> Optional[Dict[str, np.ndarray]]:
+	try:
+		from astropy.io import fits
+	except ImportError:
+		return None
+	with fits.open(source if isinstance(source, str) else io.BytesIO(source), memmap=True) as hdul:
+		hdu = None
+		for x in hdul[1:]:
+			if isinstance(x, fits.BinTableHDU) and TIME_COLUMN in x.columns.names:
+				if x.name == LIGHTCURVE_EXTNAME:
+					hdu = x
+					break
+				if hdu is None:
+					hdu = x
+		if hdu is None:
+			raise ValueError("FITS: aucune table binaire avec colonne TIME")
+		data = hdu.data
+		# Copie native des seules colonnes utiles avant fermeture du fichier
+		return {name: np.array(data[name]) for name in _wanted(hdu.columns.names)}
+
+
+def read_lightcurve(source: Union[str, bytes], quality_bitmask: int = QUALITY_BITMASK) -> pd.DataFrame:
+	"""
+	Courbe de lumière FITS (astropy si installé, sinon parseur minimal) -> DataFrame time/flux[/flux_err].
+	Masque QUALITY et valeurs non finies appliqués en une passe vectorisée: tableaux alignés.
+	"""
+	columns = _read_astropy(source)
+	if columns is None:
+		columns = _read_bintable(source)
+	flux_name = next((c for c in FLUX_COLUMNS if c in columns), None)
+	if flux_name is None:
+		raise ValueError(f"FITS: aucune colonne de flux ({', '.join(FLUX_COLUMNS)})")
+	time = columns[TIME_COLUMN]
+	flux = columns[flux_name]
+	mask = np.isfinite(time) & np.isfinite(flux)
+	if QUALITY_COLUMN in columns and quality_bitmask:
+		mask &= (columns[QUALITY_COLUMN].astype(np.int64) & quality_bitmask) == 0
+	# Indexation booléenne: copie compacte en ordre natif (les colonnes FITS sont big-endian)
+	out = {"time": np.asarray(time[mask], dtype=np.float64), flux_name.lower(): np.asarray(flux[mask], dtype=np.float64)}
+	err_name = f"{flux_name}_ERR"
+	if err_name in columns:
+		out[err_name.lower()] = np.asarray(columns[err_name][mask], dtype=np.float64)
+	return pd.DataFrame(out, copy=False)
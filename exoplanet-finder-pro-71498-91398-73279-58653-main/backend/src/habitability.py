@@ -0,0 +1,206 @@
+import math
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+
+T_SUN = 5778.0  # K
+R_SUN_M = 6.957e8  # m
+M_SUN_KG = 1.98847e30  # kg
+G_SI = 6.67430e-11  # m^3 kg^-1 s^-2
+AU_M = 1.495978707e11  # m
+L_SUN_W = 3.828e26  # W
+R_EARTH_M = 6.371e6  # m
+M_EARTH_KG = 5.972e24  # kg
+M_JUPITER_KG = 1.898e27  # kg
+
+
+def _safe_float(x: Any) -> Optional[float]:
+	try:
+		if x is None or (isinstance(x, float) and pd.isna(x)):
+			return None
+		return float(x)
+	except Exception:
+		return None
+
+
+def _mass_from_logg(logg_cgs: Optional[float], R_star_rsun: Optional[float]) -> Optional[float]:
+	if logg_cgs is None or R_star_rsun is None or R_star_rsun <= 0:
+		return None
+	try:
+		g_si = 10.0 ** logg_cgs / 100.0
+		return g_si * (R_star_rsun * R_SUN_M) ** 2 / G_SI / M_SUN_KG
+	except OverflowError:
+		return None
+
+
+def habitability_summary(name: str, in_hab_zone: Optional[bool], T_eq: Optional[float], R_p_re: Optional[float], score: float) -> Optional[str]:
+	# Phrase de synthèse (réutilisée telle quelle par la recherche catalogue)
+	try:
+		status_phrase = "dans la zone habitable" if in_hab_zone else "en dehors de la zone habitable"
+		temp_txt = f"{int(round(T_eq))} K" if T_eq is not None else "température inconnue"
+		rad_txt = f"{R_p_re:.1f}x Terre" if R_p_re is not None else "rayon inconnu"
+		return (
+			f"{name} est située {status_phrase}, avec une température de {temp_txt}, "
+			f"un rayon {rad_txt} et un score d’habitabilité de {round(score, 2):.2f}."
+		)
+	except Exception:
+		return None
+
+
+def compute_habitability_for_row(row: Dict[str, Any]) -> Dict[str, Any]:
+	name = row.get("pl_name") or row.get("name") or "Non disponible"
+	T_star = _safe_float(row.get("st_teff"))
+	R_star_rsun = _safe_float(row.get("st_rad"))
+	M_star_msun = _safe_float(row.get("st_mass"))
+	if M_star_msun is None:
+		# Masse stellaire absente (KOI, TOI): M = g R² / G, log g en cgs
+		M_star_msun = _mass_from_logg(_safe_float(row.get("st_logg")), R_star_rsun)
+	P_days = _safe_float(row.get("pl_orbper"))
+	R_p_re = _safe_float(row.get("pl_rade"))
+	# Optional masses if available in some datasets
+	M_p_earth = _safe_float(row.get("pl_bmasse"))  # Earth masses
+	M_p_jup = _safe_float(row.get("pl_bmassj")) or _safe_float(row.get("pl_massj"))  # Jupiter masses
+	T_eq = _safe_float(row.get("pl_eqt"))
+	insol = _safe_float(row.get("pl_insol"))  # flux reçu, en flux terrestres
+	# Distances
+	dist_pc = _safe_float(row.get("st_dist")) or _safe_float(row.get("sy_dist"))
+
+	a_au: Optional[float] = None
+	if M_star_msun is not None and P_days is not None:
+		try:
+			a_m = ((G_SI * (M_star_msun * M_SUN_KG) * (P_days * 86400.0) ** 2) / (4.0 * math.pi ** 2)) ** (1.0 / 3.0)
+			a_au = a_m / AU_M
+		except Exception:
+			a_au = None
+
+	L_rel: Optional[float] = None
+	if R_star_rsun is not None and T_star is not None:
+		try:
+			L_rel = (R_star_rsun ** 2.0) * ((T_star / T_SUN) ** 4.0)
+		except Exception:
+			L_rel = None
+
+	hz_inner = None
+	hz_outer = None
+	in_hab_zone = None
+	if L_rel is not None:
+		try:
+			hz_inner = math.sqrt(L_rel / 1.1)
+			hz_outer = math.sqrt(L_rel / 0.53)
+			if a_au is not None:
+				in_hab_zone = (a_au >= hz_inner and a_au <= hz_outer)
+		except Exception:
+			pass
+	if in_hab_zone is None and insol is not None:
+		# Sans demi-grand axe: mêmes bornes exprimées en flux (S = L / a²)
+		in_hab_zone = 0.53 <= insol <= 1.1
+
+	if T_eq is None and T_star is not None and R_star_rsun is not None and a_au is not None:
+		try:
+			R_star_m = R_star_rsun * R_SUN_M
+			a_m = a_au * AU_M
+			T_eq = T_star * math.sqrt(R_star_m / (2.0 * a_m)) * ((1.0 - 0.3) ** 0.25)
+		except Exception:
+			T_eq = None
+
+	# Planet gravity if mass and radius available
+	gravity = None
+	try:
+		if R_p_re is not None:
+			R_p_m = R_p_re * R_EARTH_M
+			if M_p_earth is not None:
+				M_p_kg = M_p_earth * M_EARTH_KG
+				gravity = G_SI * M_p_kg / (R_p_m ** 2)
+			elif M_p_jup is not None:
+				M_p_kg = M_p_jup * M_JUPITER_KG
+				gravity = G_SI * M_p_kg / (R_p_m ** 2)
+	except Exception:
+		gravity = None
+
+	# Stellar irradiance at planet orbit
+	luminosity_w_m2 = None
+	try:
+		if L_rel is not None and a_au is not None:
+			a_m = a_au * AU_M
+			luminosity_w_m2 = L_rel * L_SUN_W / (4.0 * math.pi * (a_m ** 2))
+	except Exception:
+		luminosity_w_m2 = None
+
+	# Star class from temperature
+	star_class = None
+	if T_star is not None:
+		try:
+			if T_star >= 30000:
+				star_class = "O"
+			elif T_star >= 10000:
+				star_class = "B"
+			elif T_star >= 7500:
+				star_class = "A"
+			elif T_star >= 6000:
+				star_class = "F"
+			elif T_star >= 5200:
+				star_class = "G"
+			elif T_star >= 3700:
+				star_class = "K"
+			else:
+				star_class = "M"
+		except Exception:
+			star_class = None
+
+	# Earth Similarity Index (simplified: radius, gravity, temp)
+	def _sub_esi(x: Optional[float], x_ref: float) -> Optional[float]:
+		if x is None or x <= 0 or x_ref <= 0:
+			return None
+		try:
+			v = 1.0 - abs(x - x_ref) / (x + x_ref)
+			return max(0.0, min(1.0, v))
+		except Exception:
+			return None
+
+	esi_parts: List[float] = []
+	r_esi = _sub_esi(R_p_re, 1.0)
+	if r_esi is not None:
+		esi_parts.append(r_esi)
+	g_esi = _sub_esi(gravity / 9.81 if (gravity is not None and gravity > 0) else None, 1.0)
+	if g_esi is not None:
+		esi_parts.append(g_esi)
+	t_esi = _sub_esi(T_eq, 288.0)
+	if t_esi is not None:
+		esi_parts.append(t_esi)
+	esi = None
+	if esi_parts:
+		try:
+			prod = 1.0
+			for p in esi_parts:
+				prod *= p
+			esi = prod ** (1.0 / len(esi_parts))
+		except Exception:
+			esi = None
+
+	score = 0.0
+	if T_eq is not None and 0.0 <= T_eq <= 373.0:
+		score += 0.4
+	if R_p_re is not None and R_p_re <= 2.0:
+		score += 0.3
+	if in_hab_zone is True:
+		score += 0.2
+	if T_star is not None and 4000.0 <= T_star <= 6000.0:
+		score += 0.1
+
+	summary = habitability_summary(name, in_hab_zone, T_eq, R_p_re, score)
+
+	return {
+		"name": name,
+		"radius": R_p_re if R_p_re is not None else None,
+		"temp_eq": T_eq if T_eq is not None else None,
+		"zone_habitable": bool(in_hab_zone) if in_hab_zone is not None else False,
+		"habitability_score": round(score, 4),
+		"gravity_m_s2": gravity if gravity is not None else None,
+		"luminosity_w_m2": luminosity_w_m2 if luminosity_w_m2 is not None else None,
+		"esi": round(esi, 4) if esi is not None else None,
+		"star_class": star_class,
+		"distance_pc": dist_pc if dist_pc is not None else None,
+		"distance_ly": (dist_pc * 3.26156) if dist_pc is not None else None,
+		"summary": summary,
+	}
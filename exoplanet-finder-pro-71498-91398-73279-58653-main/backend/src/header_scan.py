@@ -0,0 +1,133 @@
+import io
+from typing import BinaryIO, Iterator, Optional, Sequence, Tuple
+
+
+# Débuts de ligne d'entête connus (exports NEA: KOI cumulative, K2 P&C / PS, TOI)
+HEADER_MARKERS: Tuple[str, ...] = ("pl_name,", "koi_period,", "kepid,", "toi,", "rowid,")
+DEFAULT_BLOCK_SIZE = 1 << 16
+MAX_HEADER_LINES = 500
+_BOM = b"\xef\xbb\xbf"
+
+
+def iter_lines(f: BinaryIO, block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[Tuple[int, bytes]]:
+	# Lignes (offset, bytes) lues par blocs bornés: la mémoire ne dépend que du bloc et de la ligne courante
+	offset = f.tell()
+	pending = b""
+	while True:
+		block = f.read(block_size)
+		if not block:
+			break
+		pending += block
+		start = 0
+		while True:
+			nl = pending.find(b"\n", start)
+			if nl < 0:
+				break
+			yield offset, pending[start:nl + 1]
+			offset += nl + 1 - start
+			start = nl + 1
+		pending = pending[start:]
+	if pending:
+		yield offset, pending
+
+
+def _is_comment_or_blank(line: bytes) -> bool:
+	stripped = line.strip()
+	return not stripped or stripped.startswith(b"#")
+
+
+def find_header_offset(
+	path: str,
+	markers: Sequence[str] = HEADER_MARKERS,
+	require_marker: bool = False,
+	block_size: int = DEFAULT_BLOCK_SIZE,
+	max_lines: int = MAX_HEADER_LINES,
+) -> Optional[int]:
+	"""
+	Offset (octets) de la ligne d'entête, en sautant les commentaires '#'.
+	Cherche une ligne commençant par un des marqueurs parmi les max_lines premières lignes
+	non commentées; sinon retourne la première ligne non commentée (ou None si require_marker).
+	"""
+	first_data: Optional[int] = None
+	seen = 0
+	with open(path, "rb") as f:
+		for offset, line in iter_lines(f, block_size):
+			if offset == 0 and line.startswith(_BOM):
+				line = line[len(_BOM):]
+				offset = len(_BOM)
+			if _is_comment_or_blank(line):
+				continue
+			if first_data is None:
+				first_data = offset
+			text = line.strip().decode("latin-1").lower()
+			if any(text.startswith(m) for m in markers):
+				return offset
+			seen += 1
+			if seen >= max_lines:
+				break
+	return None if require_marker else first_data
+
+
+class CommentFilteredReader(io.RawIOBase):
+	"""
+	Flux binaire en lecture seule à partir d'un offset, qui retire au passage les lignes
+	commençant par '#'. Utilisable directement par pandas.read_csv ou shutil.copyfileobj.
+	"""
+
+	def __init__(
+		self,
+		path: str,
+		offset: int = 0,
+		skip_comments: bool = True,
+		block_size: int = DEFAULT_BLOCK_SIZE,
+	) -> None:
+		super().__init__()
+		self._file = open(path, "rb")
+		self._file.seek(offset)
+		self._skip_comments = skip_comments
+		self._block_size = block_size
+		self._pending = b""
+		self._buf = b""
+		self._eof = False
+
+	def readable(self) -> bool:
+		return True
+
+	def _filter(self, data: bytes) -> bytes:
+		# Chemin rapide: un bloc sans '#' passe tel quel
+		if not self._skip_comments or b"#" not in data:
+			return data
+		return b"\n".join(ln for ln in data.split(b"\n") if not ln.lstrip().startswith(b"#"))
+
+	def _fill(self) -> bytes:
+		block = self._file.read(self._block_size)
+		if not block:
+			self._eof = True
+			tail, self._pending = self._pending, b""
+			return self._filter(tail)
+		data = self._pending + block
+		cut = data.rfind(b"\n") + 1
+		self._pending = data[cut:]
+		return self._filter(data[:cut])
+
+	def readinto(self, b) -> int:
+		n = len(b)
+		while len(self._buf) < n and not self._eof:
+			self._buf += self._fill()
+		chunk, self._buf = self._buf[:n], self._buf[n:]
+		b[:len(chunk)] = chunk
+		return len(chunk)
+
+	def close(self) -> None:
+		if not self.closed:
+			self._file.close()
+		super().close()
+
+
+def open_data_stream(
+	path: str,
+	offset: int = 0,
+	skip_comments: bool = True,
+	block_size: int = DEFAULT_BLOCK_SIZE,
+) -> io.BufferedReader:
+	return io.BufferedReader(CommentFilteredReader(path, offset, skip_comments, block_size), buffer_size=block_size)
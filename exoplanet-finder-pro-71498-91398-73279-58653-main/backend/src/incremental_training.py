@@ -0,0 +1,300 @@
+import argparse
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.utils.class_weight import compute_class_weight, compute_sample_weight
+
+from .columnar_store import is_columnar_store, load_table, read_columnar, write_columnar
+from .data_cleaning import FEATURE_DTYPE, LABEL_DTYPE
+from .model_backend import (
+	DEFAULT_N_ESTIMATORS,
+	LABEL_ORDER,
+	XGBOOST_PARAMS,
+	XGBoostModel,
+	backend_name,
+	fit_model,
+	resolve_backend,
+)
+from .preprocessing import compute_preprocessor_config, save_preprocessor_config
+from .train_model import evaluation_metrics
+
+
+# Au-delà de cette proportion de lignes nouvelles, on réentraîne entièrement
+DEFAULT_REFIT_THRESHOLD = 0.25
+# Nombre minimal d'arbres (RF) / rounds (XGBoost) ajoutés par mise à jour
+MIN_EXTRA_ESTIMATORS = 10
+# Anciennes lignes rejouées par nouvelle ligne pour les arbres ajoutés
+OLD_ROWS_PER_NEW_ROW = 3
+# Refit complet si le modèle a grossi au-delà de ce facteur (vs taille par défaut)
+MAX_GROWTH_FACTOR = 2.0
+
+
+def load_store(store_path: str, columns: List[str]) -> pd.DataFrame:
+	# Chargé hors mmap: le store est réécrit juste après
+	if is_columnar_store(store_path):
+		return read_columnar(store_path, mmap=False)
+	return pd.DataFrame(columns=columns)
+
+
+def save_store(store: pd.DataFrame, store_path: str) -> None:
+	write_columnar(store, store_path, meta={"kind": "training_store"})
+
+
+def _row_hashes(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+	return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def _compact(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+	# Mêmes types que le nettoyage (features float32, label int8): hashes comparables, y compris
+	# avec un ancien store float64
+	return df[columns].astype({c: (LABEL_DTYPE if c == "label" else FEATURE_DTYPE) for c in columns})
+
+
+class MissingTrainingStore(RuntimeError):
+	pass
+
+
+def merge_into_store(
+	store: pd.DataFrame,
+	new_rows: pd.DataFrame,
+	columns: List[str],
+) -> Tuple[pd.DataFrame, pd.DataFrame, int]:
+	"""
+	Ajoute les lignes labellisées au store, clé = hash des features (le dernier label envoyé
+	l'emporte: une ligne relabellisée remplace l'ancienne).
+	Retourne (store complet, lignes réellement ajoutées, nombre de lignes relabellisées).
+	"""
+	for c in columns:
+		if c not in new_rows.columns:
+			raise ValueError(f"Colonne manquante: {c}")
+	features = [c for c in columns if c != "label"]
+	new_rows = _compact(new_rows, columns)
+	new_keys = _row_hashes(new_rows, features)
+	last = ~pd.Series(new_keys).duplicated(keep="last").to_numpy()
+	new_rows, new_keys = new_rows.loc[last].reset_index(drop=True), new_keys[last]
+
+	if store.empty:
+		return new_rows, new_rows, 0
+	store = _compact(store, columns)
+	store_keys = _row_hashes(store, features)
+	# Ancien store (dédupliqué sur features + label): dernier label connu par clé
+	known = pd.Series(store["label"].to_numpy(), index=store_keys)
+	known = known[~known.index.duplicated(keep="last")]
+	previous = known.reindex(new_keys).to_numpy()
+	is_new = pd.isna(previous)
+	relabeled = int(np.count_nonzero(~is_new & (previous != new_rows["label"].to_numpy())))
+	added = new_rows.loc[is_new].reset_index(drop=True)
+
+	merged = pd.concat([store, new_rows], ignore_index=True)
+	keep = ~pd.Series(np.concatenate([store_keys, new_keys])).duplicated(keep="last").to_numpy()
+	return merged.loc[keep].reset_index(drop=True), added, relabeled
+
+
+def reset_store(store_path: str, rows: pd.DataFrame, features: List[str]) -> int:
+	# Un entraînement complet remplace le store par ses propres lignes
+	columns = list(features) + ["label"]
+	store, _, _ = merge_into_store(pd.DataFrame(columns=columns), rows, columns)
+	save_store(store, store_path)
+	return int(store.shape[0])
+
+
+def _warm_start_sample(
+	old_rows: pd.DataFrame,
+	new_rows: pd.DataFrame,
+	random_state: int,
+) -> pd.DataFrame:
+	# Les arbres ajoutés voient les nouvelles lignes + un échantillon stratifié des anciennes,
+	# avec au moins quelques lignes de chaque classe (sinon predict_proba devient incohérent).
+	n_target = max(len(new_rows) * OLD_ROWS_PER_NEW_ROW, 200)
+	frac = min(1.0, n_target / max(len(old_rows), 1))
+	parts = [new_rows]
+	for lbl in LABEL_ORDER:
+		group = old_rows[old_rows["label"] == lbl]
+		if group.empty:
+			continue
+		k = min(len(group), max(int(round(len(group) * frac)), 20))
+		parts.append(group.sample(n=k, random_state=random_state))
+	return pd.concat(parts, ignore_index=True)
+
+
+def _extend_model(
+	model: Any,
+	sample: pd.DataFrame,
+	store: pd.DataFrame,
+	features: List[str],
+	n_extra: int,
+	random_state: int,
+) -> Any:
+	X = sample[features]
+	y = sample["label"].astype(int).to_numpy()
+	if isinstance(model, XGBoostModel):
+		import xgboost as xgb
+
+		y_idx = np.searchsorted(LABEL_ORDER, y)
+		dtrain = xgb.DMatrix(
+			X.to_numpy(dtype=np.float32),
+			label=y_idx,
+			weight=compute_sample_weight("balanced", y_idx),
+			feature_names=features,
+		)
+		params = {
+			**XGBOOST_PARAMS,
+			"num_class": len(LABEL_ORDER),
+			"nthread": model.n_threads,
+			"seed": random_state,
+		}
+		booster = xgb.train(
+			params,
+			dtrain,
+			num_boost_round=n_extra,
+			xgb_model=model.booster,
+		)
+		return XGBoostModel(booster, features, n_threads=model.n_threads)
+
+	# RandomForest: poids de classes calculés sur tout le store (recommandation sklearn avec warm_start)
+	y_all = store["label"].astype(int).to_numpy()
+	classes = np.unique(y_all)
+	weights = compute_class_weight("balanced", classes=classes, y=y_all)
+	model.set_params(
+		warm_start=True,
+		n_estimators=int(model.n_estimators) + n_extra,
+		class_weight=dict(zip(classes.tolist(), weights.tolist())),
+	)
+	model.fit(X, y)
+	model.set_params(warm_start=False)
+	return model
+
+
+def _can_extend(model: Any, backend: str, features: List[str], store_labels: np.ndarray) -> bool:
+	if model is None or backend_name(model) != backend:
+		return False
+	# Les arbres RF ajoutés doivent produire exactement les mêmes classes que les existants
+	if backend == "random_forest" and list(model.classes_) != sorted(np.unique(store_labels).tolist()):
+		return False
+	n_features = getattr(model, "n_features_in_", None)
+	if n_features is not None and int(n_features) != len(features):
+		return False
+	return int(model.n_estimators) <= MAX_GROWTH_FACTOR * DEFAULT_N_ESTIMATORS[backend]
+
+
+def train_incremental(
+	new_rows: pd.DataFrame,
+	features: List[str],
+	store_path: str,
+	model_path: str,
+	metrics_path: str,
+	preproc_path: Optional[str] = None,
+	backend: Optional[str] = None,
+	refit_threshold: float = DEFAULT_REFIT_THRESHOLD,
+	reset_store: bool = False,
+	random_state: int = 42,
+	dataset: Optional[str] = None,
+) -> Dict:
+	"""
+	Entraînement incrémental: les lignes nettoyées (features + label) sont ajoutées au store
+	dédupliqué, puis le modèle existant est prolongé (arbres warm_start ou rounds de boosting)
+	au lieu d'être réentraîné. Refit complet si le modèle est absent/incompatible, si des
+	lignes ont été relabellisées ou si la part de lignes nouvelles dépasse refit_threshold.
+	Refus (MissingTrainingStore) si un modèle existe sans store: un refit sur les seules
+	lignes envoyées écraserait le modèle entraîné sur le catalogue complet.
+	"""
+	backend = resolve_backend(backend)
+	columns = list(features) + ["label"]
+	old_rows = pd.DataFrame(columns=columns) if reset_store else load_store(store_path, columns)
+	if old_rows.empty and not reset_store and os.path.exists(model_path):
+		raise MissingTrainingStore(
+			f"Store d'entraînement absent ({store_path}) alors que {model_path} existe: "
+			"lancer d'abord un entraînement complet (mode=full) pour l'initialiser"
+		)
+	store, added, relabeled = merge_into_store(old_rows, new_rows, columns)
+	save_store(store, store_path)
+	if store.empty:
+		raise ValueError("Store d'entraînement vide")
+
+	model: Any = None
+	if not reset_store and os.path.exists(model_path):
+		try:
+			model = joblib.load(model_path)
+		except Exception:
+			model = None
+
+	y_store = store["label"].astype(int).to_numpy()
+	added_fraction = len(added) / max(len(old_rows), 1)
+	if added.empty and not relabeled and model is not None:
+		mode = "unchanged"
+	elif (
+		old_rows.empty
+		# Les arbres existants ont appris l'ancien label: warm_start ne peut pas le corriger
+		or relabeled
+		or added_fraction > refit_threshold
+		or not _can_extend(model, backend, features, y_store)
+	):
+		mode = "full_refit"
+		model = fit_model(store[features], y_store, backend=backend, random_state=random_state)
+	else:
+		mode = "warm_start"
+		base = DEFAULT_N_ESTIMATORS[backend]
+		n_extra = max(MIN_EXTRA_ESTIMATORS, int(round(base * added_fraction)))
+		sample = _warm_start_sample(old_rows, added, random_state)
+		model = _extend_model(model, sample, store, features, n_extra, random_state)
+
+	if preproc_path and mode != "unchanged":
+		os.makedirs(os.path.dirname(preproc_path) or ".", exist_ok=True)
+		save_preprocessor_config(compute_preprocessor_config(store, features), preproc_path)
+
+	X_store = store[features]
+	metrics = {
+		# Même jeu de métriques que l'entraînement complet (auc_micro_ovr compris)
+		**evaluation_metrics(y_store, model.predict(X_store), model.predict_proba(X_store)),
+		"rows": int(store.shape[0]),
+		"features": list(features),
+		"backend": backend,
+		"n_estimators": int(model.n_estimators),
+		"mode": mode,
+		"rows_uploaded": int(new_rows.shape[0]),
+		"rows_added": int(added.shape[0]),
+		"rows_relabeled": relabeled,
+		"duplicates_skipped": int(new_rows.shape[0] - added.shape[0] - relabeled),
+	}
+	if dataset:
+		metrics["dataset"] = dataset
+
+	os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+	if mode != "unchanged":
+		joblib.dump(model, model_path)
+	with open(metrics_path, "w", encoding="utf-8") as f:
+		json.dump(metrics, f, ensure_ascii=False, indent=2)
+	return metrics
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Entraînement incrémental à partir de nouvelles lignes nettoyées")
+	parser.add_argument("--cleaned", required=True, help="Données nettoyées (store colonne ou CSV: features + label) à ajouter")
+	parser.add_argument("--features", default="koi_period,koi_duration,koi_depth,koi_prad")
+	parser.add_argument("--store", default="models/training_store_kepler")
+	parser.add_argument("--model", default="models/model.joblib")
+	parser.add_argument("--metrics", default="models/metrics.json")
+	parser.add_argument("--preproc", default=None)
+	parser.add_argument("--backend", default=None)
+	parser.add_argument("--refit_threshold", type=float, default=DEFAULT_REFIT_THRESHOLD)
+	args = parser.parse_args()
+
+	m = train_incremental(
+		new_rows=load_table(args.cleaned),
+		features=[f.strip() for f in args.features.split(",") if f.strip()],
+		store_path=args.store,
+		model_path=args.model,
+		metrics_path=args.metrics,
+		preproc_path=args.preproc,
+		backend=args.backend,
+		refit_threshold=args.refit_threshold,
+	)
+	print(json.dumps(m, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,198 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# Instrumentation active par défaut (coût: un perf_counter + un verrou par mesure)
+METRICS_ENABLED = os.environ.get("EXODETECT_METRICS", "1").strip().lower() not in ("0", "false", "no")
+
+# Bornes des histogrammes de latence (secondes)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+	0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _escape(value: str) -> str:
+	return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+	parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+	if extra:
+		parts.append(extra)
+	return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+	return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+	def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()) -> None:
+		self.name = name
+		self.doc = doc
+		self.labelnames = tuple(labelnames)
+		self._values: Dict[Tuple[str, ...], float] = {}
+		self._lock = threading.Lock()
+
+	def inc(self, amount: float = 1.0, **labels: str) -> None:
+		key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+		with self._lock:
+			self._values[key] = self._values.get(key, 0.0) + amount
+
+	def render(self) -> List[str]:
+		lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+		with self._lock:
+			items = sorted(self._values.items())
+		for key, value in items:
+			lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+		return lines
+
+
+class Histogram:
+	def __init__(
+		self,
+		name: str,
+		doc: str,
+		labelnames: Sequence[str] = (),
+		buckets: Sequence[float] = DEFAULT_BUCKETS,
+	) -> None:
+		self.name = name
+		self.doc = doc
+		self.labelnames = tuple(labelnames)
+		self.buckets = tuple(sorted(buckets))
+		# clé de labels -> [comptes par bucket (+Inf en dernier), somme, total]
+		self._series: Dict[Tuple[str, ...], List] = {}
+		self._lock = threading.Lock()
+
+	def observe(self, value: float, **labels: str) -> None:
+		key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+		idx = bisect.bisect_left(self.buckets, value)
+		with self._lock:
+			series = self._series.get(key)
+			if series is None:
+				series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+				self._series[key] = series
+			series[0][idx] += 1
+			series[1] += value
+			series[2] += 1
+
+	def render(self) -> List[str]:
+		lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+		with self._lock:
+			items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._series.items())
+		for key, (counts, total, count) in items:
+			cumulative = 0
+			for bound, c in zip(self.buckets, counts):
+				cumulative += c
+				labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+				lines.append(f"{self.name}_bucket{labels} {cumulative}")
+			labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+			lines.append(f"{self.name}_bucket{labels} {count}")
+			lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+			lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+		return lines
+
+
+class Gauge:
+	"""Jauge évaluée au moment du scrape (ex: taille/hits d'un cache)."""
+
+	def __init__(self, name: str, doc: str, fn: Callable[[], float]) -> None:
+		self.name = name
+		self.doc = doc
+		self.fn = fn
+
+	def render(self) -> List[str]:
+		try:
+			value = float(self.fn())
+		except Exception:
+			return []
+		return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} gauge", f"{self.name} {_format_value(value)}"]
+
+
+class MetricsRegistry:
+	def __init__(self) -> None:
+		self._metrics: Dict[str, object] = {}
+		self._lock = threading.Lock()
+
+	def _get_or_create(self, name: str, factory: Callable[[], object]) -> object:
+		with self._lock:
+			metric = self._metrics.get(name)
+			if metric is None:
+				metric = factory()
+				self._metrics[name] = metric
+			return metric
+
+	def counter(self, name: str, doc: str, labelnames: Sequence[str] = ()) -> Counter:
+		return self._get_or_create(name, lambda: Counter(name, doc, labelnames))  # type: ignore[return-value]
+
+	def histogram(self, name: str, doc: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+		return self._get_or_create(name, lambda: Histogram(name, doc, labelnames, buckets))  # type: ignore[return-value]
+
+	def gauge(self, name: str, doc: str, fn: Callable[[], float]) -> Gauge:
+		# Une jauge ré-enregistrée remplace la précédente (ex: après rechargement des modèles)
+		gauge = Gauge(name, doc, fn)
+		with self._lock:
+			self._metrics[name] = gauge
+		return gauge
+
+	def render(self) -> str:
+		# Format texte d'exposition Prometheus (0.0.4)
+		with self._lock:
+			metrics = list(self._metrics.values())
+		lines: List[str] = []
+		for metric in metrics:
+			lines.extend(metric.render())  # type: ignore[attr-defined]
+		return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+	"exodetect_stage_seconds",
+	"Durée des étapes du pipeline (lecture, parsing, adaptation, préprocessing, inférence, explication, encodage)",
+	("stage", "model"),
+)
+
+# Durées des étapes de la requête en cours, pour l'en-tête Server-Timing
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+	"exodetect_request_timings", default=None
+)
+
+
+def begin_request() -> Tuple[List[Tuple[str, float]], contextvars.Token]:
+	timings: List[Tuple[str, float]] = []
+	return timings, _request_timings.set(timings)
+
+
+def end_request(token: contextvars.Token) -> None:
+	_request_timings.reset(token)
+
+
+@contextmanager
+def stage(name: str, model: Optional[str] = None) -> Iterator[None]:
+	"""Chronomètre une étape: histogramme exodetect_stage_seconds + entrée Server-Timing."""
+	if not METRICS_ENABLED:
+		yield
+		return
+	t0 = time.perf_counter()
+	try:
+		yield
+	finally:
+		elapsed = time.perf_counter() - t0
+		STAGE_SECONDS.observe(elapsed, stage=name, model=model or "")
+		timings = _request_timings.get()
+		if timings is not None:
+			timings.append((f"{name}-{model}" if model else name, elapsed))
+
+
+def server_timing(timings: Sequence[Tuple[str, float]]) -> str:
+	# Étapes répétées (ex: plusieurs lots) cumulées, dans l'ordre de première apparition
+	totals: Dict[str, float] = {}
+	for name, elapsed in timings:
+		totals[name] = totals.get(name, 0.0) + elapsed
+	return ", ".join(f"{name};dur={elapsed * 1000.0:.2f}" for name, elapsed in totals.items())
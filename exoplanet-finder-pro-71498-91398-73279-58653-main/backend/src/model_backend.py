@@ -0,0 +1,151 @@
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.utils.class_weight import compute_sample_weight
+
+
+# Backends de modèle disponibles (choisis via --backend ou EXODETECT_MODEL_BACKEND)
+BACKENDS: List[str] = ["random_forest", "xgboost"]
+
+# Ordre des labels commun à tous les backends: -1 FP, 0 CANDIDATE, 1 CONFIRMED
+LABEL_ORDER: List[int] = [-1, 0, 1]
+
+DEFAULT_N_ESTIMATORS: Dict[str, int] = {
+	"random_forest": 300,
+	# Nombre de rounds de boosting (un arbre par classe et par round)
+	"xgboost": 100,
+}
+
+XGBOOST_PARAMS: Dict[str, Any] = {
+	"objective": "multi:softprob",
+	"tree_method": "hist",
+	"max_depth": 6,
+	"eta": 0.1,
+	"max_bin": 256,
+	"eval_metric": "mlogloss",
+}
+
+
+def resolve_backend(name: Optional[str] = None) -> str:
+	backend = (name or os.environ.get("EXODETECT_MODEL_BACKEND") or "random_forest").strip().lower()
+	if backend in ("rf", "randomforest"):
+		backend = "random_forest"
+	if backend in ("xgb", "gbt"):
+		backend = "xgboost"
+	if backend not in BACKENDS:
+		raise ValueError(f"Backend de modèle inconnu: {backend} (disponibles: {BACKENDS})")
+	return backend
+
+
+def _n_threads(n_jobs: int) -> int:
+	if n_jobs is None or n_jobs < 1:
+		return os.cpu_count() or 1
+	return n_jobs
+
+
+def _as_float32(X: Any) -> np.ndarray:
+	if isinstance(X, pd.DataFrame):
+		X = X.to_numpy(dtype=np.float32, copy=False)
+	return np.ascontiguousarray(X, dtype=np.float32)
+
+
+class XGBoostModel:
+	"""
+	Enveloppe d'un Booster XGBoost exposant l'interface sklearn utilisée par l'API
+	(classes_, feature_importances_, predict_proba, predict).
+	L'inférence passe par inplace_predict sur un tableau NumPy float32 (pas de DMatrix).
+	"""
+
+	backend = "xgboost"
+
+	def __init__(self, booster: Any, features: List[str], n_threads: int = 1) -> None:
+		self.booster = booster
+		self.features = list(features)
+		self.n_threads = int(n_threads)
+		self.classes_ = np.array(LABEL_ORDER)
+		self.n_features_in_ = len(self.features)
+		self.n_estimators = int(booster.num_boosted_rounds())
+		# Importances "gain" normalisées, calculées une fois (ordre = features)
+		scores = booster.get_score(importance_type="gain")
+		raw = np.array([float(scores.get(f, 0.0)) for f in self.features], dtype=np.float64)
+		total = float(raw.sum())
+		self.feature_importances_ = raw / total if total > 0 else raw
+
+	def predict_proba(self, X: Any) -> np.ndarray:
+		arr = _as_float32(X)
+		proba = self.booster.inplace_predict(arr, predict_type="value")
+		return np.asarray(proba, dtype=np.float64).reshape(arr.shape[0], len(LABEL_ORDER))
+
+	def predict(self, X: Any) -> np.ndarray:
+		return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+	def __setstate__(self, state: Dict[str, Any]) -> None:
+		self.__dict__.update(state)
+		# Threads d'inférence adaptés à la machine qui charge le modèle
+		self.booster.set_param({"nthread": _n_threads(-1)})
+
+
+def _fit_xgboost(
+	X: pd.DataFrame,
+	y: np.ndarray,
+	n_estimators: int,
+	random_state: int,
+	n_jobs: int,
+) -> XGBoostModel:
+	import xgboost as xgb
+
+	features = [str(c) for c in X.columns]
+	y_idx = np.searchsorted(LABEL_ORDER, y)
+	# Equivalent de class_weight="balanced" côté RandomForest
+	weights = compute_sample_weight("balanced", y_idx)
+	n_threads = _n_threads(n_jobs)
+	dtrain = xgb.QuantileDMatrix(
+		_as_float32(X),
+		label=y_idx,
+		weight=weights,
+		feature_names=features,
+		nthread=n_threads,
+	)
+	params = {
+		**XGBOOST_PARAMS,
+		"num_class": len(LABEL_ORDER),
+		"nthread": n_threads,
+		"seed": random_state,
+	}
+	booster = xgb.train(params, dtrain, num_boost_round=n_estimators)
+	return XGBoostModel(booster, features, n_threads=n_threads)
+
+
+def fit_model(
+	X: pd.DataFrame,
+	y: np.ndarray,
+	backend: Optional[str] = None,
+	n_estimators: Optional[int] = None,
+	random_state: int = 42,
+	n_jobs: int = -1,
+) -> Any:
+	backend = resolve_backend(backend)
+	n_estimators = int(n_estimators or DEFAULT_N_ESTIMATORS[backend])
+	if backend == "xgboost":
+		return _fit_xgboost(X, y, n_estimators, random_state, n_jobs)
+
+	clf = RandomForestClassifier(
+		n_estimators=n_estimators,
+		random_state=random_state,
+		class_weight="balanced_subsample",
+		n_jobs=n_jobs,
+	)
+	clf.fit(X, y)
+	return clf
+
+
+def backend_name(model: Any) -> str:
+	if model is None:
+		return "none"
+	if isinstance(model, RandomForestClassifier):
+		return "random_forest"
+	return str(getattr(model, "backend", type(model).__name__))
+
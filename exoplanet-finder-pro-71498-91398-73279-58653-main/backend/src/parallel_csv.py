@@ -0,0 +1,200 @@
+import atexit
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from .header_scan import find_header_offset
+
+
+# Nombre de processus (défaut: nombre de coeurs) et taille minimale pour paralléliser
+CSV_WORKERS = int(os.environ.get("EXODETECT_CSV_WORKERS", "0")) or (os.cpu_count() or 1)
+PARALLEL_MIN_BYTES = int(os.environ.get("EXODETECT_CSV_PARALLEL_MIN_BYTES", str(64 << 20)))
+# Taille cible d'une plage: bornée pour limiter la mémoire par worker, plusieurs plages par worker
+RANGE_BYTES = 32 << 20
+SAMPLE_BYTES = 1 << 20
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+	# Pool partagé, créé à la première utilisation. forkserver: pas de fork du serveur (threads, sockets)
+	global _POOL
+	with _POOL_LOCK:
+		if _POOL is None or _POOL._max_workers != workers:  # type: ignore[attr-defined]
+			if _POOL is not None:
+				_POOL.shutdown(wait=False)
+			methods = multiprocessing.get_all_start_methods()
+			ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+			_POOL = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+		return _POOL
+
+
+def _reset_pool(pool: ProcessPoolExecutor) -> None:
+	global _POOL
+	with _POOL_LOCK:
+		if _POOL is pool:
+			_POOL = None
+	pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def _shutdown_pool() -> None:
+	if _POOL is not None:
+		_POOL.shutdown(wait=False, cancel_futures=True)
+
+
+def _read_at(path: str, start: int, length: int) -> bytes:
+	with open(path, "rb") as f:
+		f.seek(start)
+		return f.read(length)
+
+
+def _split_ranges(path: str, start: int, end: int, n: int) -> List[Tuple[int, int]]:
+	# Coupe [start, end) en n plages qui commencent juste après un saut de ligne
+	bounds = [start]
+	with open(path, "rb") as f:
+		for i in range(1, n):
+			target = max(start + (end - start) * i // n, bounds[-1])
+			f.seek(target)
+			f.readline()
+			pos = f.tell()
+			if pos >= end:
+				break
+			if pos > bounds[-1]:
+				bounds.append(pos)
+	bounds.append(end)
+	return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _parse_range(
+	path: str,
+	start: int,
+	end: int,
+	names: List[str],
+	text_columns: List[str],
+	sep: str,
+	quotechar: str,
+	encoding: str,
+	float_precision: Optional[str],
+) -> Tuple[pd.DataFrame, int]:
+	# Exécuté dans un worker: plage d'octets -> DataFrame typé (colonnes texte forcées en str)
+	# + nombre de guillemets de la plage (contrôle des frontières par l'appelant)
+	data = _read_at(path, start, end - start)
+	quotes = data.count(quotechar.encode("ascii"))
+	return pd.read_csv(
+		io.BytesIO(data),
+		header=None,
+		names=names,
+		dtype={c: str for c in text_columns},
+		sep=sep,
+		quotechar=quotechar,
+		comment="#",
+		encoding=encoding,
+		engine="c",
+		on_bad_lines="skip",
+		skip_blank_lines=True,
+		float_precision=float_precision,
+	), quotes
+
+
+def _boundaries_outside_quotes(quote_counts: List[int]) -> bool:
+	# Une frontière de plage tombe hors d'un champ quoté ssi le nombre de guillemets qui la
+	# précèdent est pair (guillemet échappé = doublé, parité conservée)
+	total = 0
+	for count in quote_counts[:-1]:
+		total += count
+		if total % 2:
+			return False
+	return True
+
+
+def _dtype_plan(path: str, header_offset: int, sep: str, quotechar: str, encoding: str) -> Tuple[List[str], List[str], List[str], int]:
+	# Entête + échantillon parsés une fois: noms de colonnes, colonnes texte, colonnes vides
+	# dans l'échantillon (type indéterminé), offset du début des données
+	with open(path, "rb") as f:
+		f.seek(header_offset)
+		header_line = f.readline()
+		data_start = f.tell()
+		sample = f.read(SAMPLE_BYTES)
+	cut = sample.rfind(b"\n") + 1
+	sample = sample[:cut] if cut else sample
+	frame = pd.read_csv(
+		io.BytesIO(header_line + sample), sep=sep, quotechar=quotechar, comment="#",
+		encoding=encoding, engine="c", on_bad_lines="skip", float_precision="round_trip",
+	)
+	text_columns = [c for c in frame.columns if frame[c].dtype == object]
+	empty_columns = [c for c in frame.columns if c not in text_columns and frame[c].isna().all()]
+	return list(frame.columns), text_columns, empty_columns, data_start
+
+
+def read_csv_parallel(
+	path: str,
+	sep: str = ",",
+	quotechar: str = '"',
+	encoding: str = "utf-8",
+	float_precision: Optional[str] = "round_trip",
+	workers: Optional[int] = None,
+	min_bytes: Optional[int] = None,
+) -> Optional[pd.DataFrame]:
+	"""
+	Lecture d'un gros CSV par plages d'octets en parallèle (pool de processus, moteur C).
+	Les plages commencent après l'entête et sont coupées aux sauts de ligne; dialecte et plan de
+	types (colonnes texte) sont déterminés une fois sur un échantillon et partagés par les workers.
+	float_precision: "round_trip" (exact, comme le chemin d'upload) ou None (comme le moteur python).
+	Retourne None quand le fichier ne s'y prête pas (petit, 1 coeur, champ quoté multi-ligne à
+	cheval sur une frontière de plage, types incohérents entre plages): l'appelant garde alors sa
+	lecture séquentielle. Les frontières sont vérifiées sur tout le fichier (parité des guillemets
+	comptés par chaque worker), pas seulement sur l'échantillon.
+	"""
+	workers = workers or CSV_WORKERS
+	size = os.path.getsize(path)
+	if workers < 2 or size < (PARALLEL_MIN_BYTES if min_bytes is None else min_bytes):
+		return None
+	# Entête = première ligne non commentée, comme la lecture séquentielle (pas de recherche de marqueur)
+	header_offset = find_header_offset(path, markers=())
+	if header_offset is None:
+		return None
+	try:
+		names, text_columns, empty_columns, data_start = _dtype_plan(path, header_offset, sep, quotechar, encoding)
+	except pd.errors.ParserError:
+		# Échantillon coupé dans un champ quoté multi-ligne
+		return None
+	n_ranges = max(workers, -(-(size - data_start) // RANGE_BYTES))
+	ranges = _split_ranges(path, data_start, size, n_ranges)
+	pool = _pool(workers)
+	as_text = text_columns + empty_columns
+	try:
+		futures = [pool.submit(_parse_range, path, a, b, names, as_text, sep, quotechar, encoding, float_precision) for a, b in ranges]
+		parsed = [f.result() for f in futures]
+	except BrokenProcessPool:
+		# Worker tué (OOM...): pool recréé au prochain appel, lecture séquentielle cette fois
+		_reset_pool(pool)
+		return None
+	except pd.errors.ParserError:
+		# Plage terminée dans un champ quoté ouvert ("EOF inside string"): frontière mal placée
+		return None
+	# Champ quoté multi-ligne coupé par une frontière: ses deux moitiés seraient mal parsées
+	if not _boundaries_outside_quotes([quotes for _, quotes in parsed]):
+		return None
+	frames = [frame for frame, _ in parsed]
+	# Plan de types: une colonne numérique dans l'échantillon doit l'être dans toutes les plages
+	numeric = [c for c in names if c not in as_text]
+	for frame in frames:
+		for c in numeric:
+			if frame[c].dtype == object:
+				return None
+	df = pd.concat(frames, ignore_index=True, copy=False)
+	# Colonnes vides dans l'échantillon: numériques si toutes les valeurs le sont (comme en lecture séquentielle)
+	for c in empty_columns:
+		try:
+			df[c] = pd.to_numeric(df[c])
+		except (ValueError, TypeError):
+			pass
+	return df
@@ -0,0 +1,207 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from glob import glob
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from .data_cleaning import CLEANING_VERSION, _robust_read_csv, clean_k2_frame, clean_kepler_frame, clean_toi_frame, write_cleaned
+
+
+# Catalogues NEA traités par le rafraîchissement nocturne.
+# pattern: export brut (le plus récent est retenu), cleaner: fonction de nettoyage, output: store colonne
+CATALOGS: Dict[str, Dict[str, str]] = {
+	"kepler": {
+		"pattern": "cumulative_*.csv",
+		"cleaner": "kepler",
+		"output": "data/cleaned_kepler",
+	},
+	"k2": {
+		"pattern": "k2pandc_*.csv",
+		"cleaner": "k2",
+		"output": "data/cleaned_k2",
+	},
+	"toi": {
+		"pattern": "TOI_*.csv",
+		"cleaner": "toi",
+		"output": "data/cleaned_toi",
+	},
+}
+
+CLEANERS: Dict[str, Callable[..., pd.DataFrame]] = {
+	"kepler": clean_kepler_frame,
+	"k2": clean_k2_frame,
+	"toi": clean_toi_frame,
+}
+
+MANIFEST_PATH = "data/pipeline_manifest.json"
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_sha256(path: str, block_size: int = HASH_BLOCK_SIZE) -> str:
+	h = hashlib.sha256()
+	with open(path, "rb") as f:
+		for block in iter(lambda: f.read(block_size), b""):
+			h.update(block)
+	return h.hexdigest()
+
+
+def find_latest_input(pattern: str, input_dir: str = ".") -> Optional[str]:
+	candidates = sorted(glob(os.path.join(input_dir, pattern)))
+	return candidates[-1] if candidates else None
+
+
+def load_manifest(path: str = MANIFEST_PATH) -> Dict[str, Any]:
+	if not os.path.exists(path):
+		return {"catalogs": {}}
+	try:
+		with open(path, "r", encoding="utf-8") as f:
+			return json.load(f)
+	except Exception:
+		return {"catalogs": {}}
+
+
+def process_catalog(
+	name: str,
+	spec: Dict[str, str],
+	input_path: str,
+	previous: Optional[Dict[str, Any]] = None,
+	force: bool = False,
+) -> Dict[str, Any]:
+	"""
+	Nettoie un catalogue (exécuté dans un process du pool).
+	Étapes chronométrées: hash, read, clean, write. Saute le catalogue si le hash d'entrée,
+	le cleaner et la version du nettoyage sont identiques au précédent passage et que la
+	sortie existe encore.
+	"""
+	entry: Dict[str, Any] = {
+		"input": os.path.abspath(input_path),
+		"output": os.path.abspath(spec["output"]),
+		"cleaner": spec["cleaner"],
+		"cleaning_version": CLEANING_VERSION,
+		"stages": {},
+	}
+	t_start = time.perf_counter()
+	try:
+		t0 = time.perf_counter()
+		digest = file_sha256(input_path)
+		entry["sha256"] = digest
+		entry["input_bytes"] = os.path.getsize(input_path)
+		entry["stages"]["hash"] = {"seconds": round(time.perf_counter() - t0, 4)}
+
+		if (
+			not force
+			and previous is not None
+			and previous.get("status") in ("ok", "skipped")
+			and previous.get("sha256") == digest
+			and previous.get("cleaner") == spec["cleaner"]
+			and previous.get("cleaning_version") == CLEANING_VERSION
+			and os.path.exists(spec["output"])
+		):
+			entry.update({k: previous[k] for k in ("rows_in", "rows_out", "counts") if k in previous})
+			entry["status"] = "skipped"
+			entry["seconds"] = round(time.perf_counter() - t_start, 4)
+			return entry
+
+		t0 = time.perf_counter()
+		raw = _robust_read_csv(input_path)
+		entry["stages"]["read"] = {"rows": int(raw.shape[0]), "seconds": round(time.perf_counter() - t0, 4)}
+
+		t0 = time.perf_counter()
+		counts: Dict[str, int] = {}
+		cleaned = CLEANERS[spec["cleaner"]](raw, counts=counts)
+		entry["stages"]["clean"] = {"rows": int(cleaned.shape[0]), "seconds": round(time.perf_counter() - t0, 4)}
+
+		t0 = time.perf_counter()
+		meta = {"source": entry["input"], "sha256": digest, "dataset": name, "cleaning_version": CLEANING_VERSION}
+		write_cleaned(cleaned, spec["output"], meta=meta)
+		entry["stages"]["write"] = {"rows": int(cleaned.shape[0]), "seconds": round(time.perf_counter() - t0, 4)}
+
+		entry["rows_in"] = int(raw.shape[0])
+		entry["rows_out"] = int(cleaned.shape[0])
+		entry["counts"] = counts
+		entry["status"] = "ok"
+	except Exception as e:
+		entry["status"] = "error"
+		entry["error"] = f"{type(e).__name__}: {e}"
+		entry["traceback"] = traceback.format_exc(limit=5)
+	entry["seconds"] = round(time.perf_counter() - t_start, 4)
+	return entry
+
+
+def run_pipeline(
+	catalogs: Optional[List[str]] = None,
+	input_dir: str = ".",
+	manifest_path: str = MANIFEST_PATH,
+	workers: Optional[int] = None,
+	force: bool = False,
+) -> Dict[str, Any]:
+	names = catalogs or list(CATALOGS.keys())
+	unknown = [n for n in names if n not in CATALOGS]
+	if unknown:
+		raise ValueError(f"Catalogues inconnus: {unknown} (disponibles: {list(CATALOGS)})")
+
+	previous = load_manifest(manifest_path).get("catalogs", {})
+	results: Dict[str, Any] = {}
+	jobs: Dict[str, str] = {}
+	for name in names:
+		input_path = find_latest_input(CATALOGS[name]["pattern"], input_dir)
+		if input_path is None:
+			results[name] = {"status": "missing", "pattern": CATALOGS[name]["pattern"]}
+		else:
+			jobs[name] = input_path
+
+	started = time.strftime("%Y-%m-%dT%H:%M:%S")
+	t_start = time.perf_counter()
+	n_workers = max(1, min(len(jobs), workers or os.cpu_count() or 1))
+	if jobs:
+		# Un process par catalogue: la durée totale suit le catalogue le plus lent
+		with ProcessPoolExecutor(max_workers=n_workers) as pool:
+			futures = {
+				pool.submit(process_catalog, name, CATALOGS[name], path, previous.get(name), force): name
+				for name, path in jobs.items()
+			}
+			for fut in as_completed(futures):
+				results[futures[fut]] = fut.result()
+
+	manifest = {
+		"started": started,
+		"elapsed_seconds": round(time.perf_counter() - t_start, 4),
+		"workers": n_workers,
+		"catalogs": {**previous, **{name: results[name] for name in names}},
+	}
+	os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+	with open(manifest_path, "w", encoding="utf-8") as f:
+		json.dump(manifest, f, ensure_ascii=False, indent=2)
+	return manifest
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Nettoyage parallèle de tous les catalogues NEA configurés")
+	parser.add_argument("--catalogs", type=str, default=None, help=f"Liste séparée par des virgules (défaut: {','.join(CATALOGS)})")
+	parser.add_argument("--input-dir", type=str, default=".", help="Dossier contenant les exports bruts")
+	parser.add_argument("--manifest", type=str, default=MANIFEST_PATH)
+	parser.add_argument("--workers", type=int, default=None)
+	parser.add_argument("--force", action="store_true", help="Ignorer les hash et tout renettoyer")
+	args = parser.parse_args()
+
+	catalogs = [c.strip() for c in args.catalogs.split(",") if c.strip()] if args.catalogs else None
+	manifest = run_pipeline(
+		catalogs=catalogs,
+		input_dir=args.input_dir,
+		manifest_path=args.manifest,
+		workers=args.workers,
+		force=args.force,
+	)
+	for name, entry in manifest["catalogs"].items():
+		print(f"{name}: {entry.get('status')} rows_out={entry.get('rows_out')} seconds={entry.get('seconds')}")
+	print(f"Manifeste: {args.manifest} ({manifest['elapsed_seconds']} s)")
+
+
+if __name__ == "__main__":
+	main()
@@ -1,26 +1,25 @@
 import argparse
+import io
+import shutil
 from typing import List
 
+from .header_scan import DEFAULT_BLOCK_SIZE, find_header_offset, open_data_stream
+
 
 def write_filtered_csv(input_path: str, output_path: str) -> None:
+	# Pré-scan en flux jusqu'à l'entête puis copie par blocs des lignes non commentées:
+	# mémoire O(bloc), le fichier n'est parcouru qu'une fois
 	encodings: List[str] = ["utf-8", "latin-1"]
 	last_err: Exception | None = None
 	for enc in encodings:
 		try:
-			with open(input_path, "r", encoding=enc, errors="ignore") as f:
-				all_lines = f.readlines()
-			non_comment = [ln for ln in all_lines if not ln.lstrip().startswith("#")]
-			if not non_comment:
+			header_offset = find_header_offset(input_path)
+			if header_offset is None:
 				raise ValueError("Fichier vide après filtrage des commentaires")
-			# Trouver l'entête
-			header_idx = 0
-			for i, ln in enumerate(non_comment[:500]):
-				l = ln.strip().lower()
-				if l.startswith("pl_name,") or l.startswith("koi_period,"):
-					header_idx = i
-					break
-			with open(output_path, "w", encoding="utf-8", newline="") as out:
-				out.write("".join(non_comment[header_idx:]))
+			with open_data_stream(input_path, header_offset) as src:
+				text = io.TextIOWrapper(src, encoding=enc, errors="ignore", newline="")
+				with open(output_path, "w", encoding="utf-8", newline="") as out:
+					shutil.copyfileobj(text, out, DEFAULT_BLOCK_SIZE)
 			return
 		except Exception as e:
 			last_err = e
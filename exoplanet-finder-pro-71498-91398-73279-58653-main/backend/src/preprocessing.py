@@ -1,29 +1,118 @@
 import json
-from typing import Dict, List, Tuple
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
+from .sketches import SKETCH_K, KLLSketch
+
 
 FEATURES: List[str] = ["koi_period", "koi_duration", "koi_depth", "koi_prad"]
+# Distribution de référence (surveillance de dérive): percentiles 0..100 de chaque feature.
+# clip_min, médiane et clip_max sont les percentiles 1, 50 et 99 de cette grille.
+REFERENCE_GRID = np.linspace(0.0, 1.0, 101)
+CLIP_MIN_INDEX, MEDIAN_INDEX, CLIP_MAX_INDEX = 1, 50, 99
+# Au-delà de ce nombre de lignes, method="auto" passe aux sketches (une passe par blocs, mémoire bornée)
+SKETCH_MIN_ROWS = int(os.environ.get("EXODETECT_PREPROC_SKETCH_ROWS", "5000000"))
+SKETCH_CHUNK_ROWS = 1 << 20
+
+
+def _numeric_values(df: pd.DataFrame, col: str) -> np.ndarray:
+	values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+	return values[~np.isnan(values)]
+
+
+def _column_stats(reference: np.ndarray, vmin: float, vmax: float) -> Dict:
+	return {
+		"median": float(reference[MEDIAN_INDEX]),
+		"min": float(vmin),
+		"max": float(vmax),
+		"clip_min": float(reference[CLIP_MIN_INDEX]),
+		"clip_max": float(reference[CLIP_MAX_INDEX]),
+	}
+
+
+def iter_chunks(df: pd.DataFrame, chunk_rows: int = SKETCH_CHUNK_ROWS) -> Iterable[pd.DataFrame]:
+	# Tranches de lignes (vues): sur un store mmap, seules les pages du bloc courant sont lues
+	for start in range(0, df.shape[0], chunk_rows):
+		yield df.iloc[start:start + chunk_rows]
+
+
+def sketch_features(
+	chunks: Iterable[pd.DataFrame],
+	features: List[str] = FEATURES,
+	k: int = SKETCH_K,
+	sketches: Optional[Dict[str, KLLSketch]] = None,
+) -> Dict[str, KLLSketch]:
+	"""Un sketch KLL par feature, alimenté bloc par bloc (fusionnable entre workers: merge_feature_sketches)."""
+	sketches = sketches if sketches is not None else {col: KLLSketch(k=k) for col in features}
+	for chunk in chunks:
+		for col in features:
+			sketches[col].update(_numeric_values(chunk, col))
+	return sketches
 
 
-def compute_preprocessor_config(df: pd.DataFrame, features: List[str] = FEATURES) -> Dict:
+def merge_feature_sketches(parts: Iterable[Dict[str, KLLSketch]]) -> Dict[str, KLLSketch]:
+	merged: Dict[str, KLLSketch] = {}
+	for part in parts:
+		for col, sketch in part.items():
+			if col in merged:
+				merged[col].merge(sketch)
+			else:
+				merged[col] = KLLSketch.from_dict(sketch.to_dict())
+	return merged
+
+
+def config_from_sketches(sketches: Dict[str, KLLSketch], features: List[str] = FEATURES) -> Dict:
+	stats = {}
+	reference = {}
+	errors = {}
+	for col in features:
+		sketch = sketches[col]
+		if sketch.n == 0:
+			raise ValueError(f"Colonne {col} vide après conversion numérique")
+		grid = np.asarray(sketch.quantiles(REFERENCE_GRID))
+		stats[col] = _column_stats(grid, sketch.min, sketch.max)
+		reference[col] = grid.tolist()
+		errors[col] = sketch.rank_error()
+	return {
+		"features": features,
+		"stats": stats,
+		"reference": reference,
+		"quantiles": {"method": "kll", "k": next(iter(sketches.values())).k, "rank_error": errors},
+	}
+
+
+def compute_preprocessor_config(
+	df: pd.DataFrame,
+	features: List[str] = FEATURES,
+	method: str = "auto",
+	k: int = SKETCH_K,
+) -> Dict:
+	"""
+	Statistiques de clipping par feature (quantiles 1 %/99 %, médiane, min, max) et distribution
+	de référence (percentiles 0..100, utilisée par la surveillance de dérive).
+	method: "exact" (un seul np.quantile par colonne), "sketch" (KLL par blocs, erreur de rang
+	bornée), "auto" (sketch au-delà de EXODETECT_PREPROC_SKETCH_ROWS lignes).
+	"""
+	if method == "auto":
+		method = "sketch" if df.shape[0] > SKETCH_MIN_ROWS else "exact"
+	if method == "sketch":
+		return config_from_sketches(sketch_features(iter_chunks(df), features, k=k), features)
+	if method != "exact":
+		raise ValueError(f"Méthode inconnue: {method}")
 	stats = {}
+	reference = {}
 	for col in features:
-		series = pd.to_numeric(df[col], errors="coerce").dropna()
-		if series.empty:
+		values = _numeric_values(df, col)
+		if values.size == 0:
 			raise ValueError(f"Colonne {col} vide après conversion numérique")
-		q01 = float(series.quantile(0.01))
-		q99 = float(series.quantile(0.99))
-		stats[col] = {
-			"median": float(series.median()),
-			"min": float(series.min()),
-			"max": float(series.max()),
-			"clip_min": q01,
-			"clip_max": q99,
-		}
-	return {"features": features, "stats": stats}
+		# Une seule sélection pour toute la grille (interpolation linéaire, comme pandas)
+		grid = np.quantile(values, REFERENCE_GRID)
+		stats[col] = _column_stats(grid, values.min(), values.max())
+		reference[col] = grid.tolist()
+	return {"features": features, "stats": stats, "reference": reference}
 
 
 def apply_inference_preprocessing(
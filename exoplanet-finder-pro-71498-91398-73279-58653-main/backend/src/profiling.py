@@ -0,0 +1,336 @@
+import contextvars
+import html
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# Intervalle d'échantillonnage par défaut (ms) et bornes acceptées
+DEFAULT_INTERVAL_MS = float(os.environ.get("EXODETECT_PROFILE_INTERVAL_MS", "5"))
+MIN_INTERVAL_MS = 1.0
+MAX_REQUESTS = 100
+MAX_STACK_DEPTH = 128
+# Profondeur des traces tracemalloc (frames gardées par allocation)
+TRACEMALLOC_FRAMES = 25
+# Nouveau snapshot mémoire quand la mémoire tracée dépasse le précédent pic de ce facteur
+PEAK_SNAPSHOT_GROWTH = 1.1
+# Les endpoints du profileur ne sont jamais capturés eux-mêmes
+EXCLUDED_PREFIX = "/admin/profile"
+
+
+def _frame_label(frame: Any) -> str:
+	code = frame.f_code
+	module = frame.f_globals.get("__name__", "?")
+	return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _collapse(frame: Any) -> str:
+	# Pile racine -> feuille, format "collapsed stacks" (flamegraph.pl, speedscope)
+	labels: List[str] = []
+	while frame is not None and len(labels) < MAX_STACK_DEPTH:
+		labels.append(_frame_label(frame))
+		frame = frame.f_back
+	return ";".join(reversed(labels))
+
+
+# Session qui capture la requête en cours: propagée aux workers du threadpool (run_in_threadpool
+# copie le contexte), qui s'y rattachent via profile_thread()
+_request_session: contextvars.ContextVar[Optional["ProfileSession"]] = contextvars.ContextVar(
+	"exodetect_profile_session", default=None
+)
+
+
+class ProfileSession:
+	"""
+	Capture des N prochaines requêtes correspondant au filtre (préfixe de chemin, taille minimale).
+	Un thread échantillonne la pile des threads qui servent une requête capturée; avec memory=True,
+	tracemalloc est actif pendant la session et un snapshot est pris à chaque nouveau pic mémoire.
+	"""
+
+	def __init__(
+		self,
+		requests: int,
+		path: Optional[str] = None,
+		min_bytes: int = 0,
+		interval_ms: float = DEFAULT_INTERVAL_MS,
+		memory: bool = False,
+	) -> None:
+		self.requests = requests
+		self.path = path
+		self.min_bytes = min_bytes
+		self.interval = max(interval_ms, MIN_INTERVAL_MS) / 1000.0
+		self.memory = memory
+		self.claimed = 0
+		self.completed = 0
+		self.samples = 0
+		self.stacks: Dict[str, int] = {}
+		self.captured: List[Dict[str, Any]] = []
+		self.started_at = time.time()
+		self.finished_at: Optional[float] = None
+		self._active: Dict[int, int] = {}
+		self._lock = threading.Lock()
+		self._stop = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+		self._owns_tracemalloc = False
+		self._baseline: Optional[tracemalloc.Snapshot] = None
+		self._peak_snapshot: Optional[tracemalloc.Snapshot] = None
+		self._peak_bytes = 0
+
+	@property
+	def running(self) -> bool:
+		return self.finished_at is None
+
+	def start(self) -> None:
+		if self.memory:
+			if not tracemalloc.is_tracing():
+				tracemalloc.start(TRACEMALLOC_FRAMES)
+				self._owns_tracemalloc = True
+			self._baseline = tracemalloc.take_snapshot()
+		self._thread = threading.Thread(target=self._sample_loop, name="exodetect-profiler", daemon=True)
+		self._thread.start()
+
+	def stop(self, wait: bool = False) -> None:
+		# Sans attente depuis la boucle de requêtes: le thread d'échantillonnage libère tracemalloc
+		with self._lock:
+			if self.finished_at is None:
+				self.finished_at = time.time()
+		self._stop.set()
+		if wait and self._thread is not None and self._thread is not threading.current_thread():
+			self._thread.join()
+
+	def matches(self, path: str, content_length: int) -> bool:
+		if path.startswith(EXCLUDED_PREFIX):
+			return False
+		if self.path and not path.startswith(self.path):
+			return False
+		return content_length >= self.min_bytes
+
+	def claim(self, path: str, content_length: int) -> bool:
+		with self._lock:
+			if self.finished_at is not None or self.claimed >= self.requests or not self.matches(path, content_length):
+				return False
+			self.claimed += 1
+			return True
+
+	def attach(self) -> int:
+		# Thread courant échantillonné (appels imbriqués comptés)
+		tid = threading.get_ident()
+		with self._lock:
+			self._active[tid] = self._active.get(tid, 0) + 1
+		return tid
+
+	def detach(self, tid: int) -> None:
+		with self._lock:
+			left = self._active.get(tid, 1) - 1
+			if left > 0:
+				self._active[tid] = left
+			else:
+				self._active.pop(tid, None)
+
+	def enter(self) -> Tuple[int, float, contextvars.Token]:
+		# Session visible des workers lancés par la requête (voir profile_thread)
+		return self.attach(), time.perf_counter(), _request_session.set(self)
+
+	def exit(self, token: Tuple[int, float, contextvars.Token], path: str, status: int) -> None:
+		tid, t0, ctx_token = token
+		_request_session.reset(ctx_token)
+		self.detach(tid)
+		with self._lock:
+			self.completed += 1
+			self.captured.append({"path": path, "status": status, "seconds": round(time.perf_counter() - t0, 4)})
+			done = self.completed >= self.requests
+		if done:
+			self.stop()
+
+	def _sample_loop(self) -> None:
+		while not self._stop.wait(self.interval):
+			with self._lock:
+				threads = list(self._active)
+			if not threads:
+				continue
+			frames = sys._current_frames()
+			for tid in threads:
+				frame = frames.get(tid)
+				if frame is None:
+					continue
+				key = _collapse(frame)
+				with self._lock:
+					self.stacks[key] = self.stacks.get(key, 0) + 1
+					self.samples += 1
+			del frames
+			if self.memory and tracemalloc.is_tracing():
+				current, _ = tracemalloc.get_traced_memory()
+				if current > self._peak_bytes * PEAK_SNAPSHOT_GROWTH:
+					self._peak_bytes = current
+					self._peak_snapshot = tracemalloc.take_snapshot()
+		if self._owns_tracemalloc:
+			tracemalloc.stop()
+			self._owns_tracemalloc = False
+
+	def collapsed(self) -> str:
+		with self._lock:
+			items = sorted(self.stacks.items())
+		return "".join(f"{stack} {count}\n" for stack, count in items)
+
+	def top_allocations(self, limit: int = 25) -> List[Dict[str, Any]]:
+		"""Sites d'allocation vivants au pic mémoire observé, nets de l'état au démarrage."""
+		snapshot = self._peak_snapshot
+		if snapshot is None:
+			return []
+		filters = [
+			tracemalloc.Filter(False, tracemalloc.__file__),
+			tracemalloc.Filter(False, __file__),
+			tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+		]
+		snapshot = snapshot.filter_traces(filters)
+		if self._baseline is not None:
+			stats = snapshot.compare_to(self._baseline.filter_traces(filters), "lineno")
+			stats = [s for s in stats if s.size_diff > 0]
+			stats.sort(key=lambda s: s.size_diff, reverse=True)
+			return [
+				{
+					"site": f"{s.traceback[0].filename}:{s.traceback[0].lineno}",
+					"bytes": int(s.size_diff),
+					"blocks": int(s.count_diff),
+				}
+				for s in stats[:limit]
+			]
+		return [
+			{"site": f"{s.traceback[0].filename}:{s.traceback[0].lineno}", "bytes": int(s.size), "blocks": int(s.count)}
+			for s in snapshot.statistics("lineno")[:limit]
+		]
+
+	def status(self) -> Dict[str, Any]:
+		with self._lock:
+			return {
+				"running": self.finished_at is None,
+				"requests": self.requests,
+				"claimed": self.claimed,
+				"completed": self.completed,
+				"path": self.path,
+				"min_bytes": self.min_bytes,
+				"interval_ms": round(self.interval * 1000.0, 3),
+				"memory": self.memory,
+				"samples": self.samples,
+				"distinct_stacks": len(self.stacks),
+				"peak_traced_bytes": int(self._peak_bytes) if self.memory else None,
+				"started_at": self.started_at,
+				"finished_at": self.finished_at,
+				"captured": list(self.captured),
+			}
+
+
+class Profiler:
+	"""Session courante (ou dernière terminée) du profileur à la demande."""
+
+	def __init__(self) -> None:
+		self.session: Optional[ProfileSession] = None
+		self._lock = threading.Lock()
+
+	def start(self, **kwargs: Any) -> ProfileSession:
+		session = ProfileSession(**kwargs)
+		with self._lock:
+			previous, self.session = self.session, session
+		if previous is not None:
+			previous.stop(wait=True)
+		session.start()
+		return session
+
+	def stop(self) -> Optional[ProfileSession]:
+		session = self.session
+		if session is not None:
+			session.stop(wait=True)
+		return session
+
+	def claim(self, path: str, content_length: int) -> Optional[ProfileSession]:
+		# Chemin chaud (chaque requête): une lecture d'attribut quand aucune session ne tourne
+		session = self.session
+		if session is None or not session.running:
+			return None
+		return session if session.claim(path, content_length) else None
+
+
+PROFILER = Profiler()
+
+
+@contextmanager
+def profile_thread() -> Iterator[None]:
+	"""Échantillonne aussi le thread courant (worker) si la requête en cours est capturée."""
+	session = _request_session.get()
+	if session is None:
+		yield
+		return
+	tid = session.attach()
+	try:
+		yield
+	finally:
+		session.detach(tid)
+
+
+def _stack_tree(stacks: Dict[str, int]) -> Dict[str, Any]:
+	root: Dict[str, Any] = {"name": "all", "value": 0, "children": {}}
+	for stack, count in stacks.items():
+		root["value"] += count
+		node = root
+		for label in stack.split(";"):
+			child = node["children"].get(label)
+			if child is None:
+				child = {"name": label, "value": 0, "children": {}}
+				node["children"][label] = child
+			child["value"] += count
+			node = child
+	return root
+
+
+def _frame_color(name: str) -> str:
+	# Couleur stable par fonction (teintes chaudes), code applicatif en plus saturé
+	h = sum(name.encode("utf-8")) % 55
+	sat = 80 if name.startswith(("src.", "api.")) else 55
+	return f"hsl({h},{sat}%,60%)"
+
+
+def render_flamegraph(stacks: Dict[str, int], title: str = "ExoDetect profile", width: int = 1200, row_height: int = 17) -> str:
+	"""Flamegraph SVG autonome (racine en bas, largeur proportionnelle au nombre d'échantillons)."""
+	root = _stack_tree(stacks)
+	total = max(root["value"], 1)
+	rects: List[Tuple[int, float, float, Dict[str, Any]]] = []
+	max_depth = 0
+	todo = [(root, 0, 0.0)]
+	while todo:
+		node, depth, x = todo.pop()
+		w = node["value"] / total * width
+		if w < 0.1:
+			continue
+		rects.append((depth, x, w, node))
+		max_depth = max(max_depth, depth)
+		for child in sorted(node["children"].values(), key=lambda c: c["name"]):
+			todo.append((child, depth + 1, x))
+			x += child["value"] / total * width
+
+	top = 30
+	height = top + (max_depth + 1) * row_height + 10
+	out = [
+		f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="monospace" font-size="11">',
+		f'<rect width="{width}" height="{height}" fill="#fdfdf6"/>',
+		f'<text x="{width / 2:.0f}" y="18" text-anchor="middle" font-size="14">{html.escape(title)} ({root["value"]} échantillons)</text>',
+	]
+	for depth, x, w, node in rects:
+		y = height - 10 - (depth + 1) * row_height
+		name = html.escape(node["name"])
+		pct = 100.0 * node["value"] / total
+		out.append(
+			f'<g><title>{name} ({node["value"]} échantillons, {pct:.2f}%)</title>'
+			f'<rect x="{x:.2f}" y="{y}" width="{w:.2f}" height="{row_height - 1}" fill="{_frame_color(node["name"])}" rx="2"/>'
+		)
+		# Texte seulement si la boîte est assez large (~7 px par caractère)
+		n_chars = int((w - 6) / 7)
+		if n_chars >= 3:
+			label = node["name"] if len(node["name"]) <= n_chars else node["name"][:n_chars - 2] + ".."
+			out.append(f'<text x="{x + 3:.2f}" y="{y + row_height - 5}">{html.escape(label)}</text>')
+		out.append("</g>")
+	out.append("</svg>")
+	return "\n".join(out)
@@ -0,0 +1,95 @@
+import math
+from typing import List, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+# Rayon de recherche maximal accepté (degrés): au-delà, une recherche renvoie une fraction du ciel
+MAX_RADIUS_DEG = 10.0
+ARCSEC_PER_RAD = 180.0 / math.pi * 3600.0
+
+
+def radec_to_unit(ra_deg: np.ndarray, dec_deg: np.ndarray) -> np.ndarray:
+	"""Coordonnées équatoriales (degrés) -> vecteurs unitaires (n, 3)."""
+	ra = np.radians(np.asarray(ra_deg, dtype=np.float64))
+	dec = np.radians(np.asarray(dec_deg, dtype=np.float64))
+	cos_dec = np.cos(dec)
+	return np.column_stack([cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)])
+
+
+def chord_from_arcsec(radius_arcsec: float) -> float:
+	# Séparation angulaire -> distance euclidienne entre vecteurs unitaires (corde)
+	return 2.0 * math.sin(radius_arcsec / ARCSEC_PER_RAD / 2.0)
+
+
+def arcsec_from_chord(chord: np.ndarray) -> np.ndarray:
+	return 2.0 * np.arcsin(np.clip(np.asarray(chord) / 2.0, 0.0, 1.0)) * ARCSEC_PER_RAD
+
+
+def check_position(ra: float, dec: float, radius_arcsec: float) -> None:
+	if not (math.isfinite(ra) and math.isfinite(dec)) or not -90.0 <= dec <= 90.0:
+		raise ValueError("ra/dec invalides (degrés, -90 <= dec <= 90)")
+	if not 0.0 < radius_arcsec <= MAX_RADIUS_DEG * 3600.0:
+		raise ValueError(f"Rayon hors limites (0 < rayon <= {MAX_RADIUS_DEG * 3600:.0f} arcsec)")
+
+
+class SkyIndex:
+	"""
+	KD-tree sur les vecteurs unitaires des positions (ra/dec en degrés): une recherche de cône de
+	rayon θ est une recherche euclidienne de rayon 2 sin(θ/2), sans discontinuité à ra=0/360 ni aux pôles.
+	Les lignes sans position valide sont exclues de l'index.
+	"""
+
+	def __init__(self, ra: np.ndarray, dec: np.ndarray, leaf_size: int = 16) -> None:
+		ra = np.asarray(ra, dtype=np.float64)
+		dec = np.asarray(dec, dtype=np.float64)
+		valid = _valid_positions(ra, dec)
+		self.rows = np.flatnonzero(valid)
+		self.size = int(self.rows.size)
+		self.leaf_size = leaf_size
+		self.tree = cKDTree(radec_to_unit(ra[valid], dec[valid]) if self.size else np.zeros((0, 3)), leafsize=leaf_size)
+
+	def cone(self, ra: float, dec: float, radius_arcsec: float) -> Tuple[np.ndarray, np.ndarray]:
+		"""Lignes dans le cône (ra, dec, rayon), triées par séparation croissante: (lignes, séparations en arcsec)."""
+		check_position(ra, dec, radius_arcsec)
+		if not self.size:
+			return np.empty(0, dtype=np.int64), np.empty(0)
+		center = radec_to_unit([ra], [dec])[0]
+		ind = np.asarray(self.tree.query_ball_point(center, r=chord_from_arcsec(radius_arcsec)), dtype=np.int64)
+		chord = np.linalg.norm(self.tree.data[ind] - center, axis=1)
+		order = np.argsort(chord, kind="stable")
+		return self.rows[ind[order]], arcsec_from_chord(chord[order])
+
+	def crossmatch(self, ra: np.ndarray, dec: np.ndarray, radius_arcsec: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+		"""
+		Toutes les paires (entrée, ligne) à moins de radius_arcsec (un hôte à plusieurs planètes donne
+		plusieurs lignes). Les entrées ont leur propre KD-tree, parcouru en même temps que celui du
+		catalogue (recherche double arbre), sans boucle par entrée. Entrées sans position valide ignorées.
+		Retourne (indices d'entrée, lignes, séparations en arcsec), triés par entrée puis séparation.
+		"""
+		check_position(0.0, 0.0, radius_arcsec)
+		ra = np.asarray(ra, dtype=np.float64)
+		dec = np.asarray(dec, dtype=np.float64)
+		valid = np.flatnonzero(_valid_positions(ra, dec))
+		if not self.size or not valid.size:
+			return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+		queries = cKDTree(radec_to_unit(ra[valid], dec[valid]), leafsize=self.leaf_size)
+		pairs = queries.sparse_distance_matrix(self.tree, chord_from_arcsec(radius_arcsec), output_type="ndarray")
+		order = np.lexsort((pairs["v"], pairs["i"]))
+		pairs = pairs[order]
+		return valid[pairs["i"]], self.rows[pairs["j"]], arcsec_from_chord(pairs["v"])
+
+
+def _valid_positions(ra: np.ndarray, dec: np.ndarray) -> np.ndarray:
+	return np.isfinite(ra) & np.isfinite(dec) & (np.abs(dec) <= 90.0)
+
+
+def find_coordinate_columns(columns: List[str]) -> Tuple[str, str]:
+	"""Colonnes ra/dec d'une table importée (noms usuels NEA/VizieR, casse ignorée)."""
+	lower = {c.strip().lower(): c for c in columns}
+	ra = next((lower[c] for c in ("ra", "ra_deg", "raj2000", "ra_j2000", "ra_icrs") if c in lower), None)
+	dec = next((lower[c] for c in ("dec", "dec_deg", "dej2000", "decj2000", "dec_j2000", "de_icrs", "dec_icrs") if c in lower), None)
+	if ra is None or dec is None:
+		raise ValueError("Colonnes ra/dec (degrés décimaux) introuvables")
+	return ra, dec
@@ -0,0 +1,155 @@
+import io
+import lzma
+import zipfile
+import zlib
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .fits_lightcurve import is_fits, read_lightcurve
+from .uploads import SpooledUpload, UnsupportedCompression
+
+
+# Formats binaires colonne acceptés à la place d'un CSV (aucun parsing texte)
+PARQUET_MAGIC = b"PAR1"
+ARROW_FILE_MAGIC = b"ARROW1"
+# Flux IPC Arrow: chaque message commence par le marqueur de continuation 0xFFFFFFFF
+ARROW_STREAM_MAGIC = b"\xff\xff\xff\xff"
+NPY_MAGIC = b"\x93NUMPY"
+CONTENT_TYPES: Dict[str, str] = {
+	"application/vnd.apache.parquet": "parquet",
+	"application/x-parquet": "parquet",
+	"application/parquet": "parquet",
+	"application/vnd.apache.arrow.file": "arrow",
+	"application/vnd.apache.arrow.stream": "arrow_stream",
+	"application/x-npz": "npz",
+	"application/x-npy": "npy",
+	"application/fits": "fits",
+	"image/fits": "fits",
+}
+
+
+class UnsupportedFormat(ValueError):
+	pass
+
+
+def _is_npz(upload: SpooledUpload) -> bool:
+	# Un .npz est un zip dont tous les membres sont des .npy
+	try:
+		with upload.raw_stream() as raw, zipfile.ZipFile(raw) as archive:
+			names = archive.namelist()
+	except (zipfile.BadZipFile, OSError):
+		return False
+	return bool(names) and all(n.endswith(".npy") for n in names)
+
+
+def _decompressed_is_fits(upload: SpooledUpload) -> bool:
+	# Flux compressé tronqué ou invalide: pas du FITS, la cascade de parsing CSV répondra 400
+	try:
+		return is_fits(upload.head(16))
+	except (EOFError, OSError, lzma.LZMAError, zlib.error, UnsupportedCompression):
+		return False
+
+
+def detect_table_format(upload: SpooledUpload) -> Optional[str]:
+	"""Format binaire de l'upload (signature d'abord, puis Content-Type), None pour du texte/CSV."""
+	head = upload.head(16, raw=True)
+	if head.startswith(PARQUET_MAGIC):
+		return "parquet"
+	if head.startswith(ARROW_FILE_MAGIC):
+		return "arrow"
+	if head.startswith(ARROW_STREAM_MAGIC):
+		return "arrow_stream"
+	if head.startswith(NPY_MAGIC):
+		return "npy"
+	if is_fits(head) or (upload.compression not in (None, "zip") and _decompressed_is_fits(upload)):
+		return "fits"
+	if upload.compression == "zip" and _is_npz(upload):
+		return "npz"
+	content_type = (upload.content_type or "").split(";")[0].strip().lower()
+	fmt = CONTENT_TYPES.get(content_type)
+	# Content-Type seul: jamais pour un upload compressé (c'est le CSV décompressé qui compte)
+	return fmt if fmt is not None and upload.compression is None else None
+
+
+def _pyarrow(fmt: str) -> Any:
+	try:
+		import pyarrow
+		import pyarrow.ipc  # noqa: F401
+	except ImportError:
+		raise UnsupportedFormat(f"Format {fmt} non supporté sur ce serveur (installer pyarrow)")
+	return pyarrow
+
+
+def _arrow_source(pa: Any, upload: SpooledUpload) -> Any:
+	# Fichier spoolé: memory map (buffers Arrow pointant directement dans la page cache)
+	if upload.path is not None:
+		return pa.memory_map(upload.path, "r")
+	return pa.BufferReader(upload.view())
+
+
+def _structured_frame(arr: np.ndarray) -> pd.DataFrame:
+	# Tableau structuré: une colonne par champ (vues sur le tableau, pas de copie)
+	return pd.DataFrame({name: arr[name] for name in arr.dtype.names}, copy=False)
+
+
+def _read_npz(upload: SpooledUpload) -> pd.DataFrame:
+	with upload.raw_stream() as raw, np.load(raw, allow_pickle=False) as npz:
+		keys = list(npz.files)
+		if len(keys) == 1 and npz[keys[0]].dtype.names:
+			return _structured_frame(npz[keys[0]])
+		# Matrice 2D + noms de colonnes
+		if set(keys) == {"data", "columns"}:
+			return pd.DataFrame(npz["data"], columns=[str(c) for c in npz["columns"]], copy=False)
+		# Cas général: un tableau 1D par colonne
+		columns = {k: npz[k] for k in keys}
+	lengths = {a.shape[0] if a.ndim == 1 else -1 for a in columns.values()}
+	if len(lengths) != 1 or -1 in lengths:
+		raise ValueError("npz: attendu un tableau 1D de même longueur par colonne")
+	return pd.DataFrame(columns, copy=False)
+
+
+def _read_npy(upload: SpooledUpload) -> pd.DataFrame:
+	if upload.path is not None:
+		arr = np.load(upload.path, mmap_mode="r", allow_pickle=False)
+	else:
+		arr = np.load(io.BytesIO(upload.view()), allow_pickle=False)
+	if arr.dtype.names:
+		return _structured_frame(arr)
+	if arr.ndim == 2:
+		return pd.DataFrame(arr, columns=[f"col_{i}" for i in range(arr.shape[1])], copy=False)
+	raise ValueError("npy: attendu un tableau structuré (champs nommés) ou 2D")
+
+
+def _read_fits(upload: SpooledUpload) -> pd.DataFrame:
+	# .fits.gz (fréquent sur MAST): décompressé en mémoire, borné par UPLOAD_MAX_DECOMPRESSED_BYTES
+	if upload.compression is not None:
+		with upload.stream() as f:
+			return read_lightcurve(f.read())
+	if upload.path is not None:
+		return read_lightcurve(upload.path)
+	return read_lightcurve(bytes(upload.view()))
+
+
+def read_table(upload: SpooledUpload, fmt: str) -> pd.DataFrame:
+	"""DataFrame depuis un upload binaire; colonnes numériques passées telles quelles à adapt_to_canonical."""
+	if fmt == "npz":
+		return _read_npz(upload)
+	if fmt == "npy":
+		return _read_npy(upload)
+	if fmt == "fits":
+		return _read_fits(upload)
+	pa = _pyarrow(fmt)
+	if fmt == "parquet":
+		import pyarrow.parquet as pq
+
+		table = pq.read_table(_arrow_source(pa, upload))
+	elif fmt == "arrow":
+		table = pa.ipc.open_file(_arrow_source(pa, upload)).read_all()
+	elif fmt == "arrow_stream":
+		table = pa.ipc.open_stream(_arrow_source(pa, upload)).read_all()
+	else:
+		raise UnsupportedFormat(f"Format inconnu: {fmt}")
+	# split_blocks: pas de consolidation en un bloc 2D (colonnes numériques sans copie)
+	return table.to_pandas(split_blocks=True)
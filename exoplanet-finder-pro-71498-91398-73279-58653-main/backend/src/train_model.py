@@ -1,15 +1,16 @@
 import argparse
 import json
 import os
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import joblib
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, confusion_matrix, roc_auc_score
 from sklearn.preprocessing import label_binarize
 
+from .columnar_store import load_table
+from .model_backend import fit_model, resolve_backend
 from .preprocessing import FEATURES, compute_preprocessor_config, save_preprocessor_config
 
 
@@ -20,59 +21,81 @@ LABEL_INV_MAP: Dict[int, str] = {
 }
 
 
+def evaluation_metrics(y: np.ndarray, y_pred: np.ndarray, y_proba: np.ndarray) -> Dict:
+	# Métriques communes à tous les entraînements (complet, K2, incrémental): même schéma de metrics.json
+	labels_sorted = sorted(LABEL_INV_MAP.keys())
+	# AUC ROC (micro-average) pour multi-classes
+	y_bin = label_binarize(y, classes=labels_sorted)
+	try:
+		auc_micro: Optional[float] = float(roc_auc_score(y_bin, y_proba, average="micro", multi_class="ovr"))
+	except ValueError:
+		auc_micro = None
+	return {
+		"accuracy": float(accuracy_score(y, y_pred)),
+		"confusion_matrix": confusion_matrix(y, y_pred, labels=labels_sorted).tolist(),
+		"labels_order": labels_sorted,
+		"labels_names": [LABEL_INV_MAP[i] for i in labels_sorted],
+		"auc_micro_ovr": auc_micro,
+	}
+
+
 def train_model(
-	cleaned_csv: str = "data/cleaned_kepler.csv",
+	cleaned_csv: str = "data/cleaned_kepler",
 	model_path: str = "models/model.joblib",
 	metrics_path: str = "models/metrics.json",
 	preproc_path: str = "models/preprocessor_config.json",
-	n_estimators: int = 300,
+	n_estimators: Optional[int] = None,
 	random_state: int = 42,
+	backend: Optional[str] = None,
 ) -> Dict:
+	# cleaned_csv: store colonne produit par data_cleaning (ou ancien CSV propre)
 	if not os.path.exists(cleaned_csv):
 		raise FileNotFoundError(
-			f"Fichier nettoyé introuvable: {cleaned_csv}. Lancez d'abord data_cleaning.py"
+			f"Données nettoyées introuvables: {cleaned_csv}. Lancez d'abord data_cleaning.py"
 		)
 
-	df = pd.read_csv(cleaned_csv)
+	df = load_table(cleaned_csv)
+	return train_model_frame(
+		df,
+		model_path=model_path,
+		metrics_path=metrics_path,
+		preproc_path=preproc_path,
+		n_estimators=n_estimators,
+		random_state=random_state,
+		backend=backend,
+	)
+
+
+def train_model_frame(
+	df: pd.DataFrame,
+	model_path: str = "models/model.joblib",
+	metrics_path: str = "models/metrics.json",
+	preproc_path: str = "models/preprocessor_config.json",
+	n_estimators: Optional[int] = None,
+	random_state: int = 42,
+	backend: Optional[str] = None,
+) -> Dict:
 	for c in FEATURES + ["label"]:
 		if c not in df.columns:
-			raise ValueError(f"Colonne manquante dans le CSV propre: {c}")
+			raise ValueError(f"Colonne manquante dans les données propres: {c}")
 
 	# Préprocesseur basé sur le dataset d'entraînement
 	preproc_cfg = compute_preprocessor_config(df, FEATURES)
 	os.makedirs(os.path.dirname(preproc_path), exist_ok=True)
 	save_preprocessor_config(preproc_cfg, preproc_path)
 
-	X = df[FEATURES].copy()
+	X = df[FEATURES]
 	y = df["label"].astype(int).values
 
-	clf = RandomForestClassifier(
-		n_estimators=n_estimators,
-		random_state=random_state,
-		class_weight="balanced_subsample",
-		n_jobs=-1,
-	)
-	clf.fit(X, y)
-
-	y_pred = clf.predict(X)
-	y_proba = clf.predict_proba(X)
-
-	acc = float(accuracy_score(y, y_pred))
-	labels_sorted = sorted(LABEL_INV_MAP.keys())
-	cm = confusion_matrix(y, y_pred, labels=labels_sorted)
-
-	# AUC ROC (micro-average) pour multi-classes
-	y_bin = label_binarize(y, classes=labels_sorted)
-	auc_micro = float(roc_auc_score(y_bin, y_proba, average="micro", multi_class="ovr"))
+	backend = resolve_backend(backend)
+	clf = fit_model(X, y, backend=backend, n_estimators=n_estimators, random_state=random_state)
 
 	metrics = {
-		"accuracy": acc,
-		"confusion_matrix": cm.tolist(),
-		"labels_order": labels_sorted,
-		"labels_names": [LABEL_INV_MAP[i] for i in labels_sorted],
-		"auc_micro_ovr": auc_micro,
+		**evaluation_metrics(y, clf.predict(X), clf.predict_proba(X)),
 		"rows": int(df.shape[0]),
 		"features": FEATURES,
+		"backend": backend,
+		"n_estimators": int(clf.n_estimators),
 	}
 
 	os.makedirs(os.path.dirname(model_path), exist_ok=True)
@@ -84,13 +107,14 @@ def train_model(
 
 
 def main() -> None:
-	parser = argparse.ArgumentParser(description="Entraîne un modèle RandomForest pour KOI")
-	parser.add_argument("--cleaned", type=str, default="data/cleaned_kepler.csv")
+	parser = argparse.ArgumentParser(description="Entraîne un modèle (RandomForest ou XGBoost) pour KOI")
+	parser.add_argument("--cleaned", type=str, default="data/cleaned_kepler", help="Store colonne nettoyé (ou CSV propre)")
 	parser.add_argument("--model", type=str, default="models/model.joblib")
 	parser.add_argument("--metrics", type=str, default="models/metrics.json")
 	parser.add_argument("--preproc", type=str, default="models/preprocessor_config.json")
-	parser.add_argument("--n_estimators", type=int, default=300)
+	parser.add_argument("--n_estimators", type=int, default=None, help="Arbres (RF) ou rounds de boosting (XGBoost)")
 	parser.add_argument("--random_state", type=int, default=42)
+	parser.add_argument("--backend", type=str, default=None, help="random_forest | xgboost (défaut: EXODETECT_MODEL_BACKEND)")
 	args = parser.parse_args()
 
 	m = train_model(
@@ -100,6 +124,7 @@ def main() -> None:
 		preproc_path=args.preproc,
 		n_estimators=args.n_estimators,
 		random_state=args.random_state,
+		backend=args.backend,
 	)
 	print(json.dumps(m, indent=2, ensure_ascii=False))
 
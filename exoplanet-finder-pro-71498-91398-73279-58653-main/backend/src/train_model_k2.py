@@ -1,12 +1,14 @@
 import argparse
 import json
 import os
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import joblib
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, confusion_matrix
+
+from .columnar_store import load_table
+from .model_backend import fit_model, resolve_backend
+from .train_model import evaluation_metrics
 
 LABEL_INV_MAP: Dict[int, str] = {
 	-1: "FALSE POSITIVE",
@@ -22,36 +24,47 @@ def train_model_k2(
 	model_path: str = "models/model_k2.joblib",
 	metrics_path: str = "models/metrics_k2.json",
 	random_state: int = 42,
+	backend: Optional[str] = None,
+	n_estimators: Optional[int] = None,
 ) -> Dict:
+	# cleaned_csv: store colonne (K2 ou Kepler: seules period/prad/label sont lues) ou CSV propre
 	if not os.path.exists(cleaned_csv):
 		raise FileNotFoundError(cleaned_csv)
-	df = pd.read_csv(cleaned_csv)
+	df = load_table(cleaned_csv)
+	return train_model_k2_frame(
+		df,
+		model_path=model_path,
+		metrics_path=metrics_path,
+		random_state=random_state,
+		backend=backend,
+		n_estimators=n_estimators,
+	)
+
+
+def train_model_k2_frame(
+	df: pd.DataFrame,
+	model_path: str = "models/model_k2.joblib",
+	metrics_path: str = "models/metrics_k2.json",
+	random_state: int = 42,
+	backend: Optional[str] = None,
+	n_estimators: Optional[int] = None,
+) -> Dict:
 	for c in FEATURES_K2 + ["label"]:
 		if c not in df.columns:
 			raise ValueError(f"Colonne manquante: {c}")
 
-	X = df[FEATURES_K2].copy()
+	X = df[FEATURES_K2]
 	y = df["label"].astype(int).values
 
-	clf = RandomForestClassifier(
-		random_state=random_state,
-		n_estimators=300,
-		class_weight="balanced_subsample",
-		n_jobs=-1,
-	)
-	clf.fit(X, y)
-	y_pred = clf.predict(X)
-	acc = float(accuracy_score(y, y_pred))
-	labels_sorted = sorted(LABEL_INV_MAP.keys())
-	cm = confusion_matrix(y, y_pred, labels=labels_sorted)
+	backend = resolve_backend(backend)
+	clf = fit_model(X, y, backend=backend, n_estimators=n_estimators, random_state=random_state)
 
 	metrics = {
-		"accuracy": acc,
-		"confusion_matrix": cm.tolist(),
-		"labels_order": labels_sorted,
-		"labels_names": [LABEL_INV_MAP[i] for i in labels_sorted],
+		**evaluation_metrics(y, clf.predict(X), clf.predict_proba(X)),
 		"rows": int(df.shape[0]),
 		"features": FEATURES_K2,
+		"backend": backend,
+		"n_estimators": int(clf.n_estimators),
 	}
 
 	os.makedirs(os.path.dirname(model_path), exist_ok=True)
@@ -68,6 +81,8 @@ def main() -> None:
 	parser.add_argument("--model", default="models/model_k2.joblib")
 	parser.add_argument("--metrics", default="models/metrics_k2.json")
 	parser.add_argument("--random_state", type=int, default=42)
+	parser.add_argument("--backend", default=None, help="random_forest | xgboost (défaut: EXODETECT_MODEL_BACKEND)")
+	parser.add_argument("--n_estimators", type=int, default=None)
 	args = parser.parse_args()
 
 	m = train_model_k2(
@@ -75,6 +90,8 @@ def main() -> None:
 		model_path=args.model,
 		metrics_path=args.metrics,
 		random_state=args.random_state,
+		backend=args.backend,
+		n_estimators=args.n_estimators,
 	)
 	print(json.dumps(m, ensure_ascii=False, indent=2))
 
@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+from typing import Dict, Optional
+
+import pandas as pd
+
+from .columnar_store import load_table
+from .train_model import train_model_frame
+
+
+# Le modèle TOI utilise les mêmes features que Kepler (period, duration, depth, prad),
+# avec son propre préprocesseur: les distributions TESS diffèrent de celles des KOI.
+def train_model_toi(
+	cleaned_csv: str = "data/cleaned_toi",
+	model_path: str = "models/model_toi.joblib",
+	metrics_path: str = "models/metrics_toi.json",
+	preproc_path: str = "models/preprocessor_toi.json",
+	n_estimators: Optional[int] = None,
+	random_state: int = 42,
+	backend: Optional[str] = None,
+) -> Dict:
+	if not os.path.exists(cleaned_csv):
+		raise FileNotFoundError(
+			f"Données TOI nettoyées introuvables: {cleaned_csv}. Lancez d'abord pipeline.py --catalogs toi"
+		)
+	df = load_table(cleaned_csv)
+	return train_model_toi_frame(
+		df,
+		model_path=model_path,
+		metrics_path=metrics_path,
+		preproc_path=preproc_path,
+		n_estimators=n_estimators,
+		random_state=random_state,
+		backend=backend,
+	)
+
+
+def train_model_toi_frame(
+	df: pd.DataFrame,
+	model_path: str = "models/model_toi.joblib",
+	metrics_path: str = "models/metrics_toi.json",
+	preproc_path: str = "models/preprocessor_toi.json",
+	n_estimators: Optional[int] = None,
+	random_state: int = 42,
+	backend: Optional[str] = None,
+) -> Dict:
+	metrics = train_model_frame(
+		df,
+		model_path=model_path,
+		metrics_path=metrics_path,
+		preproc_path=preproc_path,
+		n_estimators=n_estimators,
+		random_state=random_state,
+		backend=backend,
+	)
+	metrics["dataset"] = "toi"
+	with open(metrics_path, "w", encoding="utf-8") as f:
+		json.dump(metrics, f, ensure_ascii=False, indent=2)
+	return metrics
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Entraîne le modèle TESS (catalogue TOI)")
+	parser.add_argument("--cleaned", type=str, default="data/cleaned_toi", help="Store colonne nettoyé (ou CSV propre)")
+	parser.add_argument("--model", type=str, default="models/model_toi.joblib")
+	parser.add_argument("--metrics", type=str, default="models/metrics_toi.json")
+	parser.add_argument("--preproc", type=str, default="models/preprocessor_toi.json")
+	parser.add_argument("--n_estimators", type=int, default=None)
+	parser.add_argument("--random_state", type=int, default=42)
+	parser.add_argument("--backend", type=str, default=None, help="random_forest | xgboost (défaut: EXODETECT_MODEL_BACKEND)")
+	args = parser.parse_args()
+
+	m = train_model_toi(
+		cleaned_csv=args.cleaned,
+		model_path=args.model,
+		metrics_path=args.metrics,
+		preproc_path=args.preproc,
+		n_estimators=args.n_estimators,
+		random_state=args.random_state,
+		backend=args.backend,
+	)
+	print(json.dumps(m, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+	main()
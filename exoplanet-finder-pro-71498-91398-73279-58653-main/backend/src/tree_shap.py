@@ -0,0 +1,241 @@
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+
+# Nombre maximal de lignes expliquées par requête. Coût hors cache: ~15-35 ms par ligne et par
+# modèle (forêt de 300 arbres, 1 cœur), soit ~1-2 s pour 50 lignes et ~3-7 s pour 200
+SHAP_MAX_ROWS = int(os.environ.get("EXODETECT_SHAP_MAX_ROWS", "50"))
+# Lignes (modèle, valeurs) gardées en cache
+SHAP_CACHE_SIZE = int(os.environ.get("EXODETECT_SHAP_CACHE_SIZE", "20000"))
+# Taille cible des tableaux intermédiaires (lignes x feuilles) par bloc
+CHUNK_ELEMENTS = 1 << 22
+# Nombre maximal de features pour la forêt: la table des motifs a 2^(M-1) colonnes par feuille et par feature
+SHAP_MAX_FEATURES = int(os.environ.get("EXODETECT_SHAP_MAX_FEATURES", "10"))
+
+
+def _shapley_weights(m: int) -> np.ndarray:
+	# Poids |S|!(M-|S|-1)!/M! pour |S| = 0..M-1
+	return np.array(
+		[math.factorial(k) * math.factorial(m - k - 1) / math.factorial(m) for k in range(m)],
+		dtype=np.float32,
+	)
+
+
+def _forest_leaf_boxes(estimators: List[Any], n_features: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+	"""
+	Boîte de chaque feuille de la forêt: intervalle ]lo, hi] par feature et produit des
+	ratios de couverture (weighted_n_node_samples enfant/parent) des splits sur cette feature.
+	Parcours en largeur vectorisé sur tous les arbres à la fois (un pas numpy par profondeur).
+	"""
+	left_l, right_l, feat_l, thr_l, cover_l, value_l, roots = [], [], [], [], [], [], []
+	offset = 0
+	n_trees = len(estimators)
+	for est in estimators:
+		t = est.tree_
+		left, right = t.children_left.astype(np.int64), t.children_right.astype(np.int64)
+		left_l.append(np.where(left >= 0, left + offset, -1))
+		right_l.append(np.where(right >= 0, right + offset, -1))
+		feat_l.append(t.feature.astype(np.int64))
+		thr_l.append(t.threshold.astype(np.float64))
+		cover_l.append(t.weighted_n_node_samples.astype(np.float64))
+		# Probabilités de classe de chaque nœud, moyennées sur les arbres
+		value = t.value[:, 0, :].astype(np.float64)
+		value /= np.maximum(value.sum(axis=1, keepdims=True), 1e-300)
+		value_l.append(value / n_trees)
+		roots.append(offset)
+		offset += t.node_count
+
+	left, right = np.concatenate(left_l), np.concatenate(right_l)
+	feat, thr, cover = np.concatenate(feat_l), np.concatenate(thr_l), np.concatenate(cover_l)
+	lo = np.full((offset, n_features), -np.inf)
+	hi = np.full((offset, n_features), np.inf)
+	ratio = np.ones((offset, n_features))
+
+	frontier = np.array(roots, dtype=np.int64)
+	while frontier.size:
+		internal = frontier[left[frontier] >= 0]
+		if internal.size == 0:
+			break
+		f, t = feat[internal], thr[internal]
+		for child, is_left in ((left[internal], True), (right[internal], False)):
+			lo[child], hi[child], ratio[child] = lo[internal], hi[internal], ratio[internal]
+			if is_left:
+				# sklearn: x <= seuil -> enfant gauche
+				hi[child, f] = np.minimum(hi[child, f], t)
+			else:
+				lo[child, f] = np.maximum(lo[child, f], t)
+			ratio[child, f] *= cover[child] / cover[internal]
+		frontier = np.concatenate([left[internal], right[internal]])
+
+	leaves = np.flatnonzero(left < 0)
+	return lo[leaves], hi[leaves], ratio[leaves].astype(np.float32), np.concatenate(value_l)[leaves].astype(np.float32)
+
+
+def _pattern_weights(ratio: np.ndarray, weights: np.ndarray) -> np.ndarray:
+	"""
+	Pour chaque feuille l, feature i et motif binaire q des autres features (a_j dans {0, 1}):
+	E[l, i, q] = sum_k w_k e_k, où e_k sont les coefficients de prod_{j != i} (ratio_lj + a_j t).
+	"""
+	n_leaves, m = ratio.shape
+	table = np.zeros((n_leaves, m, 1 << (m - 1)), dtype=np.float32)
+	for i in range(m):
+		others = [j for j in range(m) if j != i]
+		for q in range(1 << (m - 1)):
+			coeffs = [np.ones(n_leaves, dtype=np.float64)]
+			for pos, j in enumerate(others):
+				a_j = float((q >> pos) & 1)
+				nxt = [c * ratio[:, j] for c in coeffs] + [coeffs[-1] * a_j]
+				for k in range(1, len(coeffs)):
+					nxt[k] += coeffs[k - 1] * a_j
+				coeffs = nxt
+			table[:, i, q] = sum(float(weights[k]) * coeffs[k] for k in range(m))
+	return table
+
+
+class ForestTreeShap:
+	"""
+	TreeSHAP exact (variante "path-dependent", couverture des nœuds) pour une forêt sklearn.
+	Pour chaque feuille l, f_S(x) = v_l * prod_{j in S} a_lj(x) * prod_{j hors S} ratio_lj, avec
+	a_lj = 1[x_j dans la boîte de la feuille]. La valeur de Shapley de ce jeu produit vaut
+	(a_li - ratio_li) * E[l, i, motif des a_lj, j != i]; E est précalculé pour les 2^(M-1) motifs
+	(polynômes symétriques élémentaires). Par ligne il ne reste que des comparaisons, une lecture
+	de table et un produit matriciel par feature: coût linéaire en nombre de feuilles,
+	indépendant de la profondeur.
+	"""
+
+	output = "probability"
+
+	def __init__(self, forest: Any) -> None:
+		self.classes_ = np.asarray(forest.classes_)
+		self.n_features = int(forest.n_features_in_)
+		if self.n_features > SHAP_MAX_FEATURES:
+			raise ValueError(f"TreeSHAP forêt limité à {SHAP_MAX_FEATURES} features (modèle: {self.n_features}): table de 2^(M-1) motifs par feuille")
+		lo, hi, ratio, self.values = _forest_leaf_boxes(forest.estimators_, self.n_features)
+		m = self.n_features
+		n_leaves = lo.shape[0]
+		table = _pattern_weights(ratio.astype(np.float64), _shapley_weights(m))
+		self.expected_value = (self.values * ratio.prod(axis=1, keepdims=True)).sum(axis=0).astype(np.float64)
+		# Disposition par feature (tableaux contigus de longueur n_feuilles): moins de trafic mémoire
+		self.lo = np.ascontiguousarray(lo.T)
+		self.hi = np.ascontiguousarray(hi.T)
+		self.ratio = np.ascontiguousarray(ratio.T)
+		self.tables = [np.ascontiguousarray(table[:, i, :]).ravel() for i in range(m)]
+		self._row_base = np.arange(n_leaves, dtype=np.int32) * np.int32(1 << (m - 1))
+		self._values64 = self.values.astype(np.float64)
+
+	def shap_values(self, X: np.ndarray) -> np.ndarray:
+		# (n, M, C): contribution de chaque feature à la probabilité de chaque classe
+		# Comparaisons en float32 converti, comme sklearn (X float32 vs seuils float64)
+		X = np.asarray(X, dtype=np.float32).astype(np.float64)
+		n, m = X.shape
+		n_leaves = self.lo.shape[1]
+		out = np.zeros((n, m, self.values.shape[1]), dtype=np.float64)
+		step = max(1, CHUNK_ELEMENTS // max(n_leaves, 1))
+		for s in range(0, n, step):
+			xs = X[s:s + step]
+			inside = [((xs[:, j:j + 1] > self.lo[j]) & (xs[:, j:j + 1] <= self.hi[j])).view(np.uint8) for j in range(m)]
+			for i in range(m):
+				# Index de table: feuille * 2^(M-1) + motif des autres features
+				idx = self._row_base
+				for pos, j in enumerate(j for j in range(m) if j != i):
+					# Conversion avant décalage: un uint8 perdrait les bits de position >= 8
+					idx = idx + (inside[j].astype(np.int32) << pos)
+				coef = np.take(self.tables[i], idx)
+				coef *= inside[i] - self.ratio[i]
+				out[s:s + step, i, :] = coef @ self._values64
+		return out
+
+
+class BoosterTreeShap:
+	"""SHAP des modèles XGBoost via pred_contribs (TreeSHAP natif, en log-odds par classe)."""
+
+	output = "margin"
+
+	def __init__(self, model: Any) -> None:
+		self.model = model
+		self.classes_ = np.asarray(model.classes_)
+		self.n_features = len(model.features)
+		self.expected_value: Optional[np.ndarray] = None
+
+	def shap_values(self, X: np.ndarray) -> np.ndarray:
+		import xgboost as xgb
+
+		dm = xgb.DMatrix(np.asarray(X, dtype=np.float32), feature_names=self.model.features)
+		contribs = np.asarray(self.model.booster.predict(dm, pred_contribs=True), dtype=np.float64)
+		contribs = contribs.reshape(X.shape[0], len(self.classes_), self.n_features + 1)
+		if self.expected_value is None and contribs.shape[0]:
+			self.expected_value = contribs[0, :, -1].copy()
+		return contribs[:, :, :-1].transpose(0, 2, 1)
+
+
+def make_explainer(model: Any) -> Optional[Any]:
+	if model is None:
+		return None
+	if hasattr(model, "booster"):
+		return BoosterTreeShap(model)
+	if hasattr(model, "estimators_") and hasattr(model.estimators_[0], "tree_"):
+		return ForestTreeShap(model)
+	return None
+
+
+class ShapCache:
+	"""LRU des contributions par (version du modèle, valeurs exactes de la ligne); partagé entre threads."""
+
+	def __init__(self, capacity: int = SHAP_CACHE_SIZE) -> None:
+		self.capacity = capacity
+		self._data: "OrderedDict[Tuple[str, bytes], np.ndarray]" = OrderedDict()
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+
+	def __len__(self) -> int:
+		return len(self._data)
+
+	def get(self, key: Tuple[str, bytes]) -> Optional[np.ndarray]:
+		with self._lock:
+			value = self._data.get(key)
+			if value is None:
+				self.misses += 1
+				return None
+			self._data.move_to_end(key)
+			self.hits += 1
+			return value
+
+	def put(self, key: Tuple[str, bytes], value: np.ndarray) -> None:
+		with self._lock:
+			self._data[key] = value
+			self._data.move_to_end(key)
+			while len(self._data) > self.capacity:
+				self._data.popitem(last=False)
+
+
+def explain_rows(explainer: Any, version: str, X: np.ndarray, cache: Optional[ShapCache] = None) -> Tuple[np.ndarray, int]:
+	"""
+	Contributions (n, M, C) pour les lignes de X; seules les lignes absentes du cache sont calculées.
+	Retourne aussi le nombre de lignes servies par le cache.
+	"""
+	X = np.ascontiguousarray(X, dtype=np.float64)
+	n = X.shape[0]
+	out = np.empty((n, X.shape[1], len(explainer.classes_)), dtype=np.float64)
+	keys = [(version, X[r].tobytes()) for r in range(n)]
+	missing: List[int] = []
+	for r, key in enumerate(keys):
+		hit = cache.get(key) if cache is not None else None
+		if hit is None:
+			missing.append(r)
+		else:
+			out[r] = hit
+	if missing:
+		# Lignes identiques dans le lot: calculées une seule fois
+		uniq, inverse = np.unique(X[missing], axis=0, return_inverse=True)
+		values = explainer.shap_values(uniq)[inverse.ravel()]
+		out[missing] = values
+		if cache is not None:
+			for r, v in zip(missing, values):
+				cache.put(keys[r], v)
+	return out, n - len(missing)
@@ -0,0 +1,377 @@
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+import os
+import tempfile
+import zipfile
+from typing import Any, BinaryIO, Optional, Tuple, Union
+
+
+# Au-delà de ce seuil, l'upload est écrit dans un fichier temporaire au lieu de rester en mémoire
+UPLOAD_SPOOL_BYTES = int(os.environ.get("EXODETECT_UPLOAD_SPOOL_BYTES", str(8 << 20)))
+# Taille maximale acceptée (413 au-delà)
+UPLOAD_MAX_BYTES = int(os.environ.get("EXODETECT_UPLOAD_MAX_BYTES", str(1 << 30)))
+# Dossier des fichiers temporaires (défaut: dossier temporaire système)
+UPLOAD_DIR = os.environ.get("EXODETECT_UPLOAD_DIR") or None
+UPLOAD_CHUNK_BYTES = 1 << 20
+# Taille maximale une fois décompressé (protection contre les archives "bombes")
+UPLOAD_MAX_DECOMPRESSED_BYTES = int(os.environ.get("EXODETECT_UPLOAD_MAX_DECOMPRESSED_BYTES", str(8 << 30)))
+
+# Signatures (magic bytes) des formats compressés acceptés
+COMPRESSION_MAGIC: Tuple[Tuple[str, bytes], ...] = (
+	("gzip", b"\x1f\x8b"),
+	("bz2", b"BZh"),
+	("xz", b"\xfd7zXZ\x00"),
+	("zstd", b"\x28\xb5\x2f\xfd"),
+	("zip", b"PK\x03\x04"),
+)
+# Membre retenu dans une archive zip: premier fichier avec une de ces extensions, sinon le premier fichier
+ZIP_MEMBER_EXTENSIONS = (".csv", ".tsv", ".txt", ".tbl")
+
+
+class UploadTooLarge(ValueError):
+	def __init__(self, limit: int) -> None:
+		super().__init__(f"Fichier trop volumineux (limite: {limit} octets)")
+		self.limit = limit
+
+
+class UnsupportedCompression(ValueError):
+	pass
+
+
+def detect_compression(head: bytes) -> Optional[str]:
+	for name, magic in COMPRESSION_MAGIC:
+		if head.startswith(magic):
+			return name
+	return None
+
+
+def _zstd_reader(raw: BinaryIO) -> BinaryIO:
+	# zstd: module standard compression.zstd (Python 3.14+) ou paquet optionnel zstandard
+	try:
+		from compression import zstd  # type: ignore[import-not-found]
+
+		return zstd.ZstdFile(raw)
+	except ImportError:
+		pass
+	try:
+		import zstandard
+	except ImportError:
+		raise UnsupportedCompression("Compression zstd non supportée sur ce serveur (installer zstandard)")
+	return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+
+
+def zstd_available() -> bool:
+	try:
+		_zstd_reader(io.BytesIO()).close()
+		return True
+	except UnsupportedCompression:
+		return False
+
+
+def _zip_member(archive: zipfile.ZipFile) -> zipfile.ZipInfo:
+	files = [m for m in archive.infolist() if not m.is_dir() and not m.filename.startswith("__MACOSX/")]
+	if not files:
+		raise UnsupportedCompression("Archive zip vide")
+	for m in files:
+		if m.filename.lower().endswith(ZIP_MEMBER_EXTENSIONS):
+			return m
+	return files[0]
+
+
+class DecompressingReader(io.RawIOBase):
+	"""
+	Flux décompressé (gzip, bz2, xz, zstd, membre zip) lu par blocs, sans jamais matérialiser
+	le texte complet. Au-delà de max_bytes décompressés, lève UploadTooLarge.
+	"""
+
+	def __init__(self, raw: BinaryIO, compression: str, max_bytes: int = UPLOAD_MAX_DECOMPRESSED_BYTES) -> None:
+		super().__init__()
+		self._raw = raw
+		self._archive: Optional[zipfile.ZipFile] = None
+		self.max_bytes = max_bytes
+		self.produced = 0
+		if compression == "gzip":
+			self._inner: Any = gzip.GzipFile(fileobj=raw, mode="rb")
+		elif compression == "bz2":
+			self._inner = bz2.BZ2File(raw, mode="rb")
+		elif compression == "xz":
+			self._inner = lzma.LZMAFile(raw, mode="rb")
+		elif compression == "zstd":
+			self._inner = _zstd_reader(raw)
+		elif compression == "zip":
+			self._archive = zipfile.ZipFile(raw)
+			self._inner = self._archive.open(_zip_member(self._archive))
+		else:
+			raise UnsupportedCompression(f"Compression inconnue: {compression}")
+
+	def readable(self) -> bool:
+		return True
+
+	def readinto(self, b: Any) -> int:
+		data = self._inner.read(len(b))
+		n = len(data)
+		self.produced += n
+		if self.produced > self.max_bytes:
+			raise UploadTooLarge(self.max_bytes)
+		b[:n] = data
+		return n
+
+	def close(self) -> None:
+		if not self.closed:
+			for f in (self._inner, self._archive, self._raw):
+				if f is not None:
+					try:
+						f.close()
+					except Exception:
+						pass
+		super().close()
+
+
+class SpooledUpload:
+	"""
+	Contenu d'un upload: en mémoire jusqu'à spool_bytes, puis dans un fichier temporaire nommé.
+	Les lecteurs ouvrent chacun leur propre flux (stream()) ou une vue mémoire (view(), mmap si
+	sur disque): aucune copie complète du fichier n'est nécessaire pour le parser.
+	"""
+
+	def __init__(self, spool_bytes: int = UPLOAD_SPOOL_BYTES, max_bytes: int = UPLOAD_MAX_BYTES, directory: Optional[str] = UPLOAD_DIR) -> None:
+		self.spool_bytes = spool_bytes
+		self.max_bytes = max_bytes
+		self.directory = directory
+		self.size = 0
+		self.path: Optional[str] = None
+		# False quand le fichier appartient à un autre objet (upload Starlette adopté): jamais supprimé ici
+		self._owns_path = True
+		self._buffer: Optional[io.BytesIO] = io.BytesIO()
+		self._data: Optional[bytes] = None
+		self._file: Optional[BinaryIO] = None
+		self._mmap: Optional[mmap.mmap] = None
+		# Format compressé détecté à la fin de la copie (None: texte brut)
+		self.compression: Optional[str] = None
+		# Passe à True si la décompression a dépassé UPLOAD_MAX_DECOMPRESSED_BYTES
+		self.too_large = False
+		# Content-Type déclaré par le client (aide à reconnaître les formats binaires)
+		self.content_type: Optional[str] = None
+
+	@classmethod
+	def from_bytes(cls, data: bytes) -> "SpooledUpload":
+		upload = cls(spool_bytes=max(len(data), 1), max_bytes=max(len(data), 1))
+		upload.write(data)
+		upload.finish()
+		return upload
+
+	@classmethod
+	def from_file(cls, f: BinaryIO, max_bytes: int = UPLOAD_MAX_BYTES) -> Optional["SpooledUpload"]:
+		"""
+		Adopte un fichier temporaire déjà écrit sur disque (sans copie). Il est rouvert par chemin:
+		son nom s'il en a un, sinon /proc/self/fd/N (fichier anonyme, Linux). None si aucun chemin
+		n'est utilisable; le fichier reste à fermer par son propriétaire.
+		"""
+		try:
+			f.flush()
+			fd = f.fileno()
+			size = os.fstat(fd).st_size
+		except (AttributeError, OSError, ValueError):
+			return None
+		if size > max_bytes:
+			raise UploadTooLarge(max_bytes)
+		name = getattr(f, "name", None)
+		candidates = [name] if isinstance(name, str) else []
+		candidates.append(f"/proc/self/fd/{fd}")
+		for path in candidates:
+			try:
+				with open(path, "rb"):
+					pass
+			except OSError:
+				continue
+			upload = cls(spool_bytes=0, max_bytes=max_bytes)
+			upload.path = path
+			upload._owns_path = False
+			upload._buffer = None
+			upload.size = size
+			upload.finish()
+			return upload
+		return None
+
+	@property
+	def in_memory(self) -> bool:
+		return self.path is None
+
+	def write(self, chunk: bytes) -> None:
+		if self.size + len(chunk) > self.max_bytes:
+			raise UploadTooLarge(self.max_bytes)
+		self.size += len(chunk)
+		if self._buffer is not None and self.size > self.spool_bytes:
+			# Bascule sur disque: le tampon mémoire est vidé dans le fichier temporaire
+			fd, self.path = tempfile.mkstemp(prefix="exodetect_upload_", suffix=".bin", dir=self.directory)
+			self._file = os.fdopen(fd, "wb")
+			self._file.write(self._buffer.getbuffer())
+			self._buffer = None
+		if self._file is not None:
+			self._file.write(chunk)
+		else:
+			self._buffer.write(chunk)  # type: ignore[union-attr]
+
+	def finish(self) -> None:
+		if self._file is not None:
+			self._file.close()
+			self._file = None
+		elif self._buffer is not None:
+			self._data = self._buffer.getvalue()
+			self._buffer = None
+		self.compression = detect_compression(self.head(8, raw=True))
+		if self.compression == "zstd" and not zstd_available():
+			raise UnsupportedCompression("Compression zstd non supportée sur ce serveur (installer zstandard)")
+
+	def raw_stream(self) -> BinaryIO:
+		"""Octets tels que reçus (compressés ou non)."""
+		if self.path is not None:
+			return open(self.path, "rb")
+		return io.BytesIO(self._data or b"")
+
+	def stream(self) -> BinaryIO:
+		"""Nouveau flux binaire (décompressé à la volée si besoin), à fermer par l'appelant."""
+		raw = self.raw_stream()
+		if self.compression is None:
+			return raw
+		try:
+			return io.BufferedReader(_LimitFlagReader(self, DecompressingReader(raw, self.compression)), buffer_size=UPLOAD_CHUNK_BYTES)
+		except Exception:
+			raw.close()
+			raise
+
+	def view(self) -> Union[bytes, mmap.mmap]:
+		"""Octets reçus complets sans copie: bytes en mémoire, sinon mmap en lecture seule."""
+		if self.path is None:
+			return self._data or b""
+		if self._mmap is None:
+			if self.size == 0:
+				return b""
+			with open(self.path, "rb") as f:
+				self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		return self._mmap
+
+	def head(self, n: int, raw: bool = False) -> bytes:
+		with (self.raw_stream() if raw else self.stream()) as f:
+			return f.read(n)
+
+	def close(self) -> None:
+		if self._mmap is not None:
+			self._mmap.close()
+			self._mmap = None
+		if self._file is not None:
+			self._file.close()
+			self._file = None
+		if self.path is not None:
+			if self._owns_path:
+				try:
+					os.unlink(self.path)
+				except OSError:
+					pass
+			self.path = None
+		self._data = None
+
+	def __enter__(self) -> "SpooledUpload":
+		return self
+
+	def __exit__(self, *exc: Any) -> None:
+		self.close()
+
+	def __len__(self) -> int:
+		return self.size
+
+
+class _LimitFlagReader(io.RawIOBase):
+	# Mémorise sur l'upload le dépassement de taille décompressée (les tentatives suivantes échouent vite)
+	def __init__(self, upload: SpooledUpload, inner: DecompressingReader) -> None:
+		super().__init__()
+		self._upload = upload
+		self._inner = inner
+
+	def readable(self) -> bool:
+		return True
+
+	def readinto(self, b: Any) -> int:
+		if self._upload.too_large:
+			raise UploadTooLarge(self._inner.max_bytes)
+		try:
+			return self._inner.readinto(b)
+		except UploadTooLarge:
+			self._upload.too_large = True
+			raise
+
+	def close(self) -> None:
+		if not self.closed:
+			self._inner.close()
+		super().close()
+
+
+def _rolled_file(spooled: Any) -> Optional[BinaryIO]:
+	# Fichier disque sous-jacent d'un SpooledTemporaryFile déjà basculé sur disque. Attributs
+	# privés (_rolled, _file): s'ils changent ou manquent, None et copie classique par blocs
+	try:
+		rolled = spooled._rolled
+		f = spooled._file
+	except AttributeError:
+		return None
+	if rolled is not True or f is None or isinstance(f, (io.BytesIO, io.StringIO)):
+		return None
+	return f
+
+
+async def spool_upload(file: Any, spool_bytes: int = UPLOAD_SPOOL_BYTES, max_bytes: int = UPLOAD_MAX_BYTES) -> SpooledUpload:
+	"""
+	Copie un UploadFile par blocs de 1 Mo dans un SpooledUpload (UploadTooLarge au-delà de max_bytes).
+	Si Starlette a déjà basculé l'upload sur disque (SpooledTemporaryFile), ce fichier est adopté
+	tel quel au lieu d'être recopié dans un second fichier temporaire.
+	"""
+	disk_file = _rolled_file(getattr(file, "file", None))
+	if disk_file is not None:
+		adopted = SpooledUpload.from_file(disk_file, max_bytes=max_bytes)
+		if adopted is not None:
+			adopted.content_type = getattr(file, "content_type", None)
+			return adopted
+	upload = SpooledUpload(spool_bytes=spool_bytes, max_bytes=max_bytes)
+	upload.content_type = getattr(file, "content_type", None)
+	try:
+		while True:
+			chunk = await file.read(UPLOAD_CHUNK_BYTES)
+			if not chunk:
+				break
+			upload.write(chunk)
+		upload.finish()
+	except BaseException:
+		upload.close()
+		raise
+	return upload
+
+
+class NullStrippingReader(io.RawIOBase):
+	"""Flux binaire qui retire les octets NUL au passage (remplace bytes.replace(b"\\x00", b"") sur tout le fichier)."""
+
+	def __init__(self, raw: BinaryIO) -> None:
+		super().__init__()
+		self._raw = raw
+		self._buf = b""
+
+	def readable(self) -> bool:
+		return True
+
+	def readinto(self, b: Any) -> int:
+		n = len(b)
+		while len(self._buf) < n:
+			block = self._raw.read(max(n, UPLOAD_CHUNK_BYTES))
+			if not block:
+				break
+			self._buf += block.replace(b"\x00", b"")
+		chunk, self._buf = self._buf[:n], self._buf[n:]
+		b[:len(chunk)] = chunk
+		return len(chunk)
+
+	def close(self) -> None:
+		if not self.closed:
+			self._raw.close()
+		super().close()
@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Avant tout import de api.main: pas de construction de catalogue, état de dérive et
+# store de catalogue dans un répertoire jetable (jamais dans backend/models)
+_STATE_DIR = tempfile.mkdtemp(prefix="exodetect-tests-")
+os.environ.setdefault("EXODETECT_CATALOG_AUTOBUILD", "0")
+os.environ.setdefault("EXODETECT_DRIFT_PATH", os.path.join(_STATE_DIR, "drift_state.json"))
+os.environ.setdefault("EXODETECT_CATALOG_PATH", os.path.join(_STATE_DIR, "catalog_store"))
+
+
+def pytest_sessionfinish(session, exitstatus):
+	shutil.rmtree(_STATE_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client():
+	from fastapi.testclient import TestClient
+
+	from api.main import app
+
+	with TestClient(app) as c:
+		yield c
+
+
+def _synthetic_frame(features, seed):
+	# Features log-normales, label lié à la taille (koi_prad) pour que les trois classes existent
+	rng = np.random.default_rng(seed)
+	df = pd.DataFrame(rng.lognormal(1.5, 1.0, size=(300, len(features))), columns=features)
+	df["label"] = np.digitize(df["koi_prad"], np.quantile(df["koi_prad"], [1 / 3, 2 / 3])) - 1
+	return df
+
+
+@pytest.fixture(scope="session")
+def _synthetic_fits():
+	from api.main import K2_FEATURES, KEPLER_FEATURES, TOI_FEATURES
+	from src.model_backend import fit_model
+	from src.preprocessing import compute_preprocessor_config
+
+	fits = {}
+	for seed, (name, features) in enumerate((("kepler", KEPLER_FEATURES), ("k2", K2_FEATURES), ("toi", TOI_FEATURES))):
+		df = _synthetic_frame(features, seed)
+		model = fit_model(df[features], df["label"].to_numpy(), backend="random_forest", n_estimators=10, n_jobs=1)
+		fits[name] = (model, list(features), compute_preprocessor_config(df, features))
+	return fits
+
+
+@pytest.fixture
+def synthetic_models(monkeypatch, _synthetic_fits):
+	"""Registre de modèles servi remplacé par de petites forêts entraînées sur des données synthétiques."""
+	import api.main
+
+	registry = {}
+	for name, (model, features, cfg) in _synthetic_fits.items():
+		registry[name] = {
+			"model": model,
+			"features": features,
+			"cfg": cfg,
+			"version": f"synthetic-{name}",
+			"explain": api.main._explanation_artifacts(model, features, cfg),
+			"shap": None,
+			"shap_lock": threading.Lock(),
+		}
+	monkeypatch.setattr(api.main, "MODEL_REGISTRY", registry)
+	return registry
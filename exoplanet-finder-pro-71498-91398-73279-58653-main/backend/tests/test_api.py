@@ -0,0 +1,85 @@
+import pytest
+
+KOI_CSV = (
+	"kepoi_name,koi_period,koi_duration,koi_depth,koi_prad,koi_disposition\n"
+	"K00001.01,10.5,3.2,500,1.2,CONFIRMED\n"
+	"K00002.01,20.1,4.1,800,2.3,CANDIDATE\n"
+	"K00003.01,5.3,1.9,120,9.5,FALSE POSITIVE\n"
+).encode()
+K2_CSV = (
+	"# export K2\n"
+	"pl_name,k2_name,pl_orbper,pl_rade,disposition\n"
+	"K2-18 b,K2-18 b,32.9,2.6,CONFIRMED\n"
+	"K2-3 b,K2-3 b,10.05,2.1,CONFIRMED\n"
+).encode()
+TOI_CSV = (
+	"toi,tid,tfopwg_disp,pl_orbper,pl_trandurh,pl_trandep,pl_rade\n"
+	"1000.01,50365310,FP,2.17,2.02,656.9,5.82\n"
+	"1001.01,88863718,PC,1.93,3.17,1286.0,11.22\n"
+).encode()
+
+
+def _post(client, path, data, name="data.csv", **params):
+	return client.post(path, params=params, files={"file": (name, data, "text/csv")})
+
+
+@pytest.mark.parametrize("data, dataset_type, model", [
+	(KOI_CSV, "Kepler", "kepler"),
+	(K2_CSV, "K2", "k2"),
+	(TOI_CSV, "TESS", "toi"),
+], ids=["kepler", "k2", "toi"])
+def test_predict_routes_by_catalog(client, synthetic_models, data, dataset_type, model):
+	res = _post(client, "/predict", data)
+	assert res.status_code == 200
+	body = res.json()
+	assert body["dataset_type"] == dataset_type and body["model"] == model
+	assert body["backend"] == "random_forest"
+	assert body["result"]["status"] in ("Exoplanète", "Candidat", "Faux positif")
+
+
+def test_route_falls_back_to_covered_model(client, synthetic_models):
+	# Export Kepler sans durée ni profondeur: seul le modèle K2 (période, rayon) est couvert
+	data = b"kepoi_name,koi_period,koi_prad\nK00001.01,10.5,1.2\nK00002.01,3.3,2.0\n"
+	assert _post(client, "/predict", data).json()["model"] == "k2"
+	# Modèle dédié absent: repli sur Kepler
+	synthetic_models["toi"]["model"] = None
+	assert _post(client, "/predict", TOI_CSV).json()["model"] == "kepler"
+
+
+def test_predict_auto_parses_once_for_all_models(client, synthetic_models, monkeypatch):
+	import api.main
+
+	calls = []
+	read = api.main._read_uploaded_csv
+
+	def counted(source):
+		calls.append(1)
+		return read(source)
+
+	monkeypatch.setattr(api.main, "_read_uploaded_csv", counted)
+	body = _post(client, "/predict-auto", TOI_CSV, models="all").json()
+	assert len(calls) == 1
+	assert body["dataset_type"] == "TESS"
+	assert body["models"][0] == "toi" and sorted(body["models"]) == ["k2", "kepler", "toi"]
+	assert set(body["predictions"]) == {"kepler", "k2", "toi"}
+
+	body = _post(client, "/predict-auto", KOI_CSV, models="k2").json()
+	assert body["models"] == ["k2"]
+	assert _post(client, "/predict-auto", KOI_CSV, models="k2,hubble").status_code == 400
+
+
+def test_predict_k2_and_shap_rows(client, synthetic_models):
+	body = _post(client, "/predict-k2", KOI_CSV).json()
+	assert body["model"] == "k2"
+	body = _post(client, "/predict", KOI_CSV, shap="true", shap_rows=2).json()
+	explanations = body["row_explanations"]
+	assert explanations["method"] == "tree_shap"
+	assert explanations["rows_explained"] == 2 and explanations["truncated"]
+	assert set(explanations["rows"][0]["contributions"]) == set(synthetic_models["kepler"]["features"])
+
+
+def test_predict_without_models_is_heuristic(client, synthetic_models):
+	for entry in synthetic_models.values():
+		entry["model"] = None
+	body = _post(client, "/predict", KOI_CSV).json()
+	assert body["model"] == "heuristic"
@@ -0,0 +1,98 @@
+import pytest
+
+from src.catalog import CatalogManager, CatalogTable, build_catalog
+
+# Extraits des exports NEA fournis (colonnes utiles seulement)
+CUMULATIVE = (
+	"# This file was produced by the NASA Exoplanet Archive\n"
+	"kepid,kepoi_name,kepler_name,koi_disposition,koi_period,koi_duration,koi_depth,koi_prad,koi_teq,koi_insol,"
+	"koi_steff,koi_slogg,koi_srad,ra,dec\n"
+	"4138008,K04742.01,Kepler-442 b,CONFIRMED,112.303136,5.2,510,1.3,241,0.79,4401,4.677,0.595,285.36,39.28\n"
+	"10797460,K00752.01,Kepler-227 b,CONFIRMED,9.488036,2.96,615.8,2.26,793,93.59,5455,4.467,0.927,291.93,48.14\n"
+	"10811496,K00753.01,,FALSE POSITIVE,19.899140,1.78,10829,14.6,638,39.3,5853,4.544,0.868,297.00,48.13\n"
+)
+K2PANDC = (
+	"pl_name,hostname,default_flag,disposition,pl_orbper,pl_rade,st_teff,st_rad,st_mass,pl_insol,pl_eqt,sy_dist,ra,dec\n"
+	"K2-18 b,K2-18,0,CONFIRMED,32.94,2.61,3457,0.44,0.36,1.0,255,38.07,172.56,7.59\n"
+	"K2-18 b,K2-18,1,CONFIRMED,32.94,2.37,3457,0.41,0.36,1.0,255,38.07,172.56,7.59\n"
+)
+TOI = (
+	"toi,tid,tfopwg_disp,pl_orbper,pl_trandurh,pl_trandep,pl_rade,pl_insol,pl_eqt,st_teff,st_logg,st_rad,ra,dec\n"
+	"1000.1,50365310,FP,2.17,2.02,656.9,5.82,22601.9,3127,10249,4.19,2.17,112.36,-12.70\n"
+)
+
+
+@pytest.fixture
+def catalog_dir(tmp_path):
+	(tmp_path / "cumulative_2025.10.04_04.45.50.csv").write_text(CUMULATIVE)
+	(tmp_path / "k2pandc_2025.10.04_10.51.38.csv").write_text(K2PANDC)
+	(tmp_path / "TOI_2025.10.04_22.09.00.csv").write_text(TOI)
+	return tmp_path
+
+
+def test_build_and_lookup(catalog_dir, synthetic_models):
+	store = build_catalog(synthetic_models, str(catalog_dir), str(catalog_dir / "store"))
+	table = CatalogTable(store)
+	# k2pandc: seule la solution par défaut est gardée
+	assert table.rows == 5
+	assert table.models == ["k2", "kepler", "toi"]
+	# Clés normalisées: casse, espaces, tirets ignorés
+	(i,) = table.lookup("kepler 442b")
+	assert table.lookup("K04742.01", "kepoi_name") == [i]
+	assert table.lookup("k2-18", "hostname") == table.lookup("K2-18 b")
+	assert table.lookup("TIC 50365310") == table.lookup("TOI-1000.10") == table.lookup("1000.10", "toi")
+	assert table.lookup("Kepler-227") and not table.lookup("Kepler-227", "pl_name")
+	assert table.lookup("K00753.01") and table.lookup("nothing") == []
+
+	record = table.record(i)
+	assert record["catalog"] == "kepler" and record["model"] == "kepler"
+	assert record["kepoi_name"] == "K04742.01" and record["hostname"] == "Kepler-442"
+	assert set(record["scores"]) == {"kepler", "k2", "toi"}
+	assert record["features"]["koi_prad"] == pytest.approx(1.3)
+
+
+def test_habitability_matches_known_koi(catalog_dir, synthetic_models):
+	table = CatalogTable(build_catalog(synthetic_models, str(catalog_dir), str(catalog_dir / "store")))
+	hab = table.record(table.lookup("Kepler-442 b")[0])["habitability"]
+	# Mêmes valeurs que POST /habitability sur l'export NEA (voir test_habitability)
+	assert hab["name"] == "Kepler-442 b"
+	assert hab["zone_habitable"] is True
+	assert hab["habitability_score"] == 1.0
+	assert hab["esi"] == pytest.approx(0.8901, abs=1e-4)
+	assert hab["luminosity_w_m2"] == pytest.approx(1082.28, rel=1e-4)
+	assert hab["star_class"] == "K"
+	k2 = table.record(table.lookup("K2-18 b")[0])["habitability"]
+	assert k2["zone_habitable"] is True and k2["distance_pc"] == pytest.approx(38.07)
+
+
+def test_manager_rebuilds_on_model_version(catalog_dir, synthetic_models):
+	manager = CatalogManager(store_dir=str(catalog_dir / "store"), source_dir=str(catalog_dir))
+	manager.ensure(synthetic_models, background=False)
+	first = manager.table
+	assert manager.status()["ready"] and manager.status()["rows"] == 5
+	manager.ensure(synthetic_models, background=False)
+	assert manager.table is first
+	synthetic_models["k2"]["version"] = "synthetic-k2-v2"
+	manager.ensure(synthetic_models, background=False)
+	assert manager.table is not first
+	assert manager.table.meta["model_versions"]["k2"] == "synthetic-k2-v2"
+
+
+def test_lookup_endpoint(client, catalog_dir, synthetic_models, monkeypatch):
+	import api.main
+
+	manager = CatalogManager(store_dir=str(catalog_dir / "store"), source_dir=str(catalog_dir))
+	monkeypatch.setattr(api.main, "CATALOG", manager)
+	assert client.get("/catalog/lookup", params={"q": "Kepler-442 b"}).status_code == 503
+	manager.ensure(synthetic_models, background=False)
+
+	body = client.get("/catalog/lookup", params={"q": "kepler-442b"}).json()
+	assert body["count"] == 1
+	result = body["results"][0]
+	assert result["kepoi_name"] == "K04742.01"
+	assert result["habitability"]["zone_habitable"] is True
+	assert result["scores"]["kepler"]["status"] in ("Exoplanète", "Candidat", "Faux positif")
+	assert client.get("/catalog/lookup", params={"q": "K2-18", "by": "hostname"}).json()["count"] == 1
+	assert client.get("/catalog/lookup", params={"q": "K2-18", "by": "ra"}).status_code == 400
+	assert client.get("/catalog/lookup", params={"q": "Kepler-9999 z"}).status_code == 404
+	assert client.get("/catalog/status").json()["rows"] == 5
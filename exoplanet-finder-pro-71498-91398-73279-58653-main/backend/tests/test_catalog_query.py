@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.catalog_query import CatalogQueryEngine, QueryError
+
+
+N = 5000
+CLASSES = ["F", "G", "K", "M"]
+
+
+@pytest.fixture(scope="module")
+def table():
+	rng = np.random.default_rng(0)
+	esi = rng.random(N)
+	esi[rng.random(N) < 0.1] = np.nan
+	codes = rng.integers(-1, len(CLASSES), N).astype(np.int8)
+	columns = {
+		"hab_esi": esi,
+		"hab_distance_pc": rng.lognormal(5.0, 1.0, N),
+		"koi_period": rng.lognormal(2.0, 1.5, N).astype(np.float32),
+		"koi_depth": rng.integers(0, 1000, N),
+		"hab_zone": rng.random(N) < 0.2,
+		"hab_star_class": codes,
+		"disposition": rng.choice(["CONFIRMED", "CANDIDATE", "FALSE POSITIVE"], N).astype(object),
+	}
+	frame = pd.DataFrame(columns)
+	frame["star_class"] = [CLASSES[c] if c >= 0 else None for c in codes]
+	return CatalogQueryEngine(columns, {"hab_star_class": CLASSES}), frame
+
+
+CASES = [
+	(["esi>0.8"], lambda f: f["hab_esi"] > 0.8),
+	(["esi>=0.2", "esi<0.3", "distance_pc<=100"], lambda f: (f["hab_esi"] >= 0.2) & (f["hab_esi"] < 0.3) & (f["hab_distance_pc"] <= 100)),
+	(["distance_ly=100..500"], lambda f: (f["hab_distance_pc"] * 3.26156).between(100, 500)),
+	(["koi_period<1.5", "zone_habitable=true"], lambda f: (f["koi_period"] < np.float32(1.5)) & f["hab_zone"]),
+	(["star_class=K|M", "koi_depth>=900"], lambda f: f["star_class"].isin(["K", "M"]) & (f["koi_depth"] >= 900)),
+	(["star_class!=G"], lambda f: f["star_class"].notna() & (f["star_class"] != "G")),
+	(["disposition=confirmed,candidate", "esi<0.01"], lambda f: f["disposition"].isin(["CONFIRMED", "CANDIDATE"]) & (f["hab_esi"] < 0.01)),
+	(["koi_depth=500"], lambda f: f["koi_depth"] == 500),
+	(["esi>2"], lambda f: f["hab_esi"] > 2),
+]
+
+
+@pytest.mark.parametrize("filters, expected", CASES)
+def test_matches_brute_force(table, filters, expected):
+	engine, frame = table
+	mask = expected(frame).fillna(False).to_numpy(dtype=bool)
+	result = engine.query(filters, limit=1000)
+	assert result["total"] == int(mask.sum())
+	assert result["rows"] == np.flatnonzero(mask)[:1000].tolist()
+
+
+def test_strategies_agree(table):
+	engine, frame = table
+	# Le prédicat très sélectif (koi_depth=500) passe par les candidats, le large par les bitmaps
+	selective = engine.query(["koi_depth=500", "esi>0.5"], limit=1000)
+	broad = engine.query(["esi>0.5", "koi_depth>=0"], limit=1000)
+	assert selective["strategy"] == "candidates" and broad["strategy"] == "bitmap"
+	mask = ((frame["koi_depth"] == 500) & (frame["hab_esi"] > 0.5)).to_numpy()
+	assert selective["rows"] == np.flatnonzero(mask).tolist()
+
+
+def test_sort_and_pagination(table):
+	engine, frame = table
+	mask = (frame["hab_distance_pc"] < 200).to_numpy()
+	expected = frame[mask].sort_values("hab_esi", ascending=False, na_position="last", kind="stable").index.to_numpy()
+	pages = [engine.query(["distance_pc<200"], sort="-esi", limit=40, offset=o)["rows"] for o in range(0, len(expected), 40)]
+	assert sum(pages, []) == expected.tolist()
+	ascending = engine.query(["distance_pc<200"], sort="esi", limit=1000)["rows"]
+	assert ascending == frame[mask].sort_values("hab_esi", na_position="last", kind="stable").index[:1000].tolist()
+
+
+@pytest.mark.parametrize("filters", [["esi"], ["unknown>1"], ["esi!=0.5"], ["star_class>K"], ["esi>abc"]])
+def test_invalid_filters(table, filters):
+	with pytest.raises(QueryError):
+		table[0].query(filters)
+
+
+def test_fields(table):
+	fields = table[0].fields()
+	assert {"esi", "distance_pc", "distance_ly", "koi_period"} <= set(fields["numeric"])
+	assert {"star_class", "zone_habitable", "disposition"} <= set(fields["categorical"])
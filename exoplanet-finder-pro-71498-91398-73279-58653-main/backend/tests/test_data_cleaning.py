@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.columnar_store import read_columnar
+from src.data_cleaning import (
+	FEATURE_DTYPE,
+	KEPLER_FEATURES,
+	LABEL_DTYPE,
+	clean_k2_frame,
+	clean_kepler_csv,
+	clean_kepler_frame,
+)
+
+
+def _koi() -> pd.DataFrame:
+	return pd.DataFrame({
+		" KOI_Period ": ["10.5", "20.1", "x", "5.3", "2000", "7.7", "8.8", None],
+		"koi_duration": [3.2, 4.1, 2.0, 1.9, 3.0, 2.2, 2.5, 1.0],
+		"koi_depth": [500, 800, 300, 120, 200, 410, 90, 50],
+		"koi_prad": [1.2, 2.3, 1.1, 0.9, 1.0, 45.0, 1.4, 1.0],
+		"koi_disposition": [" confirmed", "CANDIDATE", "CONFIRMED", "False Positive", "CONFIRMED", "CONFIRMED", "NOT DISPOSITIONED", "CONFIRMED"],
+	})
+
+
+def test_kepler_dtypes_labels_and_counts():
+	counts = {}
+	cleaned = clean_kepler_frame(_koi(), counts=counts)
+	assert list(cleaned.columns) == KEPLER_FEATURES + ["label"]
+	assert all(cleaned[c].dtype == FEATURE_DTYPE for c in KEPLER_FEATURES)
+	assert cleaned["label"].dtype == LABEL_DTYPE
+	# Index d'origine conservé: lignes retenues seulement
+	assert cleaned.index.tolist() == [0, 1, 3]
+	assert cleaned["label"].tolist() == [1, 0, -1]
+	np.testing.assert_array_equal(cleaned["koi_period"].to_numpy(), np.array([10.5, 20.1, 5.3], dtype=np.float32))
+	assert counts == {
+		"rows_before": 8,
+		"after_dropna_raw": 7,
+		"after_numeric": 6,
+		"after_outliers": 4,
+		"after_label_filter": 3,
+	}
+
+
+def test_k2_minimal_keeps_rows_without_duration():
+	df = pd.DataFrame({
+		"pl_orbper": [32.9, 10.05, 3.0],
+		"pl_rade": [2.6, 2.1, None],
+		"disposition": ["1", "-1", "1"],
+	})
+	cleaned = clean_k2_frame(df)
+	assert list(cleaned.columns) == ["koi_period", "koi_prad", "label"]
+	assert cleaned["koi_prad"].dtype == FEATURE_DTYPE and cleaned["label"].dtype == LABEL_DTYPE
+	assert cleaned["label"].tolist() == [1, -1]
+
+
+def test_errors():
+	with pytest.raises(ValueError):
+		clean_kepler_frame(pd.DataFrame({"foo": [1.0]}))
+	bad = _koi()
+	bad["koi_disposition"] = "NOT DISPOSITIONED"
+	with pytest.raises(ValueError):
+		clean_kepler_frame(bad)
+
+
+def test_clean_csv_to_columnar_store(tmp_path):
+	src = tmp_path / "cumulative.csv"
+	src.write_text("# export NEA\n" + _koi().to_csv(index=False))
+	out = clean_kepler_csv(str(src), str(tmp_path / "cleaned_kepler"))
+	stored = read_columnar(out)
+	assert stored["label"].dtype == LABEL_DTYPE and stored["koi_prad"].dtype == FEATURE_DTYPE
+	assert len(stored) == 3
+	manifest = json.loads((tmp_path / "cleaning_manifest.json").read_text())
+	assert manifest["rows_before"] == 8 and manifest["rows_after"] == 3
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from src.data_cleaning import FEATURE_DTYPE, LABEL_DTYPE, clean_toi_frame
+from src.dataset_adapter import CANONICAL_FEATURES, adapt_to_canonical, compile_plan, detect_dataset_type, plan_cache_info
+
+
+def _koi(n: int = 3) -> pd.DataFrame:
+	return pd.DataFrame({
+		"kepoi_name": [f"K{i:05d}.01" for i in range(n)],
+		"koi_period": ["10.5", "bad", "3.1"][:n],
+		"koi_duration": [3.2, 4.1, 1.9][:n],
+		"koi_depth": [500, 800, 120][:n],
+		"koi_prad": [1.2, 2.3, 0.9][:n],
+		"koi_disposition": ["CONFIRMED", "1", "-1"][:n],
+	})
+
+
+def test_adapt_aliases_and_missing_columns():
+	df = pd.DataFrame({" PL_ORBPER ": [12.0, 30.5], "pl_rade": [1.1, "x"], "disposition": ["0", "1"]})
+	out = adapt_to_canonical(df)
+	assert list(out.columns) == CANONICAL_FEATURES
+	assert out["koi_period"].tolist() == [12.0, 30.5]
+	assert out["koi_prad"].iloc[0] == 1.1 and np.isnan(out["koi_prad"].iloc[1])
+	assert out["koi_duration"].isna().all() and out["koi_depth"].isna().all()
+	assert out["koi_disposition"].tolist() == ["CANDIDATE", "CONFIRMED"]
+	assert detect_dataset_type(df) == "NASA_Exoplanet_Archive"
+
+
+def test_koi_values():
+	out = adapt_to_canonical(_koi())
+	assert np.isnan(out["koi_period"].iloc[1])
+	assert out["koi_disposition"].tolist() == ["CONFIRMED", "CONFIRMED", "FALSE POSITIVE"]
+	assert detect_dataset_type(_koi()) == "Kepler"
+
+
+def test_plan_cache_per_header():
+	compile_plan.cache_clear()
+	adapt_to_canonical(_koi())
+	info = plan_cache_info()
+	assert (info.hits, info.misses) == (0, 1)
+	# Même entête (casse et espaces normalisés): plan réutilisé, aucune nouvelle résolution
+	variant = _koi(2).rename(columns=lambda c: f" {c.upper()} ")
+	adapt_to_canonical(variant)
+	detect_dataset_type(variant)
+	info = plan_cache_info()
+	assert (info.hits, info.misses, info.currsize) == (2, 1, 1)
+	assert compile_plan(tuple(_koi().columns)) is compile_plan(tuple(_koi().columns))
+	# Entête différent: nouveau plan
+	adapt_to_canonical(_koi().drop(columns=["koi_depth"]))
+	assert plan_cache_info().currsize == 2
+
+
+def _toi() -> pd.DataFrame:
+	return pd.DataFrame({
+		"toi": [1000.01, 1001.01, 1002.01, 1003.01, 1004.01, 1005.01],
+		"tid": [50365310, 88863718, 124709665, 106997505, 238597883, 169249234],
+		"tfopwg_disp": ["FP", "PC", "KP", " cp ", "APC", "FA"],
+		"pl_orbper": [2.17, 1.93, 1.87, 2.74, 3.57, 0.93],
+		"pl_trandurh": [2.02, 3.17, 1.41, 3.17, 3.07, 1.21],
+		"pl_trandep": [656.9, 1286.0, 1500.0, 383.4, 755.0, 2730.0],
+		"pl_rade": [5.82, 11.22, 23.75, 3.25, 11.31, 12.83],
+	})
+
+
+def test_toi_detection_and_dispositions():
+	df = _toi()
+	# Colonnes pl_* présentes, mais les marqueurs TOI priment
+	assert detect_dataset_type(df) == "TESS"
+	out = adapt_to_canonical(df)
+	assert out["koi_duration"].tolist() == df["pl_trandurh"].tolist()
+	assert out["koi_depth"].tolist() == df["pl_trandep"].tolist()
+	assert out["koi_disposition"].tolist() == [
+		"FALSE POSITIVE", "CANDIDATE", "CONFIRMED", "CONFIRMED", "CANDIDATE", "FALSE POSITIVE",
+	]
+
+
+def test_tfopwg_codes_only_for_toi_headers():
+	df = pd.DataFrame({"pl_orbper": [1.0, 2.0], "disposition": ["CP", "1"]})
+	assert detect_dataset_type(df) == "NASA_Exoplanet_Archive"
+	assert adapt_to_canonical(df)["koi_disposition"].tolist() == ["CP", "CONFIRMED"]
+
+
+def test_clean_toi_frame():
+	cleaned = clean_toi_frame(_toi())
+	assert list(cleaned.columns) == ["koi_period", "koi_duration", "koi_depth", "koi_prad", "label"]
+	assert cleaned["label"].dtype == LABEL_DTYPE and cleaned["koi_period"].dtype == FEATURE_DTYPE
+	assert cleaned["label"].tolist() == [-1, 0, 1, 1, 0, -1]
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from src.drift import DRIFT_MIN_ROWS, DriftMonitor
+from src.preprocessing import compute_preprocessor_config
+
+FEATURES = ["koi_period", "koi_prad"]
+KOI_CSV = b"kepoi_name,koi_period,koi_duration,koi_depth,koi_prad\nK00001.01,10.5,3.2,500,1.2\nK00002.01,20.1,4.1,800,2.3\n"
+
+
+def _frame(n, seed=0, scale=1.0):
+	rng = np.random.default_rng(seed)
+	return pd.DataFrame(rng.lognormal(1.5, 0.8, size=(n, len(FEATURES))) * scale, columns=FEATURES)
+
+
+def _cfg():
+	return compute_preprocessor_config(_frame(5000, seed=1), FEATURES)
+
+
+def test_stable_and_shifted_distributions():
+	cfg = _cfg()
+	monitor = DriftMonitor(path=None)
+	monitor.observe("kepler", "v1", _frame(3000, seed=2), FEATURES, cfg)
+	monitor.observe("k2", "v1", _frame(3000, seed=3, scale=4.0), FEATURES, cfg)
+	report = monitor.report()["models"]
+
+	stable = report["kepler"]
+	assert stable["status"] == "ok" and not stable["retrain_recommended"]
+	assert stable["features"]["koi_period"]["psi"] < 0.1 and stable["features"]["koi_period"]["ks"] < 0.1
+
+	shifted = report["k2"]
+	assert shifted["status"] == "alert" and shifted["retrain_recommended"]
+	feature = shifted["features"]["koi_prad"]
+	assert feature["psi"] >= 0.25 and feature["clip_max_rate"] > 0.2
+
+
+def test_clip_hits_missing_and_small_samples():
+	cfg = _cfg()
+	monitor = DriftMonitor(path=None)
+	clip_max = cfg["stats"]["koi_period"]["clip_max"]
+	frame = pd.DataFrame({"koi_period": [clip_max * 2, 1.0, None, 5.0], "koi_prad": [1.0, 2.0, 3.0, 4.0]})
+	hits = monitor.observe("kepler", "v1", frame, FEATURES, cfg)
+	assert hits["koi_period"][1] == 1
+	period = monitor.report("kepler")["models"]["kepler"]["features"]["koi_period"]
+	assert period["missing_rate"] == 0.25 and period["clip_max_rate"] == round(1 / 3, 6)
+	assert period["status"] == "insufficient_data" and 4 < DRIFT_MIN_ROWS
+	# Sans statistiques pour ces features: rien n'est enregistré
+	assert monitor.observe("toi", "v1", frame, ["koi_depth"], cfg) == {}
+	assert "toi" not in monitor.report()["models"]
+
+
+def test_version_change_resets_and_state_roundtrip(tmp_path):
+	cfg = _cfg()
+	path = str(tmp_path / "drift_state.json")
+	monitor = DriftMonitor(path=path, persist_s=3600)
+	monitor.observe("kepler", "v1", _frame(500), FEATURES, cfg)
+	monitor.save(wait=True)
+	restored = DriftMonitor(path=path, persist_s=3600).report()["models"]["kepler"]
+	assert restored["version"] == "v1"
+	assert restored["features"]["koi_prad"]["rows"] == 500
+	assert restored["features"]["koi_prad"]["psi"] == monitor.report()["models"]["kepler"]["features"]["koi_prad"]["psi"]
+
+	monitor.observe("kepler", "v2", _frame(10), FEATURES, cfg)
+	assert monitor.report()["models"]["kepler"]["features"]["koi_prad"]["rows"] == 10
+	monitor.reset("kepler")
+	assert monitor.report()["models"] == {}
+
+
+def test_drift_endpoints(client, synthetic_models):
+	assert client.post("/admin/drift/reset").json() == {"reset": "all"}
+	client.post("/predict", files={"file": ("koi.csv", KOI_CSV, "text/csv")})
+	report = client.get("/drift", params={"model": "kepler"}).json()
+	kepler = report["models"]["kepler"]
+	assert kepler["version"] == "synthetic-kepler"
+	assert kepler["features"]["koi_period"]["rows"] == 2
+	assert report["thresholds"]["psi_alert"] == 0.25
+	assert client.get("/drift", params={"model": "hubble"}).status_code == 404
+	assert client.post("/admin/drift/reset", params={"model": "kepler"}).json() == {"reset": "kepler"}
+	assert client.get("/drift").json()["models"] == {}
@@ -0,0 +1,108 @@
+from typing import Any, List, Tuple
+
+import numpy as np
+import pytest
+
+from src import fits_lightcurve
+from src.fits_lightcurve import _read_bintable, read_lightcurve
+
+
+def _header(cards: List[Tuple[str, Any]]) -> bytes:
+	lines = []
+	for key, value in cards:
+		if isinstance(value, bool):
+			text = "T" if value else "F"
+		elif isinstance(value, str):
+			text = "'" + value.replace("'", "''").ljust(8) + "'"
+		else:
+			text = str(value)
+		lines.append(f"{key:<8}= {text:>20}".ljust(80))
+	lines.append("END".ljust(80))
+	raw = "".join(lines).encode("ascii")
+	return raw + b" " * (-len(raw) % 2880)
+
+
+def _bintable(extname: str, columns: List[Tuple[str, str, np.ndarray]], extra: List[Tuple[str, Any]] = ()) -> bytes:
+	codes = {"D": ">f8", "E": ">f4", "J": ">i4", "I": ">i2"}
+	n = len(columns[0][2])
+	rec = np.empty(n, dtype=[(name, codes[tform]) for name, tform, _ in columns])
+	for name, _, values in columns:
+		rec[name] = values
+	cards: List[Tuple[str, Any]] = [
+		("XTENSION", "BINTABLE"), ("BITPIX", 8), ("NAXIS", 2), ("NAXIS1", rec.dtype.itemsize), ("NAXIS2", n),
+		("PCOUNT", 0), ("GCOUNT", 1), ("TFIELDS", len(columns)),
+	]
+	for i, (name, tform, _) in enumerate(columns, start=1):
+		cards += [(f"TTYPE{i}", name), (f"TFORM{i}", tform)]
+	cards += [("EXTNAME", extname), *extra]
+	data = rec.tobytes()
+	return _header(cards) + data + b"\x00" * (-len(data) % 2880)
+
+
+PRIMARY = _header([("SIMPLE", True), ("BITPIX", 8), ("NAXIS", 0), ("EXTEND", True)])
+
+
+@pytest.fixture(autouse=True)
+def _without_astropy(monkeypatch):
+	# Parseur minimal testé même si astropy est installé
+	monkeypatch.setattr(fits_lightcurve, "_read_astropy", lambda source: None)
+
+
+def _lightcurve(n: int = 1000) -> Tuple[bytes, np.ndarray, np.ndarray, np.ndarray]:
+	rng = np.random.default_rng(0)
+	time = np.arange(n, dtype=np.float64) * 0.02
+	flux = 1.0 + rng.normal(scale=1e-3, size=n)
+	flux[5] = np.nan
+	quality = np.zeros(n, dtype=np.int32)
+	quality[[10, 11, 500]] = [1, 128, 4096]
+	# Table sans TIME puis table TIME non LIGHTCURVE: l'extension LIGHTCURVE doit être retenue
+	other = _bintable("APERTURE", [("X", "J", np.arange(3))])
+	decoy = _bintable("OTHER", [("TIME", "D", np.zeros(4)), ("SAP_FLUX", "D", np.ones(4))])
+	lc = _bintable("LIGHTCURVE", [
+		("TIME", "D", time), ("SAP_FLUX", "E", flux * 2), ("PDCSAP_FLUX", "E", flux),
+		("PDCSAP_FLUX_ERR", "E", np.full(n, 1e-3)), ("QUALITY", "J", quality),
+	])
+	return PRIMARY + other + decoy + lc, time, flux.astype(np.float32), quality
+
+
+def test_bintable_columns():
+	content, time, flux, quality = _lightcurve()
+	columns = _read_bintable(content)
+	assert list(columns) == ["TIME", "PDCSAP_FLUX", "PDCSAP_FLUX_ERR", "QUALITY"]
+	np.testing.assert_array_equal(columns["TIME"], time)
+	np.testing.assert_array_equal(columns["QUALITY"], quality)
+
+
+def test_read_lightcurve_masks(tmp_path):
+	content, time, flux, quality = _lightcurve()
+	keep = np.isfinite(flux) & (quality == 0)
+	path = tmp_path / "lc.fits"
+	path.write_bytes(content)
+	# Bytes (vue) et chemin (memmap): même résultat
+	for source in (content, str(path)):
+		df = read_lightcurve(source)
+		assert list(df.columns) == ["time", "pdcsap_flux", "pdcsap_flux_err"]
+		assert len(df) == int(keep.sum())
+		np.testing.assert_array_equal(df["time"].to_numpy(), time[keep])
+		np.testing.assert_array_equal(df["pdcsap_flux"].to_numpy(), flux[keep].astype(np.float64))
+		assert df["time"].dtype == np.float64
+	# Masque partiel: seuls les bits demandés excluent un point
+	df = read_lightcurve(content, quality_bitmask=1)
+	assert len(df) == int(keep.sum()) + 2
+
+
+def test_scaled_column():
+	time = np.arange(10, dtype=np.float32)
+	content = PRIMARY + _bintable("LIGHTCURVE", [("TIME", "E", time), ("FLUX", "I", np.arange(10))], extra=[("TSCAL2", 0.5), ("TZERO2", 100)])
+	df = read_lightcurve(content)
+	np.testing.assert_allclose(df["flux"].to_numpy(), np.arange(10) * 0.5 + 100)
+
+
+def test_errors():
+	content, *_ = _lightcurve()
+	with pytest.raises(ValueError):
+		read_lightcurve(content[:2880 + 100])
+	with pytest.raises(ValueError):
+		read_lightcurve(PRIMARY + _bintable("APERTURE", [("X", "J", np.arange(3))]))
+	with pytest.raises(ValueError):
+		read_lightcurve(PRIMARY + _bintable("LIGHTCURVE", [("TIME", "D", np.arange(3.0)), ("QUALITY", "J", np.zeros(3))]))
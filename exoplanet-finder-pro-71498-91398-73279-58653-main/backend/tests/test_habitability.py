@@ -0,0 +1,49 @@
+import pytest
+
+from src.habitability import _mass_from_logg, compute_habitability_for_row
+
+
+# Kepler-442 b (K04742.01) tel qu'exporté par le NEA (cumulative), colonnes NEA, sans st_mass
+KEPLER_442B = {
+	"pl_name": "Kepler-442 b",
+	"st_teff": 4401.0,
+	"st_rad": 0.595,
+	"st_logg": 4.677,
+	"pl_insol": 0.79,
+	"pl_orbper": 112.303136,
+	"pl_rade": 1.3,
+	"pl_eqt": 241.0,
+}
+
+
+def test_mass_from_logg():
+	# Soleil: log g = 4.438, R = 1 -> ~1 masse solaire
+	assert _mass_from_logg(4.438, 1.0) == pytest.approx(1.0, rel=1e-3)
+	assert _mass_from_logg(None, 1.0) is None
+	assert _mass_from_logg(4.4, 0.0) is None
+
+
+def test_known_koi_without_stellar_mass():
+	out = compute_habitability_for_row(KEPLER_442B)
+	assert out["zone_habitable"] is True
+	assert out["luminosity_w_m2"] == pytest.approx(1082.28, rel=1e-4)
+	assert out["temp_eq"] == 241.0
+	assert out["habitability_score"] == 1.0
+	assert out["esi"] == pytest.approx(0.8901, abs=1e-4)
+	assert out["star_class"] == "K"
+
+
+def test_insolation_fallback():
+	# Sans log g: demi-grand axe inconnu, test de zone sur le flux reçu
+	row = {k: v for k, v in KEPLER_442B.items() if k != "st_logg"}
+	out = compute_habitability_for_row(row)
+	assert out["zone_habitable"] is True
+	assert out["luminosity_w_m2"] is None
+	assert compute_habitability_for_row({**row, "pl_insol": 0.44})["zone_habitable"] is False
+
+
+def test_stellar_mass_takes_precedence():
+	# st_mass fourni: log g ignoré (comportement inchangé)
+	with_mass = compute_habitability_for_row({**KEPLER_442B, "st_mass": 0.61})
+	without_logg = compute_habitability_for_row({**{k: v for k, v in KEPLER_442B.items() if k != "st_logg"}, "st_mass": 0.61})
+	assert with_mass == without_logg
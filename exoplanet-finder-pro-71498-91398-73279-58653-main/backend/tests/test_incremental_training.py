@@ -0,0 +1,93 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.incremental_training import MissingTrainingStore, load_store, merge_into_store, train_incremental
+
+FEATURES = ["koi_period", "koi_duration", "koi_depth", "koi_prad"]
+COLUMNS = FEATURES + ["label"]
+
+
+def _rows(n: int, seed: int = 0) -> pd.DataFrame:
+	rng = np.random.default_rng(seed)
+	df = pd.DataFrame(rng.lognormal(1.0, 1.0, size=(n, len(FEATURES))), columns=FEATURES)
+	df["label"] = rng.choice([-1, 0, 1], size=n)
+	return df
+
+
+def _train(tmp_path, rows, **kwargs):
+	return train_incremental(
+		new_rows=rows,
+		features=FEATURES,
+		store_path=str(tmp_path / "store"),
+		model_path=str(tmp_path / "model.joblib"),
+		metrics_path=str(tmp_path / "metrics.json"),
+		backend="random_forest",
+		**kwargs,
+	)
+
+
+def test_merge_dedup_and_relabel():
+	rows = _rows(50)
+	store, added, relabeled = merge_into_store(pd.DataFrame(columns=COLUMNS), pd.concat([rows, rows.head(5)]), COLUMNS)
+	assert len(store) == len(added) == 50 and relabeled == 0
+
+	# Mêmes features, autre label: la ligne est remplacée, pas ajoutée
+	update = rows.head(3).copy()
+	update["label"] = (update["label"] + 2) % 3 - 1
+	merged, added, relabeled = merge_into_store(store, pd.concat([update, _rows(4, seed=1)]), COLUMNS)
+	assert len(merged) == 54 and len(added) == 4 and relabeled == 3
+	assert not merged[FEATURES].duplicated().any()
+	# Lignes relabellisées: nouveau label, placées avec les lignes envoyées
+	assert merged["label"].tolist()[-7:-4] == update["label"].tolist()
+
+
+def test_merge_within_upload_last_wins():
+	rows = _rows(2)
+	rows.loc[1, FEATURES] = rows.loc[0, FEATURES].to_numpy()
+	rows.loc[:, "label"] = [0, 1]
+	store, _, _ = merge_into_store(pd.DataFrame(columns=COLUMNS), rows, COLUMNS)
+	assert store["label"].tolist() == [1]
+
+
+def test_modes(tmp_path):
+	base = _rows(400)
+	assert _train(tmp_path, base)["mode"] == "full_refit"
+	assert _train(tmp_path, base.head(20))["mode"] == "unchanged"
+
+	m = _train(tmp_path, _rows(40, seed=2))
+	assert m["mode"] == "warm_start" and m["rows_added"] == 40
+	assert m["n_estimators"] > 300
+
+	relabel = base.head(2).copy()
+	relabel["label"] = (relabel["label"] + 2) % 3 - 1
+	m = _train(tmp_path, relabel)
+	assert m["mode"] == "full_refit" and m["rows_relabeled"] == 2 and m["rows_added"] == 0
+	assert len(load_store(str(tmp_path / "store"), COLUMNS)) == 440
+	assert json.loads((tmp_path / "metrics.json").read_text())["mode"] == "full_refit"
+
+
+def test_model_without_store_refused(tmp_path):
+	(tmp_path / "model.joblib").write_bytes(b"modele livre")
+	with pytest.raises(MissingTrainingStore):
+		_train(tmp_path, _rows(30))
+	assert (tmp_path / "model.joblib").read_bytes() == b"modele livre"
+	assert not (tmp_path / "store").exists()
+	# reset_store: entraînement complet explicite
+	assert _train(tmp_path, _rows(30), reset_store=True)["mode"] == "full_refit"
+
+
+def test_incremental_endpoint_conflict(client, monkeypatch):
+	import api.main
+
+	def refuse(**kwargs):
+		raise MissingTrainingStore("store absent")
+
+	monkeypatch.setattr(api.main, "train_incremental", refuse)
+	csv = _rows(10).to_csv(index=False).encode()
+	res = client.post("/admin/train/kepler?mode=incremental", files={"file": ("rows.csv", csv, "text/csv")})
+	assert res.status_code == 409
+	res = client.post("/admin/train/kepler?mode=partial", files={"file": ("rows.csv", csv, "text/csv")})
+	assert res.status_code == 400
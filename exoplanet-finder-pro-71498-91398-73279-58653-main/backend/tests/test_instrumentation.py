@@ -0,0 +1,59 @@
+import re
+
+from src.instrumentation import MetricsRegistry, begin_request, end_request, server_timing, stage
+
+KOI_CSV = b"kepoi_name,koi_period,koi_duration,koi_depth,koi_prad\nK00001.01,10.5,3.2,500,1.2\nK00002.01,20.1,4.1,800,2.3\n"
+
+
+def test_render_prometheus_text():
+	registry = MetricsRegistry()
+	counter = registry.counter("t_total", "Compteur", ("path",))
+	counter.inc(path="/a")
+	counter.inc(2, path='/b"')
+	hist = registry.histogram("t_seconds", "Durées", buckets=(0.1, 1.0))
+	for v in (0.05, 0.5, 5.0):
+		hist.observe(v)
+	registry.gauge("t_size", "Taille", lambda: 3)
+	registry.gauge("t_broken", "Jauge en échec", lambda: 1 / 0)
+	assert registry.counter("t_total", "autre doc", ("path",)) is counter
+	lines = registry.render().splitlines()
+	assert 't_total{path="/a"} 1' in lines and 't_total{path="/b\\""} 2' in lines
+	assert 't_seconds_bucket{le="0.1"} 1' in lines and 't_seconds_bucket{le="1.0"} 2' in lines
+	assert 't_seconds_bucket{le="+Inf"} 3' in lines and "t_seconds_count 3" in lines and "t_seconds_sum 5.55" in lines
+	assert "t_size 3" in lines and not any(line.startswith("t_broken") for line in lines)
+
+
+def test_server_timing_sums_repeated_stages():
+	timings, token = begin_request()
+	try:
+		with stage("parse"):
+			pass
+		for _ in range(2):
+			with stage("predict", "kepler"):
+				pass
+	finally:
+		end_request(token)
+	assert [name for name, _ in timings] == ["parse", "predict-kepler", "predict-kepler"]
+	header = server_timing(timings)
+	assert re.fullmatch(r"parse;dur=\d+\.\d\d, predict-kepler;dur=\d+\.\d\d", header)
+	# Hors requête: rien n'est collecté
+	with stage("parse"):
+		pass
+	assert len(timings) == 3
+
+
+def test_predict_server_timing_and_metrics(client, synthetic_models):
+	res = client.post("/predict", files={"file": ("koi.csv", KOI_CSV, "text/csv")})
+	assert res.status_code == 200
+	stages = [part.split(";")[0] for part in res.headers["Server-Timing"].split(", ")]
+	for name in ("read_upload", "parse", "adapt", "route", "preprocess-kepler", "predict-kepler", "total"):
+		assert name in stages
+	assert stages[-1] == "total"
+	assert "total;dur=" in client.get("/health").headers["Server-Timing"]
+
+	text = client.get("/metrics").text
+	assert 'exodetect_requests_total{path="/predict",method="POST",status="200"}' in text
+	assert 'exodetect_stage_seconds_count{stage="predict",model="kepler"}' in text
+	assert re.search(r'exodetect_csv_parse_total\{depth="\d+",outcome="ok"\} \d+', text)
+	assert 'exodetect_rows_total{model="kepler",direction="in"}' in text
+	assert "# TYPE exodetect_request_seconds histogram" in text
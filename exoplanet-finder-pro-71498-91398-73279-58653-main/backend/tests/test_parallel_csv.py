@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.parallel_csv import read_csv_parallel
+
+
+PREAMBLE = "# This file was produced by the NASA Exoplanet Archive\n# COLUMN koi_period: Orbital Period [days]\n#\n"
+
+
+def _frame(n: int, seed: int = 0) -> pd.DataFrame:
+	rng = np.random.default_rng(seed)
+	return pd.DataFrame({
+		"kepoi_name": [f"K{i:05d}.01" for i in range(n)],
+		"koi_period": rng.lognormal(2.0, 1.0, n),
+		"koi_depth": rng.integers(0, 10_000, n),
+		"comment": np.where(rng.random(n) < 0.1, 'note, "quoted"', ""),
+		"koi_prad": np.where(rng.random(n) < 0.05, np.nan, rng.normal(2.0, 0.5, n)),
+	})
+
+
+def _write(tmp_path, name, text):
+	path = tmp_path / name
+	path.write_text(text, encoding="utf-8")
+	return str(path)
+
+
+def _sequential(path):
+	return pd.read_csv(path, comment="#", float_precision="round_trip")
+
+
+def test_matches_sequential(tmp_path):
+	path = _write(tmp_path, "koi.csv", PREAMBLE + _frame(20_000).to_csv(index=False))
+	for workers in (2, 3):
+		df = read_csv_parallel(path, workers=workers, min_bytes=0)
+		assert df is not None
+		pd.testing.assert_frame_equal(df, _sequential(path))
+
+
+def test_small_file_or_single_worker(tmp_path):
+	path = _write(tmp_path, "koi.csv", _frame(100).to_csv(index=False))
+	assert read_csv_parallel(path, workers=2) is None
+	assert read_csv_parallel(path, workers=1, min_bytes=0) is None
+
+
+def test_multiline_field_at_boundary(tmp_path):
+	lines = _frame(20_000).to_csv(index=False).splitlines()
+	middle = len(lines) // 2
+	# Champ de ~2000 lignes (~20 % du fichier) centré sur le milieu: la frontière tombe dedans
+	comment = "ligne de commentaire\n" * 2000
+	lines[middle] = f'K{middle:05d}.01,1.5,10,"{comment}",1.0'
+	path = _write(tmp_path, "multiline.csv", "\n".join(lines) + "\n")
+	assert len(_sequential(path)) == 20_000
+	# Frontière au milieu d'un champ quoté: lecture séquentielle laissée à l'appelant
+	assert read_csv_parallel(path, workers=2, min_bytes=0) is None
+
+
+def test_multiline_field_inside_range(tmp_path):
+	lines = _frame(20_000).to_csv(index=False).splitlines()
+	lines[15_000] = 'K15000.01,1.5,10,"ligne 1\nligne 2",1.0'
+	path = _write(tmp_path, "multiline.csv", "\n".join(lines) + "\n")
+	df = read_csv_parallel(path, workers=2, min_bytes=0)
+	assert df is not None
+	pd.testing.assert_frame_equal(df, _sequential(path))
+
+
+def test_type_divergence_after_sample(tmp_path):
+	frame = _frame(40_000)
+	frame["koi_depth"] = frame["koi_depth"].astype(object)
+	# Colonne numérique dans l'échantillon de 1 Mo, texte plus loin
+	frame.loc[len(frame) - 10, "koi_depth"] = "inconnue"
+	path = _write(tmp_path, "mixed.csv", frame.to_csv(index=False))
+	assert read_csv_parallel(path, workers=2, min_bytes=0) is None
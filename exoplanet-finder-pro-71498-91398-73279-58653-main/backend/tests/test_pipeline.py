@@ -0,0 +1,63 @@
+import shutil
+
+import pytest
+
+from src import pipeline
+from src.columnar_store import read_manifest
+from src.pipeline import CATALOGS, process_catalog, run_pipeline
+
+KOI_CSV = (
+	"# export NEA\n"
+	"kepoi_name,koi_period,koi_duration,koi_depth,koi_prad,koi_disposition\n"
+	"K00001.01,10.5,3.2,500,1.2,CONFIRMED\n"
+	"K00002.01,20.1,4.1,800,2.3,CANDIDATE\n"
+	"K00003.01,5.3,1.9,120,0.9,FALSE POSITIVE\n"
+	"K00004.01,,2.0,300,1.1,CANDIDATE\n"
+)
+
+
+@pytest.fixture
+def koi_export(tmp_path, monkeypatch):
+	monkeypatch.chdir(tmp_path)
+	path = tmp_path / "cumulative_2025.csv"
+	path.write_text(KOI_CSV)
+	return str(path)
+
+
+def test_skip_requires_same_hash_cleaner_and_version(koi_export, monkeypatch):
+	spec = CATALOGS["kepler"]
+	first = process_catalog("kepler", spec, koi_export)
+	assert first["status"] == "ok" and first["rows_out"] == 3
+	assert read_manifest(spec["output"])["meta"]["cleaning_version"] == pipeline.CLEANING_VERSION
+
+	again = process_catalog("kepler", spec, koi_export, previous=first)
+	assert again["status"] == "skipped" and again["rows_out"] == 3
+	assert process_catalog("kepler", spec, koi_export, previous=first, force=True)["status"] == "ok"
+
+	# Règles de nettoyage modifiées: les sorties existantes ne sont plus réutilisées
+	monkeypatch.setattr(pipeline, "CLEANING_VERSION", pipeline.CLEANING_VERSION + 1)
+	assert process_catalog("kepler", spec, koi_export, previous=first)["status"] == "ok"
+	# Ancien manifeste sans version
+	legacy = {k: v for k, v in first.items() if k != "cleaning_version"}
+	assert process_catalog("kepler", spec, koi_export, previous=legacy)["status"] == "ok"
+
+
+def test_skip_on_changed_input_or_missing_output(koi_export, tmp_path):
+	spec = CATALOGS["kepler"]
+	first = process_catalog("kepler", spec, koi_export)
+	(tmp_path / "cumulative_2025.csv").write_text(KOI_CSV + "K00005.01,7.7,2.2,410,1.5,CONFIRMED\n")
+	second = process_catalog("kepler", spec, koi_export, previous=first)
+	assert second["status"] == "ok" and second["rows_out"] == 4
+
+	shutil.rmtree(spec["output"])
+	assert process_catalog("kepler", spec, koi_export, previous=second)["status"] == "ok"
+
+
+def test_run_pipeline_manifest(koi_export, tmp_path):
+	manifest = run_pipeline(catalogs=["kepler", "k2"], workers=1, manifest_path="data/pipeline_manifest.json")
+	assert manifest["catalogs"]["kepler"]["status"] == "ok"
+	assert manifest["catalogs"]["k2"]["status"] == "missing"
+	manifest = run_pipeline(catalogs=["kepler"], workers=1, manifest_path="data/pipeline_manifest.json")
+	assert manifest["catalogs"]["kepler"]["status"] == "skipped"
+	with pytest.raises(ValueError):
+		run_pipeline(catalogs=["kepler", "tess"])
@@ -0,0 +1,53 @@
+import contextvars
+import threading
+import time
+
+import api.main
+from src.profiling import ProfileSession, profile_thread, render_flamegraph
+
+CSV = b"koi_period,koi_duration,koi_depth,koi_prad\n10.5,3.2,500,1.2\n20.1,4.1,800,2.3\n"
+
+
+def test_worker_thread_attached():
+	session = ProfileSession(requests=1, interval_ms=1)
+	session.start()
+	token = session.enter()
+	seen = []
+
+	def worker():
+		with profile_thread():
+			seen.append(threading.get_ident() in session._active)
+
+	ctx = contextvars.copy_context()
+	t = threading.Thread(target=ctx.run, args=(worker,))
+	t.start()
+	t.join()
+	session.exit(token, "/predict", 200)
+	assert seen == [True]
+	assert session._active == {}
+	assert not session.running
+
+
+def test_profile_thread_without_session():
+	with profile_thread():
+		pass
+
+
+def test_predict_worker_in_collapsed(client, monkeypatch):
+	adapt = api.main.adapt_to_canonical
+
+	def slow_adapt(df):
+		time.sleep(0.2)
+		return adapt(df)
+
+	monkeypatch.setattr(api.main, "adapt_to_canonical", slow_adapt)
+	res = client.post("/admin/profile/start", params={"requests": 1, "path": "/predict", "interval_ms": 1})
+	assert res.status_code == 200
+	res = client.post("/predict", files={"file": ("koi.csv", CSV, "text/csv")})
+	assert res.status_code == 200
+	status = client.get("/admin/profile/status").json()
+	assert status["completed"] == 1 and not status["running"]
+	collapsed = client.get("/admin/profile/collapsed").text
+	assert "api.main:_run_prediction_pipeline" in collapsed
+	assert "slow_adapt" in collapsed
+	assert "<svg" in render_flamegraph(api.main.PROFILER.session.stacks)
@@ -0,0 +1,64 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.sketches import KLLSketch, merge_sketches
+
+
+def _rank_errors(sketch: KLLSketch, data: np.ndarray, qs: np.ndarray) -> np.ndarray:
+	# Écart entre le rang vrai de chaque quantile estimé et le rang demandé (normalisé par n)
+	ordered = np.sort(data)
+	estimates = np.asarray(sketch.quantiles(qs))
+	ranks = np.searchsorted(ordered, estimates, side="right") / data.size
+	return np.abs(ranks - qs)
+
+
+def test_exact_below_k():
+	data = np.random.default_rng(0).normal(size=1000)
+	sketch = KLLSketch(k=2048, seed=0).update(data)
+	qs = [0.0, 0.01, 0.25, 0.5, 0.9, 1.0]
+	assert sketch.exact
+	assert sketch.rank_error() == 0.0
+	np.testing.assert_allclose(sketch.quantiles(qs), np.quantile(data, qs))
+
+
+@pytest.mark.parametrize("dist", ["normal", "lognormal", "sorted"])
+def test_rank_error_bound(dist):
+	rng = np.random.default_rng(1)
+	data = {"normal": rng.normal(size=500_000), "lognormal": rng.lognormal(size=500_000), "sorted": np.arange(500_000.0)}[dist]
+	sketch = KLLSketch(k=2048, seed=1)
+	for chunk in np.array_split(data, 50):
+		sketch.update(chunk)
+	qs = np.linspace(0.001, 0.999, 199)
+	errors = _rank_errors(sketch, data, qs)
+	assert not sketch.exact
+	assert sketch.retained < 4 * 2048
+	# k=2048: erreur de rang max observée ~1,1e-3 sur 199 quantiles, borne annoncée ~1,4e-3
+	assert errors.max() <= sketch.rank_error()
+	assert sketch.quantile(0.0) == data.min() and sketch.quantile(1.0) == data.max()
+
+
+def test_merge_matches_single_pass():
+	rng = np.random.default_rng(2)
+	parts = [rng.normal(loc=i, size=100_000) for i in range(4)]
+	merged = merge_sketches((KLLSketch(k=1024, seed=i).update(p) for i, p in enumerate(parts)), k=1024)
+	data = np.concatenate(parts)
+	assert merged.n == data.size
+	assert _rank_errors(merged, data, np.linspace(0.01, 0.99, 99)).max() <= merged.rank_error()
+
+
+def test_nan_ignored_and_roundtrip():
+	data = np.random.default_rng(3).normal(size=50_000)
+	data[::10] = np.nan
+	sketch = KLLSketch(k=256, seed=3).update(data)
+	assert sketch.n == int(np.count_nonzero(~np.isnan(data)))
+	restored = KLLSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+	assert restored.n == sketch.n
+	assert restored.quantiles([0.1, 0.5, 0.9]) == sketch.quantiles([0.1, 0.5, 0.9])
+	np.testing.assert_allclose(restored.cdf([0.0]), sketch.cdf([0.0]))
+
+
+def test_empty_sketch():
+	with pytest.raises(ValueError):
+		KLLSketch(k=64).quantile(0.5)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from src.sky_index import SkyIndex, find_coordinate_columns
+
+
+def _separation_arcsec(ra1, dec1, ra2, dec2):
+	# Formule de Vincenty (stable à toutes les séparations), en arcsec
+	ra1, dec1, ra2, dec2 = map(np.radians, (ra1, dec1, ra2, dec2))
+	dra = ra2 - ra1
+	num = np.hypot(np.cos(dec2) * np.sin(dra), np.cos(dec1) * np.sin(dec2) - np.sin(dec1) * np.cos(dec2) * np.cos(dra))
+	den = np.sin(dec1) * np.sin(dec2) + np.cos(dec1) * np.cos(dec2) * np.cos(dra)
+	return np.degrees(np.arctan2(num, den)) * 3600.0
+
+
+@pytest.fixture(scope="module")
+def sky():
+	rng = np.random.default_rng(0)
+	n = 20_000
+	ra = rng.uniform(0.0, 360.0, n)
+	dec = np.degrees(np.arcsin(rng.uniform(-1.0, 1.0, n)))
+	# Amas près de ra=0/360 et du pôle nord, positions invalides
+	ra[:200] = np.mod(rng.normal(0.0, 0.01, 200), 360.0)
+	dec[:200] = rng.normal(10.0, 0.01, 200)
+	ra[200:300] = rng.uniform(0.0, 360.0, 100)
+	dec[200:300] = 89.99 + rng.uniform(0.0, 0.01, 100)
+	ra[300:310] = np.nan
+	dec[310:320] = 95.0
+	return SkyIndex(ra, dec), ra, dec
+
+
+@pytest.mark.parametrize("center, radius", [((0.0, 10.0), 60.0), ((359.999, 10.0), 30.0), ((123.0, 90.0), 60.0), ((80.0, -30.0), 3600.0)])
+def test_cone_matches_brute_force(sky, center, radius):
+	index, ra, dec = sky
+	rows, seps = index.cone(center[0], center[1], radius)
+	valid = np.isfinite(ra) & np.isfinite(dec) & (np.abs(dec) <= 90.0)
+	brute = _separation_arcsec(center[0], center[1], ra, dec)
+	expected = np.flatnonzero(valid & (brute <= radius))
+	assert sorted(rows.tolist()) == expected.tolist()
+	assert np.all(np.diff(seps) >= 0)
+	np.testing.assert_allclose(seps, brute[rows], atol=1e-6)
+
+
+def test_self_crossmatch_exact(sky):
+	index, ra, dec = sky
+	queries, rows, seps = index.crossmatch(ra, dec, 0.01)
+	valid = np.flatnonzero(np.isfinite(ra) & np.isfinite(dec) & (np.abs(dec) <= 90.0))
+	# Positions aléatoires distinctes: chaque entrée valide ne trouve qu'elle-même, à 0"
+	assert queries.tolist() == valid.tolist()
+	assert rows.tolist() == valid.tolist()
+	assert np.all(seps < 1e-6)
+
+
+def test_crossmatch_matches_brute_force(sky):
+	index, ra, dec = sky
+	q_ra = np.array([0.0005, 200.0, np.nan, 45.0])
+	q_dec = np.array([10.0, 89.995, 0.0, -20.0])
+	queries, rows, seps = index.crossmatch(q_ra, q_dec, 120.0)
+	expected = []
+	for i in (0, 1, 3):
+		brute = _separation_arcsec(q_ra[i], q_dec[i], ra, dec)
+		hits = np.flatnonzero(brute <= 120.0)
+		expected += [(i, int(r)) for r in hits[np.argsort(brute[hits], kind="stable")]]
+	assert list(zip(queries.tolist(), rows.tolist())) == expected
+	assert {q for q, _ in expected} == {0, 1}
+	assert np.all(np.diff(seps[queries == 0]) >= 0)
+
+
+def test_invalid_queries(sky):
+	index = sky[0]
+	with pytest.raises(ValueError):
+		index.cone(0.0, 91.0, 10.0)
+	with pytest.raises(ValueError):
+		index.cone(0.0, 0.0, 0.0)
+	with pytest.raises(ValueError):
+		index.crossmatch([0.0], [0.0], 11 * 3600.0)
+	empty = SkyIndex(np.array([np.nan]), np.array([0.0]))
+	assert empty.size == 0 and empty.cone(0.0, 0.0, 10.0)[0].size == 0
+
+
+def test_coordinate_columns():
+	assert find_coordinate_columns(["pl_name", "RAJ2000", "DEJ2000"]) == ("RAJ2000", "DEJ2000")
+	assert find_coordinate_columns([" ra ", "dec"]) == (" ra ", "dec")
+	with pytest.raises(ValueError):
+		find_coordinate_columns(["ra", "glat"])
@@ -0,0 +1,50 @@
+import bz2
+import gzip
+import lzma
+
+import pytest
+from fastapi import HTTPException
+
+from api.main import _read_uploaded_csv
+from src.tabular_formats import detect_table_format
+from src.uploads import SpooledUpload
+
+CSV = b"koi_period,koi_prad,koi_teq\n" + b"10.5,1.2,300\n" * 2000
+
+# Flux compressés tronqués et CSV en clair commençant par la signature bz2
+UNREADABLE = {
+	"gzip": gzip.compress(CSV)[:40],
+	"bz2": bz2.compress(CSV)[:40],
+	"xz": lzma.compress(CSV)[:40],
+	"bzh_text": b"BZh,koi_period\n1,10.5\n",
+}
+
+
+@pytest.mark.parametrize("name", sorted(UNREADABLE))
+def test_unreadable_head_is_not_fits(name):
+	with SpooledUpload.from_bytes(UNREADABLE[name]) as upload:
+		assert detect_table_format(upload) is None
+
+
+@pytest.mark.parametrize("name", sorted(UNREADABLE))
+def test_unreadable_upload_gives_400(name):
+	with pytest.raises(HTTPException) as exc:
+		_read_uploaded_csv(UNREADABLE[name])
+	assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("name", sorted(UNREADABLE))
+def test_unreadable_upload_endpoints(client, name):
+	files = {"file": (f"{name}.csv", UNREADABLE[name], "text/csv")}
+	# /predict: repli sur la réponse par défaut (CSV illisible), jamais une 500
+	res = client.post("/predict", files=files)
+	assert res.status_code == 200
+	assert "model" not in res.json()
+	res = client.post("/habitability", files=files)
+	assert res.status_code == 400
+
+
+def test_compressed_csv_still_parsed():
+	df = _read_uploaded_csv(gzip.compress(CSV))
+	assert list(df.columns) == ["koi_period", "koi_prad", "koi_teq"]
+	assert len(df) == 2000
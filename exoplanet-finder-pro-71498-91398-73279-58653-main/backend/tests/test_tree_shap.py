@@ -0,0 +1,123 @@
+import itertools
+import math
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from src import tree_shap
+from src.tree_shap import ForestTreeShap, ShapCache, explain_rows
+
+
+def _expectation(tree, x, subset):
+	# E[f(x) | x_S] "path-dependent": features de S suivies, les autres pondérées par la couverture
+	def walk(node):
+		left, right = tree.children_left[node], tree.children_right[node]
+		if left < 0:
+			value = tree.value[node, 0].astype(np.float64)
+			return value / value.sum()
+		feature = tree.feature[node]
+		if feature in subset:
+			return walk(left if np.float32(x[feature]) <= tree.threshold[node] else right)
+		cover = tree.weighted_n_node_samples
+		return (cover[left] * walk(left) + cover[right] * walk(right)) / cover[node]
+	return walk(0)
+
+
+def _brute_force(forest, x):
+	m = forest.n_features_in_
+	out = np.zeros((m, forest.n_classes_))
+	for est in forest.estimators_:
+		f = {s: _expectation(est.tree_, x, set(s)) for r in range(m + 1) for s in itertools.combinations(range(m), r)}
+		for i in range(m):
+			others = [j for j in range(m) if j != i]
+			for r in range(m):
+				w = math.factorial(r) * math.factorial(m - r - 1) / math.factorial(m)
+				for s in itertools.combinations(others, r):
+					out[i] += w * (f[tuple(sorted(s + (i,)))] - f[s])
+	return out / len(forest.estimators_)
+
+
+def _forest(n_features, seed=0):
+	rng = np.random.default_rng(seed)
+	X = rng.normal(size=(400, n_features))
+	y = (X[:, 0] + X[:, 1] * X[:, -1] > 0).astype(int) + (X[:, 2] > 1)
+	forest = RandomForestClassifier(n_estimators=4, max_depth=6, random_state=seed).fit(X, y)
+	return forest, X
+
+
+@pytest.mark.parametrize("n_features", [3, 10])
+def test_matches_brute_force(n_features):
+	forest, X = _forest(n_features)
+	explainer = ForestTreeShap(forest)
+	values = explainer.shap_values(X[:3])
+	for r in range(3):
+		np.testing.assert_allclose(values[r], _brute_force(forest, X[r]), atol=1e-6)
+	# Additivité: base + somme des contributions = predict_proba
+	np.testing.assert_allclose(explainer.expected_value + values.sum(axis=1), forest.predict_proba(X[:3]), atol=1e-5)
+
+
+def test_max_features_guard(monkeypatch):
+	forest, _ = _forest(4)
+	monkeypatch.setattr(tree_shap, "SHAP_MAX_FEATURES", 3)
+	with pytest.raises(ValueError):
+		ForestTreeShap(forest)
+
+
+def test_cache_reuses_rows():
+	forest, X = _forest(4)
+	explainer = ForestTreeShap(forest)
+	cache = ShapCache(capacity=100)
+	first, hits = explain_rows(explainer, "v1", X[:5], cache)
+	assert hits == 0 and len(cache) == 5
+	again, hits = explain_rows(explainer, "v1", X[[4, 0]], cache)
+	assert hits == 2
+	np.testing.assert_array_equal(again, first[[4, 0]])
+	_, hits = explain_rows(explainer, "v2", X[:1], cache)
+	assert hits == 0
+
+
+def test_explainer_built_once_per_entry(monkeypatch):
+	import api.main
+
+	forest, X = _forest(4)
+	calls = []
+
+	def slow_make_explainer(model):
+		calls.append(model)
+		time.sleep(0.1)
+		return tree_shap.make_explainer(model)
+
+	monkeypatch.setattr(api.main, "make_explainer", slow_make_explainer)
+	entry = {"model": forest, "features": ["a", "b", "c", "d"], "version": "v-test", "shap": None, "shap_lock": threading.Lock()}
+	df = pd.DataFrame(X[:3], columns=entry["features"])
+	results = []
+	threads = [
+		threading.Thread(target=lambda: results.append(api.main._row_explanations(entry, df, forest.predict_proba(X[:3]), 3)))
+		for _ in range(4)
+	]
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+	assert len(calls) == 1
+	assert [r["rows_explained"] for r in results] == [3] * 4
+
+
+def test_registry_keeps_explainer_for_same_version(monkeypatch):
+	import api.main
+
+	forest, _ = _forest(4)
+	monkeypatch.setattr(api.main, "MODEL_KEPLER", forest)
+	monkeypatch.setattr(api.main, "_explanation_artifacts", lambda *args: None)
+	monkeypatch.setattr(api.main, "_model_version", lambda path: "v1")
+	first = api.main._build_registry()
+	first["kepler"]["shap"] = "explainer-v1"
+	monkeypatch.setattr(api.main, "MODEL_REGISTRY", first)
+	# Rechargement après l'entraînement d'un autre modèle: explainer conservé
+	assert api.main._build_registry()["kepler"]["shap"] == "explainer-v1"
+	monkeypatch.setattr(api.main, "_model_version", lambda path: "v2")
+	assert api.main._build_registry()["kepler"]["shap"] is None
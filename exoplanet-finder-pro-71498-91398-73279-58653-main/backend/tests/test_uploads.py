@@ -0,0 +1,191 @@
+import asyncio
+import bz2
+import gzip
+import io
+import lzma
+import tempfile
+import zipfile
+
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from api.main import UploadSizeLimit
+from src.uploads import DecompressingReader, SpooledUpload, UnsupportedCompression, UploadTooLarge, spool_upload
+
+
+CSV = b"kepoi_name,koi_period\n" + b"K00001.01,1.5\n" * 20_000
+
+
+def _zip(data: bytes) -> bytes:
+	buf = io.BytesIO()
+	with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as archive:
+		archive.writestr("__MACOSX/._koi.csv", b"ignored")
+		archive.writestr("readme.md", b"ignored")
+		archive.writestr("data/koi.csv", data)
+	return buf.getvalue()
+
+
+COMPRESSORS = {"gzip": gzip.compress, "bz2": bz2.compress, "xz": lzma.compress, "zip": _zip}
+
+
+@pytest.mark.parametrize("compression", sorted(COMPRESSORS))
+def test_stream_decompresses(compression):
+	upload = SpooledUpload.from_bytes(COMPRESSORS[compression](CSV))
+	assert upload.compression == compression
+	with upload.stream() as f:
+		assert f.read() == CSV
+	assert upload.head(10) == CSV[:10]
+
+
+@pytest.mark.parametrize("compression", sorted(COMPRESSORS))
+def test_decompressed_limit(compression):
+	# ~300 Ko compressés en quelques centaines d'octets: limite à 100 Ko
+	bomb = COMPRESSORS[compression](b"\x00" * 300_000)
+	reader = DecompressingReader(io.BytesIO(bomb), compression, max_bytes=100_000)
+	with pytest.raises(UploadTooLarge):
+		while reader.read(1 << 16):
+			pass
+	reader.close()
+	exact = DecompressingReader(io.BytesIO(bomb), compression, max_bytes=300_000)
+	assert sum(len(chunk) for chunk in iter(lambda: exact.read(1 << 16), b"")) == 300_000
+
+
+def test_limit_flag_sticks(monkeypatch):
+	monkeypatch.setattr("src.uploads.DecompressingReader", lambda raw, compression: DecompressingReader(raw, compression, max_bytes=100_000))
+	upload = SpooledUpload.from_bytes(gzip.compress(b"\x00" * 300_000))
+	with pytest.raises(UploadTooLarge):
+		with upload.stream() as f:
+			f.read()
+	assert upload.too_large
+	# Les lectures suivantes échouent sans redécompresser
+	with pytest.raises(UploadTooLarge):
+		with upload.stream() as f:
+			f.read(1)
+
+
+def test_raw_size_limits(tmp_path):
+	upload = SpooledUpload(spool_bytes=1000, max_bytes=5000, directory=str(tmp_path))
+	upload.write(b"x" * 3000)
+	assert not upload.in_memory
+	with pytest.raises(UploadTooLarge):
+		upload.write(b"x" * 3000)
+	path = upload.path
+	upload.close()
+	assert not (tmp_path / path.rsplit("/", 1)[-1]).exists()
+	with open(tmp_path / "big.csv", "wb+") as f:
+		f.write(b"x" * 6000)
+		with pytest.raises(UploadTooLarge):
+			SpooledUpload.from_file(f, max_bytes=5000)
+		adopted = SpooledUpload.from_file(f, max_bytes=10_000)
+		assert adopted is not None and len(adopted) == 6000
+		adopted.close()
+	# Fichier adopté: jamais supprimé par l'upload
+	assert (tmp_path / "big.csv").exists()
+
+
+def test_spool_upload_adopts_rolled_file():
+	spooled = tempfile.SpooledTemporaryFile(max_size=1000)
+	spooled.write(CSV)
+	spooled.seek(0)
+	assert spooled._rolled
+	upload = asyncio.run(spool_upload(UploadFile(spooled, filename="koi.csv")))
+	# Fichier Starlette rouvert par chemin, pas recopié
+	assert upload.path is not None and not upload._owns_path
+	assert len(upload) == len(CSV) and upload.head(10) == CSV[:10]
+	upload.close()
+	spooled.close()
+
+
+class _RenamedSpool(io.BytesIO):
+	# SpooledTemporaryFile d'une autre version: attributs privés renommés
+	_rolled_v2 = True
+
+
+class _RolledInMemory(io.BytesIO):
+	# _rolled incohérent avec un _file resté en mémoire
+	_rolled = True
+
+	@property
+	def _file(self):
+		return io.BytesIO(b"ignored")
+
+
+@pytest.mark.parametrize("cls", [_RenamedSpool, _RolledInMemory])
+def test_spool_upload_falls_back_to_copy(cls):
+	upload = asyncio.run(spool_upload(UploadFile(cls(CSV), filename="koi.csv"), spool_bytes=1 << 30))
+	assert upload.in_memory and upload._owns_path
+	assert len(upload) == len(CSV) and upload.head(10) == CSV[:10]
+	upload.close()
+
+
+def _limited_app(max_bytes):
+	app = FastAPI()
+
+	@app.post("/upload")
+	async def upload(file: UploadFile = File(...)):
+		return {"size": len(await file.read())}
+
+	return UploadSizeLimit(app, max_bytes=max_bytes)
+
+
+def _multipart(data):
+	head = b'--b\r\nContent-Disposition: form-data; name="file"; filename="koi.csv"\r\nContent-Type: text/csv\r\n\r\n'
+	return head + data + b"\r\n--b--\r\n"
+
+
+def _post_chunked(app, body, chunk=4096):
+	# Corps envoyé par messages ASGI sans Content-Length; retourne (statut, octets consommés)
+	consumed = [0]
+	statuses = []
+
+	async def receive():
+		start = consumed[0]
+		consumed[0] = min(start + chunk, len(body))
+		return {"type": "http.request", "body": body[start:consumed[0]], "more_body": consumed[0] < len(body)}
+
+	async def send(message):
+		if message["type"] == "http.response.start":
+			statuses.append(message["status"])
+
+	scope = {
+		"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+		"path": "/upload", "raw_path": b"/upload", "root_path": "", "query_string": b"",
+		"headers": [(b"content-type", b"multipart/form-data; boundary=b")], "client": ("test", 1), "server": ("test", 80),
+	}
+	asyncio.run(app(scope, receive, send))
+	return statuses[0], consumed[0]
+
+
+def test_body_limit_counts_received_bytes():
+	app = _limited_app(1000)
+	body = _multipart(b"x" * 1_000_000)
+	status, consumed = _post_chunked(app, body)
+	# Lecture interrompue au premier bloc au-delà de la limite (+ 64 Ko d'enveloppe), pas tout le corps
+	assert status == 413
+	assert consumed <= app.max_body + 4096 < len(body)
+	assert _post_chunked(app, _multipart(b"x" * 500)) == (200, len(_multipart(b"x" * 500)))
+
+
+def test_body_limit_content_length():
+	client = TestClient(_limited_app(1000))
+	headers = {"content-type": "multipart/form-data; boundary=b"}
+	res = client.post("/upload", content=_multipart(b"x" * 1_000_000), headers=headers)
+	assert res.status_code == 413
+	assert res.json()["detail"] == "Fichier trop volumineux (limite: 1000 octets)"
+	res = client.post("/upload", content=_multipart(b"x" * 500), headers=headers)
+	assert res.status_code == 200 and res.json() == {"size": 500}
+
+
+def test_unsupported():
+	with pytest.raises(UnsupportedCompression):
+		DecompressingReader(io.BytesIO(b""), "rar")
+	with pytest.raises(UnsupportedCompression):
+		DecompressingReader(io.BytesIO(_zip_empty()), "zip")
+
+
+def _zip_empty() -> bytes:
+	buf = io.BytesIO()
+	with zipfile.ZipFile(buf, "w") as archive:
+		archive.writestr("empty/", b"")
+	return buf.getvalue()